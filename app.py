@@ -1,19 +1,30 @@
+import os
+import time
+import uuid
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
 
 from models.health_risk_matching import find_similar_profiles, get_profile_insights
-from models.health_risk_model import HealthRiskModel, get_risk_level, train_health_risk_model
+from models.health_risk_model import get_risk_level, train_risk_lookup
 from models.exercise_model import ExercisePlanGenerator
 from models.meal.meal_model import MealPlanGenerator
-from utils.data_processing import (
-    preprocess_data,
-    create_user_features,
-    scale_features,
-    find_similar_users
+from models.plan_records import PlanCodec
+from models.plan_store import PlanStore, StoredPlan, iso_week
+from models.training_executor import TrainingExecutor, TrainingStep
+from utils.data_processing import create_user_features
+from utils.dataset_cache import DatasetCache
+from utils.shared_data import attach_from_env, scale_reference_features
+from utils.plan_rendering import PlanRenderCache, exercise_day_views, meal_day_views, plan_id, records_id
+from utils import instrumentation, request_budget
+from utils.cache import LRUCache
+from config import (
+    APP_CONFIG,
+    COMPACTION_CONFIG,
+    PLAN_STORE_CONFIG,
+    REQUEST_BUDGET_CONFIG,
+    SIMILARITY_CACHE_CONFIG,
+    TRAINING_CONFIG,
 )
-from config import APP_CONFIG, FEATURES
 
 # Set page configuration
 st.set_page_config(
@@ -61,6 +72,588 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+
+@st.cache_resource
+def get_dataset_cache():
+    """Dataset cache shared by every rerun and session of this server"""
+    # Uploads matching a dataset published to shared memory attach it instead of parsing a copy
+    return DatasetCache(shared=attach_from_env())
+
+
+@st.cache_resource
+def get_plan_render_cache():
+    """Rendered plan markdown shared by every rerun and session of this server"""
+    return PlanRenderCache()
+
+
+@st.cache_resource
+def get_plan_record_cache():
+    """Last plan records generated for each set of plan choices, the fallback when plan generation overruns"""
+    return LRUCache(max_entries=REQUEST_BUDGET_CONFIG['plan_cache_entries'])
+
+
+@st.cache_resource
+def get_similarity_cache():
+    """Similar-profile search results shared by every session of this server"""
+    from models.similarity_cache import SimilarityCache
+
+    return SimilarityCache()
+
+
+@st.cache_resource
+def get_precompute_pool():
+    """Single worker for similar-profile precomputes, apart from the training workers and requests"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='precompute')
+
+
+@st.cache_resource
+def get_plan_store():
+    """Plan store shared by every session of this server, or None when persistence is not configured"""
+    if not PLAN_STORE_CONFIG['path']:
+        return None
+    return PlanStore(PLAN_STORE_CONFIG['path'], PlanCodec(ExercisePlanGenerator.focus_types()))
+
+
+def save_plan(member_id, plan):
+    """Persist a generated plan under the member for the current calendar week, tagged with its plan id"""
+    store = get_plan_store()
+    if store is not None:
+        week = iso_week()
+        store.put_many([StoredPlan(member_id, week, plan['risk_level'], plan[key], plan['id'])
+                        for key in ('meal_record', 'exercise_record')])
+
+
+def train_risk_model(data):
+    """Train the forest predicting risk score and exercise capacity together, on compacted data"""
+    from models.joint_model import train_joint_model
+
+    return train_joint_model(data)
+
+
+def build_risk_explainer(model, data):
+    """Precompute Age/BMI contributions to a trained risk model's predictions"""
+    from models.risk_explainer import RiskExplainer
+
+    return RiskExplainer.from_model(model, data)
+
+
+def build_reference_profiles(dataset):
+    """
+    Profiles searched for similar users, with their scaled features.
+
+    Returns:
+    tuple: (unique profiles with their row counts, features scaled with count weights) when the
+        dataset repeats profiles enough, otherwise (the dataset's rows, their scaled features)
+    """
+    from utils.compaction import weighted_rows
+
+    points, counts = weighted_rows(dataset.data, COMPACTION_CONFIG['index_keys'])
+    if counts is None:
+        return dataset.data, dataset.get_artifact('scaled_features', scale_reference_features)
+    return points, scale_reference_features(points, sample_weight=counts)
+
+
+def build_profile_index(data, scaled):
+    """Partition reference profiles by gender and diet for filtered similarity search"""
+    from models.profile_index import ProfileIndex
+
+    return ProfileIndex(data, scaled)
+
+
+# Similar profiles shown per plan
+SIMILAR_PROFILE_MATCHES = 5
+
+
+def search_similar_profiles(dataset, user_profile, n_matches=SIMILAR_PROFILE_MATCHES):
+    """
+    Nearest reference profiles of the same gender and diet, and their insights.
+
+    Returns:
+    tuple: (similar profiles, insights), or (None, None) when no profile matches
+    """
+    reference, scaled = dataset.get_artifact('reference_profiles', lambda data: build_reference_profiles(dataset))
+    similar_profiles = find_similar_profiles(
+        target_profile=user_profile,
+        dataset=reference,
+        n_matches=n_matches,
+        scaled=scaled,
+        filters={'Gender': user_profile['Gender'], 'DietaryPreference': user_profile['DietaryPreference']},
+        index=dataset.get_artifact('profile_index', lambda data: build_profile_index(reference, scaled))
+    )
+    if similar_profiles is None or similar_profiles.empty:
+        return None, None
+    return similar_profiles, get_profile_insights(similar_profiles)
+
+
+def build_cohort_cube(data):
+    """Population statistics per Age × BMI × gender × diet cohort, with every rollup precomputed"""
+    from models.cohort_cube import CohortCube
+
+    return CohortCube.from_frame(data)
+
+
+def profile_dataset(data):
+    """Streaming column statistics of a dataset, compared against later uploads for drift"""
+    from utils.dataset_stats import DatasetStats
+
+    return DatasetStats.from_frame(data)
+
+
+def check_drift(dataset, reference):
+    """
+    Decide whether a new upload needs its own risk model.
+
+    The upload is compared with the statistics of the data the reference model version was
+    trained on; when the model's columns have not drifted, that version's risk model is reused.
+
+    Returns:
+    DriftReport: None when there is no trained model version to compare against
+    """
+    from utils.dataset_stats import compare_stats
+
+    if reference is None:
+        return None
+    return compare_stats(reference.artifacts['stats'], dataset.get_artifact('stats', profile_dataset))
+
+
+def train_exercise_generator(data):
+    """Fit the exercise generator's user clusters on a dataset"""
+    exercise_generator = ExercisePlanGenerator()
+    exercise_generator.create_user_clusters(data[['Age', 'BMI', 'HealthRiskScore']])
+    return exercise_generator
+
+
+# Artifacts trained for every dataset, in order; weights are rough relative costs for progress
+TRAINING_STEPS = (
+    TrainingStep('stats', "Profiling the dataset", 1, lambda data, built: profile_dataset(data)),
+    TrainingStep('risk_lookup', "Building the quick risk lookup", 1, lambda data, built: train_risk_lookup(data)),
+    TrainingStep('cohort_cube', "Summarizing cohorts", 1, lambda data, built: build_cohort_cube(data)),
+    TrainingStep('exercise_generator', "Clustering users", 2, lambda data, built: train_exercise_generator(data)),
+    TrainingStep('cluster_insights', "Summarizing user clusters", 1,
+                 lambda data, built: built['exercise_generator'].cluster_insights(data)),
+    TrainingStep('health_model', "Training the risk and capacity model", 10, lambda data, built: train_risk_model(data)),
+    TrainingStep('risk_explainer', "Explaining risk scores", 2,
+                 lambda data, built: build_risk_explainer(built['health_model'], data)),
+)
+
+
+def start_training(executor, dataset, reference=None):
+    """
+    Queue a dataset for background training.
+
+    The dataset is checked for drift against the reference model version first, the one the
+    uploading session was served; when it has not drifted, that version's risk model is reused
+    instead of trained again. Once trained, the dataset's own version is stored with it as the
+    'models' artifact.
+    """
+    drift = check_drift(dataset, reference)
+    reuse = {}
+    if drift is not None:
+        dataset.set_artifact('drift', drift)
+        # Built once per dataset even when another session is checking the same upload concurrently
+        reuse['stats'] = dataset.get_artifact('stats', profile_dataset)
+        if not drift.retrain:
+            reuse['health_model'] = reference.artifacts['health_model']
+
+    similarity_cache = get_similarity_cache()
+    precompute_pool = get_precompute_pool()
+
+    def publish(version):
+        dataset.set_artifact('models', version)
+        if SIMILARITY_CACHE_CONFIG['precompute']['enabled']:
+            # Queued behind earlier precomputes on its own worker; the training worker moves on
+            similarity_cache.precompute_in_background(
+                precompute_pool, dataset.fingerprint, lambda profile: search_similar_profiles(dataset, profile),
+                version.artifacts['health_model'], SIMILAR_PROFILE_MATCHES)
+
+    return executor.submit(dataset.fingerprint, dataset.data, reuse=reuse, on_done=publish)
+
+
+@st.cache_resource
+def get_training_executor():
+    """Training executor shared by every session"""
+    return TrainingExecutor(TRAINING_STEPS)
+
+
+@st.cache_resource
+def get_warm_start():
+    """
+    Start training the default dataset on the server's first page load.
+
+    Its model version answers a session's requests until the session has been served a version
+    of its own, so no session falls back to a model trained on another session's upload.
+
+    Returns:
+    dict: The warm-start 'job' (None when there is no default dataset) and the 'error' that
+        kept the default dataset from loading, if any
+    """
+    path = TRAINING_CONFIG['warm_start']
+    warm_start = {'job': None, 'error': None}
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                warm_start['job'] = start_training(get_training_executor(), get_dataset_cache().load(f.read()))
+        except ValueError as e:
+            warm_start['error'] = f"Skipped warm start from {path}: {str(e)}"
+    return warm_start
+
+
+def warm_start_version(warm_start):
+    """The default dataset's model version, or None while it trains or when there is none"""
+    job = warm_start['job']
+    return job.result() if job is not None and job.state == 'done' else None
+
+
+def wait_for_training(job):
+    """Show live progress until a dataset's training finishes; used only when no model is ready at all"""
+    progress = st.progress(job.progress, text=f"Training models · {job.stage}")
+    while not job.done:
+        time.sleep(0.2)
+        progress.progress(job.progress, text=f"Training models · {job.stage}")
+    progress.empty()
+    return job.result()
+
+
+@st.fragment(run_every=TRAINING_CONFIG['poll_seconds'])
+def render_training_progress(job, serving):
+    """Poll a dataset's background training; the page reruns once its model version is swapped in"""
+    if job.done:
+        st.rerun()
+    st.progress(job.progress, text=f"Training models for this dataset · {job.stage}")
+    st.caption(f"Until training finishes, plans come from model version {serving.version}, "
+               "trained on an earlier dataset.")
+
+
+def render_training_panel(panel, executor, warm_start):
+    """Show the model version serving this session and any training still running"""
+    with panel:
+        if warm_start['error']:
+            st.warning(f"⚠️ {warm_start['error']}")
+        current = st.session_state.get('model_version') or warm_start_version(warm_start)
+        if current is None:
+            st.caption("No model version trained yet")
+        else:
+            st.caption(f"Serving version {current.version} · Trained "
+                       f"{time.strftime('%H:%M:%S', time.localtime(current.trained_at))}")
+        for job in executor.jobs():
+            if not job.done:
+                st.caption(f"Training · {job.stage} · {job.progress:.0%}")
+
+
+def render_drift(drift):
+    """Explain whether an upload's risk model is reused or retrained"""
+    if drift is not None and drift.retrain:
+        st.warning("⚠️ This dataset differs from the previous training data ("
+                   + "; ".join(drift.reasons) + "), so the risk and capacity model is retrained.")
+    elif drift is not None:
+        st.info("This dataset matches the previous training data, so its risk and capacity model was reused.")
+
+
+def render_debug_panel(trace):
+    """Show per-stage latency for the current request in the sidebar"""
+    with st.sidebar.expander("🐞 Stage Timings", expanded=True):
+        if not trace:
+            st.caption("No instrumented stages ran in this request.")
+        else:
+            stages = {}
+            for stage_name, elapsed_ms in trace:
+                calls, total_ms = stages.get(stage_name, (0, 0.0))
+                stages[stage_name] = (calls + 1, total_ms + elapsed_ms)
+            st.dataframe(
+                [{'Stage': name, 'Calls': calls, 'Latency (ms)': round(total_ms, 2)}
+                 for name, (calls, total_ms) in stages.items()],
+                use_container_width=True,
+                hide_index=True
+            )
+        if instrumentation.is_enabled():
+            st.download_button(
+                "Download metrics (Prometheus)",
+                instrumentation.REGISTRY.to_prometheus() + request_budget.DEGRADATION.to_prometheus()
+                + get_similarity_cache().to_prometheus(),
+                file_name="healthalign_metrics.prom"
+            )
+
+
+def generate_plan(current_plan_id, dataset, models, budget, age, gender, bmi, goal, dietary_preferences,
+                  conditions):
+    """
+    Predict health risk and build the meal and exercise plan records for one set of inputs.
+
+    Each stage runs within its deadline on the request's budget. A stage that overruns answers
+    with a precomputed fallback and is listed in the plan's 'degraded' entry. The fallbacks are a
+    grid-lookup risk score, the insights of the user's KMeans cluster, and the last plan records
+    generated for the same choices. models holds the artifacts of the model version answering
+    the request, which is an earlier dataset's while this one's is still training.
+    """
+    from models.joint_model import capacity_intensity
+    from models.profile_index import diet_category
+
+    # Stages may run on worker threads, so everything they use is read from the session here
+    health_model = models['health_model']
+    meal_generator = st.session_state.meal_generator
+    exercise_generator = models['exercise_generator']
+    risk_lookup = models['risk_lookup']
+
+    # Risk and exercise capacity come from one pass of the joint forest; the lookup knows only risk
+    user_features = create_user_features(age, bmi)
+    health_risk, exercise_capacity = budget.run(
+        'risk', lambda: tuple(health_model.predict(user_features)[0]),
+        fallback=lambda: (risk_lookup.predict(user_features)[0], None))
+    risk_level = get_risk_level(health_risk)
+    intensity = capacity_intensity(exercise_capacity, risk_level)
+
+    explanation = None
+    if 'risk' not in budget.degraded:
+        explainer = models['risk_explainer']
+        contributions = explainer.explain(age, bmi)
+        explanation = {
+            'base': explainer.base,
+            'expected': float(contributions.expected),
+            'Age': float(contributions.age),
+            'BMI': float(contributions.bmi)
+        }
+
+    plan_cache = get_plan_record_cache()
+    plan_key = (goal, tuple(sorted(dietary_preferences)), tuple(sorted(conditions)), risk_level, intensity)
+
+    def build_records():
+        meal_record = meal_generator.generate_meal_plan_record(
+            goal=goal,
+            dietary_preferences=dietary_preferences,
+            health_conditions=conditions,
+            risk_level=risk_level
+        )
+        exercise_record = exercise_generator.get_weekly_exercise_plan_record(
+            intensity=intensity,
+            conditions=conditions,
+            goal=goal
+        )
+        records = (records_id(meal_record, exercise_record), meal_record, exercise_record)
+        plan_cache.put(plan_key, records)
+        return records
+
+    # Without a cached plan for these choices there is nothing cheaper to answer with, so it runs inline
+    cached_records = plan_cache.get(plan_key)
+    plan_records_id, meal_record, exercise_record = budget.run(
+        'plans', build_records, fallback=(lambda: cached_records) if cached_records is not None else None)
+
+    plan = {
+        'id': current_plan_id,
+        # Content hash of the meal and exercise records, the key of their rendered markdown
+        'records_id': plan_records_id,
+        'dataset': dataset.fingerprint,
+        'health_risk': health_risk,
+        'risk_level': risk_level,
+        'exercise_capacity': exercise_capacity,
+        'intensity': intensity,
+        'explanation': explanation,
+        'similar_profiles': None,
+        'similar_filters': None,
+        'insights': None,
+        'similar_profiles_error': None,
+        'meal_record': meal_record,
+        'exercise_record': exercise_record,
+        'degraded': []
+    }
+
+    similarity_cache = get_similarity_cache()
+
+    def similar_profiles():
+        # Memoized per quantized query; repeated and precomputed queries skip the search
+        user_profile = {
+            'Age': age,
+            'BMI': bmi,
+            'HealthRiskScore': health_risk,
+            'Gender': gender,
+            'DietaryPreference': diet_category(dietary_preferences)
+        }
+        return similarity_cache.get(dataset.fingerprint, user_profile, SIMILAR_PROFILE_MATCHES,
+                                    lambda profile: search_similar_profiles(dataset, profile))
+
+    def cluster_insights():
+        return None, models['cluster_insights'][exercise_generator.user_cluster(age, bmi, health_risk)]
+
+    try:
+        similar_profiles, plan['insights'] = budget.run('similar', similar_profiles, fallback=cluster_insights)
+        if similar_profiles is not None:
+            plan['similar_profiles'] = similar_profiles
+            plan['similar_filters'] = similar_profiles.attrs.get('filters')
+    except Exception as e:
+        plan['similar_profiles_error'] = str(e)
+
+    # A lookup in the cube trained with the models, so it is not budgeted
+    cohort = models['cohort_cube'].compare(age, bmi, gender, diet_category(dietary_preferences))
+    plan['cohort'] = {
+        'labels': cohort.labels,
+        'count': cohort.count,
+        'mean': cohort.mean,
+        'risk_share_below': cohort.share_below('HealthRiskScore', health_risk)
+    }
+
+    plan['degraded'] = list(budget.degraded)
+    return plan
+
+
+# What each degraded stage answered with, as shown next to a degraded plan
+DEGRADED_NOTES = {
+    'training': "the models for this dataset are still training, so an earlier model version answered",
+    'risk': "your risk score is estimated from people of your age and BMI, and your exercise intensity from its risk level",
+    'similar': "insights come from your wider user group rather than your closest matches",
+    'plans': "your meal and exercise plans reuse the last plan made for the same choices"
+}
+
+
+def render_profile_insights(insights):
+    """Show averages over a group of reference profiles"""
+    st.markdown("### 📊 Profile Insights")
+    metrics_col1, metrics_col2 = st.columns(2)
+
+    with metrics_col1:
+        st.metric("Average Health Risk Score", f"{insights['avg_risk_score']:.1f}")
+        st.metric("Average Exercise Capacity", f"{insights['avg_exercise_capacity']:.1f}")
+
+    with metrics_col2:
+        st.metric("Age Range", f"{insights['age_range']['min']} - {insights['age_range']['max']} years")
+        st.metric("Most Common Diet", insights['common_diet'])
+
+
+def render_cohort_comparison(plan):
+    """Show how a user's risk score compares with people of similar age, BMI, gender and diet"""
+    cohort = plan['cohort']
+    if not cohort['count']:
+        return
+    st.markdown("#### 🧭 How You Compare")
+    cohort_col1, cohort_col2, cohort_col3 = st.columns(3)
+    cohort_col1.metric(
+        "Cohort Average Risk", f"{cohort['mean']['HealthRiskScore']:.1f}",
+        delta=f"{plan['health_risk'] - cohort['mean']['HealthRiskScore']:+.1f} yours",
+        delta_color="inverse"
+    )
+    share_below = cohort['risk_share_below']
+    cohort_col2.metric("Cohort With Lower Risk", "-" if share_below is None else f"{share_below:.0%}")
+    cohort_col3.metric("Cohort Average Exercise Capacity", f"{cohort['mean']['ExerciseCapacity']:.1f}")
+    labels = cohort['labels']
+    described = [f"age {labels['age']}" if labels['age'] != 'All' else None,
+                 f"BMI {labels['bmi']}" if labels['bmi'] != 'All' else None,
+                 labels['gender'] if labels['gender'] != 'All' else None,
+                 labels['diet'] if labels['diet'] != 'All' else None]
+    st.caption("Compared with " + (" · ".join(label for label in described if label) or "everyone")
+               + f" ({cohort['count']:,} people)")
+
+
+def render_plan(plan):
+    """Show a generated plan; per-day markdown is built once per plan id and then served from cache"""
+    render_cache = get_plan_render_cache()
+
+    if plan['degraded']:
+        st.warning("⏱️ Parts of this plan were answered in fast mode: "
+                   + "; ".join(DEGRADED_NOTES[stage] for stage in dict.fromkeys(plan['degraded']))
+                   + ". Submit again for the full analysis.")
+
+    # Display results in tabs with icons
+    tab1, tab2, tab3 = st.tabs([
+        "🔍 Health Analysis",
+        "🍽 7-Day Meal Plan",
+        "💪 7-Day Exercise Plan"
+    ])
+
+    with tab1:
+        st.markdown("""
+            <h3 style='color: #333;'>🤖 AI-Generated Health Analysis</h3>
+        """, unsafe_allow_html=True)
+
+        # Display risk score in a nice card
+        risk_color = {
+            "High": "risk-high",
+            "Moderate": "risk-moderate",
+            "Low": "risk-low"
+        }[plan['risk_level']]
+
+        st.markdown(f"""
+            <div class='health-metric'>
+                <h4>Health Risk Assessment</h4>
+                <p>Score: <strong>{plan['health_risk']:.2f}</strong></p>
+                <p>Level: <strong class='{risk_color}'>{plan['risk_level']}</strong></p>
+            </div>
+        """, unsafe_allow_html=True)
+        if plan['exercise_capacity'] is not None:
+            st.caption(f"Predicted exercise capacity: {plan['exercise_capacity']:.1f} · "
+                       f"Exercise intensity: {plan['intensity']}")
+
+        render_cohort_comparison(plan)
+
+        explanation = plan['explanation']
+        if explanation is not None:
+            st.markdown("#### 🔎 What Drives Your Score")
+            contribution_col1, contribution_col2 = st.columns(2)
+            contribution_col1.metric("Age", f"{explanation['Age']:+.1f}")
+            contribution_col2.metric("BMI", f"{explanation['BMI']:+.1f}")
+            st.caption(
+                f"Points added to or taken from the dataset average risk score of {explanation['base']:.1f}, "
+                f"giving an expected score of {explanation['expected']:.1f}"
+            )
+
+        similar_profiles = plan['similar_profiles']
+        if plan['similar_profiles_error']:
+            st.error(f"⚠️ Error analyzing similar profiles: {plan['similar_profiles_error']}")
+        elif similar_profiles is not None:
+            st.markdown("### 👥 Similar Profiles Analysis")
+            st.markdown("""
+                <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px; margin: 1rem 0;'>
+                    Similarity Score indicates how closely these profiles match yours (100 = exact match)
+                </div>
+            """, unsafe_allow_html=True)
+            similar_filters = plan['similar_filters'] or {}
+            if similar_filters:
+                st.caption("Compared with " + " · ".join(similar_filters.values()) + " profiles"
+                           + ("" if 'DietaryPreference' in similar_filters
+                              else "; too few share your diet, so profiles on any diet are included"))
+            else:
+                st.caption("Too few profiles share your gender and diet, so all profiles are compared")
+
+            # Style the dataframe
+            st.dataframe(
+                similar_profiles[['Age', 'Gender', 'BMI', 'HealthRiskScore', 'ExerciseCapacity', 'SimilarityScore']],
+                use_container_width=True,
+                hide_index=True
+            )
+
+            render_profile_insights(plan['insights'])
+
+        elif plan['insights'] is not None:
+            render_profile_insights(plan['insights'])
+            st.caption("Averages over the group of users closest to your age, BMI and risk score")
+
+        else:
+            st.warning("⚠️ No similar profiles found. Try adjusting your input parameters.")
+
+    with tab2:
+        st.markdown("### 🍽 Your Personalized 7-Day Meal Plan")
+        meal_days = render_cache.get(
+            plan['records_id'], 'meal',
+            lambda: meal_day_views(st.session_state.meal_generator.render_meal_plan(plan['meal_record']))
+        )
+        for view in meal_days:
+            with st.expander(view.title):
+                st.markdown(view.markdown)
+
+    with tab3:
+        st.markdown("### 💪 Your Customized 7-Day Exercise Plan")
+        if plan['exercise_record'].relaxed:
+            st.warning("⚠️ No week fit every recovery rule for your choices, so some days train the same "
+                       "muscles or do high-impact cardio back to back. Take extra rest where you need it.")
+        exercise_days = render_cache.get(
+            plan['records_id'], 'exercise',
+            lambda: exercise_day_views(
+                st.session_state.exercise_generator.render_exercise_plan(plan['exercise_record']))
+        )
+        for view in exercise_days:
+            with st.expander(view.title):
+                st.markdown(view.markdown)
+
+
 def main():
     # Header with logo and title
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -73,6 +666,10 @@ def main():
             </h1>
         """, unsafe_allow_html=True)
 
+    # Starts training the default dataset in the background on the server's first page load
+    executor = get_training_executor()
+    warm_start = get_warm_start()
+
     # Initialize session state for models
     if 'health_model' not in st.session_state:
         st.session_state.health_model = None
@@ -80,6 +677,9 @@ def main():
         st.session_state.exercise_generator = None
     if 'meal_generator' not in st.session_state:
         st.session_state.meal_generator = MealPlanGenerator()
+    # The app has no sign-in, so each browser session is one member of the plan store
+    if 'member_id' not in st.session_state:
+        st.session_state.member_id = uuid.uuid4().hex
 
     # File uploader with enhanced styling
     st.markdown("### 📊 Training Data Upload")
@@ -89,26 +689,75 @@ def main():
         help="Upload a CSV file containing health data with required columns"
     )
 
-    if uploaded_file:
+    dataset_cache = get_dataset_cache()
+    similarity_cache = get_similarity_cache()
+    with st.sidebar.expander("⚙️ Caches"):
+        for cache_name, cache_stats in (("Datasets", dataset_cache.stats()),
+                                        ("Plan renders", get_plan_render_cache().stats()),
+                                        ("Similar profiles", similarity_cache.stats())):
+            st.caption(
+                f"{cache_name} · Entries: {cache_stats['entries']} · Hits: {cache_stats['hits']} · "
+                f"Misses: {cache_stats['misses']} · Hit rate: {cache_stats['hit_rate']:.0%}"
+            )
+        if similarity_cache.last_precompute_error:
+            st.caption(f"Similar-profile precompute failed {similarity_cache.precompute_failures} time(s); "
+                       f"last error: {similarity_cache.last_precompute_error}")
+    with st.sidebar.expander("⏱️ Latency Budget"):
+        degradation = request_budget.DEGRADATION.snapshot()
+        st.caption(
+            f"Requests: {degradation['requests']} · Degraded: {degradation['degraded_requests']} · "
+            f"Degraded rate: {degradation['degraded_rate']:.0%}"
+        )
+        for stage_name, stage_stats in degradation['stages'].items():
+            st.caption(
+                f"{stage_name} · Budget: {REQUEST_BUDGET_CONFIG['stages_ms'][stage_name]} ms · "
+                f"Runs: {stage_stats['runs']} · Fallbacks: {stage_stats['fallbacks']} · "
+                f"Fallback rate: {stage_stats['fallback_rate']:.0%}"
+            )
+
+    # Filled once this run has settled which model version serves the session
+    training_panel = st.sidebar.expander("🧠 Model Training")
+
+    if not uploaded_file:
+        render_training_panel(training_panel, executor, warm_start)
+    else:
+        budget = request_budget.RequestBudget()
         try:
-            # Load and preprocess data
-            data = pd.read_csv(uploaded_file)
-            expected_columns = ['Age', 'Gender', 'BMI', 'HealthRiskScore', 'ExerciseCapacity']
-
-            # Verify columns
-            if not all(col in data.columns for col in expected_columns):
-                st.error(f"Dataset must contain these columns: {', '.join(expected_columns)}")
+            # Load and preprocess data (memoized by content hash across reruns and sessions)
+            try:
+                dataset = dataset_cache.load(uploaded_file.getvalue())
+            except ValueError as e:
+                st.error(str(e))
                 return
-
-            data = preprocess_data(data)
-
-            # Initialize models if not already done
-            if st.session_state.health_model is None:
-                with st.spinner('Training models... Please wait.'):
-                    st.session_state.health_model = train_health_risk_model(data)
-                    st.session_state.exercise_generator = ExercisePlanGenerator()
-                    st.session_state.exercise_generator.create_user_clusters(data[['Age', 'BMI', 'HealthRiskScore']])
+            data = dataset.data
+
+            # Models are trained in the background once per dataset; until this dataset's version is
+            # swapped in, requests are answered by the current version, trained on an earlier dataset
+            version = dataset.artifacts.get('models')
+            if version is None:
+                # The version this session was last served, never one trained on another session's upload
+                previous = st.session_state.get('model_version') or warm_start_version(warm_start)
+                job = executor.job(dataset.fingerprint) or start_training(executor, dataset, previous)
+                if job.state == 'failed':
+                    st.error(f"⚠️ Error training models: {job.error}")
+                    if previous is None:
+                        return
+                    version = previous
+                elif previous is None:
+                    version = wait_for_training(job)
+                else:
+                    version = budget.wait('training', job.future, fallback=lambda: previous)
+                if version.key != dataset.fingerprint:
+                    render_drift(dataset.artifacts.get('drift'))
+                    if not job.done:
+                        render_training_progress(job, version)
+            if version.key == dataset.fingerprint and st.session_state.get('announced_version') != version.version:
+                render_drift(dataset.artifacts.get('drift'))
                 st.success('Models trained successfully!')
+                st.session_state.announced_version = version.version
+            st.session_state.model_version = version
+            st.session_state.health_model = version.artifacts['health_model']
+            st.session_state.exercise_generator = version.artifacts['exercise_generator']
 
             # Create form for user inputs
             with st.form(key='user_input_form'):
@@ -191,143 +840,58 @@ def main():
                 submit_button = st.form_submit_button("Generate Your Personalized Health Plan 🚀")
 
                 if submit_button:
-                    if st.session_state.health_model is None:
+                    if st.session_state.exercise_generator is None:
                         st.error("⚠️ Please upload a dataset first!")
                         return
 
-                    try:
-                        with st.spinner('Generating your personalized plan...'):
-                            # Generate predictions and plans
-                            user_features = create_user_features(selected_age, selected_bmi)
-                            health_risk = st.session_state.health_model.predict(user_features)[0]
-                            risk_level = get_risk_level(health_risk)
-
-                            # Display results in tabs with icons
-                            tab1, tab2, tab3 = st.tabs([
-                                "🔍 Health Analysis",
-                                "🍽 7-Day Meal Plan",
-                                "💪 7-Day Exercise Plan"
-                            ])
-
-                            with tab1:
-                                st.markdown("""
-                                    <h3 style='color: #333;'>🤖 AI-Generated Health Analysis</h3>
-                                """, unsafe_allow_html=True)
-                                
-                                # Display risk score in a nice card
-                                risk_color = {
-                                    "High": "risk-high",
-                                    "Moderate": "risk-moderate",
-                                    "Low": "risk-low"
-                                }[risk_level]
-                                
-                                st.markdown(f"""
-                                    <div class='health-metric'>
-                                        <h4>Health Risk Assessment</h4>
-                                        <p>Score: <strong>{health_risk:.2f}</strong></p>
-                                        <p>Level: <strong class='{risk_color}'>{risk_level}</strong></p>
-                                    </div>
-                                """, unsafe_allow_html=True)
-
-                                try:
-                                    user_profile = {
-                                        'Age': selected_age,
-                                        'BMI': selected_bmi,
-                                        'HealthRiskScore': health_risk
-                                    }
-
-                                    similar_profiles = find_similar_profiles(
-                                        target_profile=user_profile,
-                                        dataset=data,
-                                        n_matches=5
-                                    )
-
-                                    if similar_profiles is not None and not similar_profiles.empty:
-                                        st.markdown("### 👥 Similar Profiles Analysis")
-                                        st.markdown("""
-                                            <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px; margin: 1rem 0;'>
-                                                Similarity Score indicates how closely these profiles match yours (100 = exact match)
-                                            </div>
-                                        """, unsafe_allow_html=True)
-
-                                        # Style the dataframe
-                                        st.dataframe(
-                                            similar_profiles[['Age', 'Gender', 'BMI', 'HealthRiskScore', 'ExerciseCapacity', 'SimilarityScore']],
-                                            use_container_width=True,
-                                            hide_index=True
-                                        )
-
-                                        insights = get_profile_insights(similar_profiles)
-                                        
-                                        st.markdown("### 📊 Profile Insights")
-                                        metrics_col1, metrics_col2 = st.columns(2)
-                                        
-                                        with metrics_col1:
-                                            st.metric("Average Health Risk Score", f"{insights['avg_risk_score']:.1f}")
-                                            st.metric("Average Exercise Capacity", f"{insights['avg_exercise_capacity']:.1f}")
-                                        
-                                        with metrics_col2:
-                                            st.metric("Age Range", f"{insights['age_range']['min']} - {insights['age_range']['max']} years")
-                                            st.metric("Most Common Diet", insights['common_diet'])
-
-                                    else:
-                                        st.warning("⚠️ No similar profiles found. Try adjusting your input parameters.")
-
-                                except Exception as e:
-                                    st.error(f"⚠️ Error analyzing similar profiles: {str(e)}")
-
-                            with tab2:
-                                st.markdown("### 🍽 Your Personalized 7-Day Meal Plan")
-                                meal_plan = st.session_state.meal_generator.generate_meal_plan(
-                                    goal=selected_goal,
-                                    dietary_preferences=dietary_preferences,
-                                    health_conditions=conditions,
-                                    risk_level=risk_level
-                                )
-
-                                for day, meals in meal_plan.items():
-                                    with st.expander(f"Day {day}", expanded=day == "1"):
-                                        col1, col2 = st.columns([2, 1])
-                                        with col1:
-                                            st.markdown(f"""
-                                                - 🍳 **Breakfast:** {meals['breakfast']}
-                                                - 🥪 **Morning Snack:** {meals['morning_snack']}
-                                                - 🥗 **Lunch:** {meals['lunch']}
-                                                - 🍎 **Evening Snack:** {meals['evening_snack']}
-                                                - 🍽 **Dinner:** {meals['dinner']}
-                                            """)
-                                        with col2:
-                                            st.markdown("### Nutrition Info")
-                                            st.markdown(f"**Calories:** {meals['calories']}")
-                                            st.markdown(f"**Macros:** {meals['macros']}")
-
-                            with tab3:
-                                st.markdown("### 💪 Your Customized 7-Day Exercise Plan")
-                                intensity = "low" if risk_level == "High" else "moderate" if risk_level == "Moderate" else "high"
-                                exercise_plan = st.session_state.exercise_generator.get_weekly_exercise_plan(
-                                    intensity=intensity,
-                                    conditions=conditions,
-                                    goal=selected_goal
+                    # Plans stay fixed across reruns and are only regenerated when an input changes
+                    current_plan_id = plan_id(
+                        dataset=dataset.fingerprint,
+                        age=selected_age,
+                        gender=selected_gender,
+                        bmi=selected_bmi,
+                        goal=selected_goal,
+                        activity_level=activity_level,
+                        dietary_preferences=dietary_preferences,
+                        conditions=conditions
+                    )
+                    plan = st.session_state.get('plan')
+                    # A degraded plan is regenerated in full once the slow stages have caught up
+                    if plan is None or plan['id'] != current_plan_id or plan['degraded']:
+                        try:
+                            with st.spinner('Generating your personalized plan...'):
+                                st.session_state.plan = generate_plan(
+                                    current_plan_id, dataset, version.artifacts, budget, selected_age,
+                                    selected_gender, selected_bmi, selected_goal, dietary_preferences, conditions
                                 )
-
-                                for day, workout in exercise_plan.items():
-                                    with st.expander(f"Day {day}", expanded=day == "1"):
-                                        col1, col2 = st.columns([3, 1])
-                                        with col1:
-                                            st.markdown(f"**🎯 Focus:** {workout['focus']}")
-                                            st.markdown("**🏋️ Exercises:**")
-                                            for exercise in workout['exercises']:
-                                                st.markdown(f"- {exercise}")
-                                            if workout.get('notes'):
-                                                st.info(f"💡 {workout['notes']}")
-                                        with col2:
-                                            st.markdown(f"**⏱ Duration:** {workout['duration']} minutes")
-
-                    except Exception as e:
-                        st.error(f"⚠️ Error generating recommendations: {str(e)}")
+                        except Exception as e:
+                            st.session_state.plan = None
+                            st.error(f"⚠️ Error generating recommendations: {str(e)}")
+                        else:
+                            try:
+                                save_plan(st.session_state.member_id, st.session_state.plan)
+                            except Exception as e:
+                                st.warning(f"⚠️ Your plan could not be saved: {str(e)}")
+
+            plan = st.session_state.get('plan')
+            if plan is not None and plan['dataset'] == dataset.fingerprint:
+                try:
+                    with instrumentation.stage('plan_render'):
+                        render_plan(plan)
+                except Exception as e:
+                    st.error(f"⚠️ Error displaying your plan: {str(e)}")
 
         except Exception as e:
             st.error(f"⚠️ Error loading dataset: {str(e)}")
+        finally:
+            budget.finish()
+            render_training_panel(training_panel, executor, warm_start)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if st.sidebar.checkbox("🐞 Show stage timings", value=False):
+        with instrumentation.request_trace() as trace:
+            with instrumentation.stage('script_run'):
+                main()
+        render_debug_panel(trace)
+    else:
+        main()
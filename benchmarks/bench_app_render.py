@@ -0,0 +1,156 @@
+"""
+Script rerun time and UI payload benchmark for app.py.
+
+Drives the Streamlit app headlessly with ``streamlit.testing.v1.AppTest``
+(the file uploader is fed a CSV from disk) and times three interactions after
+the models are trained:
+
+- ``new_inputs``: submit the form with a changed input (plan generation + render)
+- ``same_inputs``: submit the form again without changing anything
+- ``rerun``: rerun the script with no form submission, as an unrelated widget
+  toggle does
+
+For each interaction it reports the element count and the serialized size of
+every element in the resulting page, an approximation of the delta payload
+sent over the websocket, and whether the plan shown is unchanged. Pass
+``--baseline-rev`` to run the same interactions against ``app.py`` from an
+earlier commit (for example the commit before utils/plan_rendering.py was
+added) for a before/after comparison.
+
+Usage:
+    python -m benchmarks.bench_app_render --baseline-rev <rev> --output app_render.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import add_output_arguments, finish, format_seconds, measure
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATASET = os.path.join(REPO_ROOT, 'data', 'health_fitness_dataset.csv')
+
+WRAPPER = """\
+import io
+import runpy
+import sys
+
+sys.path.insert(0, {root!r})
+import streamlit as st
+
+
+class _Upload(io.BytesIO):
+    name = 'dataset.csv'
+
+
+_raw = open({dataset!r}, 'rb').read()
+st.file_uploader = lambda *args, **kwargs: _Upload(_raw)
+runpy.run_path({script!r}, run_name='__main__')
+"""
+
+
+def page_payload(app) -> dict:
+    """Element count and total serialized size of every element on the page"""
+    elements, nbytes = 0, 0
+    stack = [app._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, 'proto', None)
+        if proto is not None and hasattr(proto, 'ByteSize'):
+            elements += 1
+            nbytes += proto.ByteSize()
+        stack.extend(getattr(node, 'children', {}).values())
+    return {'elements': elements, 'payload_bytes': nbytes}
+
+
+def plan_text(app) -> list:
+    """Markdown inside the day expanders, used to check that a plan stayed the same"""
+    return [markdown.value for expander in app.expander if expander.label.startswith('Day')
+            for markdown in expander.markdown]
+
+
+class AppDriver:
+    """One headless session of an app script"""
+
+    def __init__(self, script: str, dataset: str, workdir: str, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        wrapper = os.path.join(workdir, f'run_{os.path.basename(script)}')
+        with open(wrapper, 'w') as f:
+            f.write(WRAPPER.format(root=REPO_ROOT, dataset=dataset, script=script))
+        self.app = AppTest.from_file(wrapper, default_timeout=timeout)
+        self.age = 30
+        self.app.run()
+        self._check()
+
+    def _check(self):
+        errors = [e.value for e in self.app.exception] + [e.value for e in self.app.error]
+        if errors:
+            raise RuntimeError(f"app failed: {errors}")
+
+    def submit(self):
+        button = next(b for b in self.app.button if b.label.startswith('Generate'))
+        button.click()
+        self.app.run()
+        self._check()
+
+    def new_inputs(self):
+        self.age = 31 if self.age >= 70 else self.age + 1
+        self.app.number_input[0].set_value(self.age)
+        self.submit()
+
+    def rerun(self):
+        self.app.run()
+        self._check()
+
+
+def run_app(label: str, script: str, dataset: str, workdir: str, repeat: int, timeout: float) -> dict:
+    driver = AppDriver(script, dataset, workdir, timeout)
+    results = {}
+    for interaction in ('new_inputs', 'same_inputs', 'rerun'):
+        action = driver.new_inputs if interaction == 'new_inputs' else (
+            driver.submit if interaction == 'same_inputs' else driver.rerun)
+        # Every interaction starts from a freshly submitted plan
+        driver.new_inputs()
+        before = plan_text(driver.app)
+        result = measure(action, repeat=repeat, min_run_time=0)
+        result.update(page_payload(driver.app))
+        result['plan_days_shown'] = sum(e.label.startswith('Day') for e in driver.app.expander)
+        if interaction != 'new_inputs':
+            result['plan_unchanged'] = plan_text(driver.app) == before
+        result['params'] = {'app': label, 'interaction': interaction}
+        name = f'{label}:{interaction}'
+        results[name] = result
+        print(f"{name:<32}{format_seconds(result['min_s']):>12}{result['elements']:>10} elements"
+              f"{result['payload_bytes']:>10,} bytes  plan days shown: {result['plan_days_shown']}"
+              + (f"  unchanged: {result['plan_unchanged']}" if 'plan_unchanged' in result else ''),
+              flush=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default=DEFAULT_DATASET, help='CSV fed to the file uploader')
+    parser.add_argument('--baseline-rev', help='Also benchmark app.py as of this git revision')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per interaction')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds allowed per script run')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.baseline_rev:
+            baseline = os.path.join(workdir, 'app_baseline.py')
+            source = subprocess.run(['git', 'show', f'{args.baseline_rev}:app.py'], cwd=REPO_ROOT,
+                                    check=True, capture_output=True, text=True).stdout
+            with open(baseline, 'w') as f:
+                f.write(source)
+            results.update(run_app('baseline', baseline, args.dataset, workdir, args.repeat, args.timeout))
+        results.update(run_app('current', os.path.join(REPO_ROOT, 'app.py'), args.dataset, workdir,
+                               args.repeat, args.timeout))
+    return finish(args, results, suite='app_render', baseline_rev=args.baseline_rev)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Cohort statistics from the materialized cube versus a pandas scan per request.
+
+On a generated reference set, the benchmark times:
+
+- building the cube
+- appending a chunk with ``update`` versus rebuilding the cube
+- one cohort query from the cube versus filtering the DataFrame and
+  aggregating, which is what each request would otherwise pay
+- a rollup (all diets and genders) from the cube versus pandas
+
+The benchmark also checks every non-empty cell's count, means and standard
+deviations against a pandas groupby, and exits non-zero on any difference.
+
+Usage:
+    python -m benchmarks.bench_cohort_cube --rows 1000000 --output cohort_cube.json
+"""
+import argparse
+import sys
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--append', type=int, default=10_000, help='Rows appended by the update case')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from models.cohort_cube import CohortCube
+    from utils.data_processing import preprocess_data
+
+    seed_everything()
+    data = preprocess_data(generate_health_dataset(args.rows + args.append))
+    data, appended = data.iloc[:args.rows], data.iloc[args.rows:]
+    cube = CohortCube.from_frame(data)
+    measures = list(cube.measures)
+
+    # Every cell of the cube against a pandas groupby over the same buckets
+    grouped = data.assign(age=np.digitize(data['Age'], cube.age_edges), bmi=np.digitize(data['BMI'], cube.bmi_edges))
+    expected = grouped.groupby(['age', 'bmi', 'Gender', 'DietaryPreference'])[measures].agg(['count', 'mean', 'std'])
+    table = cube.table('age', 'bmi', 'gender', 'diet')
+    table = table[table['count'] > 0]
+    mismatches = int(len(table) != len(expected))
+    if not mismatches:
+        labels = {dimension: dict(enumerate(cube.labels[dimension])) for dimension in ('age', 'bmi')}
+        expected.index = expected.index.set_levels(
+            [expected.index.levels[0].map(labels['age']), expected.index.levels[1].map(labels['bmi'])],
+            level=[0, 1])
+        got = table.set_index(['age', 'bmi', 'gender', 'diet']).loc[expected.index]
+        for measure in measures:
+            mismatches += int((got['count'].to_numpy() != expected[(measure, 'count')].to_numpy()).sum())
+            for stat in ('mean', 'std'):
+                mismatches += int((~np.isclose(got[f'{measure}_{stat}'].to_numpy(),
+                                               expected[(measure, stat)].to_numpy(), equal_nan=True)).sum())
+
+    age, bmi, gender, diet = 42.0, 27.5, 'Female', 'Vegetarian'
+
+    def pandas_cohort():
+        members = data[(data['Age'] >= 40) & (data['Age'] < 45) & (data['BMI'] >= 25) & (data['BMI'] < 30)
+                       & (data['Gender'] == gender) & (data['DietaryPreference'] == diet)]
+        return len(members), members[measures].mean(), members[measures].std()
+
+    def pandas_rollup():
+        members = data[(data['Age'] >= 40) & (data['Age'] < 45) & (data['BMI'] >= 25) & (data['BMI'] < 30)]
+        return len(members), members[measures].mean(), members[measures].std()
+
+    def rebuild():
+        import pandas as pd
+
+        return CohortCube.from_frame(pd.concat([data, appended]))
+
+    results = run_cases([
+        BenchmarkCase('build', lambda: CohortCube.from_frame(data), {'rows': args.rows}, repeat=3),
+        BenchmarkCase('append[update]', lambda: CohortCube.from_frame(data.iloc[:0]).update(appended),
+                      {'rows': args.append}),
+        BenchmarkCase('append[rebuild]', rebuild, {'rows': args.rows + args.append}, repeat=3),
+        BenchmarkCase('cohort[cube]', lambda: cube.cohort(age, bmi, gender, diet), {'rows': args.rows}),
+        BenchmarkCase('cohort[pandas]', pandas_cohort, {'rows': args.rows}, repeat=3),
+        BenchmarkCase('rollup[cube]', lambda: cube.cohort(age, bmi), {'rows': args.rows}),
+        BenchmarkCase('rollup[pandas]', pandas_rollup, {'rows': args.rows}, repeat=3),
+    ])
+
+    print(f"\ncube: {cube.nbytes / 1e3:.1f} kB, {int((cube.count[:-1, :-1, :-1, :-1] > 0).sum())} non-empty cells")
+    for kind in ('cohort', 'rollup'):
+        speedup = results[f'{kind}[pandas]']['min_s'] / results[f'{kind}[cube]']['min_s']
+        print(f"{kind} query: {speedup:,.0f}x faster from the cube")
+    print(f"append: update {results['append[rebuild]']['min_s'] / results['append[update]']['min_s']:,.0f}x "
+          f"faster than rebuilding")
+    if mismatches:
+        print(f"MISMATCH: {mismatches} cube statistics differ from pandas")
+
+    code = finish(args, results, suite='cohort_cube', rows=args.rows, nbytes=cube.nbytes, mismatches=mismatches)
+    return code or int(bool(mismatches))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Model fit and neighbour index build on raw rows versus compacted points.
+
+Generates a large synthetic dataset (10M rows by default) and compacts it
+twice:
+
+- on the risk model's features and target (Age, BMI, HealthRiskScore)
+- on the similarity keys, which add Gender and DietaryPreference so every
+  filtered partition keeps its profiles
+
+It then times, on raw rows and on count-weighted points:
+
+- the risk forest fit with the COMPRESSION_CONFIG limits
+- the similarity scaler, the ProfileIndex build and a filtered query
+
+It reports rows per point and the validation MAE of both forests on held-out
+raw rows. With weights, the forest's min_samples_leaf still counts rows, but
+bootstrap draws points rather than rows, so the two forests differ by more
+than their random seeds.
+
+Usage:
+    python -m benchmarks.bench_compaction --rows 10000000 --trees 10 --output compaction.json
+"""
+import argparse
+import sys
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--valid', type=int, default=50_000, help='Held-out rows for validation MAE')
+    parser.add_argument('--trees', type=int, default=10, help='Forest size, kept small for 10M-row fits')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from config import COMPACTION_CONFIG, COMPRESSION_CONFIG, MODEL_CONFIG
+    from data.dataset_generator import generate_health_dataset
+    from models.health_risk_model import HealthRiskModel
+    from models.profile_index import ProfileIndex
+    from utils.compaction import compact
+    from utils.shared_data import scale_reference_features
+
+    seed_everything()
+    data = generate_health_dataset(args.rows + args.valid)
+    data, valid = data.iloc[:args.rows], data.iloc[args.rows:]
+    forest = {**MODEL_CONFIG['random_forest'], **COMPRESSION_CONFIG['limits'], 'n_estimators': args.trees}
+
+    compacted = {}
+    cases = []
+    for name, keys in (('training', COMPACTION_CONFIG['training_keys']), ('index', COMPACTION_CONFIG['index_keys'])):
+        compacted[name] = compact(data, keys)
+        cases.append(BenchmarkCase(f'compact[{name}]', lambda keys=keys: compact(data, keys),
+                                   {'rows': args.rows, 'keys': list(keys)}, repeat=1))
+
+    points, counts = compacted['training'].points, compacted['training'].counts
+    models = {}
+
+    def fit(name, frame, weights):
+        model = HealthRiskModel(forest)
+        model.train(frame[['Age', 'BMI']], frame['HealthRiskScore'], weights)
+        models[name] = model
+
+    cases += [
+        BenchmarkCase('fit[rows]', lambda: fit('rows', data, None), {'rows': args.rows, 'trees': args.trees}, repeat=1),
+        BenchmarkCase('fit[points]', lambda: fit('points', points, counts),
+                      {'rows': len(points), 'trees': args.trees}, repeat=1),
+    ]
+
+    index_points, index_counts = compacted['index'].points, compacted['index'].counts
+    scaled = {'rows': scale_reference_features(data),
+              'points': scale_reference_features(index_points, sample_weight=index_counts)}
+    indexes = {'rows': ProfileIndex(data, scaled['rows']), 'points': ProfileIndex(index_points, scaled['points'])}
+    profile = {'Age': 45, 'BMI': 27.5, 'HealthRiskScore': 70.0}
+    filters = {'Gender': 'Female', 'DietaryPreference': 'Vegan'}
+    for name, frame, weights in (('rows', data, None), ('points', index_points, index_counts)):
+        cases += [
+            BenchmarkCase(f'scale[{name}]', lambda f=frame, w=weights: scale_reference_features(f, sample_weight=w),
+                          {'rows': len(frame)}, repeat=3),
+            BenchmarkCase(f'index_build[{name}]', lambda f=frame, n=name: ProfileIndex(f, scaled[n]),
+                          {'rows': len(frame)}, repeat=3),
+            BenchmarkCase(f'query[{name}]', lambda n=name: indexes[n].query(profile, 5, filters),
+                          {'rows': len(frame)}),
+        ]
+
+    results = run_cases(cases)
+
+    y_valid = valid['HealthRiskScore'].to_numpy(dtype=np.float64)
+    report = {'rows': args.rows}
+    print(f"\n{'keys':<12}{'points':>12}{'rows/point':>12}")
+    for name, result in compacted.items():
+        report[f'{name}_points'] = len(result.points)
+        print(f"{name:<12}{len(result.points):>12,}{result.ratio:>12.2f}")
+    print(f"\n{'fit on':<12}{'time':>10}{'MAE':>8}{'expected MAE':>14}")
+    for name, model in models.items():
+        mae = float(np.abs(model.predict(valid[['Age', 'BMI']]) - y_valid).mean())
+        expected_mae = float(np.abs(model.expected_score(valid[['Age', 'BMI']]) - y_valid).mean())
+        report[f'mae[{name}]'], report[f'expected_mae[{name}]'] = mae, expected_mae
+        print(f"{name:<12}{results[f'fit[{name}]']['min_s']:>8.1f} s{mae:>8.2f}{expected_mae:>14.2f}")
+    return finish(args, results, suite='compaction', trees=args.trees, report=report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Time and peak-memory benchmark for streaming dataset statistics.
+
+Writes a generated dataset to a temporary CSV, then profiles it once by
+reading the whole file into a DataFrame for ``describe()`` and
+``value_counts()``, and once with ``DatasetStats.from_file``, which keeps
+only fixed-size state per column. Peak Python memory comes from tracemalloc
+in a separate untimed run. Streaming results are checked against the
+in-memory ones: moments to float precision and the quantiles' rank error. A
+drift check of the file against itself is timed as well.
+
+Usage:
+    python -m benchmarks.bench_dataset_stats --rows 1000000 --output dataset_stats.json
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def peak_bytes(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    from data.dataset_generator import generate_health_dataset
+    from utils.dataset_stats import DatasetStats, compare_stats
+
+    seed_everything()
+    workdir = tempfile.mkdtemp(prefix='dataset_stats_bench_')
+    path = os.path.join(workdir, 'dataset.csv')
+    generate_health_dataset(args.rows).to_csv(path, index=False)
+
+    def in_memory():
+        data = pd.read_csv(path)
+        return data.describe(), {column: data[column].value_counts(normalize=True)
+                                 for column in data.select_dtypes(exclude='number')}
+
+    def streaming():
+        return DatasetStats.from_file(path, chunksize=args.chunksize)
+
+    data = pd.read_csv(path)
+    stats = streaming()
+    errors = {'mean': 0.0, 'std': 0.0, 'quantile_rank': 0.0}
+    quantiles = np.linspace(0.01, 0.99, 99)
+    for column, numeric in stats.numeric.items():
+        values = np.sort(data[column].dropna().to_numpy(dtype=np.float64))
+        errors['mean'] = max(errors['mean'], abs(numeric.moments.mean - values.mean()) / (abs(values.mean()) or 1))
+        errors['std'] = max(errors['std'], abs(numeric.moments.std - values.std(ddof=1)) / (values.std(ddof=1) or 1))
+        estimates = numeric.sketch.quantile(quantiles)
+        # Rank interval of each estimate; zero error if the target quantile falls inside it
+        low = np.searchsorted(values, estimates, side='left') / len(values)
+        high = np.searchsorted(values, estimates, side='right') / len(values)
+        errors['quantile_rank'] = max(errors['quantile_rank'],
+                                      float(np.maximum(np.maximum(low - quantiles, quantiles - high), 0).max()))
+    del data
+    print("max relative error: " + ", ".join(f"{name} {value:.2e}" for name, value in errors.items()))
+
+    peaks = {'in_memory': peak_bytes(in_memory), 'streaming': peak_bytes(streaming)}
+    cases = [BenchmarkCase('in_memory_describe', in_memory, {'rows': args.rows}, repeat=3),
+             BenchmarkCase('streaming_stats', streaming, {'rows': args.rows, 'chunksize': args.chunksize}, repeat=3),
+             BenchmarkCase('drift_check', lambda: compare_stats(stats, stats), {'rows': args.rows})]
+    results = run_cases(cases)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'case':<22}{'time':>12}{'peak memory':>16}")
+    for name, result in results.items():
+        peak = peaks.get(name.replace('_describe', '').replace('_stats', ''))
+        if peak is not None:
+            result['peak_bytes'] = peak
+        print(f"{name:<22}{result['min_s'] * 1e3:>9.1f} ms" + (f"{peak / 1e6:>13.1f} MB" if peak else ''))
+    return finish(args, results, suite='dataset_stats', **{f'max_{k}_error': v for k, v in errors.items()})
+
+
+if __name__ == '__main__':
+    sys.exit(main())
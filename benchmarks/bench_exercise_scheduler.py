@@ -0,0 +1,85 @@
+"""
+Throughput and constraint benchmark for weekly exercise scheduling.
+
+Generates weekly exercise plan records for random (goal, intensity,
+conditions) requests with the previous fixed-template method and with the
+constraint-aware ExerciseScheduler, reporting plans per second. Every plan is
+validated with ``ExerciseScheduler.violations``: recovery spacing, intensity
+caps, condition exclusions and training streaks count as hard violations,
+and weekly minutes are reported as the mean relative deviation from the
+goal's template total.
+
+Usage:
+    python -m benchmarks.bench_exercise_scheduler --plans 2000 --output exercise_scheduler.json
+"""
+import argparse
+import random
+import sys
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def make_requests(n_plans: int, seed: int = SEED):
+    """Random (goal, intensity, conditions) exercise plan requests"""
+    from config import CONDITIONS
+    from models.plan_records import GOALS, INTENSITIES
+
+    rng = random.Random(seed)
+    return [(rng.choice(GOALS), rng.choice(INTENSITIES), rng.sample(CONDITIONS, rng.randint(0, 2)))
+            for _ in range(n_plans)]
+
+
+def generate(generator, requests, method):
+    from config import EXERCISE_CONFIG
+
+    configured, EXERCISE_CONFIG['method'] = EXERCISE_CONFIG['method'], method
+    try:
+        return [generator.get_weekly_exercise_plan_record(intensity, conditions, goal)
+                for goal, intensity, conditions in requests]
+    finally:
+        EXERCISE_CONFIG['method'] = configured
+
+
+def evaluate(generator, requests, records):
+    """Share of plans with hard violations, and mean relative deviation of weekly minutes"""
+    structures = generator.WEEKLY_STRUCTURES
+    violating, deviation = 0, 0.0
+    for (goal, intensity, conditions), record in zip(requests, records):
+        target = sum(day["duration"] for day in structures.get(goal, structures["default"]))
+        problems = generator.scheduler.violations(record.days, intensity, conditions)
+        violating += bool(problems)
+        deviation += abs(sum(day.duration for day in record.days) - target) / target
+    return violating / len(records), deviation / len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=2000, help='Weekly plans to generate per method')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from models.exercise_model import ExercisePlanGenerator
+
+    random.seed(SEED)
+    generator = ExercisePlanGenerator()
+    requests = make_requests(args.plans)
+
+    cases, quality = [], {}
+    for method in ('template', 'scheduler'):
+        # The first pass also builds the scheduler's day pools, outside the timed runs
+        quality[method] = evaluate(generator, requests, generate(generator, requests, method))
+        cases.append(BenchmarkCase(method, lambda m=method: generate(generator, requests, m),
+                                   {'plans': args.plans, 'method': method}, repeat=3))
+
+    results = run_cases(cases)
+    print(f"{'method':<12}{'plans/s':>12}{'violating plans':>18}{'minutes deviation':>20}")
+    for name, result in results.items():
+        result['plans_per_s'] = args.plans / result['min_s']
+        result['violating_share'], result['minutes_deviation'] = quality[name]
+        print(f"{name:<12}{result['plans_per_s']:>12,.0f}{result['violating_share']:>18.1%}"
+              f"{result['minutes_deviation']:>20.1%}")
+    return finish(args, results, suite='exercise_scheduler')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
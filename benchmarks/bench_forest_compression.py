@@ -0,0 +1,116 @@
+"""
+Size, load time, latency and accuracy report for the compressed risk forest.
+
+Trains the unconstrained forest (MODEL_CONFIG) and one with the validated
+limits of COMPRESSION_CONFIG on the same training split. Then compares:
+
+- the pickled sklearn models
+- their CompactRiskModel packings (``.npz``)
+
+Reported per variant:
+
+- serialized size
+- load time, skipped for pickles larger than --max-load-mb because loading
+  one next to the others would exhaust memory on small hosts
+- single-row and batch predict latency
+- validation MAE and its change versus the unconstrained sklearn forest
+- for packed models, agreement with the sklearn forest they were packed from
+
+Usage:
+    python -m benchmarks.bench_forest_compression --output forest_compression.json
+"""
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default='data/health_fitness_dataset.csv')
+    parser.add_argument('--batch', type=int, default=2000, help='Rows per batch prediction')
+    parser.add_argument('--max-load-mb', type=float, default=1024, help='Largest pickle whose load is timed')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    from config import COMPRESSION_CONFIG, MODEL_CONFIG
+    from models.forest_compression import CompactRiskModel
+    from models.health_risk_model import HealthRiskModel
+    from models.sweep import artifact_size
+
+    seed_everything()
+    data = pd.read_csv(args.csv)
+    X_train, X_valid, y_train, y_valid = train_test_split(
+        data[['Age', 'BMI']], data['HealthRiskScore'],
+        test_size=COMPRESSION_CONFIG['validation_size'], random_state=COMPRESSION_CONFIG['random_state'])
+    y_valid = y_valid.to_numpy(dtype=np.float64)
+
+    models = {}
+    for name, config in (('unconstrained', MODEL_CONFIG['random_forest']),
+                         ('limited', {**MODEL_CONFIG['random_forest'], **COMPRESSION_CONFIG['limits']})):
+        model = HealthRiskModel(config)
+        model.train(X_train, y_train)
+        models[f'sklearn_{name}'] = model
+        models[f'compact_{name}'] = CompactRiskModel.from_model(model)
+
+    workdir = tempfile.mkdtemp(prefix='forest_compression_bench_')
+    reference = models['sklearn_unconstrained'].predict(X_valid)
+    reference_mae = float(np.abs(reference - y_valid).mean())
+    batch = X_valid.iloc[:args.batch].to_numpy()
+    single = batch[:1]
+    report, cases = {}, []
+    for name, model in models.items():
+        path = os.path.join(workdir, name + ('.npz' if name.startswith('compact') else '.pkl'))
+        if name.startswith('compact'):
+            model.save(path)
+            size = os.path.getsize(path)
+            load = lambda path=path: CompactRiskModel.load(path)
+        else:
+            size = artifact_size(model)
+            load = None
+            if size <= args.max_load_mb * 1e6:
+                with open(path, 'wb') as f:
+                    pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+                def load(path=path):
+                    with open(path, 'rb') as f:
+                        return pickle.load(f)
+
+        predictions = model.predict(X_valid)
+        mae = float(np.abs(predictions - y_valid).mean())
+        report[name] = {'bytes': size, 'mae': mae, 'mae_delta': mae - reference_mae}
+        if name.startswith('compact'):
+            source = models[name.replace('compact', 'sklearn')].predict(X_valid)
+            report[name]['agreement'] = float((predictions == source).mean())
+        if load is not None:
+            cases.append(BenchmarkCase(f'load[{name}]', load, {'model': name, 'bytes': size}, repeat=3))
+        cases.append(BenchmarkCase(f'predict_single[{name}]', lambda m=model: m.predict(single),
+                                   {'model': name, 'rows': 1}))
+        cases.append(BenchmarkCase(f'predict_batch[{name}]', lambda m=model: m.predict(batch),
+                                   {'model': name, 'rows': len(batch)}, repeat=3))
+
+    results = run_cases(cases)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    def timing(kind, name):
+        result = results.get(f'{kind}[{name}]')
+        return f"{result['min_s'] * 1e3:>9.2f} ms" if result else f"{'skipped':>12}"
+
+    print(f"\n{'model':<24}{'size':>12}{'load':>12}{'single':>12}{'batch':>12}{'MAE':>8}{'delta':>8}{'agree':>8}")
+    for name, row in report.items():
+        print(f"{name:<24}{row['bytes'] / 1e6:>9.2f} MB{timing('load', name)}{timing('predict_single', name)}"
+              f"{timing('predict_batch', name)}{row['mae']:>8.2f}{row['mae_delta']:>+8.2f}"
+              + (f"{row['agreement']:>8.1%}" if 'agreement' in row else f"{'-':>8}"))
+    return finish(args, results, suite='forest_compression', report=report, limits=COMPRESSION_CONFIG['limits'])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
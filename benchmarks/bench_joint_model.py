@@ -0,0 +1,85 @@
+"""
+One joint risk and capacity forest versus two single-target forests.
+
+On a generated dataset, the benchmark fits a ``JointHealthModel`` predicting
+HealthRiskScore and ExerciseCapacity together, and two models with the same
+limits that each predict one target. It then times:
+
+- fitting the joint model versus fitting both separate models
+- one single-row request, served by one joint prediction versus two
+  separate predictions
+- a batch prediction of --batch rows
+- sklearn's own ``predict`` on the joint forest, for the packed traversal
+
+It reports the validation MAE of each target for both setups, and the
+largest difference between the packed and sklearn predictions.
+
+Usage:
+    python -m benchmarks.bench_joint_model --rows 1000000 --output joint_model.json
+"""
+import argparse
+import sys
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--valid', type=int, default=50_000, help='Held-out rows for validation MAE')
+    parser.add_argument('--batch', type=int, default=10_000, help='Rows in the batch prediction cases')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from models.joint_model import train_joint_model
+
+    seed_everything()
+    data = generate_health_dataset(args.rows + args.valid)
+    data, valid = data.iloc[:args.rows], data.iloc[args.rows:]
+    targets = ['HealthRiskScore', 'ExerciseCapacity']
+
+    models = {}
+
+    def fit_joint():
+        models['joint'] = train_joint_model(data)
+
+    def fit_separate():
+        for target in targets:
+            models[target] = train_joint_model(data, {'targets': (target,)})
+
+    fit_joint()
+    fit_separate()
+    request = np.array([[45, 27.5]])
+    batch = valid[['Age', 'BMI']].iloc[:args.batch]
+    joint = models['joint']
+    params = {'rows': args.rows, 'trees': joint.model.n_estimators}
+    cases = [
+        BenchmarkCase('fit[joint]', fit_joint, params, repeat=1),
+        BenchmarkCase('fit[separate]', fit_separate, params, repeat=1),
+        BenchmarkCase('request[joint]', lambda: joint.predict(request)[0], params),
+        BenchmarkCase('request[separate]', lambda: [models[target].predict(request)[0] for target in targets], params),
+        BenchmarkCase('request[sklearn]', lambda: joint.model.predict(joint._matrix(request))[0], params),
+        BenchmarkCase('batch[joint]', lambda: joint.predict(batch), {**params, 'batch': args.batch}),
+        BenchmarkCase('batch[separate]', lambda: [models[target].predict(batch) for target in targets],
+                      {**params, 'batch': args.batch}),
+    ]
+    results = run_cases(cases)
+
+    X_valid = valid[['Age', 'BMI']]
+    joint_pred = joint.predict(X_valid)
+    report = {'packed_max_diff': float(np.abs(joint_pred - joint.model.predict(joint._matrix(X_valid))).max())}
+    print(f"\n{'target':<18}{'joint MAE':>12}{'separate MAE':>14}")
+    for index, target in enumerate(targets):
+        y_valid = valid[target].to_numpy(dtype=np.float64)
+        report[f'mae[joint][{target}]'] = float(np.abs(joint_pred[:, index] - y_valid).mean())
+        report[f'mae[separate][{target}]'] = float(np.abs(models[target].predict(X_valid)[:, 0] - y_valid).mean())
+        print(f"{target:<18}{report[f'mae[joint][{target}]']:>12.2f}{report[f'mae[separate][{target}]']:>14.2f}")
+    print(f"Largest packed vs sklearn difference: {report['packed_max_diff']:.3g}")
+    return finish(args, results, suite='joint_model', report=report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Latency and accuracy benchmark for the meal plan optimizer.
+
+Plans a week against the goal targets with the previous random dish choice
+and with both MealOptimizer solvers, on the real meal catalog and on synthetic
+catalogs with thousands of dishes. Accuracy is reported as the mean absolute
+relative error of daily calories and of all four targets (calories, protein,
+carbs, fats).
+
+Usage:
+    python -m benchmarks.bench_meal_optimizer --dishes 1000 5000 --output meal_optimizer.json
+"""
+import argparse
+import random
+import sys
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+# Typical (protein_g, carbs_g, fats_g) per slot, used to draw synthetic dishes
+SLOT_MACROS = {
+    "breakfast": (12, 48, 10),
+    "morning_snacks": (6, 20, 5),
+    "lunch": (22, 78, 16),
+    "evening_snacks": (8, 26, 8),
+    "dinner": (20, 56, 15),
+}
+
+
+def synthetic_catalog(n_dishes: int, seed: int = SEED):
+    """A single-database meal catalog with n_dishes dishes spread over the slots"""
+    import numpy as np
+
+    from models.meal.dish_nutrition import TAGS
+    from models.plan_records import MealCatalog
+
+    rng = np.random.default_rng(seed)
+    database, nutrition = {}, {}
+    per_slot = max(1, n_dishes // len(SLOT_MACROS))
+    for slot, macros in SLOT_MACROS.items():
+        names = [f"{slot} dish {i}" for i in range(per_slot)]
+        database[slot] = names
+        values = rng.gamma(4.0, np.asarray(macros) / 4.0, size=(per_slot, 3)).round(1)
+        tags = rng.random((per_slot, len(TAGS))) < 0.15
+        for name, row, flags in zip(names, values, tags):
+            nutrition[name] = (*row, tuple(tag for tag, flag in zip(TAGS, flags) if flag))
+    return MealCatalog({'synthetic': database}), nutrition
+
+
+def plan_errors(optimizer, plan, targets):
+    import numpy as np
+
+    totals = np.array([optimizer.totals(day) for day in plan])
+    relative = np.abs(totals - np.asarray(targets)) / np.asarray(targets)
+    return float(relative[:, 0].mean()), float(relative.mean())
+
+
+def random_plan(optimizer, eligible, days=7):
+    import numpy as np
+
+    slots = [np.flatnonzero(eligible & (optimizer.slots == slot)) for slot in range(5)]
+    return [tuple(int(random.choice(dishes)) for dishes in slots) for _ in range(days)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dishes', type=int, nargs='+', default=[1000, 5000],
+                        help='Synthetic catalog sizes, in addition to the real catalog')
+    parser.add_argument('--milp-max-dishes', type=int, default=1000,
+                        help='Skip the MILP solver above this catalog size')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from models.meal.meal_model import MealPlanGenerator
+    from models.meal.meal_optimizer import MealOptimizer
+
+    random.seed(SEED)
+    generator = MealPlanGenerator()
+    calories = generator._calculate_base_calories("Maintenance")
+    targets = (calories, *generator._macro_targets(calories, "Maintenance")[:3])
+    scenarios = [('real', generator.optimizer, generator.optimizer.eligibility('standard', [], ['diabetes']))]
+    for n_dishes in args.dishes:
+        catalog, nutrition = synthetic_catalog(n_dishes)
+        optimizer = MealOptimizer(catalog, nutrition)
+        scenarios.append((f'synthetic[{len(catalog)}]', optimizer,
+                          optimizer.eligibility('synthetic', ['gluten-free'], ['diabetes'])))
+
+    cases, accuracy = [], {}
+    for label, optimizer, eligible in scenarios:
+        solvers = {'random': lambda o=optimizer, e=eligible: random_plan(o, e),
+                   'greedy': lambda o=optimizer, e=eligible: o.plan_week(targets, e, method='greedy')}
+        if int(eligible.sum()) <= args.milp_max_dishes:
+            solvers['milp'] = lambda o=optimizer, e=eligible: o.plan_week(targets, e, method='milp')
+        for solver, plan_week in solvers.items():
+            name = f'{solver}:{label}'
+            accuracy[name] = plan_errors(optimizer, plan_week(), targets)
+            cases.append(BenchmarkCase(name, plan_week, {'dishes': int(eligible.sum()), 'solver': solver},
+                                       repeat=3))
+
+    results = run_cases(cases)
+    print(f"{'case':<36}{'eligible':>10}{'latency':>12}{'calorie err':>14}{'all targets err':>18}")
+    for name, result in results.items():
+        result['calorie_error'], result['target_error'] = accuracy[name]
+        print(f"{name:<36}{result['params']['dishes']:>10}{result['min_s'] * 1e3:>9.1f} ms"
+              f"{result['calorie_error']:>13.1%}{result['target_error']:>17.1%}")
+    return finish(args, results, suite='meal_optimizer')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Size and throughput benchmark for structured plan records.
+
+Generates a batch of meal and exercise plans both as the display dicts
+returned by ``generate_meal_plan`` / ``get_weekly_exercise_plan`` and as
+records, then compares serialized size (JSON of the dicts vs PlanCodec JSON
+lines and binary) and the cost of generating, serializing, deserializing and
+rendering them. Records are checked to round-trip exactly and to render to
+the same dicts as the direct path.
+
+Usage:
+    python -m benchmarks.bench_plan_records --plans 20000 --output plan_records.json
+"""
+import argparse
+import json
+import random
+import sys
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def make_requests(n_plans: int, seed: int = SEED):
+    """Random (goal, diet, conditions, risk level, intensity) plan requests"""
+    from config import CONDITIONS
+    from models.plan_records import GOALS, INTENSITIES
+    from utils.risk_bands import RISK_BANDS
+
+    rng = random.Random(seed)
+    diets = [[], ["vegetarian"], ["vegan"], ["non-vegetarian"]]
+    return [(rng.choice(GOALS), rng.choice(diets), rng.sample(CONDITIONS, rng.randint(0, 2)),
+             rng.choice(RISK_BANDS.labels), rng.choice(INTENSITIES))
+            for _ in range(n_plans)]
+
+
+def generate_dicts(meals, exercises, requests):
+    return [(meals.generate_meal_plan(goal, diet, conditions, risk),
+             exercises.get_weekly_exercise_plan(intensity, conditions, goal))
+            for goal, diet, conditions, risk, intensity in requests]
+
+
+def generate_records(meals, exercises, requests):
+    records = []
+    for goal, diet, conditions, risk, intensity in requests:
+        records.append(meals.generate_meal_plan_record(goal, diet, conditions, risk))
+        records.append(exercises.get_weekly_exercise_plan_record(intensity, conditions, goal))
+    return records
+
+
+def render_records(meals, exercises, records):
+    return [meals.render_meal_plan(record) if i % 2 == 0 else exercises.render_exercise_plan(record)
+            for i, record in enumerate(records)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=20_000, help='Members to generate meal + exercise plans for')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from models.exercise_model import ExercisePlanGenerator
+    from models.meal.meal_model import MealPlanGenerator
+    from models.plan_records import PlanCodec
+
+    meals, exercises = MealPlanGenerator(), ExercisePlanGenerator()
+    codec = PlanCodec(ExercisePlanGenerator.focus_types())
+    requests = make_requests(args.plans)
+
+    random.seed(SEED)
+    dicts = generate_dicts(meals, exercises, requests)
+    random.seed(SEED)
+    records = generate_records(meals, exercises, requests)
+
+    rendered = render_records(meals, exercises, records)
+    if rendered != [plan for pair in dicts for plan in pair]:
+        raise AssertionError("rendered records differ from the generated dicts")
+    jsonl = codec.dumps_jsonl(records)
+    binary = codec.dumps_many(records)
+    if codec.read_jsonl(jsonl.splitlines()) != records or codec.loads_many(binary) != records:
+        raise AssertionError("records do not round-trip through PlanCodec")
+    print(f"verified {len(records)} records: round-trip exact, rendering matches the dict path")
+
+    dict_json = json.dumps(dicts)
+    sizes = {
+        'dict_json': len(dict_json.encode()),
+        'records_jsonl': len(jsonl.encode()),
+        'records_binary': len(binary),
+    }
+    for name, size in sizes.items():
+        print(f"{name:<20}{size:>14,} bytes  {size / args.plans:>8,.0f} bytes/member  "
+              f"{sizes['dict_json'] / size:>6.1f}x smaller than dict JSON")
+
+    cases = [
+        BenchmarkCase('generate_dicts', lambda: generate_dicts(meals, exercises, requests),
+                      {'plans': args.plans}, repeat=3),
+        BenchmarkCase('generate_records', lambda: generate_records(meals, exercises, requests),
+                      {'plans': args.plans}, repeat=3),
+        BenchmarkCase('render_records', lambda: render_records(meals, exercises, records),
+                      {'plans': args.plans}, repeat=3),
+        BenchmarkCase('dict_json_dumps', lambda: json.dumps(dicts), {'plans': args.plans}, repeat=3),
+        BenchmarkCase('dict_json_loads', lambda: json.loads(dict_json), {'plans': args.plans}, repeat=3),
+        BenchmarkCase('records_jsonl_dumps', lambda: codec.dumps_jsonl(records), {'plans': args.plans}, repeat=3),
+        BenchmarkCase('records_jsonl_loads', lambda: codec.read_jsonl(jsonl.splitlines()),
+                      {'plans': args.plans}, repeat=3),
+        BenchmarkCase('records_binary_dumps', lambda: codec.dumps_many(records), {'plans': args.plans}, repeat=3),
+        BenchmarkCase('records_binary_loads', lambda: codec.loads_many(binary), {'plans': args.plans}, repeat=3),
+    ]
+    results = run_cases(cases)
+    for name, result in results.items():
+        result['plans_per_s'] = result['params']['plans'] / result['min_s']
+        print(f"{name:<48}{result['plans_per_s']:>14,.0f} members/s")
+    return finish(args, results, suite='plan_records', sizes_bytes=sizes)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Insert and lookup throughput benchmark for the SQLite plan store.
+
+Writes meal and exercise plans for synthetic members over several weeks,
+comparing one transaction per plan (what naive per-request saving does)
+with batched ``put_many`` and with ``PlanWriter`` fed from several threads.
+Then measures point lookups by member and week, a member's plan history, and
+range scans of one risk level for a week. Payloads cycle through a small set
+of generated records, since their content does not affect throughput.
+
+Usage:
+    python -m benchmarks.bench_plan_store --members 10000 --weeks 4 --output plan_store.json
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def sample_records(n: int):
+    """n (risk level, meal record, exercise record) triples from the real generators"""
+    from config import CONDITIONS
+    from models.exercise_model import ExercisePlanGenerator
+    from models.meal.meal_model import MealPlanGenerator
+    from models.plan_records import GOALS, INTENSITIES
+    from utils.risk_bands import RISK_BANDS
+
+    meals, exercises = MealPlanGenerator(), ExercisePlanGenerator()
+    rng = random.Random(SEED)
+    samples = []
+    for _ in range(n):
+        goal, risk = rng.choice(GOALS), rng.choice(RISK_BANDS.labels)
+        conditions = rng.sample(CONDITIONS, rng.randint(0, 2))
+        samples.append((risk, meals.generate_meal_plan_record(goal, [], conditions, risk),
+                        exercises.get_weekly_exercise_plan_record(rng.choice(INTENSITIES), conditions, goal)))
+    return samples
+
+
+def make_plans(samples, members: int, weeks: int):
+    from models.plan_store import StoredPlan
+
+    plans = []
+    for member in range(members):
+        for week in range(1, weeks + 1):
+            risk, meal, exercise = samples[(member * weeks + week) % len(samples)]
+            plans.append(StoredPlan(f"member-{member:07d}", week, risk, meal))
+            plans.append(StoredPlan(f"member-{member:07d}", week, risk, exercise))
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=10_000)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help='Producer threads for the PlanWriter case')
+    parser.add_argument('--single-rows', type=int, default=2000,
+                        help='Plans written one transaction at a time (kept small; it is slow)')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from models.exercise_model import ExercisePlanGenerator
+    from models.plan_records import PlanCodec
+    from models.plan_store import PlanStore
+
+    random.seed(SEED)
+    codec = PlanCodec(ExercisePlanGenerator.focus_types())
+    plans = make_plans(sample_records(200), args.members, args.weeks)
+    workdir = tempfile.mkdtemp(prefix='plan_store_bench_')
+    runs = iter(range(1_000_000))
+
+    def fresh_store():
+        return PlanStore(os.path.join(workdir, f"run{next(runs)}.db"), codec)
+
+    def single_transactions():
+        with fresh_store() as store:
+            for plan in plans[:args.single_rows]:
+                store.put(plan.member_id, plan.week, plan.risk_level, plan.record)
+
+    def batched():
+        with fresh_store() as store:
+            store.put_many(plans)
+
+    def threaded_writer():
+        with fresh_store() as store, store.writer() as writer:
+            def produce(part):
+                for plan in plans[part::args.threads]:
+                    writer.add(plan.member_id, plan.week, plan.risk_level, plan.record)
+            threads = [threading.Thread(target=produce, args=(part,)) for part in range(args.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    store = fresh_store()
+    store.put_many(plans)
+    rng = random.Random(SEED)
+    keys = [(f"member-{rng.randrange(args.members):07d}", rng.randint(1, args.weeks)) for _ in range(2000)]
+    high_risk = sum(1 for _ in store.scan(weeks=args.weeks, risk_levels=['High']))
+
+    cases = [
+        BenchmarkCase('insert_single_transactions', single_transactions, {'rows': args.single_rows}, repeat=3),
+        BenchmarkCase('insert_put_many', batched, {'rows': len(plans)}, repeat=3),
+        BenchmarkCase('insert_writer_threads', threaded_writer, {'rows': len(plans), 'threads': args.threads},
+                      repeat=3),
+        BenchmarkCase('lookup_member_week', lambda: [store.get(m, w) for m, w in keys], {'rows': 2 * len(keys)}),
+        BenchmarkCase('lookup_member_history', lambda: [store.member_plans(m) for m, _ in keys[:500]],
+                      {'rows': 500 * 2 * args.weeks}),
+        BenchmarkCase('scan_high_risk_week', lambda: list(store.scan(weeks=args.weeks, risk_levels=['High'])),
+                      {'rows': high_risk}, repeat=3),
+    ]
+    results = run_cases(cases)
+    print(f"{'case':<30}{'rows':>10}{'rows/s':>14}")
+    for name, result in results.items():
+        result['rows_per_s'] = result['params']['rows'] / result['min_s']
+        print(f"{name:<30}{result['params']['rows']:>10,}{result['rows_per_s']:>14,.0f}")
+    store.close()
+    db_bytes = os.path.getsize(store.path)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return finish(args, results, suite='plan_store', db_bytes=db_bytes)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Throughput benchmark for similarity search filtered by gender and diet.
+
+Compares filter-after-scan (distances to every profile, then discarding the
+ones outside the requested partition) with ``ProfileIndex.query``, which
+computes distances over the matching partition's contiguous slice only.
+Queries pick random (Gender, DietaryPreference) filters and profiles. Both
+paths must return the same profiles in the same order for every query; the
+benchmark exits non-zero if they differ.
+
+Usage:
+    python -m benchmarks.bench_profile_index --rows 100000 1000000 --output profile_index.json
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def filter_after_scan(matrix, weights, mask, target, n_matches):
+    """Positions of the n_matches nearest rows of matrix where mask is set, nearest first"""
+    import numpy as np
+
+    distances = np.sqrt(((matrix - target) ** 2) @ weights)
+    distances[~mask] = np.inf
+    k = min(n_matches, int(mask.sum()))
+    top = np.flatnonzero(distances <= np.partition(distances, k - 1)[k - 1])
+    return top[np.lexsort((top, distances[top]))][:k]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='Dataset sizes')
+    parser.add_argument('--queries', type=int, default=200, help='Filtered queries per case')
+    parser.add_argument('--matches', type=int, default=5)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from models.profile_index import ProfileIndex
+    from utils.data_processing import preprocess_data
+    from utils.shared_data import scale_reference_features
+
+    seed_everything()
+    rng = np.random.default_rng(0)
+    cases, mismatches, meta = [], 0, {}
+    for rows in args.rows:
+        data = preprocess_data(generate_health_dataset(rows))
+        scaled = scale_reference_features(data)
+        start = time.perf_counter()
+        index = ProfileIndex(data, scaled)
+        build_s = time.perf_counter() - start
+
+        picks = rng.choice(len(data), args.queries)
+        queries = [({f: float(data[f].iat[i]) for f in index.features},
+                    {c: data[c].iat[rng.integers(len(data))] for c in index.columns}) for i in picks]
+        columns = {c: data[c].to_numpy() for c in index.columns}
+        masks = {}
+        for _, filters in queries:
+            key = tuple(filters.values())
+            if key not in masks:
+                masks[key] = np.logical_and.reduce([columns[c] == v for c, v in filters.items()])
+
+        searched = []
+        for profile, filters in queries:
+            matches = index.query(profile, args.matches, filters)
+            target = (np.array([profile[f] for f in index.features]) - index.mean) / index.scale
+            expected = filter_after_scan(scaled.matrix, index.weights, masks[tuple(filters.values())],
+                                         target, args.matches)
+            mismatches += not np.array_equal(matches.positions, expected)
+            searched.append(matches.searched)
+        meta[f'build_s[{rows}]'] = build_s
+        meta[f'mean_searched[{rows}]'] = float(np.mean(searched))
+        print(f"{rows:,} rows: index built in {build_s * 1e3:.1f} ms, "
+              f"{np.mean(searched):,.0f} rows searched per query on average")
+
+        def scan(queries=queries, matrix=scaled.matrix, index=index, masks=masks):
+            for profile, filters in queries:
+                target = (np.array([profile[f] for f in index.features]) - index.mean) / index.scale
+                filter_after_scan(matrix, index.weights, masks[tuple(filters.values())], target, args.matches)
+
+        def indexed(queries=queries, index=index):
+            for profile, filters in queries:
+                index.query(profile, args.matches, filters)
+
+        params = {'rows': rows, 'queries': args.queries}
+        cases += [BenchmarkCase(f'filter_after_scan[{rows}]', scan, params, repeat=3),
+                  BenchmarkCase(f'profile_index[{rows}]', indexed, params, repeat=3)]
+
+    results = run_cases(cases)
+    print(f"\n{'case':<32}{'queries/s':>12}{'speedup':>10}")
+    for name, result in results.items():
+        result['queries_per_s'] = result['params']['queries'] / result['min_s']
+        speedup = ''
+        if name.startswith('profile_index'):
+            scan_s = results[f"filter_after_scan[{result['params']['rows']}]"]['min_s']
+            speedup = f"{scan_s / result['min_s']:.1f}x"
+        print(f"{name:<32}{result['queries_per_s']:>12,.0f}{speedup:>10}")
+    if mismatches:
+        print(f"MISMATCH: {mismatches} queries returned different profiles than filter-after-scan")
+
+    code = finish(args, results, suite='profile_index', mismatches=mismatches, **meta)
+    return code or int(bool(mismatches))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
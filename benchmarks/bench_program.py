@@ -0,0 +1,60 @@
+"""
+Latency benchmark for incremental updates of progressive programs.
+
+Builds a 12-week program, then applies a risk-level change taking effect at
+different weeks, once by regenerating the whole program (the only option
+without week segments) and once with ``ProgramBuilder.update``, which
+regenerates only the future weeks whose spec changed. Also reports an update
+that changes nothing, which should cost only re-deriving the specs.
+
+Usage:
+    python -m benchmarks.bench_program --weeks 2 6 10 --output program.json
+"""
+import argparse
+import random
+import sys
+from dataclasses import replace
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weeks', type=int, nargs='+', default=[2, 6, 10],
+                        help='Weeks at which the risk-level change takes effect')
+    parser.add_argument('--goal', default='Weight Loss')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from models.exercise_model import ExercisePlanGenerator
+    from models.program import ProgramBuilder, start_intensity
+
+    random.seed(SEED)
+    builder = ProgramBuilder(ExercisePlanGenerator())
+    conditions = ['diabetes']
+    start = start_intensity(45, 'Female', conditions)
+    program = builder.build(args.goal, start, conditions, 'Low')
+
+    def updated(week, risk_level):
+        copy = replace(program, weeks=list(program.weeks))
+        return builder.update(copy, risk_level=risk_level, week=week)
+
+    cases = [BenchmarkCase('full_build', lambda: builder.build(args.goal, start, conditions, 'Moderate'),
+                           {'rebuilt_weeks': len(program)}, repeat=3),
+             BenchmarkCase('update_unchanged', lambda: updated(1, 'Low'), {'rebuilt_weeks': 0})]
+    for week in args.weeks:
+        rebuilt = updated(week, 'Moderate')
+        cases.append(BenchmarkCase(f'update_from_week[{week}]', lambda w=week: updated(w, 'Moderate'),
+                                   {'week': week, 'rebuilt_weeks': len(rebuilt)}, repeat=3))
+
+    results = run_cases(cases)
+    full = results['full_build']['min_s']
+    print(f"{'case':<24}{'rebuilt weeks':>15}{'latency':>12}{'vs full build':>16}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['params']['rebuilt_weeks']:>15}{result['min_s'] * 1e3:>9.2f} ms"
+              f"{full / result['min_s']:>15.1f}x")
+    return finish(args, results, suite='program')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
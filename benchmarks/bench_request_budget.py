@@ -0,0 +1,157 @@
+"""
+Latency of the plan request pipeline with and without a per-request budget.
+
+Each request runs the app's three budgeted stages on a generated reference set:
+
+- 'risk': the compact risk forest; the fallback is the Age/BMI grid lookup
+- 'similar': an unindexed full-scan similarity search, the slow stage on large
+  uploads; the fallback is the insights of the user's KMeans cluster
+- 'plans': meal and exercise plan records; the fallback is the last records
+  generated for the same choices
+
+The requests run inline first (budget disabled), then under
+REQUEST_BUDGET_CONFIG, with stage deadlines overridden by --stage-ms (e.g.
+``--stage-ms similar=25`` to make the full scan overrun on a small reference
+set). The benchmark reports each stage and its fallback, the
+p50/p95/max request latency, the share of degraded requests and the
+validation MAE of the risk lookup against the forest's predictions and
+expected scores.
+
+Stages that overrun keep running on the budget pool. Requests arrive
+--interval-ms apart; with shorter intervals on hosts with few CPUs, that
+background work competes with the next request and shows up in its latency.
+
+Usage:
+    python -m benchmarks.bench_request_budget --rows 1000000 --requests 30 --output request_budget.json
+    python -m benchmarks.bench_request_budget --rows 300000 --stage-ms similar=25
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows in the reference set')
+    parser.add_argument('--train-rows', type=int, default=50_000, help='Rows the risk forest is trained on')
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--interval-ms', type=float, default=250, help='Pause between request arrivals')
+    parser.add_argument('--stage-ms', nargs='+', default=[], metavar='STAGE=MS',
+                        help='Override stage deadlines of REQUEST_BUDGET_CONFIG')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    stages_ms = {stage: float(ms) for stage, ms in (item.split('=', 1) for item in args.stage_ms)}
+
+    import numpy as np
+
+    from config import REQUEST_BUDGET_CONFIG
+    from data.dataset_generator import generate_health_dataset
+    from models.exercise_model import ExercisePlanGenerator
+    from models.forest_compression import train_compact_risk_model
+    from models.health_risk_matching import find_similar_profiles, get_profile_insights
+    from models.health_risk_model import get_risk_level, train_risk_lookup
+    from models.meal.meal_model import MealPlanGenerator
+    from utils.cache import LRUCache
+    from utils.data_processing import create_user_features, preprocess_data
+    from utils.request_budget import DEGRADATION, RequestBudget
+    from utils.shared_data import scale_reference_features
+
+    seed_everything()
+    data = preprocess_data(generate_health_dataset(args.rows))
+    scaled = scale_reference_features(data)
+    train, valid = data.iloc[:args.train_rows], data.iloc[args.train_rows:args.train_rows + 20_000]
+    model = train_compact_risk_model(train)
+    lookup = train_risk_lookup(train)
+    exercise_generator = ExercisePlanGenerator()
+    exercise_generator.create_user_clusters(data[['Age', 'BMI', 'HealthRiskScore']])
+    cluster_insights = exercise_generator.cluster_insights(data)
+    meal_generator = MealPlanGenerator()
+    plan_cache = LRUCache(max_entries=REQUEST_BUDGET_CONFIG['plan_cache_entries'])
+
+    rng = np.random.default_rng(0)
+    goals = ["Weight Loss", "Muscle Gain", "Maintenance", "General Fitness"]
+    requests = [(float(data['Age'].iat[i]), data['Gender'].iat[i], float(data['BMI'].iat[i]),
+                 goals[int(rng.integers(len(goals)))]) for i in rng.choice(len(data), args.requests)]
+
+    def handle(budget, age, gender, bmi, goal):
+        features = create_user_features(age, bmi)
+        health_risk = budget.run('risk', lambda: model.predict(features)[0],
+                                 fallback=lambda: lookup.predict(features)[0])
+        risk_level = get_risk_level(health_risk)
+        intensity = "low" if risk_level == "High" else "moderate" if risk_level == "Moderate" else "high"
+        profile = {'Age': age, 'BMI': bmi, 'HealthRiskScore': health_risk}
+
+        def search():
+            return get_profile_insights(find_similar_profiles(profile, data, 5, scaled=scaled,
+                                                              filters={'Gender': gender}))
+
+        budget.run('similar', search, fallback=lambda: cluster_insights[
+            exercise_generator.user_cluster(age, bmi, health_risk)])
+
+        key = (goal, risk_level)
+
+        def build_records():
+            records = (meal_generator.generate_meal_plan_record(goal=goal, dietary_preferences=[],
+                                                                health_conditions=[], risk_level=risk_level),
+                       exercise_generator.get_weekly_exercise_plan_record(intensity=intensity, conditions=[],
+                                                                          goal=goal))
+            plan_cache.put(key, records)
+            return records
+
+        cached = plan_cache.get(key)
+        budget.run('plans', build_records, fallback=(lambda: cached) if cached is not None else None)
+        return budget.finish()
+
+    age, gender, bmi, goal = requests[0]
+    features = create_user_features(age, bmi)
+    profile = {'Age': age, 'BMI': bmi, 'HealthRiskScore': float(model.predict(features)[0])}
+    results = run_cases([
+        BenchmarkCase('risk[forest]', lambda: model.predict(features), {'stage': 'risk'}),
+        BenchmarkCase('risk[lookup]', lambda: lookup.predict(features), {'stage': 'risk'}),
+        BenchmarkCase('similar[full_scan]', lambda: find_similar_profiles(profile, data, 5, scaled=scaled),
+                      {'stage': 'similar', 'rows': len(data)}, repeat=3),
+        BenchmarkCase('similar[cluster]', lambda: cluster_insights[
+            exercise_generator.user_cluster(age, bmi, profile['HealthRiskScore'])], {'stage': 'similar'}),
+    ])
+
+    print(f"\n{'mode':<12}{'p50':>12}{'p95':>12}{'max':>12}{'degraded':>10}")
+    for mode, enabled in (('inline', False), ('budgeted', True)):
+        DEGRADATION.reset()
+        latencies = []
+        for request in requests:
+            started = time.perf_counter()
+            handle(RequestBudget(stages_ms=stages_ms, enabled=enabled), *request)
+            latencies.append(time.perf_counter() - started)
+            time.sleep(args.interval_ms / 1000)
+        snapshot = DEGRADATION.snapshot()
+        latencies.sort()
+        results[f'request[{mode}]'] = {
+            'median_s': statistics.median(latencies),
+            'min_s': latencies[0],
+            'p95_s': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            'max_s': latencies[-1],
+            'runs': len(latencies),
+            'degraded_rate': snapshot['degraded_rate'],
+            'stages': snapshot['stages'],
+            'params': {'budget_enabled': enabled, 'requests': len(requests)},
+        }
+        row = results[f'request[{mode}]']
+        print(f"{mode:<12}{row['median_s'] * 1e3:>9.1f} ms{row['p95_s'] * 1e3:>9.1f} ms"
+              f"{row['max_s'] * 1e3:>9.1f} ms{row['degraded_rate']:>10.0%}")
+
+    X_valid, y_valid = valid[['Age', 'BMI']], valid['HealthRiskScore'].to_numpy(dtype=np.float64)
+    mae = {'forest': float(np.abs(model.predict(X_valid) - y_valid).mean()),
+           'forest_expected': float(np.abs(model.expected_score(X_valid) - y_valid).mean()),
+           'lookup': float(np.abs(lookup.predict(X_valid) - y_valid).mean())}
+    print(f"\nrisk MAE: forest {mae['forest']:.2f}, forest expected score {mae['forest_expected']:.2f}, "
+          f"lookup {mae['lookup']:.2f}")
+    return finish(args, results, suite='request_budget', rows=args.rows,
+                  budget={**REQUEST_BUDGET_CONFIG, 'stages_ms': {**REQUEST_BUDGET_CONFIG['stages_ms'], **stages_ms}},
+                  risk_mae=mae)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
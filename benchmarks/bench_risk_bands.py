@@ -0,0 +1,65 @@
+"""
+Benchmark for risk banding on large score arrays.
+
+Compares the previous per-row pattern (``Series.apply(get_risk_category)``) on a
+subset with the precompiled searchsorted APIs of utils.risk_bands on the full
+array, and checks that every API agrees with the scalar ``RISK_BANDS.label``.
+
+Usage:
+    python -m benchmarks.bench_risk_bands --rows 10000000 --output risk_bands.json
+"""
+import argparse
+import sys
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000, help='Scores to band with the array APIs')
+    parser.add_argument('--apply-rows', type=int, default=1_000_000,
+                        help='Scores to band with the row-wise pandas apply')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    from models.health_risk_matching import get_risk_category
+    from utils.risk_bands import RISK_BANDS
+
+    rng = np.random.default_rng(SEED)
+    scores = rng.uniform(0, 100, args.rows).round(1)
+    scores[::1000] = np.nan
+    series = pd.Series(scores)
+    subset = series.iloc[:args.apply_rows]
+
+    expected = subset.apply(RISK_BANDS.label).to_numpy()
+    if not np.array_equal(RISK_BANDS.label_array(subset.to_numpy()), expected):
+        raise AssertionError("label_array disagrees with the scalar API")
+    categories = pd.Series(RISK_BANDS.categorical(subset)).astype(object).fillna('Unknown')
+    if not np.array_equal(categories.to_numpy(), expected):
+        raise AssertionError("categorical disagrees with the scalar API")
+    print(f"verified {len(subset)} scores: array and categorical APIs match the scalar API")
+
+    cases = [
+        BenchmarkCase(f'series_apply_get_risk_category[n={len(subset)}]',
+                      lambda: subset.apply(get_risk_category), {'rows': len(subset)}, repeat=3),
+        BenchmarkCase(f'RiskBands.codes[n={args.rows}]',
+                      lambda: RISK_BANDS.codes(scores), {'rows': args.rows}),
+        BenchmarkCase(f'RiskBands.label_array[n={args.rows}]',
+                      lambda: RISK_BANDS.label_array(scores), {'rows': args.rows}),
+        BenchmarkCase(f'RiskBands.categorical[n={args.rows}]',
+                      lambda: RISK_BANDS.categorical(scores), {'rows': args.rows}),
+        BenchmarkCase(f'RiskBands.value_counts[n={args.rows}]',
+                      lambda: RISK_BANDS.value_counts(scores), {'rows': args.rows}),
+    ]
+    results = run_cases(cases)
+    for name, result in results.items():
+        result['rows_per_s'] = result['params']['rows'] / result['min_s']
+        print(f"{name:<48}{result['rows_per_s']:>14,.0f} rows/s")
+    return finish(args, results, suite='risk_bands')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Latency budget benchmark for risk prediction explanations.
+
+Trains the risk model, builds the RiskExplainer grid once, and times
+explaining one member (as the app does next to every prediction) and batches
+of members, with ``HealthRiskModel.predict`` timed for reference. Exits
+non-zero when a single explanation or the per-member batch cost is over
+budget. Explanations are checked against brute-force Shapley values from
+the forest for a sample of members.
+
+Usage:
+    python -m benchmarks.bench_risk_explainer --batch 100000 1000000 --output risk_explainer.json
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def brute_force_shapley(model, background, age, bmi):
+    """Age and BMI Shapley values of expected_score, evaluating the forest on the whole background"""
+    import numpy as np
+    import pandas as pd
+
+    def f(ages, bmis):
+        return model.expected_score(pd.DataFrame({'Age': ages, 'BMI': bmis}))
+
+    n = len(background)
+    base = f(background[:, 0], background[:, 1]).mean()
+    with_age = f(np.full(n, age), background[:, 1]).mean()
+    with_bmi = f(background[:, 0], np.full(n, bmi)).mean()
+    full = f(np.array([age]), np.array([bmi]))[0]
+    age_value = 0.5 * ((with_age - base) + (full - with_bmi))
+    return age_value, full - base - age_value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000, help='Training rows')
+    parser.add_argument('--batch', type=int, nargs='+', default=[100_000, 1_000_000], help='Batch sizes')
+    parser.add_argument('--budget-single-ms', type=float, default=1.0,
+                        help='Latency budget for explaining one member')
+    parser.add_argument('--budget-member-ns', type=float, default=200.0,
+                        help='Per-member budget for batch explanations')
+    parser.add_argument('--check', type=int, default=5, help='Members checked against brute-force Shapley')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    from data.dataset_generator import generate_health_dataset
+    from models.health_risk_model import train_health_risk_model
+    from models.risk_explainer import RiskExplainer
+    from utils.data_processing import preprocess_data
+
+    seed_everything()
+    data = preprocess_data(generate_health_dataset(args.rows))
+    model = train_health_risk_model(data)
+    start = time.perf_counter()
+    explainer = RiskExplainer.from_model(model, data)
+    build_s = time.perf_counter() - start
+    print(f"grid {explainer.surface.shape} ({explainer.nbytes / 1e6:.1f} MB) built in {build_s:.2f} s")
+
+    rng = np.random.default_rng(0)
+    background = data[['Age', 'BMI']].to_numpy(dtype=np.float64)
+    errors = []
+    for age, bmi in background[rng.choice(len(background), args.check, replace=False)]:
+        explanation = explainer.explain(age, bmi)
+        exact = brute_force_shapley(model, background, age, bmi)
+        errors.append(max(abs(float(explanation.age) - exact[0]), abs(float(explanation.bmi) - exact[1])))
+    print(f"max deviation from brute-force Shapley over {args.check} members: {max(errors):.2e}")
+
+    member = pd.DataFrame({'Age': [45], 'BMI': [27.3]})
+    cases = [BenchmarkCase('predict_single', lambda: model.predict(member), {'members': 1}),
+             BenchmarkCase('explain_single', lambda: explainer.explain(45, 27.3), {'members': 1})]
+    # predict runs every tree over hundreds of score classes, so it is timed on a small batch only
+    batch = pd.DataFrame({'Age': rng.integers(18, 81, 10_000).astype(np.float64),
+                          'BMI': np.round(rng.uniform(16, 40, 10_000), 1)})
+    cases.append(BenchmarkCase('predict_batch[10000]', lambda: model.predict(batch), {'members': 10_000}, repeat=3))
+    for size in args.batch:
+        ages = rng.integers(18, 81, size).astype(np.float64)
+        bmis = np.round(rng.uniform(16, 40, size), 1)
+        cases.append(BenchmarkCase(f'explain_batch[{size}]', lambda a=ages, b=bmis: explainer.explain(a, b),
+                                   {'members': size}))
+
+    results = run_cases(cases)
+    over_budget = []
+    print(f"\n{'case':<28}{'members':>10}{'per member':>14}{'budget':>14}")
+    for name, result in results.items():
+        members = result['params']['members']
+        per_member_ns = result['min_s'] / members * 1e9
+        result['per_member_ns'] = per_member_ns
+        budget = ''
+        if name == 'explain_single':
+            budget = f"{args.budget_single_ms * 1e6:,.0f} ns"
+            if per_member_ns > args.budget_single_ms * 1e6:
+                over_budget.append(name)
+        elif name.startswith('explain_batch'):
+            budget = f"{args.budget_member_ns:,.0f} ns"
+            if per_member_ns > args.budget_member_ns:
+                over_budget.append(name)
+        print(f"{name:<28}{members:>10,}{per_member_ns:>11,.0f} ns{budget:>14}")
+    for name in over_budget:
+        print(f"OVER BUDGET {name}")
+
+    code = finish(args, results, suite='risk_explainer', build_s=build_s, max_shapley_error=max(errors))
+    return code or int(bool(over_budget))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark for the vectorized population scoring engine.
+
+Compares the scalar scoring functions (calculate_health_metrics,
+AIWorkoutPlanGenerator._calculate_intensity, get_risk_level) applied row by row
+against utils.scoring, and verifies that both give identical results.
+
+Usage:
+    python -m benchmarks.bench_scoring --rows 1000000 --output scoring.json
+"""
+import argparse
+import sys
+
+from benchmarks.common import SEED, BenchmarkCase, add_output_arguments, finish, run_cases
+
+
+def make_population(n_rows: int, seed: int = SEED):
+    """Synthetic members: generator ages/BMIs plus random distinct conditions"""
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from utils.scoring import CONDITIONS
+
+    data = generate_health_dataset(n_rows)
+    rng = np.random.default_rng(seed)
+    conditions = rng.random((n_rows, len(CONDITIONS))) < 0.15
+    return (data['Age'].to_numpy(), data['BMI'].to_numpy(), conditions,
+            data['HealthRiskScore'].to_numpy())
+
+
+def score_scalar(age, bmi, conditions, risk_scores):
+    from models.exercise_plan import AIWorkoutPlanGenerator, WorkoutParameters
+    from models.health_risk_model import get_risk_level
+    from utils.data_processing import calculate_health_metrics
+    from utils.scoring import CONDITIONS
+
+    planner = AIWorkoutPlanGenerator()
+    health, intensity, risk = [], [], []
+    for a, b, mask, r in zip(age.tolist(), bmi.tolist(), conditions.tolist(), risk_scores.tolist()):
+        member_conditions = [name for name, flag in zip(CONDITIONS, mask) if flag]
+        health.append(calculate_health_metrics(a, b, member_conditions))
+        intensity.append(planner._calculate_intensity(
+            WorkoutParameters(age=a, gender='Female', conditions=member_conditions)))
+        risk.append(get_risk_level(r))
+    return health, intensity, risk
+
+
+def verify(age, bmi, conditions, risk_scores) -> int:
+    """Check the vectorized engine against the scalar functions; returns the rows checked"""
+    import numpy as np
+
+    from utils.scoring import health_scores, intensity_tiers, risk_levels
+
+    health, intensity, risk = score_scalar(age, bmi, conditions, risk_scores)
+    if not np.array_equal(np.asarray(health, dtype=np.float64), health_scores(age, bmi, conditions)):
+        raise AssertionError("health_scores differs from calculate_health_metrics")
+    if not np.array_equal(np.asarray(intensity), intensity_tiers(age, conditions)):
+        raise AssertionError("intensity_tiers differs from _calculate_intensity")
+    if not np.array_equal(np.asarray(risk), risk_levels(risk_scores)):
+        raise AssertionError("risk_levels differs from get_risk_level")
+    return len(age)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Population size for the vectorized engine')
+    parser.add_argument('--scalar-rows', type=int, default=50_000,
+                        help='Rows scored (and verified) with the scalar functions')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from utils.scoring import score_population
+
+    age, bmi, conditions, risk_scores = make_population(args.rows)
+    n_scalar = min(args.scalar_rows, args.rows)
+    checked = verify(age[:n_scalar], bmi[:n_scalar], conditions[:n_scalar], risk_scores[:n_scalar])
+    print(f"verified {checked} rows: vectorized results identical to scalar functions")
+
+    cases = [
+        BenchmarkCase(f'scalar_scoring[n={n_scalar}]',
+                      lambda: score_scalar(age[:n_scalar], bmi[:n_scalar],
+                                           conditions[:n_scalar], risk_scores[:n_scalar]),
+                      {'rows': n_scalar}, repeat=3),
+        BenchmarkCase(f'score_population[n={args.rows}]',
+                      lambda: score_population(age, bmi, conditions, risk_scores),
+                      {'rows': args.rows}),
+    ]
+    results = run_cases(cases)
+    for name, result in results.items():
+        result['rows_per_s'] = result['params']['rows'] / result['min_s']
+        print(f"{name:<48}{result['rows_per_s']:>14,.0f} rows/s")
+    return finish(args, results, suite='scoring')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Scaling benchmark for sharded exact similarity search.
+
+Times ``find_similar_profiles`` over a generated reference set, unsharded and
+with a ``ShardedIndex`` run by thread and process pools of 1 to N workers.
+A third of the queries filter by gender. Every sharded result must equal the
+unsharded one, profiles and similarity scores alike; the benchmark exits
+non-zero if any differs. The serial sharded case (no pool) separates the gain
+from per-shard partial top-k selection from the gain of running shards in
+parallel, which is bounded by the CPUs available (recorded in the results).
+
+Usage:
+    python -m benchmarks.bench_sharded_search --rows 1000000 --workers 1 2 4 --output sharded_search.json
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--strategy', default='age', choices=['age', 'hash'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--executors', nargs='+', default=['serial', 'thread', 'process'],
+                        choices=['serial', 'thread', 'process'])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--matches', type=int, default=5)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from config import FEATURES
+    from data.dataset_generator import generate_health_dataset
+    from models.health_risk_matching import find_similar_profiles
+    from models.sharded_search import ShardedIndex
+    from utils.data_processing import preprocess_data
+    from utils.shared_data import scale_reference_features
+
+    seed_everything()
+    data = preprocess_data(generate_health_dataset(args.rows))
+    scaled = scale_reference_features(data)
+    rng = np.random.default_rng(0)
+    queries = [({feature: float(data[feature].iat[i]) for feature in FEATURES},
+                {'Gender': data['Gender'].iat[i]} if n % 3 == 0 else None)
+               for n, i in enumerate(rng.choice(len(data), args.queries))]
+
+    def search(shards=None):
+        return [find_similar_profiles(profile, data, args.matches, scaled=scaled, filters=filters, shards=shards)
+                for profile, filters in queries]
+
+    expected = search()
+    cases = [BenchmarkCase('unsharded', search, {'workers': 1, 'queries': args.queries}, repeat=3)]
+    indexes, mismatches = [], 0
+    for executor in args.executors:
+        for workers in args.workers if executor != 'serial' else [1]:
+            shards = ShardedIndex(data, scaled, n_shards=args.shards, strategy=args.strategy,
+                                  executor=executor, workers=workers)
+            indexes.append(shards)
+            for got, want in zip(search(shards), expected):
+                mismatches += not (got.index.equals(want.index)
+                                   and np.array_equal(got['SimilarityScore'].to_numpy(),
+                                                      want['SimilarityScore'].to_numpy()))
+            name = executor if executor == 'serial' else f'{executor}[workers={workers}]'
+            cases.append(BenchmarkCase(name, lambda s=shards: search(s),
+                                       {'executor': executor, 'workers': workers, 'queries': args.queries},
+                                       repeat=3))
+
+    results = run_cases(cases)
+    for shards in indexes:
+        shards.close()
+
+    baseline = results['unsharded']['min_s']
+    print(f"\n{'case':<24}{'queries/s':>12}{'speedup':>10}")
+    for name, result in results.items():
+        result['queries_per_s'] = args.queries / result['min_s']
+        print(f"{name:<24}{result['queries_per_s']:>12,.1f}{baseline / result['min_s']:>9.2f}x")
+    if mismatches:
+        print(f"MISMATCH: {mismatches} sharded results differ from the unsharded search")
+
+    code = finish(args, results, suite='sharded_search', rows=args.rows, shards=args.shards,
+                  strategy=args.strategy, cpus=os.cpu_count(), mismatches=mismatches)
+    return code or int(bool(mismatches))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
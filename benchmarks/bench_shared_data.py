@@ -0,0 +1,136 @@
+"""
+Host memory benchmark for the shared-memory reference dataset.
+
+Starts N concurrent worker processes that either parse their own copy of the
+dataset (``private``: load_dataset + scale_reference_features, as every app
+worker did before) or attach the published copy (``shared``:
+utils.shared_data.attach_dataset), touch every page of it, and report their
+proportional set size (PSS). Summed over workers, PSS is what the workers cost
+the host. Idle workers that only import the libraries give the baseline that
+is subtracted to get the dataset's share.
+
+Linux only (reads /proc/self/smaps_rollup).
+
+Usage:
+    python -m benchmarks.bench_shared_data --rows 1000000 --workers 1 2 4 8 --output shared_data.json
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import add_output_arguments, finish
+
+
+def memory_kb() -> dict:
+    """Rss and Pss of the current process in KiB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def worker(mode: str, source: str, loaded, measure, reports) -> None:
+    import numpy as np
+    import pandas  # noqa: F401 - every app worker has these loaded
+    import sklearn.preprocessing  # noqa: F401
+
+    started = time.perf_counter()
+    if mode == 'private':
+        from utils.dataset_cache import load_dataset
+        from utils.shared_data import scale_reference_features
+
+        with open(source, 'rb') as f:
+            data = load_dataset(f.read())
+        scaled = scale_reference_features(data)
+    elif mode == 'shared':
+        from utils.shared_data import attach_dataset
+
+        shared = attach_dataset(source)
+        data, scaled = shared.data, shared.scaled
+    else:
+        data = scaled = None
+    if data is not None:
+        # Touch every page as a similarity query would
+        float(np.asarray(scaled.matrix).sum())
+        for name in data.columns:
+            column = data[name]
+            if column.dtype.kind in 'biuf':
+                float(column.to_numpy().sum())
+            else:
+                len(column.value_counts())
+    elapsed = time.perf_counter() - started
+    loaded.put(elapsed)
+    # Pss splits shared pages between the processes mapping them, so only sample once all have loaded
+    measure.wait()
+    reports.put({'load_s': elapsed, **memory_kb()})
+    measure.wait()  # stay alive until the parent has every report
+
+
+def run_workers(mode: str, source: str, n_workers: int) -> dict:
+    """Start n workers, wait until all hold the dataset, and sum their memory"""
+    context = multiprocessing.get_context('spawn')
+    loaded, reports = context.Queue(), context.Queue()
+    measure = context.Barrier(n_workers + 1)
+    processes = [context.Process(target=worker, args=(mode, source, loaded, measure, reports))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        loaded.get()
+    measure.wait()
+    reports = [reports.get() for _ in processes]
+    measure.wait()
+    for process in processes:
+        process.join()
+    return {
+        'workers': n_workers,
+        'pss_mb': sum(r['pss'] for r in reports) / 1024,
+        'rss_mb': sum(r['rss'] for r in reports) / 1024,
+        'load_s': [r['load_s'] for r in reports],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows in the generated reference dataset')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to measure')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from data.dataset_generator import generate_health_dataset
+    from utils.dataset_cache import content_hash, load_dataset
+    from utils.shared_data import publish_dataset, unpublish_dataset
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'reference.csv')
+        generate_health_dataset(args.rows).to_csv(csv_path, index=False)
+        with open(csv_path, 'rb') as f:
+            raw = f.read()
+        directory = publish_dataset(load_dataset(raw), content_hash(raw))
+        try:
+            results = {}
+            print(f"{'mode':<10}{'workers':>8}{'total PSS':>14}{'dataset PSS':>14}{'per worker':>14}{'load':>10}")
+            for n_workers in args.workers:
+                idle = run_workers('idle', '', n_workers)
+                for mode, source in (('private', csv_path), ('shared', directory)):
+                    result = run_workers(mode, source, n_workers)
+                    result['dataset_pss_mb'] = result['pss_mb'] - idle['pss_mb']
+                    result['min_s'] = min(result['load_s'])
+                    result['params'] = {'mode': mode, 'workers': n_workers, 'rows': args.rows}
+                    results[f'{mode}[workers={n_workers}]'] = result
+                    print(f"{mode:<10}{n_workers:>8}{result['pss_mb']:>11.1f} MB{result['dataset_pss_mb']:>11.1f} MB"
+                          f"{result['dataset_pss_mb'] / n_workers:>11.1f} MB{max(result['load_s']):>9.2f}s",
+                          flush=True)
+        finally:
+            unpublish_dataset(directory)
+    return finish(args, results, suite='shared_data')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Similar-profile requests with and without the similarity result cache.
+
+Generates a reference dataset and a stream of user queries drawn from the
+same population: ages and BMIs as the generator draws them, both genders,
+and diets with the generator's weights. Risk scores come from the joint
+model, as in the app. The benchmark then replays the stream:
+
+- searching every query (``find_similar_profiles`` on a ``ProfileIndex``)
+- through an empty ``SimilarityCache``
+- through a cache whose hot region was precomputed first
+- again through the filled cache, where every query repeats
+
+It reports the hit rate of each cached replay and how long precomputing took.
+Every cached result must equal a fresh search of its quantized query; the
+benchmark exits non-zero if one differs.
+
+Usage:
+    python -m benchmarks.bench_similarity_cache --rows 100000 --queries 5000 --output similarity_cache.json
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.common import BenchmarkCase, add_output_arguments, finish, run_cases, seed_everything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=5_000, help='Queries in the replayed stream')
+    parser.add_argument('--matches', type=int, default=5)
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from models.health_risk_matching import find_similar_profiles, get_profile_insights
+    from models.joint_model import train_joint_model
+    from models.profile_index import ProfileIndex
+    from models.similarity_cache import SimilarityCache
+    from utils.data_processing import preprocess_data
+    from utils.shared_data import scale_reference_features
+
+    seed_everything()
+    data = preprocess_data(generate_health_dataset(args.rows))
+    scaled = scale_reference_features(data)
+    index = ProfileIndex(data, scaled)
+    model = train_joint_model(data)
+
+    rng = np.random.default_rng(0)
+    ages = np.clip(rng.normal(35, 12, args.queries), 18, 80).astype(int)
+    bmis = np.clip(rng.normal(25, 4, args.queries), 16, 35).round(1)
+    risks = model.expected_score(np.column_stack([ages, bmis]))
+    genders = rng.choice(['Male', 'Female'], args.queries)
+    diets = rng.choice(['Standard', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Dairy-Free'], args.queries,
+                       p=[0.6, 0.15, 0.1, 0.1, 0.05])
+    stream = [{'Age': int(age), 'BMI': float(bmi), 'HealthRiskScore': float(risk), 'Gender': gender,
+               'DietaryPreference': diet} for age, bmi, risk, gender, diet in zip(ages, bmis, risks, genders, diets)]
+
+    def search(profile):
+        profiles = find_similar_profiles(profile, data, args.matches, scaled=scaled, index=index,
+                                         filters={'Gender': profile['Gender'],
+                                                  'DietaryPreference': profile['DietaryPreference']})
+        return profiles, get_profile_insights(profiles)
+
+    caches = {'cached': SimilarityCache(), 'precomputed': SimilarityCache()}
+    timings = {}
+
+    def reset(name):
+        caches[name] = SimilarityCache()
+        if name == 'precomputed':
+            start = time.perf_counter()
+            caches[name].precompute('bench', search, model, args.matches)
+            timings['precompute_s'] = time.perf_counter() - start
+
+    def replay(name):
+        cache = caches[name]
+        for profile in stream:
+            cache.get('bench', profile, args.matches, search)
+
+    quantize = SimilarityCache().quantize
+    params = {'rows': args.rows, 'queries': args.queries}
+    cases = [
+        BenchmarkCase('stream[search]', lambda: [search(quantize(profile)) for profile in stream], params, repeat=1),
+        BenchmarkCase('stream[cached]', lambda: replay('cached'), params, repeat=1, setup=lambda: reset('cached')),
+        BenchmarkCase('stream[precomputed]', lambda: replay('precomputed'), params, repeat=1,
+                      setup=lambda: reset('precomputed')),
+    ]
+    results = run_cases(cases)
+    # Hit rates of the first replays, before the repeat case replays the filled cache again
+    first_stats = {name: cache.stats() for name, cache in caches.items()}
+    results.update(run_cases([BenchmarkCase('stream[repeat]', lambda: replay('cached'), params, repeat=3)]))
+
+    mismatches = 0
+    cache = caches['precomputed']
+    for profile in stream[:200]:
+        cached = cache.get('bench', profile, args.matches, search)[0]
+        mismatches += not cached.equals(search(quantize(profile))[0])
+
+    report = {'precompute_s': timings['precompute_s'], 'mismatches': mismatches}
+    print(f"\n{'replay':<14}{'hit rate':>10}{'entries':>10}")
+    for name, stats in first_stats.items():
+        report[f'hit_rate[{name}]'] = stats['hit_rate']
+        print(f"{name:<14}{stats['hit_rate']:>10.1%}{stats['entries']:>10,}")
+    print(f"Precomputing the hot region took {timings['precompute_s']:.1f} s; {mismatches} mismatches")
+    code = finish(args, results, suite='similarity_cache', report=report)
+    return 1 if mismatches else code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
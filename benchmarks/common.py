@@ -0,0 +1,164 @@
+"""Shared timing, reporting and baseline-comparison helpers for the benchmarks."""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+SEED = 42
+
+
+def seed_everything(seed: int = SEED) -> None:
+    """Seed both random number generators used by the generators"""
+    import numpy as np
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+@dataclass
+class BenchmarkCase:
+    """A named callable to time, with the parameters that describe it"""
+    name: str
+    func: Callable[[], Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+    repeat: int = 5
+    setup: Optional[Callable[[], None]] = None
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_run_time: float = 0.1,
+            setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Time a callable.
+
+    The number of loops per run is calibrated so that one run lasts at least
+    ``min_run_time`` seconds; ``repeat`` runs are then timed and summarized as
+    seconds per call.
+
+    Returns:
+    dict: median/min/mean/stdev seconds per call plus the loop and run counts
+    """
+    if setup is not None:
+        setup()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_run_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_run_time / 10 else 2
+
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'mean_s': statistics.fmean(timings),
+        'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'loops': loops,
+        'runs': repeat,
+    }
+
+
+def run_cases(cases: List[BenchmarkCase], verbose: bool = True) -> Dict[str, Dict]:
+    results = {}
+    for case in cases:
+        result = measure(case.func, repeat=case.repeat, setup=case.setup)
+        result['params'] = case.params
+        results[case.name] = result
+        if verbose:
+            print(f"{case.name:<48}{format_seconds(result['median_s']):>12}", flush=True)
+    return results
+
+
+def environment() -> Dict:
+    """Versions and platform details stored alongside results"""
+    info = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'seed': SEED,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    for module in ('numpy', 'pandas', 'sklearn', 'scipy'):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            pass
+    return info
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def save_results(path: str, results: Dict[str, Dict], **meta) -> None:
+    with open(path, 'w') as f:
+        json.dump({'meta': {**environment(), **meta}, 'results': results}, f, indent=2, default=str)
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current: Dict[str, Dict], baseline: Dict[str, Dict],
+                    tolerance: float = 0.2) -> List[str]:
+    """
+    Compare timings against a baseline.
+
+    The best-of-runs time is compared, as it is the least sensitive to scheduler noise.
+
+    Returns:
+    List[str]: One message per benchmark slower than the baseline by more than ``tolerance``
+    """
+    print(f"\n{'benchmark':<48}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<48}{'-':>12}{format_seconds(result['min_s']):>12}{'new':>8}")
+            continue
+        ratio = result['min_s'] / base['min_s'] if base['min_s'] else float('inf')
+        flag = '  REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<48}{format_seconds(base['min_s']):>12}"
+              f"{format_seconds(result['min_s']):>12}{ratio:>8.2f}{flag}")
+        if flag:
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--output', help='Write machine-readable results to this JSON file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown before a benchmark counts as a regression')
+
+
+def finish(args: argparse.Namespace, results: Dict[str, Dict], **meta) -> int:
+    """Save and/or compare results as requested on the command line; returns the exit code"""
+    if args.output:
+        save_results(args.output, results, **meta)
+    if args.compare:
+        regressions = compare_results(results, load_results(args.compare)['results'], args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,172 @@
+"""
+Import-time benchmark for the app's start-up path.
+
+Each target module is imported in a fresh interpreter under ``python -X importtime``
+and the per-module cumulative times are parsed from stderr. Results are written as
+JSON and can be compared against a saved baseline to catch cold-start regressions.
+
+Usage:
+    python -m benchmarks.import_time --output import_time.json
+    python -m benchmarks.import_time --compare import_time.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = [
+    'config',
+    'models',
+    'utils',
+    'utils.data_processing',
+    'utils.dataset_cache',
+    'models.health_risk_model',
+    'models.health_risk_matching',
+    'models.exercise_model',
+    'models.exercise_plan',
+    'models.meal.meal_model',
+    'app',
+]
+
+# Third-party packages that should only be imported on first use, never at start-up
+HEAVY_PACKAGES = ('numpy', 'pandas', 'sklearn', 'scipy')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+    List[Tuple[str, int, int, int]]: (module, self_us, cumulative_us, depth) per line
+    """
+    records = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def measure_target(target: str, python: str = sys.executable) -> Dict:
+    """Import one module in a fresh interpreter and summarize its import tree"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+
+    records = parse_importtime(proc.stderr)
+    cumulative = {module: cum for module, _, cum, _ in records}
+    self_times = {module: self_us for module, self_us, _, _ in records}
+    top_level = {}
+    for module, _, cum, _ in records:
+        package = module.split('.')[0]
+        top_level[package] = max(top_level.get(package, 0), cum)
+
+    return {
+        'cumulative_us': cumulative.get(target, 0),
+        'self_us': self_times.get(target, 0),
+        'total_us': sum(self_times.values()),
+        'heavy_imports': sorted(p for p in HEAVY_PACKAGES if p in top_level),
+        'packages': top_level,
+    }
+
+
+def run(targets: List[str], repeat: int = 5) -> Dict:
+    """Measure each target ``repeat`` times and keep the median"""
+    results = {}
+    for target in targets:
+        # Discard a warm-up run so bytecode compilation does not skew the numbers
+        measure_target(target)
+        runs = [measure_target(target) for _ in range(repeat)]
+        packages = {}
+        for package in runs[0]['packages']:
+            packages[package] = int(statistics.median(r['packages'].get(package, 0) for r in runs))
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]
+        results[target] = {
+            'cumulative_us': int(statistics.median(r['cumulative_us'] for r in runs)),
+            'total_us': int(statistics.median(r['total_us'] for r in runs)),
+            'heavy_imports': runs[0]['heavy_imports'],
+            'heaviest_packages': heaviest,
+        }
+    return {
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.25, slack_us: int = 20000) -> List[str]:
+    """
+    Compare a run against a baseline.
+
+    A target regresses when its total import time grows by more than ``tolerance``
+    (relative) and ``slack_us`` (absolute), or when it starts importing a heavy package.
+
+    Returns:
+    List[str]: Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for target, result in current['results'].items():
+        base = baseline.get('results', {}).get(target)
+        if base is None:
+            continue
+        before, after = base['total_us'], result['total_us']
+        if after > before * (1 + tolerance) and after - before > slack_us:
+            regressions.append(f"{target}: {before / 1000:.1f} ms -> {after / 1000:.1f} ms")
+        new_heavy = set(result['heavy_imports']) - set(base['heavy_imports'])
+        if new_heavy:
+            regressions.append(f"{target}: now imports {', '.join(sorted(new_heavy))} at start-up")
+    return regressions
+
+
+def print_report(report: Dict, baseline: Dict = None) -> None:
+    print(f"{'module':<32}{'total ms':>10}{'baseline':>10}  heavy imports")
+    for target, result in report['results'].items():
+        base = (baseline or {}).get('results', {}).get(target)
+        base_ms = f"{base['total_us'] / 1000:.1f}" if base else '-'
+        heavy = ', '.join(result['heavy_imports']) or '-'
+        print(f"{target:<32}{result['total_us'] / 1000:>10.1f}{base_ms:>10}  {heavy}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help='Modules to import')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per module (median is kept)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown')
+    args = parser.parse_args(argv)
+
+    report = run(args.targets, repeat=args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(report, baseline, tolerance=args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark suite for the models and generators.
+
+All data comes from ``data.dataset_generator.generate_health_dataset`` and every
+case is seeded, so runs are reproducible. Results are written as JSON and can be
+compared against a saved baseline to catch regressions before deploying.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output baseline.json
+    python -m benchmarks.run_benchmarks --compare baseline.json
+    python -m benchmarks.run_benchmarks --profile full --filter find_similar
+"""
+import argparse
+import sys
+from typing import List
+
+from benchmarks.common import (
+    SEED,
+    BenchmarkCase,
+    add_output_arguments,
+    finish,
+    run_cases,
+    seed_everything,
+)
+
+# Reference-set sizes used for the similarity search benchmarks in each profile
+PROFILES = {
+    'quick': [10_000],
+    'standard': [10_000, 1_000_000],
+    'full': [10_000, 1_000_000, 10_000_000],
+}
+
+TRAINING_ROWS = 10_000
+
+
+def build_cases(profile: str, name_filter: str = None) -> List[BenchmarkCase]:
+    import numpy as np
+
+    from data.dataset_generator import generate_health_dataset
+    from models.exercise_model import ExercisePlanGenerator
+    from models.exercise_plan import AIWorkoutPlanGenerator, WorkoutParameters
+    from models.health_risk_matching import find_similar_profiles, get_profile_insights
+    from models.health_risk_model import train_health_risk_model
+    from models.meal.meal_model import MealPlanGenerator
+    from utils.data_processing import create_user_features, preprocess_data
+
+    training_data = preprocess_data(generate_health_dataset(TRAINING_ROWS))
+    model = train_health_risk_model(training_data)
+    batch_features = training_data[['Age', 'BMI']].to_numpy()
+    single_features = create_user_features(35, 24.5)
+    target_profile = {'Age': 35, 'BMI': 24.5, 'HealthRiskScore': float(model.predict(single_features)[0])}
+    neighbours = find_similar_profiles(target_profile, training_data, n_matches=5)
+
+    exercise_generator = ExercisePlanGenerator()
+    exercise_generator.create_user_clusters(training_data[['Age', 'BMI', 'HealthRiskScore']])
+    meal_generator = MealPlanGenerator()
+    workout_generator = AIWorkoutPlanGenerator()
+    workout_params = WorkoutParameters(age=45, gender='Female', conditions=['diabetes', 'hypertension'])
+
+    cases = [
+        BenchmarkCase('generate_health_dataset[n=10000]',
+                      lambda: generate_health_dataset(TRAINING_ROWS), {'n_samples': TRAINING_ROWS}),
+        BenchmarkCase('train_health_risk_model[n=10000]',
+                      lambda: train_health_risk_model(training_data), {'rows': TRAINING_ROWS}, repeat=3),
+        BenchmarkCase('HealthRiskModel.predict[single]',
+                      lambda: model.predict(single_features), {'rows': 1}),
+        BenchmarkCase(f'HealthRiskModel.predict[batch={TRAINING_ROWS}]',
+                      lambda: model.predict(batch_features), {'rows': TRAINING_ROWS}),
+        BenchmarkCase('get_profile_insights[k=5]',
+                      lambda: get_profile_insights(neighbours), {'rows': len(neighbours)}),
+        BenchmarkCase('MealPlanGenerator.generate_meal_plan',
+                      lambda: meal_generator.generate_meal_plan(
+                          goal='Weight Loss', dietary_preferences=['vegetarian'],
+                          health_conditions=['diabetes'], risk_level='Moderate'),
+                      setup=seed_everything),
+        BenchmarkCase('ExercisePlanGenerator.get_weekly_exercise_plan',
+                      lambda: exercise_generator.get_weekly_exercise_plan(
+                          intensity='moderate', conditions=['asthma'], goal='Weight Loss'),
+                      setup=seed_everything),
+        BenchmarkCase('AIWorkoutPlanGenerator.generate_weekly_plan',
+                      lambda: workout_generator.generate_weekly_plan(workout_params),
+                      setup=seed_everything),
+    ]
+
+    for n_rows in PROFILES[profile]:
+        if name_filter and name_filter not in f'find_similar_profiles[n={n_rows}]':
+            continue
+        reference = training_data if n_rows == TRAINING_ROWS else preprocess_data(generate_health_dataset(n_rows))
+        cases.append(BenchmarkCase(
+            f'find_similar_profiles[n={n_rows}]',
+            # Bind the reference set now; the loop variable would otherwise be shared
+            lambda reference=reference: find_similar_profiles(target_profile, reference, n_matches=5),
+            {'rows': n_rows, 'n_matches': 5},
+            repeat=3 if n_rows >= 1_000_000 else 5
+        ))
+
+    # Keep numpy's global state seeded for anything that runs afterwards
+    np.random.seed(SEED)
+    if name_filter:
+        cases = [case for case in cases if name_filter in case.name]
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='standard',
+                        help='Reference-set sizes for similarity search (full includes 10M rows)')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this text')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    seed_everything()
+    cases = build_cases(args.profile, args.filter)
+    results = run_cases(cases)
+    return finish(args, results, suite='models', profile=args.profile)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
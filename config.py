@@ -1,13 +1,16 @@
+import os
+
 # Configuration settings for the application
 APP_CONFIG = {
     'min_age': 18,
     'max_age': 80,
     'min_bmi': 16.0,
     'max_bmi': 35.0,
+    # Half-open [lower, upper) score ranges per risk level (see utils/risk_bands.py)
     'risk_score_ranges': {
         'low': (0, 33),
-        'moderate': (34, 66),
-        'high': (67, 100)
+        'moderate': (33, 66),
+        'high': (66, 100)
     }
 }
 
@@ -25,3 +28,279 @@ MODEL_CONFIG = {
 
 # Feature columns used in the models
 FEATURES = ['Age', 'BMI', 'HealthRiskScore']
+
+# Health conditions understood by the planners, in bitmask order
+CONDITIONS = ('diabetes', 'hypertension', 'asthma', 'arthritis', 'heart disease')
+
+# Columns an uploaded training dataset must provide
+REQUIRED_COLUMNS = ['Age', 'Gender', 'BMI', 'HealthRiskScore', 'ExerciseCapacity']
+
+# Cache configuration for uploaded datasets and their trained models
+CACHE_CONFIG = {
+    'datasets': {
+        'max_entries': 8,
+        'max_bytes': 512 * 1024 * 1024
+    },
+    # Rendered per-day plan markdown, keyed by plan id (see utils/plan_rendering.py)
+    'plan_renders': {
+        'max_entries': 256,
+        'max_bytes': 16 * 1024 * 1024
+    }
+}
+
+# Stage timing instrumentation (see utils/instrumentation.py); enable with HEALTHALIGN_INSTRUMENTATION=1
+INSTRUMENTATION_CONFIG = {
+    'enabled': os.environ.get('HEALTHALIGN_INSTRUMENTATION', '0').lower() in ('1', 'true', 'yes'),
+    'buckets_ms': (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+}
+
+# Shared-memory reference dataset (see utils/shared_data.py); workers attach the
+# directory named by the environment variable instead of parsing their own copy
+SHARED_DATA_CONFIG = {
+    'env': 'HEALTHALIGN_SHARED_DATA',
+    'root': 'healthalign'
+}
+
+# Hyperparameter sweep grid (see models/sweep.py); each list is expanded into MODEL_CONFIG variants
+SWEEP_CONFIG = {
+    'grid': {
+        'random_forest': {
+            'n_estimators': [25, 50, 100],
+            'max_depth': [None, 12]
+        },
+        'kmeans': {
+            'n_clusters': [3, 4, 5, 6, 8]
+        }
+    },
+    'test_size': 0.2,
+    'random_state': 42,
+    'silhouette_sample_size': 2000
+}
+
+# Meal plan optimizer (see models/meal/meal_optimizer.py)
+MEAL_CONFIG = {
+    # 'greedy' (vectorized coordinate descent) or 'milp' (scipy.optimize.milp, falls back to greedy)
+    'method': 'greedy',
+    # Relative weight of each daily target: calories, protein, carbs, fats
+    'target_weights': (2.0, 1.0, 1.0, 1.0),
+    # A dish may appear at most this many times a week while alternatives remain
+    'max_repeats': 2,
+    # Added to the loss for every earlier use of a dish in the week
+    'repeat_penalty': 0.02,
+    'restarts': 4,
+    'max_sweeps': 10,
+    'milp_time_limit': 2.0,
+    # Dish tags excluded by dietary preferences and health conditions (see models/meal/dish_nutrition.py)
+    'diet_exclusions': {
+        'vegan': ('dairy',),
+        'gluten-free': ('gluten',),
+        'dairy-free': ('dairy',)
+    },
+    'condition_exclusions': {
+        'diabetes': ('high_gi',),
+        'hypertension': ('high_sodium',),
+        'heart disease': ('fried', 'full_fat')
+    }
+}
+
+# Weekly exercise scheduler (see models/exercise_scheduler.py)
+EXERCISE_CONFIG = {
+    # 'scheduler' (constraint-aware) or 'template' (fixed weekly order, random picks)
+    'method': 'scheduler',
+    'max_consecutive_training_days': 3,
+    # Weekly minutes may deviate this much (relative) from the goal's target
+    'duration_tolerance': 0.15,
+    'warmup_minutes': 10,
+    'minutes_per_set': 3,
+    # Added to a day's score for every earlier use of one of its exercises in the week
+    'repeat_penalty': 0.15,
+    'restarts': 4,
+    # Highest intensity allowed with each condition, and exercise tags it excludes
+    # (see models/exercise_attributes.py)
+    'condition_intensity_caps': {
+        'heart disease': 'low',
+        'hypertension': 'moderate'
+    },
+    'condition_exclusions': {
+        'arthritis': ('high_impact',),
+        'asthma': ('hiit',),
+        'hypertension': ('heavy',),
+        'heart disease': ('high_impact', 'hiit', 'heavy')
+    }
+}
+
+# Multi-week progressive programs (see models/program.py)
+PROGRAM_CONFIG = {
+    'weeks': 12,
+    # Intensity steps above the starting tier per week, capped at 'high' and by the risk level
+    'intensity_steps': (0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2),
+    # Training minutes relative to the weekly plan; every fourth week is a lighter deload week
+    'volume': (0.8, 0.9, 1.0, 0.7, 0.9, 1.0, 1.1, 0.75, 1.0, 1.1, 1.2, 0.8),
+    # Highest intensity allowed at each predicted risk level
+    'risk_intensity_caps': {
+        'Low': 'high',
+        'Moderate': 'moderate',
+        'High': 'low'
+    }
+}
+
+# Persistent plan store (see models/plan_store.py); the app saves generated plans
+# when HEALTHALIGN_PLAN_STORE names a database file
+PLAN_STORE_CONFIG = {
+    'path': os.environ.get('HEALTHALIGN_PLAN_STORE'),
+    'pool_size': 4,
+    # Rows per write transaction
+    'batch_size': 1000,
+    'busy_timeout_ms': 30000
+}
+
+# Risk explanations (see models/risk_explainer.py); grid steps match the resolution of the
+# training data and app inputs, so grid lookups reproduce the forest exactly
+EXPLAINER_CONFIG = {
+    'age_step': 1,
+    'bmi_step': 0.1
+}
+
+# Filtered similarity search (see models/profile_index.py)
+PROFILE_INDEX_CONFIG = {
+    # Partition columns; when a filtered partition has too few rows, filters are dropped
+    # from the last column backwards until enough profiles match
+    'columns': ('Gender', 'DietaryPreference'),
+    # Squared-distance weight of each scaled similarity feature
+    'feature_weights': {'Age': 1.0, 'BMI': 1.0, 'HealthRiskScore': 1.0},
+    # Added to the squared distance when a profile's category differs from the query's
+    # in a column that is not filtered on (e.g. after widening)
+    'category_weights': {'Gender': 1.0, 'DietaryPreference': 0.5}
+}
+
+# Streaming dataset statistics and drift checks (see utils/dataset_stats.py)
+DRIFT_CONFIG = {
+    'chunksize': 100_000,
+    # Weighted centroids kept per numeric column; columns with fewer distinct values are exact
+    'sketch_size': 512,
+    # PSI bins are the reference dataset's quantiles
+    'psi_bins': 10,
+    'psi_warn': 0.1,
+    'psi_retrain': 0.25,
+    'ks_retrain': 0.1,
+    # Model inputs and targets; drift in any of them means the models should be retrained
+    'model_columns': ('Age', 'BMI', 'HealthRiskScore', 'ExerciseCapacity')
+}
+
+# Risk forest compression (see models/forest_compression.py)
+COMPRESSION_CONFIG = {
+    # Tree limits tried against the unconstrained forest
+    'grid': {
+        'max_depth': [None, 16, 12, 8],
+        'min_samples_leaf': [1, 5, 10, 20, 40],
+        'ccp_alpha': [0.0]
+    },
+    'validation_size': 0.2,
+    'random_state': 42,
+    # The smallest candidate within this many validation MAE points of the unconstrained forest wins
+    'mae_tolerance': 0.25,
+    # Limits chosen by `python -m models.forest_compression` on data/health_fitness_dataset.csv
+    'limits': {'max_depth': 8, 'min_samples_leaf': 40}
+}
+
+# Sharded exact similarity search (see models/sharded_search.py)
+SHARD_CONFIG = {
+    'shards': 4,
+    # 'age' (contiguous Age ranges) or 'hash' (hash of row position)
+    'strategy': 'age',
+    # 'thread', 'process' (shards attached from shared memory) or 'serial'
+    'executor': 'thread',
+    # Pool size; None means one worker per shard, at most the CPU count
+    'workers': None
+}
+
+# Per-request latency budget (see utils/request_budget.py)
+REQUEST_BUDGET_CONFIG = {
+    'enabled': True,
+    # Whole request, and each stage that has a cheaper fallback answer
+    'total_ms': 6000,
+    'stages_ms': {
+        # Waiting for a dataset's background training; the previous model version answers on overrun
+        'training': 3000,
+        'risk': 500,
+        # Similar profiles; insights of the user's KMeans cluster answer on overrun
+        'similar': 1500,
+        # Meal and exercise plan records; the last plan for the same inputs answers on overrun
+        'plans': 2000
+    },
+    'workers': 4,
+    # Plan records kept for the 'plans' fallback
+    'plan_cache_entries': 256,
+    # BMI width of the risk lookup grid cells (ages are whole years)
+    'lookup_bmi_step': 1.0
+}
+
+# Age × BMI × gender × diet cohort cube (see models/cohort_cube.py)
+COHORT_CONFIG = {
+    # Bucket boundaries; values below the first or from the last edge form the outer buckets
+    'age_edges': [25, 30, 35, 40, 45, 50, 55, 60, 65, 70],
+    'bmi_edges': [18.5, 25.0, 30.0, 35.0],
+    'genders': ('Female', 'Male'),
+    'diets': ('Standard', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Dairy-Free'),
+    'measures': ('HealthRiskScore', 'ExerciseCapacity'),
+    # Smallest cohort a user is compared with; smaller ones are widened in this order
+    'min_count': 30,
+    'widen': ('diet', 'gender', 'bmi', 'age')
+}
+
+# Collapsing repeated feature tuples into weighted points (see utils/compaction.py)
+COMPACTION_CONFIG = {
+    # Risk model training: its features and target
+    'training_keys': ('Age', 'BMI', 'HealthRiskScore'),
+    # Similar-profile search: its features and the filter columns, so every partition keeps its profiles
+    'index_keys': ('Age', 'BMI', 'HealthRiskScore', 'Gender', 'DietaryPreference'),
+    # Compact only when there are at least this many rows per unique point
+    'min_ratio': 1.5
+}
+
+# Background model training (see models/training_executor.py)
+TRAINING_CONFIG = {
+    # Dataset trained when the server starts, so the first upload is answered by a ready model;
+    # HEALTHALIGN_WARM_START='' disables it
+    'warm_start': os.environ.get('HEALTHALIGN_WARM_START', 'data/health_fitness_dataset.csv'),
+    # Training jobs run one at a time by default so they do not compete with requests for CPUs
+    'workers': 1,
+    # Finished jobs remembered for progress reporting; older ones are forgotten
+    'max_jobs': 8,
+    # How often a page with training in progress polls it
+    'poll_seconds': 1.0
+}
+
+# Joint risk and exercise capacity forest (see models/joint_model.py)
+JOINT_MODEL_CONFIG = {
+    'features': ('Age', 'BMI'),
+    # Categorical features, encoded as their index in these lists; to use one, add it to 'features'
+    # too, e.g. 'Gender' with {'Gender': ('Female', 'Male')}
+    'categories': {},
+    'targets': ('HealthRiskScore', 'ExerciseCapacity'),
+    # Tree limits; the ones validated for the risk forest
+    'limits': COMPRESSION_CONFIG['limits'],
+    # Half-open [lower, upper) predicted capacity ranges per exercise intensity. Capacity runs
+    # roughly opposite to risk (about 100 minus the score), so these mirror the risk bands
+    'capacity_intensity_ranges': {
+        'low': (0, 34),
+        'moderate': (34, 67),
+        'high': (67, 100)
+    }
+}
+
+# Memoized similar-profile searches (see models/similarity_cache.py)
+SIMILARITY_CACHE_CONFIG = {
+    'max_entries': 20000,
+    'max_bytes': 64 * 1024 * 1024,
+    # Queries are rounded to these steps, the resolution of the data and app inputs
+    'steps': {'Age': 1, 'BMI': 0.1, 'HealthRiskScore': 0.1},
+    # Region searched after each dataset's models are trained; enable with HEALTHALIGN_PRECOMPUTE_SIMILAR=1
+    'precompute': {
+        'enabled': os.environ.get('HEALTHALIGN_PRECOMPUTE_SIMILAR', '0').lower() in ('1', 'true', 'yes'),
+        'ages': (25, 45),
+        'bmis': (20.0, 30.0),
+        'genders': ('Female', 'Male'),
+        'diets': ('Standard',)
+    }
+}
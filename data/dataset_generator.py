@@ -28,31 +28,23 @@ def generate_health_dataset(n_samples: int = 10000) -> pd.DataFrame:
     bmi = np.clip(bmi, 16, 40).round(1)  # Clip to realistic BMI range
 
     # Generate health risk score (influenced by age and BMI)
-    health_risk = np.zeros(n_samples)
-    for i in range(n_samples):
-        # Base risk
-        base_risk = np.random.normal(50, 15)
+    # Base risk
+    base_risk = np.random.normal(50, 15, n_samples)
 
-        # Age factor (higher risk with age)
-        age_factor = (age[i] - 18) / 62 * 30  # Max 30 points from age
+    # Age factor (higher risk with age)
+    age_factor = (age - 18) / 62 * 30  # Max 30 points from age
 
-        # BMI factor (higher risk for very low or very high BMI)
-        bmi_factor = abs(bmi[i] - 22) * 2  # Optimal BMI around 22
+    # BMI factor (higher risk for very low or very high BMI)
+    bmi_factor = np.abs(bmi - 22) * 2  # Optimal BMI around 22
 
-        # Combine factors
-        total_risk = base_risk + age_factor + bmi_factor
-        health_risk[i] = np.clip(total_risk, 0, 100).round(1)
+    # Combine factors
+    health_risk = np.clip(base_risk + age_factor + bmi_factor, 0, 100).round(1)
 
     # Generate exercise capacity (inversely related to health risk)
-    exercise_capacity = np.zeros(n_samples)
-    for i in range(n_samples):
-        # Base capacity
-        base_capacity = 100 - health_risk[i]
-
-        # Add some random variation
-        variation = np.random.normal(0, 10)
-
-        exercise_capacity[i] = np.clip(base_capacity + variation, 0, 100).round(1)
+    # Base capacity plus some random variation
+    base_capacity = 100 - health_risk
+    variation = np.random.normal(0, 10, n_samples)
+    exercise_capacity = np.clip(base_capacity + variation, 0, 100).round(1)
 
     # Generate dietary preferences
     preferences = ['Standard', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Dairy-Free']
@@ -72,10 +64,6 @@ def generate_health_dataset(n_samples: int = 10000) -> pd.DataFrame:
     return df
 
 
-# Generate the dataset
-dataset = generate_health_dataset(10000)
-
-
 # Add some correlations and patterns
 def adjust_for_patterns(df: pd.DataFrame) -> pd.DataFrame:
     """Add realistic patterns and correlations to the dataset"""
@@ -103,17 +91,31 @@ def adjust_for_patterns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-# Apply patterns and save dataset
-final_dataset = adjust_for_patterns(dataset)
-final_dataset.to_csv('health_fitness_dataset.csv', index=False)
-
-# Print summary statistics
-print("\nDataset Summary:")
-print("-" * 50)
-print(final_dataset.describe())
-print("\nValue Counts:")
-print("-" * 50)
-print("\nGender Distribution:")
-print(final_dataset['Gender'].value_counts(normalize=True))
-print("\nDietary Preference Distribution:")
-print(final_dataset['DietaryPreference'].value_counts(normalize=True))
\ No newline at end of file
+if __name__ == "__main__":
+    import os
+    import sys
+
+    # Run as a script (python data/dataset_generator.py) only data/ is on the path, not the repo root;
+    # imported before anything is written so a failure cannot leave a half-finished run behind
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.dataset_stats import DatasetStats
+
+    # Generate the dataset
+    dataset = generate_health_dataset(10000)
+
+    # Apply patterns and save dataset
+    final_dataset = adjust_for_patterns(dataset)
+    final_dataset.to_csv('health_fitness_dataset.csv', index=False)
+
+    # Print summary statistics, streamed back from the saved file in one pass
+    stats = DatasetStats.from_file('health_fitness_dataset.csv')
+    stats.save('health_fitness_dataset.stats.json')
+    print("\nDataset Summary:")
+    print("-" * 50)
+    print(stats.summary())
+    print("\nValue Counts:")
+    print("-" * 50)
+    print("\nGender Distribution:")
+    print(stats.categorical['Gender'].frequencies())
+    print("\nDietary Preference Distribution:")
+    print(stats.categorical['DietaryPreference'].frequencies())
@@ -0,0 +1,47 @@
+"""Health planning models.
+
+Public names are resolved on first access so that ``import models`` does not
+pull in scikit-learn, numpy or pandas until a model is actually used.
+"""
+import importlib
+
+_EXPORTS = {
+    'HealthRiskModel': 'models.health_risk_model',
+    'get_risk_level': 'models.health_risk_model',
+    'train_health_risk_model': 'models.health_risk_model',
+    'RiskLookup': 'models.health_risk_model',
+    'JointHealthModel': 'models.joint_model',
+    'find_similar_profiles': 'models.health_risk_matching',
+    'get_profile_insights': 'models.health_risk_matching',
+    'get_risk_category': 'models.health_risk_matching',
+    'ExercisePlanGenerator': 'models.exercise_model',
+    'AIWorkoutPlanGenerator': 'models.exercise_plan',
+    'WorkoutParameters': 'models.exercise_plan',
+    'MealPlanGenerator': 'models.meal.meal_model',
+    'MealPlanRecord': 'models.plan_records',
+    'ExercisePlanRecord': 'models.plan_records',
+    'PlanCodec': 'models.plan_records',
+    'PlanStore': 'models.plan_store',
+    'ProfileIndex': 'models.profile_index',
+    'CohortCube': 'models.cohort_cube',
+    'CompactRiskModel': 'models.forest_compression',
+    'ShardedIndex': 'models.sharded_search',
+    'SimilarityCache': 'models.similarity_cache',
+    'TrainingExecutor': 'models.training_executor',
+    'Program': 'models.program',
+    'ProgramBuilder': 'models.program',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
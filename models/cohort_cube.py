@@ -0,0 +1,261 @@
+# models/cohort_cube.py
+"""
+Population statistics per Age × BMI × gender × diet cohort.
+
+The cube holds a count and, for each measure (HealthRiskScore and
+ExerciseCapacity), a sum and a sum of squares per cell. These are enough for
+the mean and standard deviation of any cohort. Cells are filled with one
+bincount per array over the flattened cell index of every row.
+
+Each dimension has one extra slot holding the total over its buckets, and
+the totals are summed along every axis in turn. Every rollup (e.g. all
+diets, or all ages of one BMI bucket) is therefore already materialized, and
+any cohort query is a single array lookup, independent of the dataset size.
+
+Count, sums and sums of squares add up, so appended rows (``update``) and
+cubes of separate chunks (``merge``) combine exactly, rollups included.
+Rows with a gender or diet outside the configured categories, or with
+missing values, are skipped and counted in ``skipped``.
+"""
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from config import COHORT_CONFIG
+from utils.instrumentation import timed
+
+DIMENSIONS = ('age', 'bmi', 'gender', 'diet')
+ALL = 'All'
+
+
+class Cohort(NamedTuple):
+    """Bucket labels, size and per-measure mean and standard deviation of one cohort"""
+    labels: Dict[str, str]
+    count: int
+    mean: Dict[str, float]
+    std: Dict[str, float]
+
+    def share_below(self, measure: str, value: float) -> Optional[float]:
+        """Approximate share of the cohort below value, assuming the measure is normally distributed"""
+        std = self.std[measure]
+        if not self.count or not std > 0:
+            return None
+        return 0.5 * (1 + math.erf((value - self.mean[measure]) / (std * math.sqrt(2))))
+
+
+def _bucket_labels(edges: Sequence[float], whole: bool) -> List[str]:
+    """Labels of the buckets np.digitize assigns for these edges, e.g. '<25', '25–29', '≥70'"""
+    labels = [f"<{edges[0]:g}"]
+    for low, high in zip(edges, edges[1:]):
+        labels.append(f"{low:g}–{high - 1 if whole else high:g}")
+    labels.append(f"≥{edges[-1]:g}")
+    return labels
+
+
+class CohortCube:
+    """Counts, sums and sums of squares per Age × BMI × gender × diet cell, with every rollup materialized"""
+
+    def __init__(self, age_edges: Sequence[float] = COHORT_CONFIG['age_edges'],
+                 bmi_edges: Sequence[float] = COHORT_CONFIG['bmi_edges'],
+                 genders: Sequence[str] = COHORT_CONFIG['genders'],
+                 diets: Sequence[str] = COHORT_CONFIG['diets'],
+                 measures: Sequence[str] = COHORT_CONFIG['measures']):
+        self.age_edges = np.asarray(age_edges, dtype=np.float64)
+        self.bmi_edges = np.asarray(bmi_edges, dtype=np.float64)
+        self.genders = tuple(genders)
+        self.diets = tuple(diets)
+        self.measures = tuple(measures)
+        self.labels = {
+            'age': _bucket_labels(age_edges, whole=True),
+            'bmi': _bucket_labels(bmi_edges, whole=False),
+            'gender': list(self.genders),
+            'diet': list(self.diets),
+        }
+        self._slots = {dimension: {label: i for i, label in enumerate(labels)}
+                       for dimension, labels in self.labels.items()}
+        # Bucket cells, then one extra slot per dimension for its total
+        self.cells = tuple(len(self.labels[dimension]) for dimension in DIMENSIONS)
+        shape = tuple(size + 1 for size in self.cells)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.sums = np.zeros((len(self.measures),) + shape)
+        self.sumsq = np.zeros((len(self.measures),) + shape)
+        self.rows = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_frame(cls, data, **kwargs) -> 'CohortCube':
+        cube = cls(**kwargs)
+        cube.update(data)
+        return cube
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable, **kwargs) -> 'CohortCube':
+        """Build from DataFrame chunks, e.g. utils.dataset_stats.read_chunks of a large file"""
+        cube = cls(**kwargs)
+        for chunk in chunks:
+            cube.update(chunk)
+        return cube
+
+    @property
+    def nbytes(self) -> int:
+        return self.count.nbytes + self.sums.nbytes + self.sumsq.nbytes
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _same_layout(self, other: 'CohortCube') -> bool:
+        return (np.array_equal(self.age_edges, other.age_edges) and np.array_equal(self.bmi_edges, other.bmi_edges)
+                and (self.genders, self.diets, self.measures) == (other.genders, other.diets, other.measures))
+
+    @staticmethod
+    def _rollup(cells: np.ndarray, first_axis: int = 0) -> np.ndarray:
+        """Append each dimension's total as its last slot; totals of totals cover every rollup"""
+        for axis in range(first_axis, cells.ndim):
+            cells = np.concatenate([cells, cells.sum(axis=axis, keepdims=True)], axis=axis)
+        return cells
+
+    @timed('cohort_cube_update')
+    def update(self, data) -> 'CohortCube':
+        """Add rows, e.g. an appended chunk; every rollup is updated with them"""
+        import pandas as pd
+
+        values = data[list(self.measures)].to_numpy(dtype=np.float64)
+        age = data['Age'].to_numpy(dtype=np.float64)
+        bmi = data['BMI'].to_numpy(dtype=np.float64)
+        # Values outside the categories become missing first, which pandas no longer does itself
+        gender = pd.Categorical(data['Gender'].where(data['Gender'].isin(self.genders)),
+                                categories=self.genders).codes
+        diet = pd.Categorical(data['DietaryPreference'].where(data['DietaryPreference'].isin(self.diets)),
+                              categories=self.diets).codes
+        keep = ((gender >= 0) & (diet >= 0) & np.isfinite(age) & np.isfinite(bmi)
+                & np.isfinite(values).all(axis=1))
+
+        # np.digitize puts values below the first edge in bucket 0 and from the last edge on in the last
+        flat = np.ravel_multi_index((np.digitize(age[keep], self.age_edges), np.digitize(bmi[keep], self.bmi_edges),
+                                     gender[keep], diet[keep]), self.cells)
+        size = int(np.prod(self.cells))
+        values = values[keep]
+        count = np.bincount(flat, minlength=size).reshape(self.cells)
+        sums = np.stack([np.bincount(flat, weights=column, minlength=size)
+                         for column in values.T]).reshape((-1,) + self.cells)
+        sumsq = np.stack([np.bincount(flat, weights=column * column, minlength=size)
+                          for column in values.T]).reshape((-1,) + self.cells)
+
+        self.count += self._rollup(count)
+        self.sums += self._rollup(sums, first_axis=1)
+        self.sumsq += self._rollup(sumsq, first_axis=1)
+        kept = int(keep.sum())
+        self.rows += kept
+        self.skipped += len(keep) - kept
+        return self
+
+    def merge(self, other: 'CohortCube') -> 'CohortCube':
+        """Add another cube with the same buckets, categories and measures"""
+        if not self._same_layout(other):
+            raise ValueError("Cannot merge cohort cubes with different buckets, categories or measures")
+        self.count += other.count
+        self.sums += other.sums
+        self.sumsq += other.sumsq
+        self.rows += other.rows
+        self.skipped += other.skipped
+        return self
+
+    def _slot(self, dimension: str, value) -> Optional[int]:
+        """Slot of a value along a dimension: its bucket, the total for None, or None if unknown"""
+        if value is None:
+            return self.cells[DIMENSIONS.index(dimension)]
+        if dimension == 'age':
+            return int(np.digitize(value, self.age_edges))
+        if dimension == 'bmi':
+            return int(np.digitize(value, self.bmi_edges))
+        return self._slots[dimension].get(value)
+
+    def _summary(self, index: tuple, labels: Dict[str, str]) -> Cohort:
+        count = int(self.count[index])
+        sums = self.sums[(slice(None),) + index]
+        sumsq = self.sumsq[(slice(None),) + index]
+        mean, std = {}, {}
+        for i, measure in enumerate(self.measures):
+            mean[measure] = float(sums[i] / count) if count else float('nan')
+            # Sample standard deviation, as pandas reports it
+            std[measure] = (math.sqrt(max(sumsq[i] - sums[i] * sums[i] / count, 0.0) / (count - 1))
+                            if count > 1 else float('nan'))
+        return Cohort(labels, count, mean, std)
+
+    def cohort(self, age: Optional[float] = None, bmi: Optional[float] = None, gender: Optional[str] = None,
+               diet: Optional[str] = None) -> Cohort:
+        """
+        Statistics of one cohort; a single lookup in the materialized cube.
+
+        Parameters:
+        age (float): Age in the age bucket wanted; None rolls ages up
+        bmi (float): BMI in the BMI bucket wanted; None rolls BMIs up
+        gender (str): Gender category; None rolls genders up
+        diet (str): Dataset DietaryPreference category; None rolls diets up
+
+        Returns:
+        Cohort: Empty (count 0) when gender or diet is not one of the cube's categories
+        """
+        values = dict(zip(DIMENSIONS, (age, bmi, gender, diet)))
+        index = tuple(self._slot(dimension, values[dimension]) for dimension in DIMENSIONS)
+        labels = {dimension: ALL if values[dimension] is None else str(values[dimension])
+                  for dimension in DIMENSIONS}
+        for dimension, slot in zip(('age', 'bmi'), index):
+            if values[dimension] is not None:
+                labels[dimension] = self.labels[dimension][slot]
+        if None in index:
+            return Cohort(labels, 0, {measure: float('nan') for measure in self.measures},
+                          {measure: float('nan') for measure in self.measures})
+        return self._summary(index, labels)
+
+    @timed('cohort_lookup')
+    def compare(self, age: float, bmi: float, gender: Optional[str] = None, diet: Optional[str] = None,
+                min_count: int = COHORT_CONFIG['min_count'],
+                widen: Sequence[str] = COHORT_CONFIG['widen']) -> Cohort:
+        """The most specific cohort of a profile with at least min_count members, rolling dimensions up in order"""
+        values = {'age': age, 'bmi': bmi, 'gender': gender, 'diet': diet}
+        cohort = self.cohort(**values)
+        for dimension in widen:
+            if cohort.count >= min_count:
+                break
+            values[dimension] = None
+            cohort = self.cohort(**values)
+        return cohort
+
+    def table(self, *dimensions: str):
+        """
+        Rollup over the given dimensions, one row per bucket combination.
+
+        Parameters:
+        dimensions (str): Dimensions to group by, from DIMENSIONS; the others are rolled up
+
+        Returns:
+        pd.DataFrame: Bucket labels, count, and mean and std of each measure (NaN for empty cohorts)
+        """
+        import pandas as pd
+
+        unknown = set(dimensions) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown cohort dimensions {sorted(unknown)}; expected some of {DIMENSIONS}")
+        index = tuple(slice(0, size) if dimension in dimensions else size
+                      for dimension, size in zip(DIMENSIONS, self.cells))
+        count = self.count[index].astype(np.float64)
+        sums = self.sums[(slice(None),) + index]
+        sumsq = self.sumsq[(slice(None),) + index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = sums / count
+            std = np.sqrt(np.maximum(sumsq - sums * mean, 0.0) / (count - 1))
+            std[:, count <= 1] = np.nan
+
+        grouped = [dimension for dimension in DIMENSIONS if dimension in dimensions]
+        if grouped:
+            frame = pd.MultiIndex.from_product([self.labels[dimension] for dimension in grouped],
+                                               names=grouped).to_frame(index=False)
+        else:
+            frame = pd.DataFrame(index=range(1))
+        frame['count'] = count.reshape(-1).astype(np.int64)
+        for i, measure in enumerate(self.measures):
+            frame[f'{measure}_mean'] = mean[i].reshape(-1)
+            frame[f'{measure}_std'] = std[i].reshape(-1)
+        return frame
@@ -0,0 +1,55 @@
+# models/exercise_attributes.py
+"""
+Scheduling attributes for every exercise in the exercise database.
+
+Each entry maps an exercise name to ``(muscle_groups, tags)``. Muscle groups
+are the primary groups loaded by strength work and drive recovery spacing
+(see models/exercise_scheduler.py; core work is exempt). Tags mark properties
+that health conditions exclude (see ``EXERCISE_CONFIG``):
+
+- ``high_impact``: running and jumping, hard on joints
+- ``hiit``: maximal-effort intervals
+- ``heavy``: heavy barbell lifts with breath holding under load
+"""
+from typing import Dict, Tuple
+
+MUSCLE_GROUPS = ('legs', 'chest', 'back', 'shoulders', 'arms', 'core')
+TAGS = ('high_impact', 'hiit', 'heavy')
+
+EXERCISE_ATTRIBUTES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    # Cardio
+    "Walking": (('legs',), ()),
+    "Brisk Walking": (('legs',), ()),
+    "Running": (('legs',), ('high_impact',)),
+    "Swimming": (('back', 'shoulders'), ()),
+    "Stationary Bike": (('legs',), ()),
+    "Cycling": (('legs',), ()),
+    "Elliptical": (('legs',), ()),
+    "Rowing": (('back', 'legs'), ()),
+    "HIIT Cardio": (('legs', 'core'), ('high_impact', 'hiit')),
+
+    # Strength
+    "Bodyweight Squats": (('legs',), ()),
+    "Wall Push-ups": (('chest',), ()),
+    "Chair Dips": (('arms', 'shoulders'), ()),
+    "Standing Calf Raises": (('legs',), ()),
+    "Dumbbell Squats": (('legs', 'core'), ()),
+    "Push-ups": (('chest', 'core'), ()),
+    "Dumbbell Rows": (('back',), ()),
+    "Lunges": (('legs', 'core'), ()),
+    "Barbell Squats": (('legs', 'core'), ('heavy',)),
+    "Bench Press": (('chest', 'shoulders'), ('heavy',)),
+    "Deadlifts": (('back', 'legs', 'core'), ('heavy',)),
+    "Pull-ups": (('back', 'arms'), ()),
+
+    # Flexibility
+    "Basic Stretching": ((), ()),
+    "Gentle Yoga": (('core',), ()),
+    "Joint Mobility": ((), ()),
+    "Dynamic Stretching": ((), ()),
+    "Yoga Flow": (('core',), ()),
+    "Pilates": (('core',), ()),
+    "Advanced Yoga": (('core',), ()),
+    "Power Stretching": ((), ()),
+    "Dynamic Mobility Work": ((), ()),
+}
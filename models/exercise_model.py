@@ -1,20 +1,94 @@
 # models/exercise_model.py
-from sklearn.cluster import KMeans
-from config import MODEL_CONFIG
+from config import EXERCISE_CONFIG, MODEL_CONFIG
+from models.plan_records import (
+    DayWorkout,
+    ExerciseCatalog,
+    ExercisePlanRecord,
+    decode_conditions,
+    encode_conditions,
+)
+from utils.instrumentation import timed
 from typing import Dict, List
 import random
 
 
 class ExercisePlanGenerator:
-    def __init__(self):
-        self.kmeans = KMeans(**MODEL_CONFIG['kmeans'])
+    # Weekly structure per goal; any other goal (Maintenance, General Fitness) uses "default"
+    WEEKLY_STRUCTURES = {
+        "Weight Loss": [
+            {"day": 1, "focus": "Cardio + Strength", "duration": 60},
+            {"day": 2, "focus": "Cardio + Flexibility", "duration": 45},
+            {"day": 3, "focus": "Strength + Cardio", "duration": 60},
+            {"day": 4, "focus": "Rest", "duration": 15},
+            {"day": 5, "focus": "Cardio + Strength", "duration": 60},
+            {"day": 6, "focus": "Cardio + Flexibility", "duration": 45},
+            {"day": 7, "focus": "Rest", "duration": 15}
+        ],
+        "Muscle Gain": [
+            {"day": 1, "focus": "Upper Body Strength", "duration": 60},
+            {"day": 2, "focus": "Lower Body Strength", "duration": 60},
+            {"day": 3, "focus": "Rest", "duration": 15},
+            {"day": 4, "focus": "Push Exercises", "duration": 60},
+            {"day": 5, "focus": "Pull Exercises", "duration": 60},
+            {"day": 6, "focus": "Legs + Core", "duration": 60},
+            {"day": 7, "focus": "Rest", "duration": 15}
+        ],
+        "default": [
+            {"day": 1, "focus": "Full Body Strength", "duration": 45},
+            {"day": 2, "focus": "Cardio", "duration": 45},
+            {"day": 3, "focus": "Flexibility + Core", "duration": 45},
+            {"day": 4, "focus": "Rest", "duration": 15},
+            {"day": 5, "focus": "Upper Body Strength", "duration": 45},
+            {"day": 6, "focus": "Lower Body Strength", "duration": 45},
+            {"day": 7, "focus": "Light Cardio + Flexibility", "duration": 30}
+        ]
+    }
+    REST_DAY_EXERCISES = ["Light stretching", "Walking if desired", "Foam rolling"]
+
+    def __init__(self, kmeans_config=None):
+        from sklearn.cluster import KMeans
+
+        self.kmeans = KMeans(**(kmeans_config or MODEL_CONFIG['kmeans']))
         self.exercise_database = self._initialize_exercise_database()
+        self.catalog = ExerciseCatalog(self.exercise_database)
+        self._scheduler = None
+
+    @property
+    def scheduler(self):
+        """Constraint-aware week scheduler, built on first use so that importing the app stays cheap"""
+        if self._scheduler is None:
+            from models.exercise_scheduler import ExerciseScheduler
+
+            self._scheduler = ExerciseScheduler(self.catalog)
+        return self._scheduler
 
+    @classmethod
+    def focus_types(cls) -> List[str]:
+        """Every distinct day focus used by the weekly structures"""
+        return list(dict.fromkeys(day["focus"] for structure in cls.WEEKLY_STRUCTURES.values()
+                                  for day in structure))
+
+    @timed('kmeans_clustering')
     def create_user_clusters(self, data):
         """Create user clusters based on health characteristics"""
         self.kmeans.fit(data)
         return self.kmeans
 
+    @timed('cluster_insights')
+    def cluster_insights(self, data) -> Dict[int, dict]:
+        """Profile insights of each cluster's members; data must be the rows the clusters were fitted on"""
+        from models.health_risk_matching import get_profile_insights
+
+        return {int(label): get_profile_insights(members)
+                for label, members in data.groupby(self.kmeans.labels_)}
+
+    def user_cluster(self, age: float, bmi: float, health_risk: float) -> int:
+        """Cluster a user's Age, BMI and risk score falls in"""
+        import pandas as pd
+
+        user = pd.DataFrame([[age, bmi, health_risk]], columns=self.kmeans.feature_names_in_)
+        return int(self.kmeans.predict(user)[0])
+
     def _initialize_exercise_database(self) -> Dict:
         """Initialize the database of exercises for different intensities and goals"""
         return {
@@ -79,83 +153,80 @@ class ExercisePlanGenerator:
 
     def get_weekly_exercise_plan(self, intensity: str, conditions: List[str], goal: str) -> Dict:
         """Generate a 7-day exercise plan based on intensity, conditions, and goals"""
-        weekly_plan = {}
+        return self.render_exercise_plan(self.get_weekly_exercise_plan_record(intensity, conditions, goal))
+
+    @timed('exercise_generation')
+    def get_weekly_exercise_plan_record(self, intensity: str, conditions: List[str],
+                                        goal: str) -> ExercisePlanRecord:
+        """Generate a 7-day exercise plan as a compact record of catalog exercise ids"""
+        weekly_structure = self.WEEKLY_STRUCTURES.get(goal, self.WEEKLY_STRUCTURES["default"])
 
-        # Define weekly structure based on goal
-        if goal == "Weight Loss":
-            weekly_structure = [
-                {"day": 1, "focus": "Cardio + Strength", "duration": 60},
-                {"day": 2, "focus": "Cardio + Flexibility", "duration": 45},
-                {"day": 3, "focus": "Strength + Cardio", "duration": 60},
-                {"day": 4, "focus": "Rest", "duration": 15},
-                {"day": 5, "focus": "Cardio + Strength", "duration": 60},
-                {"day": 6, "focus": "Cardio + Flexibility", "duration": 45},
-                {"day": 7, "focus": "Rest", "duration": 15}
-            ]
-        elif goal == "Muscle Gain":
-            weekly_structure = [
-                {"day": 1, "focus": "Upper Body Strength", "duration": 60},
-                {"day": 2, "focus": "Lower Body Strength", "duration": 60},
-                {"day": 3, "focus": "Rest", "duration": 15},
-                {"day": 4, "focus": "Push Exercises", "duration": 60},
-                {"day": 5, "focus": "Pull Exercises", "duration": 60},
-                {"day": 6, "focus": "Legs + Core", "duration": 60},
-                {"day": 7, "focus": "Rest", "duration": 15}
-            ]
-        else:  # Maintenance or General Fitness
-            weekly_structure = [
-                {"day": 1, "focus": "Full Body Strength", "duration": 45},
-                {"day": 2, "focus": "Cardio", "duration": 45},
-                {"day": 3, "focus": "Flexibility + Core", "duration": 45},
-                {"day": 4, "focus": "Rest", "duration": 15},
-                {"day": 5, "focus": "Upper Body Strength", "duration": 45},
-                {"day": 6, "focus": "Lower Body Strength", "duration": 45},
-                {"day": 7, "focus": "Light Cardio + Flexibility", "duration": 30}
-            ]
-
-        # Generate exercises for each day
-        for day_plan in weekly_structure:
-            day = day_plan["day"]
-            focus = day_plan["focus"]
-            duration = day_plan["duration"]
-
-            if "Rest" in focus:
-                exercises = ["Light stretching", "Walking if desired", "Foam rolling"]
+        if EXERCISE_CONFIG['method'] == 'scheduler':
+            # Reorders the template's days; durations are the chosen exercises' actual minutes
+            intensity, days, relaxed = self.scheduler.schedule(weekly_structure, intensity, conditions)
+        else:
+            relaxed = False
+            # Fixed template order with random picks for each day
+            days = []
+            for day_plan in weekly_structure:
+                focus = day_plan["focus"]
+                exercise_ids = () if "Rest" in focus else tuple(self._pick_exercises_for_focus(focus, intensity))
+                days.append(DayWorkout(focus, day_plan["duration"], exercise_ids))
+
+        return ExercisePlanRecord(
+            goal=goal,
+            intensity=intensity,
+            conditions=encode_conditions(conditions),
+            days=tuple(days),
+            relaxed=relaxed
+        )
+
+    def render_exercise_plan(self, record: ExercisePlanRecord) -> Dict:
+        """Render an exercise plan record into the display dict used by the UI"""
+        conditions = decode_conditions(record.conditions)
+        weekly_plan = {}
+        for day, workout in enumerate(record.days, start=1):
+            if "Rest" in workout.focus:
+                exercises = list(self.REST_DAY_EXERCISES)
                 notes = "Focus on recovery and mobility"
             else:
-                exercises = self._get_exercises_for_focus(focus, intensity, conditions)
-                notes = self._get_exercise_notes(focus, conditions, intensity)
+                exercises = self._modify_for_conditions(
+                    [self._format_exercise(item_id) for item_id in workout.exercise_ids], conditions)
+                notes = self._get_exercise_notes(workout.focus, conditions, record.intensity)
 
             weekly_plan[day] = {
-                "focus": focus,
-                "duration": duration,
+                "focus": workout.focus,
+                "duration": workout.duration,
                 "exercises": exercises,
                 "notes": notes
             }
 
         return weekly_plan
 
-    def _get_exercises_for_focus(self, focus: str, intensity: str, conditions: List[str]) -> List[str]:
-        """Get appropriate exercises based on the day's focus"""
-        exercises = []
+    def _pick_exercises_for_focus(self, focus: str, intensity: str) -> List[int]:
+        """Pick catalog ids of exercises matching the day's focus"""
+        picks = []
 
         if "Cardio" in focus:
-            cardio = random.choice(self.exercise_database["cardio"][intensity])
-            exercises.append(f"{cardio['name']} - {cardio['duration']} ({cardio['intensity']})")
+            picks.append(("cardio", random.choice(self.exercise_database["cardio"][intensity])))
 
         if "Strength" in focus:
-            strength_exercises = random.sample(self.exercise_database["strength"][intensity], 3)
-            for exercise in strength_exercises:
-                exercises.append(f"{exercise['name']} - {exercise['sets']} sets of {exercise['reps']}")
+            for exercise in random.sample(self.exercise_database["strength"][intensity], 3):
+                picks.append(("strength", exercise))
 
         if "Flexibility" in focus:
-            flexibility = random.choice(self.exercise_database["flexibility"][intensity])
-            exercises.append(f"{flexibility['name']} - {flexibility['duration']}")
+            picks.append(("flexibility", random.choice(self.exercise_database["flexibility"][intensity])))
 
-        # Modify exercises based on conditions
-        exercises = self._modify_for_conditions(exercises, conditions)
+        return [self.catalog.ids[(category, intensity, exercise["name"])] for category, exercise in picks]
 
-        return exercises
+    def _format_exercise(self, item_id: int) -> str:
+        """Display text for one catalog exercise"""
+        category, _, exercise = self.catalog.items[item_id]
+        if category == "cardio":
+            return f"{exercise['name']} - {exercise['duration']} ({exercise['intensity']})"
+        if category == "strength":
+            return f"{exercise['name']} - {exercise['sets']} sets of {exercise['reps']}"
+        return f"{exercise['name']} - {exercise['duration']}"
 
     def _modify_for_conditions(self, exercises: List[str], conditions: List[str]) -> List[str]:
         """Modify exercises based on health conditions"""
@@ -1,7 +1,8 @@
-import numpy as np
 from dataclasses import dataclass
 from typing import List, Dict
 
+from utils.instrumentation import timed
+
 
 @dataclass
 class WorkoutParameters:
@@ -93,6 +94,8 @@ class AIWorkoutPlanGenerator:
 
     def _generate_day_plan(self, intensity: str, focus: str) -> Dict:
         """Generate a single day's workout plan"""
+        import numpy as np
+
         exercises = []
         duration = 0
 
@@ -122,6 +125,7 @@ class AIWorkoutPlanGenerator:
             'exercises': exercises
         }
 
+    @timed('exercise_generation')
     def generate_weekly_plan(self, params: WorkoutParameters) -> Dict:
         """Generate a complete 7-day workout plan"""
         intensity = self._calculate_intensity(params)
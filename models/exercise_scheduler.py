@@ -0,0 +1,351 @@
+# models/exercise_scheduler.py
+"""
+Constraint-aware weekly exercise scheduling.
+
+A goal's weekly template (``ExercisePlanGenerator.WEEKLY_STRUCTURES``) fixes
+which day focuses the week contains; the scheduler decides their order and
+the exercises for each day, as a constraint-satisfaction problem:
+
+- intensity caps and excluded exercise tags from health conditions
+- recovery spacing: no strength muscle group (other than core) is loaded on
+  consecutive days, and high-impact cardio never falls on consecutive days
+- at most ``max_consecutive_training_days`` training days in a row
+- weekly minutes close to the template's total
+
+Every feasible day (a focus plus one combination of exercises for it) is
+enumerated once per (intensity, excluded tags) and kept as arrays: the
+minutes range its exercises span (fewest to most sets, shortest to longest
+duration), strength muscle bitmasks, impact flags, exercise membership and a
+day-to-day compatibility matrix. The search assigns days in order, masking
+candidates with the precomputed arrays and scoring all remaining ones in one
+vectorized step, and backtracks on dead ends. A few randomized restarts keep
+plans varied; the best-scoring week is returned, with each training day's
+minutes placed at the same point of its range so the week meets its total.
+When no week meets the recovery spacing, a second pass searches without it
+and the schedule is flagged as relaxed, so callers can tell the user and
+``violations()`` lists the days that break it.
+"""
+import itertools
+import random
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import EXERCISE_CONFIG
+from models.exercise_attributes import EXERCISE_ATTRIBUTES, MUSCLE_GROUPS, TAGS
+from models.plan_records import EXERCISE_CATEGORIES, INTENSITIES, DayWorkout, ExerciseCatalog
+
+REST = "Rest"
+REST_MINUTES = 15
+# Core work tolerates daily training and is left out of recovery spacing
+RECOVERY_MASK = sum(1 << i for i, muscle in enumerate(MUSCLE_GROUPS) if muscle != "core")
+
+# Exercises per category for each day focus, and the muscle groups its strength work is limited to
+FOCUS_SPECS: Dict[str, Tuple[Dict[str, int], Optional[Tuple[str, ...]]]] = {
+    "Cardio + Strength": ({"cardio": 1, "strength": 3}, None),
+    "Strength + Cardio": ({"cardio": 1, "strength": 3}, None),
+    "Cardio + Flexibility": ({"cardio": 1, "flexibility": 1}, None),
+    "Cardio": ({"cardio": 1}, None),
+    "Light Cardio + Flexibility": ({"cardio": 1, "flexibility": 1}, None),
+    "Flexibility + Core": ({"flexibility": 1}, None),
+    "Full Body Strength": ({"strength": 3}, None),
+    "Upper Body Strength": ({"strength": 3}, ("chest", "back", "shoulders", "arms")),
+    "Lower Body Strength": ({"strength": 3}, ("legs",)),
+    "Push Exercises": ({"strength": 3}, ("chest", "shoulders", "arms")),
+    "Pull Exercises": ({"strength": 3}, ("back", "arms")),
+    "Legs + Core": ({"strength": 3}, ("legs", "core")),
+    REST: ({}, None),
+}
+FOCUSES = tuple(FOCUS_SPECS)
+
+
+def _bounds(text: str) -> Tuple[float, float]:
+    """Low and high ends of a range such as '20-30 min' or '3-4'"""
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", text)]
+    return numbers[0], numbers[min(1, len(numbers) - 1)]
+
+
+class DayPool:
+    """Every feasible training or rest day for one intensity and set of excluded tags, as arrays"""
+
+    def __init__(self, focus: np.ndarray, exercise_ids: List[Tuple[int, ...]], min_minutes: np.ndarray,
+                 max_minutes: np.ndarray, muscles: np.ndarray, impact: np.ndarray, n_exercises: int):
+        self.focus = focus
+        self.exercise_ids = exercise_ids
+        self.min_minutes = min_minutes
+        self.max_minutes = max_minutes
+        self.muscles = muscles
+        self.impact = impact
+        self.training = focus != FOCUSES.index(REST)
+        self.membership = np.zeros((len(focus), n_exercises), dtype=np.float64)
+        for row, ids in enumerate(exercise_ids):
+            self.membership[row, list(ids)] = 1.0
+        # compatible[a, b]: day b may directly follow day a
+        self.compatible = (((muscles[:, None] & muscles[None, :]) == 0)
+                           & ~(impact[:, None] & impact[None, :]))
+
+    def __len__(self) -> int:
+        return len(self.focus)
+
+
+class ExerciseScheduler:
+    """Builds weekly exercise plans that respect recovery, condition and duration constraints"""
+
+    def __init__(self, catalog: ExerciseCatalog, attributes: Dict = EXERCISE_ATTRIBUTES,
+                 config: Optional[Dict] = None):
+        self.catalog = catalog
+        self.config = {**EXERCISE_CONFIG, **(config or {})}
+        n = len(catalog)
+        self.categories = np.empty(n, dtype=np.int8)
+        self.levels = np.empty(n, dtype=np.int8)
+        self.muscles = np.zeros(n, dtype=np.uint8)
+        self.tags = np.zeros((n, len(TAGS)), dtype=bool)
+        self.minutes = np.empty((n, 2), dtype=np.float64)
+        for item_id, (category, intensity, exercise) in enumerate(catalog.items):
+            muscles, tags = attributes[exercise["name"]]
+            self.categories[item_id] = EXERCISE_CATEGORIES.index(category)
+            self.levels[item_id] = INTENSITIES.index(intensity)
+            for muscle in muscles:
+                self.muscles[item_id] |= 1 << MUSCLE_GROUPS.index(muscle)
+            self.tags[item_id, [TAGS.index(tag) for tag in tags]] = True
+            if category == "strength":
+                self.minutes[item_id] = np.multiply(_bounds(exercise["sets"]), self.config['minutes_per_set'])
+            else:
+                self.minutes[item_id] = _bounds(exercise["duration"])
+        self._pools: Dict[Tuple[int, Tuple[str, ...]], DayPool] = {}
+
+    # Constraints from conditions --------------------------------------------
+
+    def effective_intensity(self, intensity: str, conditions: Sequence[str]) -> str:
+        """Requested intensity lowered to the strictest cap of the user's conditions"""
+        level = INTENSITIES.index(intensity)
+        for condition in conditions:
+            cap = self.config['condition_intensity_caps'].get(condition)
+            if cap is not None:
+                level = min(level, INTENSITIES.index(cap))
+        return INTENSITIES[level]
+
+    def excluded_tags(self, conditions: Sequence[str]) -> Tuple[str, ...]:
+        exclusions = self.config['condition_exclusions']
+        return tuple(sorted({tag for condition in conditions for tag in exclusions.get(condition, ())}))
+
+    # Day pools --------------------------------------------------------------
+
+    def pool(self, intensity: str, excluded: Tuple[str, ...] = ()) -> DayPool:
+        """Feasible days for an intensity and excluded tags, built once and cached"""
+        key = (INTENSITIES.index(intensity), excluded)
+        if key not in self._pools:
+            self._pools[key] = self._build_pool(*key)
+        return self._pools[key]
+
+    def _eligible(self, category: str, level: int, excluded: Tuple[str, ...], count: int = 1,
+                  muscles: Optional[Tuple[str, ...]] = None) -> np.ndarray:
+        """
+        Exercises of a category at the level, topped up from lower levels until there are count.
+
+        A muscle filter that no exercise satisfies is dropped, so a focus falls back to
+        general work in its category rather than disappearing.
+        """
+        allowed = self.categories == EXERCISE_CATEGORIES.index(category)
+        if excluded:
+            allowed &= ~self.tags[:, [TAGS.index(tag) for tag in excluded]].any(axis=1)
+        if muscles is not None:
+            # Exercises whose primary muscles (core aside) all belong to the focus
+            outside = RECOVERY_MASK & ~sum(1 << MUSCLE_GROUPS.index(m) for m in muscles)
+            targeted = allowed & ((self.muscles & outside) == 0) & ((self.muscles & RECOVERY_MASK) != 0)
+            if (targeted & (self.levels <= level)).any():
+                allowed = targeted
+        found = np.empty(0, dtype=np.int64)
+        for candidate_level in range(level, -1, -1):
+            found = np.concatenate([found, np.flatnonzero(allowed & (self.levels == candidate_level))])
+            if len(found) >= count:
+                break
+        return found
+
+    def _build_pool(self, level: int, excluded: Tuple[str, ...]) -> DayPool:
+        focus, exercise_ids = [], []
+        for focus_index, (name, (counts, targets)) in enumerate(FOCUS_SPECS.items()):
+            choices = []
+            for category, count in counts.items():
+                eligible = self._eligible(category, level, excluded, count, targets if category == "strength" else None)
+                if not len(eligible):
+                    continue
+                # Strength days may drop one exercise to fit recovery spacing or shorter sessions
+                sizes = range(max(1, count - 1), count + 1) if category == "strength" else (count,)
+                choices.append([group for size in sorted({min(size, len(eligible)) for size in sizes})
+                                for group in itertools.combinations(eligible.tolist(), size)])
+            if name != REST and not choices:
+                continue
+            for combination in itertools.product(*choices):
+                focus.append(focus_index)
+                exercise_ids.append(tuple(item for group in combination for item in group))
+
+        strength = EXERCISE_CATEGORIES.index("strength")
+        high_impact = self.tags[:, TAGS.index("high_impact")]
+        minutes, muscles, impact = [], [], []
+        for ids in exercise_ids:
+            ids = list(ids)
+            if ids:
+                minutes.append(self.config['warmup_minutes'] + self.minutes[ids].sum(axis=0))
+                muscles.append(np.bitwise_or.reduce(self.muscles[ids][self.categories[ids] == strength],
+                                                    initial=0) & RECOVERY_MASK)
+                impact.append(bool(high_impact[ids].any()))
+            else:
+                minutes.append((REST_MINUTES, REST_MINUTES))
+                muscles.append(0)
+                impact.append(False)
+
+        minutes = np.asarray(minutes, dtype=np.float64)
+        return DayPool(np.asarray(focus, dtype=np.int16), exercise_ids, minutes[:, 0], minutes[:, 1],
+                       np.asarray(muscles, dtype=np.uint8), np.asarray(impact, dtype=bool), len(self.catalog))
+
+    # Search -----------------------------------------------------------------
+
+    def schedule(self, structure: Sequence[Dict], intensity: str,
+                 conditions: Sequence[str]) -> Tuple[str, List[DayWorkout], bool]:
+        """
+        Order a weekly template's focuses and choose exercises for each day.
+
+        Parameters:
+        structure (Sequence[Dict]): Weekly template days with 'focus' and 'duration'
+        intensity (str): Requested intensity ('low', 'moderate' or 'high')
+        conditions (Sequence[str]): Health conditions
+
+        Returns:
+        tuple: The intensity actually used (after condition caps), the week's DayWorkouts, and
+            whether recovery spacing had to be dropped to find a week
+        """
+        intensity = self.effective_intensity(intensity, conditions)
+        pool = self.pool(intensity, self.excluded_tags(conditions))
+        counts = np.zeros(len(FOCUSES), dtype=np.int64)
+        for day in structure:
+            counts[FOCUSES.index(day["focus"])] += 1
+        target = float(sum(day["duration"] for day in structure))
+
+        best, best_score = None, np.inf
+        relaxed = False
+        for relax in (False, True):
+            relaxed = relax
+            for _ in range(max(1, self.config['restarts'])):
+                week = self._search(pool, counts, target, relax)
+                if week is not None:
+                    minutes = self._allocate(pool, week, target)
+                    score = self._score_week(pool, week, minutes, target)
+                    if score < best_score:
+                        best, best_score = (week, minutes), score
+            if best is not None:
+                break
+        if best is None:
+            raise ValueError("No feasible weekly schedule for these constraints")
+
+        week, minutes = best
+        days = [DayWorkout(FOCUSES[pool.focus[c]], int(m), pool.exercise_ids[c]) for c, m in zip(week, minutes)]
+        return intensity, days, relaxed
+
+    @staticmethod
+    def _allocate(pool: DayPool, week: List[int], target: float) -> np.ndarray:
+        """Minutes per day at one common point of every day's range, as close to the target as allowed"""
+        low, high = pool.min_minutes[week], pool.max_minutes[week]
+        spread = (high - low).sum()
+        fraction = np.clip((target - low.sum()) / spread, 0.0, 1.0) if spread else 0.0
+        return 5 * np.round((low + fraction * (high - low)) / 5)
+
+    def _score_week(self, pool: DayPool, week: List[int], minutes: np.ndarray, target: float) -> float:
+        uses = pool.membership[week].sum(axis=0)
+        repeats = float(np.maximum(uses - 1, 0).sum())
+        return abs(minutes.sum() - target) / target + self.config['repeat_penalty'] * repeats
+
+    def _search(self, pool: DayPool, counts: np.ndarray, target: float, relax: bool) -> Optional[List[int]]:
+        """Randomized depth-first search; relax drops the recovery spacing constraints"""
+        n_days = int(counts.sum())
+        max_streak = self.config['max_consecutive_training_days']
+        penalty = self.config['repeat_penalty']
+        budget = [500]
+        rng = np.random.default_rng(random.getrandbits(32))
+
+        def assign(week: List[int], remaining: np.ndarray, uses: np.ndarray, minutes: float,
+                   streak: int) -> Optional[List[int]]:
+            if len(week) == n_days:
+                return week
+            budget[0] -= 1
+            if budget[0] < 0:
+                return None
+
+            # Forward check: after a training day, the rest days left must still be able to
+            # break the remaining training days into streaks within the limit
+            rest_left = int(remaining[FOCUSES.index(REST)])
+            training_left = n_days - len(week) - rest_left
+            mask = remaining[pool.focus] > 0
+            if week and not relax:
+                mask &= pool.compatible[week[-1]]
+            if streak >= max_streak or training_left - 1 > max_streak - streak - 1 + rest_left * max_streak:
+                mask &= ~pool.training
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return None
+
+            # Spread the remaining minutes evenly over the remaining training days
+            ideal = (target - minutes - rest_left * REST_MINUTES) / max(training_left, 1)
+            gap = (np.maximum(pool.min_minutes[candidates] - ideal, 0)
+                   + np.maximum(ideal - pool.max_minutes[candidates], 0))
+            scores = gap / max(ideal, 1.0) + penalty * (pool.membership[candidates] @ uses)
+            # Rest days are preferred once the current streak reaches an even split of the week
+            even_streak = training_left / (rest_left + 1) if rest_left else n_days
+            resting = ~pool.training[candidates]
+            scores[resting] = 0.5 * max(even_streak - streak, 0.0)
+            scores += rng.uniform(0, 0.1, len(candidates))
+
+            for candidate in candidates[np.argsort(scores)[:3]]:
+                remaining[pool.focus[candidate]] -= 1
+                uses += pool.membership[candidate]
+                middle = (pool.min_minutes[candidate] + pool.max_minutes[candidate]) / 2
+                result = assign(week + [int(candidate)], remaining, uses, minutes + middle,
+                                streak + 1 if pool.training[candidate] else 0)
+                if result is not None:
+                    return result
+                remaining[pool.focus[candidate]] += 1
+                uses -= pool.membership[candidate]
+            return None
+
+        return assign([], counts.copy(), np.zeros(pool.membership.shape[1]), 0.0, 0)
+
+    # Validation -------------------------------------------------------------
+
+    def violations(self, days: Sequence[DayWorkout], intensity: str, conditions: Sequence[str],
+                   target_minutes: Optional[float] = None) -> List[str]:
+        """
+        Constraint violations of a week, for validating plans from any generator.
+
+        A week the scheduler returned as relaxed (``ExercisePlanRecord.relaxed``) is expected to
+        have recovery spacing violations; any other week should have none.
+        """
+        problems = []
+        cap = INTENSITIES.index(self.effective_intensity(intensity, conditions))
+        excluded = [TAGS.index(tag) for tag in self.excluded_tags(conditions)]
+        strength = EXERCISE_CATEGORIES.index("strength")
+        high_impact = TAGS.index("high_impact")
+        previous_muscles, previous_impact, streak = 0, False, 0
+        for day_number, day in enumerate(days, start=1):
+            ids = list(day.exercise_ids)
+            if ids and self.levels[ids].max() > cap:
+                problems.append(f"day {day_number}: exceeds the {INTENSITIES[cap]} intensity cap")
+            if ids and excluded and self.tags[np.ix_(ids, excluded)].any():
+                problems.append(f"day {day_number}: includes an exercise excluded by a condition")
+            muscles = int(np.bitwise_or.reduce(self.muscles[ids][self.categories[ids] == strength],
+                                               initial=0)) & RECOVERY_MASK
+            impact = bool(self.tags[ids, high_impact].any())
+            if muscles & previous_muscles:
+                problems.append(f"day {day_number}: strength work on muscles trained the day before")
+            if impact and previous_impact:
+                problems.append(f"day {day_number}: high-impact cardio on consecutive days")
+            streak = streak + 1 if day.focus != REST else 0
+            if streak > self.config['max_consecutive_training_days']:
+                problems.append(f"day {day_number}: more than {self.config['max_consecutive_training_days']} "
+                                f"training days in a row")
+            previous_muscles, previous_impact = muscles, impact
+        if target_minutes:
+            total = sum(day.duration for day in days)
+            if abs(total - target_minutes) > self.config['duration_tolerance'] * target_minutes:
+                problems.append(f"week: {total} minutes against a target of {target_minutes:.0f}")
+        return problems
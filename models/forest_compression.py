@@ -0,0 +1,322 @@
+# models/forest_compression.py
+"""
+Compact, array-packed form of the health risk forest.
+
+The unconstrained ``RandomForestClassifier`` has one class per distinct risk
+score (hundreds of them). sklearn stores a float64 value for every class at
+every node, internal nodes included, so the fitted forest takes gigabytes
+even though a leaf rarely holds more than a few classes. Compression has
+three steps:
+
+- **Limits.** ``select_limits`` retrains with the ``max_depth``,
+  ``min_samples_leaf`` and ``ccp_alpha`` candidates of COMPRESSION_CONFIG
+  on a training split. It keeps the smallest forest whose validation error
+  stays within tolerance of the unconstrained one. Depth and leaf-size
+  limits act as pre-pruning and ``ccp_alpha`` as cost-complexity pruning.
+- **Packing.** ``CompactForest`` keeps the split structure of all trees in
+  flat arrays (int8 features, float32 thresholds, int32 children) and only
+  the leaves' non-zero class probabilities, as float32 in CSR layout. A
+  float32 expected score is kept per leaf for ``expected_score``. Internal
+  node values are dropped.
+- **Serialization.** ``CompactRiskModel.save`` writes those arrays and the
+  scaler to one ``.npz`` file, which loads without unpickling sklearn
+  objects.
+
+Thresholds are rounded down to float32. sklearn compares float32 inputs with
+float64 thresholds, so splits are unchanged. Predictions traverse every tree
+for a batch of rows at once, one depth level per step.
+
+Choose limits and write a compact model from the command line:
+
+    python -m models.forest_compression data/health_fitness_dataset.csv --output health_risk_model.npz
+"""
+import argparse
+import itertools
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import COMPRESSION_CONFIG, MODEL_CONFIG
+from utils.instrumentation import timed
+
+# Rows traversed together; bounds the (rows x classes) probability buffer
+PREDICT_CHUNK = 4096
+
+
+class CompactForest:
+    """Flat arrays for the trees of a fitted forest, with sparse float32 leaf distributions"""
+
+    ARRAYS = ('roots', 'feature', 'threshold', 'left', 'right', 'leaf_of',
+              'leaf_ptr', 'leaf_class', 'leaf_prob', 'leaf_expected')
+
+    def __init__(self, n_classes: int, depth: int, **arrays: np.ndarray):
+        """
+        Parameters:
+        n_classes (int): Number of classes
+        depth (int): Depth of the deepest tree
+        arrays (np.ndarray): The arrays named in ARRAYS
+        """
+        self.n_classes = n_classes
+        self.depth = depth
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self._distributions = None
+
+    @classmethod
+    def from_sklearn(cls, estimators, classes: np.ndarray) -> 'CompactForest':
+        """
+        Pack fitted sklearn decision trees.
+
+        Parameters:
+        estimators (list): Fitted DecisionTreeClassifier instances, e.g. a forest's estimators_
+        classes (np.ndarray): Score of each class index, for the per-leaf expected score
+
+        Returns:
+        CompactForest: Forest predicting the same classes
+        """
+        parts = {name: [] for name in cls.ARRAYS}
+        offset = leaves = entries = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+
+            # Leaves point at themselves, so traversal can run a fixed number of steps without masks
+            threshold = tree.threshold.astype(np.float32)
+            above = threshold > tree.threshold
+            threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+            threshold[is_leaf] = np.inf
+            parts['roots'].append([offset])
+            parts['feature'].append(np.where(is_leaf, 0, tree.feature).astype(np.int8))
+            parts['threshold'].append(threshold)
+            parts['left'].append((np.where(is_leaf, nodes, tree.children_left) + offset).astype(np.int32))
+            parts['right'].append((np.where(is_leaf, nodes, tree.children_right) + offset).astype(np.int32))
+            leaf_of = np.full(tree.node_count, -1, dtype=np.int32)
+            leaf_of[is_leaf] = leaves + np.arange(is_leaf.sum())
+            parts['leaf_of'].append(leaf_of)
+
+            values = tree.value[is_leaf, 0, :]
+            values = values / values.sum(axis=1, keepdims=True)
+            rows, columns = np.nonzero(values)
+            counts = np.bincount(rows, minlength=len(values))
+            parts['leaf_ptr'].append(entries + np.cumsum(counts))
+            parts['leaf_class'].append(columns.astype(np.uint16))
+            parts['leaf_prob'].append(values[rows, columns].astype(np.float32))
+            parts['leaf_expected'].append((values @ classes).astype(np.float32))
+
+            offset += tree.node_count
+            leaves += len(values)
+            entries += len(rows)
+
+        arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        arrays['roots'] = arrays['roots'].astype(np.int32)
+        arrays['leaf_ptr'] = np.concatenate([[0], arrays['leaf_ptr']]).astype(np.int64)
+        return cls(len(classes), max(estimator.tree_.max_depth for estimator in estimators), **arrays)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index reached in every tree, shape (rows, trees); X is float32"""
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.leaf_of[nodes]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Class index with the highest mean probability over the trees, per row"""
+        from scipy import sparse
+
+        if self._distributions is None:
+            self._distributions = sparse.csr_matrix((self.leaf_prob, self.leaf_class, self.leaf_ptr),
+                                                    shape=(len(self.leaf_expected), self.n_classes))
+        X = np.asarray(X, dtype=np.float32)
+        result = np.empty(len(X), dtype=np.intp)
+        for start in range(0, len(X), PREDICT_CHUNK):
+            leaves = self.apply(X[start:start + PREDICT_CHUNK])
+            # Summing the reached leaves' distributions is a product of a one-hot row x leaf
+            # matrix with the sparse leaf x class matrix
+            reached = sparse.csr_matrix(
+                (np.ones(leaves.size, dtype=np.float32), leaves.ravel(), np.arange(0, leaves.size + 1, self.n_trees)),
+                shape=(len(leaves), self._distributions.shape[0]))
+            result[start:start + len(leaves)] = (reached @ self._distributions).toarray().argmax(axis=1)
+        return result
+
+    def expected(self, X: np.ndarray) -> np.ndarray:
+        """Mean over the trees of each reached leaf's expected score"""
+        X = np.asarray(X, dtype=np.float32)
+        result = np.empty(len(X))
+        for start in range(0, len(X), PREDICT_CHUNK):
+            leaves = self.apply(X[start:start + PREDICT_CHUNK])
+            result[start:start + len(leaves)] = self.leaf_expected[leaves].mean(axis=1, dtype=np.float64)
+        return result
+
+
+class CompactRiskModel:
+    """HealthRiskModel predictions served from a CompactForest"""
+
+    def __init__(self, forest: CompactForest, classes: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 config: Optional[Dict] = None):
+        self.forest = forest
+        self.classes_ = classes
+        self.mean = mean
+        self.scale = scale
+        self.config = config or {}
+
+    @classmethod
+    def from_model(cls, model) -> 'CompactRiskModel':
+        """Pack a trained HealthRiskModel"""
+        config = {key: value for key, value in model.model.get_params().items()
+                  if key in ('n_estimators', 'max_depth', 'min_samples_leaf', 'ccp_alpha')}
+        return cls(CompactForest.from_sklearn(model.model.estimators_, model.classes_),
+                   model.classes_, model.scaler.mean_, model.scaler.scale_, config)
+
+    def _scaled(self, X) -> np.ndarray:
+        return ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+
+    @timed('predict')
+    def predict(self, X):
+        """Predict health risk score"""
+        return self.classes_[self.forest.predict(self._scaled(X))]
+
+    def expected_score(self, X):
+        """Probability-weighted mean of the score classes, a smooth counterpart of predict"""
+        return self.forest.expected(self._scaled(X))
+
+    @property
+    def nbytes(self) -> int:
+        return self.forest.nbytes + self.classes_.nbytes + self.mean.nbytes + self.scale.nbytes
+
+    def save(self, path: str) -> None:
+        meta = {'n_classes': self.forest.n_classes, 'depth': self.forest.depth, 'config': self.config}
+        np.savez(path, classes=self.classes_, mean=self.mean, scale=self.scale,
+                 meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                 **{name: getattr(self.forest, name) for name in CompactForest.ARRAYS})
+
+    @classmethod
+    def load(cls, path: str) -> 'CompactRiskModel':
+        with np.load(path) as arrays:
+            meta = json.loads(arrays['meta'].tobytes())
+            forest = CompactForest(meta['n_classes'], meta['depth'],
+                                   **{name: arrays[name] for name in CompactForest.ARRAYS})
+            return cls(forest, arrays['classes'], arrays['mean'], arrays['scale'], meta['config'])
+
+
+def _expand(grid: Dict[str, List]) -> List[Dict]:
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+@timed('forest_compression')
+def select_limits(X, y, config: Optional[Dict] = None) -> Tuple[Dict, List[Dict]]:
+    """
+    Choose tree limits on a validation split.
+
+    Every grid candidate and the unconstrained forest are trained on the same split.
+    The smallest packed candidate whose validation MAE (of both predict and
+    expected_score) is within tolerance of the unconstrained forest wins.
+
+    Parameters:
+    X (pd.DataFrame): Age and BMI
+    y (pd.Series): Health risk scores
+    config (dict): Overrides for COMPRESSION_CONFIG
+
+    Returns:
+    tuple: (chosen limits, one result dict per candidate, unconstrained first)
+    """
+    from sklearn.model_selection import train_test_split
+
+    from models.health_risk_model import HealthRiskModel
+
+    config = {**COMPRESSION_CONFIG, **(config or {})}
+    X_train, X_valid, y_train, y_valid = train_test_split(
+        X, y, test_size=config['validation_size'], random_state=config['random_state'])
+    y_valid = np.asarray(y_valid, dtype=np.float64)
+
+    unconstrained = {'max_depth': None, 'min_samples_leaf': 1, 'ccp_alpha': 0.0}
+    candidates = [unconstrained] + [limits for limits in _expand(config['grid']) if limits != unconstrained]
+    results = []
+    for limits in candidates:
+        model = HealthRiskModel({**MODEL_CONFIG['random_forest'], **limits})
+        model.train(X_train, y_train)
+        compact = CompactRiskModel.from_model(model)
+        del model
+        results.append({
+            'limits': limits,
+            'nodes': compact.forest.n_nodes,
+            'depth': compact.forest.depth,
+            'packed_bytes': compact.nbytes,
+            'mae': float(np.abs(compact.predict(X_valid) - y_valid).mean()),
+            'expected_mae': float(np.abs(compact.expected_score(X_valid) - y_valid).mean()),
+        })
+
+    baseline = results[0]
+    eligible = [result for result in results
+                if result['mae'] <= baseline['mae'] + config['mae_tolerance']
+                and result['expected_mae'] <= baseline['expected_mae'] + config['mae_tolerance']]
+    chosen = min(eligible, key=lambda result: result['packed_bytes'])
+    return chosen['limits'], results
+
+
+def train_compact_risk_model(data, limits: Optional[Dict] = None, sample_weight=None) -> CompactRiskModel:
+    """
+    Train the risk model with tree limits and pack it.
+
+    Parameters:
+    data (pd.DataFrame): Training data with Age, BMI and HealthRiskScore
+    limits (dict): Tree limits; defaults to COMPRESSION_CONFIG['limits']
+    sample_weight (np.ndarray): Row counts when data holds compacted points (see utils.compaction)
+
+    Returns:
+    CompactRiskModel: Packed model
+    """
+    from models.health_risk_model import train_health_risk_model
+
+    config = {**MODEL_CONFIG['random_forest'], **(COMPRESSION_CONFIG['limits'] if limits is None else limits)}
+    return CompactRiskModel.from_model(train_health_risk_model(data, config, sample_weight))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Choose risk forest limits and write a compact model")
+    parser.add_argument('csv', help='Training dataset CSV')
+    parser.add_argument('--output', help='Write the compact model (.npz) trained on the whole dataset')
+    parser.add_argument('--report', help='Write the candidate results as JSON')
+    parser.add_argument('--tolerance', type=float, default=COMPRESSION_CONFIG['mae_tolerance'],
+                        help='Validation MAE points allowed above the unconstrained forest')
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    data = pd.read_csv(args.csv)
+    limits, results = select_limits(data[['Age', 'BMI']], data['HealthRiskScore'],
+                                    {'mae_tolerance': args.tolerance})
+    print(f"{'max_depth':>10}{'min_leaf':>10}{'ccp_alpha':>11}{'nodes':>10}{'packed':>11}{'MAE':>8}{'exp MAE':>9}")
+    for result in results:
+        marker = '  <- chosen' if result['limits'] == limits else ''
+        print(f"{str(result['limits']['max_depth']):>10}{result['limits']['min_samples_leaf']:>10}"
+              f"{result['limits']['ccp_alpha']:>11g}{result['nodes']:>10,}{result['packed_bytes'] / 1e6:>8.2f} MB"
+              f"{result['mae']:>8.2f}{result['expected_mae']:>9.2f}{marker}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'chosen': limits, 'candidates': results}, f, indent=2)
+    if args.output:
+        train_compact_risk_model(data, limits).save(args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
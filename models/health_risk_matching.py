@@ -1,14 +1,28 @@
-from sklearn.preprocessing import StandardScaler
-import numpy as np
-from typing import List, Tuple, Union
-import pandas as pd
+from __future__ import annotations
 
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
+from utils.instrumentation import timed
+from utils.risk_bands import RISK_BANDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from models.profile_index import Matches, ProfileIndex
+    from models.sharded_search import ShardedIndex
+    from utils.shared_data import ScaledFeatures
+
+
+@timed()
 def find_similar_profiles(
         target_profile: dict,
         dataset: pd.DataFrame,
         n_matches: int = 5,
-        features: List[str] = ['Age', 'BMI', 'HealthRiskScore']
+        features: List[str] = ['Age', 'BMI', 'HealthRiskScore'],
+        scaled: Optional[ScaledFeatures] = None,
+        filters: Optional[Dict[str, str]] = None,
+        index: Optional[ProfileIndex] = None,
+        shards: Optional[ShardedIndex] = None
 ) -> pd.DataFrame:
     """
     Find similar health profiles in the dataset based on user input.
@@ -18,10 +32,22 @@ def find_similar_profiles(
     dataset (pd.DataFrame): Reference dataset containing historical profiles
     n_matches (int): Number of similar profiles to return
     features (List[str]): Features to consider for similarity matching
+    scaled (ScaledFeatures): Scaler and scaled feature matrix fitted once on this dataset
+        (see utils.shared_data); fitted here on every call when omitted
+    filters (Dict[str, str]): Required values of categorical columns, e.g. {'Gender': 'Female'}
+    index (ProfileIndex): Partitioned index of this dataset (see models.profile_index); filtered
+        queries then search only matching partitions and widen when too few profiles match.
+        Without an index, filters are applied after scanning every profile and never widened.
+    shards (ShardedIndex): Sharded copy of this dataset (see models.sharded_search); the scan then
+        runs across its shards in parallel and returns the same profiles as the unsharded scan
 
     Returns:
-    pd.DataFrame: DataFrame containing similar profiles
+    pd.DataFrame: DataFrame containing similar profiles, nearest first (ties in dataset order);
+        with an index or shards, ``attrs['filters']`` holds the filters actually applied
     """
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+
     # Verify that all required features are present in the dataset
     if not all(feature in dataset.columns for feature in features):
         raise ValueError(f"Dataset missing required features. Required: {features}")
@@ -33,42 +59,77 @@ def find_similar_profiles(
     # Ensure n_matches is not larger than dataset
     n_matches = min(n_matches, len(dataset))
 
+    if index is not None and shards is not None:
+        raise ValueError("Pass either a profile index or shards, not both")
+    for searcher, kind in ((index, "Profile index"), (shards, "Shards")):
+        if searcher is not None:
+            if len(searcher) != len(dataset):
+                raise ValueError(f"{kind} built for a different dataset")
+            if list(searcher.features) != list(features):
+                raise ValueError(f"{kind} searches {list(searcher.features)}, not the requested {list(features)}")
+            return _matches_frame(dataset, searcher.query(target_profile, n_matches, filters))
+
     try:
         # Extract features from target profile
         target_values = np.array([[target_profile[feature] for feature in features]])
 
-        # Extract features from dataset
-        dataset_values = dataset[features].values
+        if scaled is not None and list(scaled.features) == list(features) and len(scaled.matrix) == len(dataset):
+            # Reuse the precomputed scaling; same arithmetic as StandardScaler.transform
+            dataset_scaled = scaled.matrix
+            if np.isnan(dataset_scaled).any() or np.isnan(target_values).any():
+                raise ValueError("Input data contains NaN values")
+            target_scaled = (target_values - scaled.mean) / scaled.scale
+        else:
+            # Extract features from dataset
+            dataset_values = dataset[features].values
 
-        # Handle NaN values if any
-        if np.isnan(dataset_values).any() or np.isnan(target_values).any():
-            raise ValueError("Input data contains NaN values")
+            # Handle NaN values if any
+            if np.isnan(dataset_values).any() or np.isnan(target_values).any():
+                raise ValueError("Input data contains NaN values")
 
-        # Scale the features
-        scaler = StandardScaler()
-        dataset_scaled = scaler.fit_transform(dataset_values)
-        target_scaled = scaler.transform(target_values)
+            # Scale the features
+            scaler = StandardScaler()
+            dataset_scaled = scaler.fit_transform(dataset_values)
+            target_scaled = scaler.transform(target_values)
 
         # Calculate Euclidean distances
         distances = np.sqrt(((dataset_scaled - target_scaled) ** 2).sum(axis=1))
+        if filters:
+            keep = np.ones(len(dataset), dtype=bool)
+            for column, value in filters.items():
+                keep &= (dataset[column] == value).to_numpy()
+            distances = np.where(keep, distances, np.inf)
+            n_matches = min(n_matches, int(keep.sum()))
+            max_distance = distances[keep].max() if n_matches else 0
+        else:
+            max_distance = distances.max()
 
-        # Find indices of n most similar profiles
-        similar_indices = distances.argsort()[:n_matches]
+        # Find indices of n most similar profiles; ties keep dataset order
+        similar_indices = distances.argsort(kind='stable')[:n_matches]
 
         # Calculate similarity scores (inverse of normalized distance)
-        max_distance = distances.max() if distances.max() > 0 else 1
+        max_distance = max_distance if max_distance > 0 else 1
         similarity_scores = (1 - (distances[similar_indices] / max_distance)) * 100
 
         # Get similar profiles
         similar_profiles = dataset.iloc[similar_indices].copy()
         similar_profiles['SimilarityScore'] = similarity_scores.round(2)
 
-        return similar_profiles.sort_values('SimilarityScore', ascending=False)
+        return similar_profiles.sort_values('SimilarityScore', ascending=False, kind='stable')
 
     except Exception as e:
         raise Exception(f"Error in finding similar profiles: {str(e)}")
 
 
+def _matches_frame(dataset: pd.DataFrame, matches: Matches) -> pd.DataFrame:
+    """Rows of an index or shard search with their similarity scores"""
+    max_distance = matches.max_distance if matches.max_distance > 0 else 1
+    similar_profiles = dataset.iloc[matches.positions].copy()
+    similar_profiles['SimilarityScore'] = ((1 - matches.distances / max_distance) * 100).round(2)
+    similar_profiles.attrs['filters'] = matches.filters
+    return similar_profiles.sort_values('SimilarityScore', ascending=False, kind='stable')
+
+
 def get_risk_category(risk_score: float) -> str:
     """
     Determine risk category based on health risk score.
@@ -77,20 +138,12 @@ def get_risk_category(risk_score: float) -> str:
     risk_score (float): Health risk score
 
     Returns:
-    str: Risk category
+    str: Risk category ("Unknown" if the score is missing or not numeric)
     """
-    try:
-        risk_score = float(risk_score)
-        if risk_score < 30:
-            return "Low"
-        elif risk_score < 60:
-            return "Moderate"
-        else:
-            return "High"
-    except (ValueError, TypeError):
-        return "Unknown"
+    return RISK_BANDS.label(risk_score)
 
 
+@timed()
 def get_profile_insights(similar_profiles: pd.DataFrame) -> dict:
     """
     Generate insights based on similar profiles.
@@ -116,7 +169,7 @@ def get_profile_insights(similar_profiles: pd.DataFrame) -> dict:
 
         insights = {
             'avg_risk_score': similar_profiles['HealthRiskScore'].mean(),
-            'risk_distribution': similar_profiles['HealthRiskScore'].apply(get_risk_category).value_counts().to_dict(),
+            'risk_distribution': RISK_BANDS.value_counts(similar_profiles['HealthRiskScore']),
             'common_diet': common_diet,
             'avg_exercise_capacity': similar_profiles['ExerciseCapacity'].mean(),
             'age_range': {
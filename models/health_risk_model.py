@@ -1,38 +1,123 @@
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from config import MODEL_CONFIG
+from config import MODEL_CONFIG, REQUEST_BUDGET_CONFIG
+from utils.instrumentation import timed
+from utils.risk_bands import RISK_BANDS
 
 
 class HealthRiskModel:
-    def __init__(self):
-        self.model = RandomForestClassifier(**MODEL_CONFIG['random_forest'])
+    def __init__(self, config=None):
+        # sklearn is imported here rather than at module level to keep app start-up cheap
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+
+        self.model = RandomForestClassifier(**(config or MODEL_CONFIG['random_forest']))
         self.scaler = StandardScaler()
+        self._leaf_scores = None
 
-    def train(self, X, y):
-        """Train the health risk prediction model"""
-        X_scaled = self.scaler.fit_transform(X)
-        self.model.fit(X_scaled, y)
+    @timed('forest_training')
+    def train(self, X, y, sample_weight=None):
+        """
+        Train the health risk prediction model.
+
+        Parameters:
+        X: Age and BMI
+        y: Health risk scores
+        sample_weight: Number of rows each training point stands for (see utils.compaction), or None
+        """
+        import numpy as np
 
+        # Scores are floats (0.1 resolution), which the classifier rejects as continuous
+        # targets, so each distinct score is trained as an integer class label
+        self.classes_, y_encoded = np.unique(np.asarray(y), return_inverse=True)
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+            # min_samples_leaf counts points; keep leaves at least that many rows instead
+            min_leaf = self.model.min_samples_leaf
+            if isinstance(min_leaf, int) and min_leaf > 1:
+                self.model.set_params(
+                    min_samples_leaf=1,
+                    min_weight_fraction_leaf=max(self.model.min_weight_fraction_leaf,
+                                                 min_leaf / sample_weight.sum()))
+        X_scaled = self.scaler.fit_transform(X, sample_weight=sample_weight)
+        self.model.fit(X_scaled, y_encoded, sample_weight=sample_weight)
+        self._leaf_scores = None
+
+    @timed('predict')
     def predict(self, X):
         """Predict health risk score"""
         X_scaled = self.scaler.transform(X)
-        return self.model.predict(X_scaled)
+        return self.classes_[self.model.predict(X_scaled)]
+
+    def expected_score(self, X):
+        """Probability-weighted mean of the score classes, a smooth counterpart of predict"""
+        import numpy as np
+
+        # Equal to predict_proba(X) @ classes_, but each tree contributes its leaf's expected
+        # score instead of a probability for every one of the hundreds of score classes
+        if self._leaf_scores is None:
+            self._leaf_scores = []
+            for tree in self.model.estimators_:
+                value = tree.tree_.value[:, 0, :]
+                self._leaf_scores.append(value @ self.classes_ / value.sum(axis=1))
+        X_scaled = self.scaler.transform(X).astype(np.float32)
+        total = np.zeros(len(X_scaled))
+        for tree, scores in zip(self.model.estimators_, self._leaf_scores):
+            total += scores[tree.apply(X_scaled)]
+        return total / len(self._leaf_scores)
+
+
+class RiskLookup:
+    """Mean risk score per (Age, BMI bin) grid cell, a cheap stand-in while the forest is unavailable"""
+
+    def __init__(self, bmi_step=None):
+        self.bmi_step = bmi_step or REQUEST_BUDGET_CONFIG['lookup_bmi_step']
+        self.cells = {}
+        self.age_means = {}
+        self.mean = 0.0
+
+    def _keys(self, X):
+        import numpy as np
+
+        X = np.asarray(X, dtype=np.float64)
+        ages = np.rint(X[:, 0]).astype(np.int64)
+        bins = np.floor(X[:, 1] / self.bmi_step).astype(np.int64)
+        return ages.tolist(), bins.tolist()
+
+    @timed('risk_lookup_training')
+    def train(self, X, y):
+        """Average the scores falling in each grid cell and each age"""
+        import pandas as pd
+
+        ages, bins = self._keys(X)
+        frame = pd.DataFrame({'age': ages, 'bin': bins, 'score': pd.Series(y).to_numpy(dtype=float)})
+        self.cells = frame.groupby(['age', 'bin'])['score'].mean().to_dict()
+        self.age_means = frame.groupby('age')['score'].mean().to_dict()
+        self.mean = float(frame['score'].mean())
+
+    def predict(self, X):
+        """Score of each row's cell; empty cells fall back to the age mean, then the overall mean"""
+        import numpy as np
+
+        ages, bins = self._keys(X)
+        return np.array([self.cells.get((age, bin_), self.age_means.get(age, self.mean))
+                         for age, bin_ in zip(ages, bins)])
 
 
 def get_risk_level(risk_score):
     """Determine risk level based on risk score"""
-    if risk_score < 33:
-        return "Low"
-    elif risk_score < 66:
-        return "Moderate"
-    else:
-        return "High"
+    return RISK_BANDS.label(risk_score)
 
 
-def train_health_risk_model(data):
-    """Helper function to train the model"""
-    model = HealthRiskModel()
+def train_health_risk_model(data, config=None, sample_weight=None):
+    """Helper function to train the model; sample_weight holds the row counts of compacted data"""
+    model = HealthRiskModel(config)
     X = data[['Age', 'BMI']]
     y = data['HealthRiskScore']
-    model.train(X, y)
-    return model
\ No newline at end of file
+    model.train(X, y, sample_weight)
+    return model
+
+
+def train_risk_lookup(data, bmi_step=None):
+    """Helper function to build the grid-lookup fallback for the risk model"""
+    lookup = RiskLookup(bmi_step)
+    lookup.train(data[['Age', 'BMI']], data['HealthRiskScore'])
+    return lookup
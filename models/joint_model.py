@@ -0,0 +1,197 @@
+# models/joint_model.py
+"""
+One forest predicting health risk and exercise capacity together.
+
+``JointHealthModel`` wraps a multi-output ``RandomForestRegressor``. Every
+leaf stores the mean of both targets, so one traversal of the trees yields
+the risk score and the exercise capacity. Separate risk and capacity forests
+would each traverse their own trees and, when fitted, sort the same feature
+columns again.
+
+The features are Age and BMI by default. JOINT_MODEL_CONFIG can add
+categorical columns such as Gender or DietaryPreference, encoded as their
+index in a fixed category list.
+
+Training compacts the data on the feature columns alone (see
+utils.compaction), which averages both targets per unique feature tuple.
+Without bootstrap, splits and leaf means on those count-weighted points are
+the same as on the raw rows under squared error, because rows sharing a tuple
+can never be split apart. With bootstrap (the default), samples draw points
+rather than rows, so the forest is not identical to one fitted on the rows,
+as with the compacted risk forest.
+
+``capacity_intensity`` turns a predicted capacity into an exercise
+intensity tier, capped by the risk level.
+
+After fitting, the trees are packed into flat node arrays, and predictions
+traverse all of them for a batch of rows at once, one depth level per step,
+as ``CompactForest`` does for the risk classifier. This skips sklearn's
+per-tree dispatch, which dominates the cost of a single-row request.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import JOINT_MODEL_CONFIG, MODEL_CONFIG, PROGRAM_CONFIG
+from models.plan_records import INTENSITIES
+from utils.instrumentation import timed
+from utils.risk_bands import RiskBands
+
+CAPACITY_BANDS = RiskBands(JOINT_MODEL_CONFIG['capacity_intensity_ranges'])
+
+# Rows traversed together; bounds the (rows x trees) node buffer
+PREDICT_CHUNK = 4096
+
+
+class JointHealthModel:
+    """Multi-output forest predicting every JOINT_MODEL_CONFIG target in one pass"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Parameters:
+        config (dict): Overrides for JOINT_MODEL_CONFIG
+        """
+        # sklearn is imported here rather than at module level to keep app start-up cheap
+        from sklearn.ensemble import RandomForestRegressor
+
+        self.config = {**JOINT_MODEL_CONFIG, **(config or {})}
+        self.features = list(self.config['features'])
+        self.targets = list(self.config['targets'])
+        self.categories = {column: list(values) for column, values in self.config['categories'].items()}
+        self.model = RandomForestRegressor(**{**MODEL_CONFIG['random_forest'], **self.config['limits']})
+        # Code used for a categorical feature the input does not provide
+        self.default_codes: Dict[str, int] = {}
+        self._nodes: Optional[Dict[str, np.ndarray]] = None
+        self._depth = 0
+
+    def _matrix(self, X) -> np.ndarray:
+        """Feature matrix in self.features order, with categories replaced by their codes"""
+        import pandas as pd
+
+        if not hasattr(X, 'columns'):
+            if not self.categories:
+                return np.asarray(X, dtype=np.float32).reshape(-1, len(self.features))
+            X = pd.DataFrame(np.asarray(X), columns=self.features[:np.shape(X)[1]])
+        columns = []
+        for column in self.features:
+            if column in self.categories:
+                if column in X.columns:
+                    codes = pd.Categorical(X[column], categories=self.categories[column]).codes
+                    codes = np.where(codes < 0, self.default_codes.get(column, 0), codes)
+                else:
+                    codes = np.full(len(X), self.default_codes.get(column, 0))
+                columns.append(codes.astype(np.float32))
+            else:
+                columns.append(X[column].to_numpy(dtype=np.float32))
+        return np.column_stack(columns)
+
+    @timed('joint_training')
+    def train(self, X, Y, sample_weight=None):
+        """
+        Train the joint model.
+
+        Parameters:
+        X (pd.DataFrame): Feature columns
+        Y (pd.DataFrame): Target columns, one per output
+        sample_weight (np.ndarray): Number of rows each training point stands for (see utils.compaction), or None
+        """
+        for column, values in self.categories.items():
+            if column in X.columns:
+                mode = X[column].mode(dropna=True)
+                self.default_codes[column] = values.index(mode.iloc[0]) if len(mode) and mode.iloc[0] in values else 0
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+            # min_samples_leaf counts points; keep leaves at least that many rows instead
+            min_leaf = self.model.min_samples_leaf
+            if isinstance(min_leaf, int) and min_leaf > 1:
+                self.model.set_params(
+                    min_samples_leaf=1,
+                    min_weight_fraction_leaf=max(self.model.min_weight_fraction_leaf,
+                                                 min_leaf / sample_weight.sum()))
+        Y = np.asarray(Y, dtype=np.float64)
+        self.model.fit(self._matrix(X), Y[:, 0] if Y.shape[1] == 1 else Y, sample_weight=sample_weight)
+        self._pack()
+
+    def _pack(self) -> None:
+        """Concatenate the fitted trees' nodes; leaves point at themselves so traversal needs no masks"""
+        parts = {name: [] for name in ('roots', 'feature', 'threshold', 'left', 'right', 'value')}
+        offset = 0
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            parts['roots'].append(offset)
+            parts['feature'].append(np.where(is_leaf, 0, tree.feature))
+            parts['threshold'].append(np.where(is_leaf, np.inf, tree.threshold))
+            parts['left'].append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            parts['right'].append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            parts['value'].append(tree.value[:, :, 0])
+            offset += tree.node_count
+        self._nodes = {name: np.asarray(parts[name]) if name == 'roots' else np.concatenate(parts[name])
+                       for name in parts}
+        self._depth = max(estimator.tree_.max_depth for estimator in self.model.estimators_)
+
+    @timed('predict')
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict every target in one traversal of the forest.
+
+        Parameters:
+        X (pd.DataFrame or array-like): Feature columns by name, or an array in self.features order;
+            categorical features the input lacks take their most common training value
+
+        Returns:
+        np.ndarray: Shape (rows, targets), in self.targets order
+        """
+        nodes = self._nodes
+        # float32 inputs against float64 thresholds, the comparison sklearn makes
+        X = self._matrix(X)
+        result = np.empty((len(X), len(self.targets)))
+        for start in range(0, len(X), PREDICT_CHUNK):
+            chunk = X[start:start + PREDICT_CHUNK]
+            reached = np.broadcast_to(nodes['roots'], (len(chunk), len(nodes['roots'])))
+            rows = np.arange(len(chunk))[:, None]
+            for _ in range(self._depth):
+                go_left = chunk[rows, nodes['feature'][reached]] <= nodes['threshold'][reached]
+                reached = np.where(go_left, nodes['left'][reached], nodes['right'][reached])
+            result[start:start + len(chunk)] = nodes['value'][reached].mean(axis=1)
+        return result
+
+    def expected_score(self, X) -> np.ndarray:
+        """Predicted risk score; a regression forest's prediction already is a smooth mean"""
+        return self.predict(X)[:, self.targets.index('HealthRiskScore')]
+
+
+def capacity_intensity(capacity: Optional[float], risk_level: Optional[str] = None) -> str:
+    """
+    Exercise intensity tier for a predicted exercise capacity.
+
+    Parameters:
+    capacity (float): Predicted exercise capacity, or None when only the risk level is known
+    risk_level (str): Predicted risk level; its PROGRAM_CONFIG['risk_intensity_caps'] entry caps the tier
+
+    Returns:
+    str: 'low', 'moderate' or 'high'
+    """
+    cap = INTENSITIES.index(PROGRAM_CONFIG['risk_intensity_caps'].get(risk_level, INTENSITIES[-1]))
+    level = CAPACITY_BANDS.code(capacity) if capacity is not None else -1
+    return INTENSITIES[cap if level < 0 else min(level, cap)]
+
+
+def train_joint_model(data, config: Optional[Dict] = None) -> JointHealthModel:
+    """
+    Helper function to train the joint model on compacted data.
+
+    Parameters:
+    data (pd.DataFrame): Training data with the feature and target columns
+    config (dict): Overrides for JOINT_MODEL_CONFIG
+
+    Returns:
+    JointHealthModel: Trained model
+    """
+    from utils.compaction import weighted_rows
+
+    model = JointHealthModel(config)
+    points, counts = weighted_rows(data[model.features + model.targets], model.features)
+    model.train(points[model.features], points[model.targets], counts)
+    return model
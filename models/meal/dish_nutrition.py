@@ -0,0 +1,138 @@
+# models/meal/dish_nutrition.py
+"""
+Nutrition per plan serving for every dish in the meal database.
+
+Each entry is ``(protein_g, carbs_g, fats_g, tags)``; calories are derived with
+the Atwater factors (4/4/9 kcal per gram) so that a plan's calories and macro
+percentages always agree. Tags mark ingredients and properties that dietary
+preferences and health conditions exclude (see ``MEAL_CONFIG``):
+
+- ``dairy``, ``gluten``: contains milk products / wheat, semolina or bread
+- ``high_gi``: built around white rice, refined flour or sugar
+- ``high_sodium``: salty snacks and chaat
+- ``fried``: deep fried
+- ``full_fat``: rich in ghee, butter, cream, paneer or fatty meat
+"""
+from typing import Dict, Tuple
+
+KCAL_PER_GRAM = (4, 4, 9)
+TAGS = ('dairy', 'gluten', 'high_gi', 'high_sodium', 'fried', 'full_fat')
+
+DISH_NUTRITION: Dict[str, Tuple[float, float, float, Tuple[str, ...]]] = {
+    # Vegetarian breakfast
+    "Poha with peanuts and vegetables": (9, 52, 12, ()),
+    "Idli with sambar and chutney": (12, 58, 6, ()),
+    "Masala dosa with coconut chutney": (9, 60, 17, ('high_gi',)),
+    "Upma with vegetables": (8, 48, 10, ('gluten',)),
+    "Aloo paratha with curd": (12, 60, 18, ('dairy', 'gluten', 'high_gi', 'full_fat')),
+    "Besan chilla with mint chutney": (15, 34, 10, ()),
+    "Oats upma with vegetables": (11, 46, 8, ()),
+    "Multigrain dosa with sambar": (12, 50, 7, ()),
+    "Vegetable daliya": (10, 48, 5, ('gluten',)),
+    "Moong dal chilla": (17, 32, 6, ()),
+    "Ragi idli with chutney": (9, 48, 5, ()),
+    "Sprouts poha": (12, 46, 6, ()),
+    "Oats uttapam": (11, 42, 8, ()),
+    "Quinoa upma": (11, 46, 8, ()),
+
+    # Vegetarian snacks
+    "Fruit chaat": (2, 30, 1, ()),
+    "Roasted chana": (11, 30, 3, ()),
+    "Buttermilk": (4, 6, 2, ('dairy',)),
+    "Mixed nuts and seeds": (7, 9, 18, ()),
+    "Sprouts bhel": (9, 28, 3, ()),
+    "Masala mathri": (4, 26, 13, ('gluten', 'high_sodium', 'fried')),
+    "Dates and almonds": (4, 32, 8, ('high_gi',)),
+    "Mixed sprouts": (10, 20, 1, ()),
+    "Cucumber and carrot sticks": (2, 12, 0, ()),
+    "Chaas (buttermilk)": (4, 6, 2, ('dairy',)),
+    "Apple with cinnamon": (1, 26, 0, ()),
+    "Roasted makhana": (5, 22, 2, ()),
+    "Green tea with murmura": (2, 18, 0, ()),
+    "Coconut water": (1, 10, 0, ()),
+    "Samosa with green chutney": (5, 34, 18, ('gluten', 'high_sodium', 'fried')),
+    "Dhokla with chutney": (8, 30, 5, ()),
+    "Bhel puri": (6, 40, 7, ('high_sodium',)),
+    "Masala chai with marie biscuits": (4, 28, 5, ('dairy', 'gluten', 'high_gi')),
+    "Vegetable cutlets": (6, 30, 11, ('gluten', 'fried')),
+    "Corn chaat": (5, 32, 3, ()),
+    "Pani puri": (5, 36, 7, ('gluten', 'high_sodium', 'fried')),
+    "Roasted chana chaat": (10, 26, 3, ()),
+    "Steamed corn kernels": (4, 27, 1, ()),
+    "Vegetable soup": (3, 15, 2, ()),
+    "Mixed fruit salad": (2, 28, 0, ()),
+    "Cucumber raita": (5, 8, 4, ('dairy',)),
+    "Lemon water with chia seeds": (2, 9, 4, ()),
+
+    # Vegetarian lunch and dinner
+    "Dal tadka with jeera rice and mixed vegetables": (20, 92, 15, ('high_gi',)),
+    "Rajma chawal with raita": (22, 95, 13, ('dairy', 'high_gi')),
+    "Chole with brown rice and salad": (20, 90, 13, ()),
+    "Kadhi chawal with aloo gobi": (15, 86, 17, ('dairy', 'high_gi')),
+    "Matar paneer with roti and salad": (24, 56, 25, ('dairy', 'gluten', 'full_fat')),
+    "Vegetable biryani with raita": (14, 92, 19, ('dairy', 'high_gi')),
+    "Dal makhani with jeera rice": (20, 86, 25, ('dairy', 'high_gi', 'full_fat')),
+    "Mixed vegetable curry with chapati": (13, 66, 15, ('gluten',)),
+    "Palak paneer with roti": (24, 46, 25, ('dairy', 'gluten', 'full_fat')),
+    "Dal fry with jeera rice": (18, 84, 12, ('high_gi',)),
+    "Bhindi masala with chapati": (11, 58, 15, ('gluten',)),
+    "Methi malai matar with paratha": (16, 60, 31, ('dairy', 'gluten', 'full_fat')),
+    "Vegetable pulao with raita": (11, 76, 14, ('dairy', 'high_gi')),
+    "Aloo matar with roti": (12, 72, 13, ('gluten',)),
+    "Dal palak with brown rice": (20, 76, 10, ()),
+    "Mixed vegetable curry with millet roti": (14, 68, 13, ()),
+    "Chickpea curry with quinoa": (22, 74, 13, ()),
+    "Moong dal khichdi with vegetables": (19, 72, 9, ()),
+    "Lobia curry with brown rice": (20, 78, 8, ()),
+    "Tofu bhurji with multigrain roti": (28, 44, 17, ('gluten',)),
+    "Vegetable curry with jowar roti": (12, 66, 12, ()),
+    "Lauki curry with chapati": (11, 58, 10, ('gluten',)),
+    "Mixed dal with vegetable roti": (20, 62, 10, ('gluten',)),
+    "Spinach soup with multigrain bread": (13, 46, 9, ('gluten',)),
+    "Tofu curry with millet roti": (23, 46, 16, ()),
+    "Mushroom masala with chapati": (13, 54, 12, ('gluten',)),
+    "Vegetable daliya khichdi": (13, 62, 6, ('gluten',)),
+    "Bottle gourd soup with quinoa": (11, 52, 7, ()),
+
+    # Non-vegetarian
+    "Egg bhurji with multigrain paratha": (22, 42, 21, ('gluten',)),
+    "Chicken keema with roti": (32, 40, 20, ('gluten',)),
+    "Masala omelette with toast": (20, 32, 19, ('gluten',)),
+    "Fish curry with idli": (28, 50, 13, ()),
+    "Egg white omelette with vegetables": (20, 8, 5, ()),
+    "Chicken sandwich with mint chutney": (28, 42, 13, ('gluten',)),
+    "Egg rice with vegetables": (16, 66, 14, ('high_gi',)),
+    "Boiled eggs with black pepper": (13, 1, 11, ()),
+    "Chicken tikka": (30, 5, 9, ('dairy',)),
+    "Fish cutlet": (17, 18, 12, ('gluten', 'fried')),
+    "Egg salad": (13, 6, 14, ()),
+    "Grilled chicken strips": (32, 2, 6, ()),
+    "Tuna sandwich": (23, 32, 10, ('gluten',)),
+    "Egg bhurji roll": (15, 36, 15, ('gluten',)),
+    "Chicken curry with brown rice": (38, 68, 21, ()),
+    "Fish curry with chapati": (34, 52, 19, ('gluten',)),
+    "Mutton curry with jeera rice": (36, 76, 29, ('high_gi', 'full_fat')),
+    "Egg curry with roti": (21, 48, 23, ('gluten',)),
+    "Chicken biryani with raita": (34, 84, 23, ('dairy', 'high_gi', 'full_fat')),
+    "Fish fry with dal rice": (36, 78, 21, ('high_gi', 'fried')),
+    "Keema matar with paratha": (34, 56, 33, ('gluten', 'full_fat')),
+    "Chicken soup": (15, 7, 4, ('high_sodium',)),
+    "Egg bhurji sandwich": (16, 34, 15, ('gluten',)),
+    "Fish pakora": (19, 17, 17, ('fried',)),
+    "Chicken seekh kebab": (25, 7, 14, ()),
+    "Egg rolls": (14, 40, 16, ('gluten', 'fried')),
+    "Grilled fish tikka": (29, 5, 8, ('dairy',)),
+    "Chicken cutlet": (21, 17, 14, ('gluten', 'fried')),
+    "Grilled chicken with mint chutney": (44, 7, 14, ()),
+    "Fish curry with brown rice": (34, 66, 16, ()),
+    "Egg curry with chapati": (21, 48, 23, ('gluten',)),
+    "Chicken tikka masala with roti": (38, 46, 27, ('dairy', 'gluten', 'full_fat')),
+    "Mutton soup with bread": (27, 32, 17, ('gluten',)),
+    "Tandoori fish with salad": (38, 10, 14, ('dairy',)),
+    "Chicken stew with appam": (32, 56, 21, ()),
+}
+
+
+def dish_calories(protein_g: float, carbs_g: float, fats_g: float) -> float:
+    p, c, f = KCAL_PER_GRAM
+    return protein_g * p + carbs_g * c + fats_g * f
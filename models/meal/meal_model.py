@@ -1,11 +1,39 @@
 # models/meal_model.py
-from typing import Dict, List
-import random
+from typing import Dict, List, Sequence, Tuple
+
+from models.meal.dish_nutrition import KCAL_PER_GRAM
+from models.plan_records import (
+    MEAL_SLOTS,
+    DayMeals,
+    MealCatalog,
+    MealPlanRecord,
+    decode_conditions,
+    encode_conditions,
+)
+from utils.instrumentation import timed
 
 
 class MealPlanGenerator:
+    # Macronutrient split per goal as (protein, carbs, fats) percentages of calories
+    MACRO_SPLITS = {
+        "Weight Loss": (30, 40, 30),
+        "Muscle Gain": (35, 45, 20),
+    }
+    DEFAULT_MACRO_SPLIT = (25, 55, 20)
+
     def __init__(self):
         self.meal_database = self._initialize_meal_database()
+        self.catalog = MealCatalog(self.meal_database)
+        self._optimizer = None
+
+    @property
+    def optimizer(self):
+        """Dish selection solver, built on first use so that importing the app stays cheap"""
+        if self._optimizer is None:
+            from models.meal.meal_optimizer import MealOptimizer
+
+            self._optimizer = MealOptimizer(self.catalog)
+        return self._optimizer
 
     def _initialize_meal_database(self) -> Dict:
         """Initialize the database of meals with Indian cuisine focus"""
@@ -156,47 +184,72 @@ class MealPlanGenerator:
     def generate_meal_plan(self, goal: str, dietary_preferences: List[str],
                            health_conditions: List[str], risk_level: str) -> Dict:
         """Generate a 7-day Indian meal plan based on user characteristics"""
-        meal_plan = {}
+        record = self.generate_meal_plan_record(goal, dietary_preferences, health_conditions, risk_level)
+        return self.render_meal_plan(record)
 
+    @timed('meal_generation')
+    def generate_meal_plan_record(self, goal: str, dietary_preferences: List[str],
+                                  health_conditions: List[str], risk_level: str) -> MealPlanRecord:
+        """Generate a 7-day meal plan whose dishes best match the goal's calorie and macro targets"""
         # Select appropriate meal database based on preferences and goals
         if "vegetarian" in dietary_preferences or "vegan" in dietary_preferences:
             if goal == "Weight Loss":
-                meals_db = self.meal_database["weight_loss"]
+                database = "weight_loss"
             else:
-                meals_db = self.meal_database["standard"]
+                database = "standard"
         else:
-            meals_db = self.meal_database["non_vegetarian"]
+            database = "non_vegetarian"
 
-        # Calculate base calories based on goal
+        # Daily targets from the goal; dishes are chosen to hit them within diet and condition limits
         base_calories = self._calculate_base_calories(goal)
+        protein_g, carbs_g, fats_g = self._macro_targets(base_calories, goal)[:3]
+        eligible = self.optimizer.eligibility(database, dietary_preferences, health_conditions)
+        week = self.optimizer.plan_week((base_calories, protein_g, carbs_g, fats_g), eligible)
 
-        # Generate plan for each day
-        for day in range(1, 8):
-            # Select meals for the day
-            daily_meals = {
-                "breakfast": random.choice(meals_db["breakfast"]),
-                "morning_snack": random.choice(meals_db["morning_snacks"]),
-                "lunch": random.choice(meals_db["lunch"]),
-                "evening_snack": random.choice(meals_db["evening_snacks"]),
-                "dinner": random.choice(meals_db["dinner"])
-            }
+        days = [self._day_meals(meal_ids) for meal_ids in week]
 
-            # Adjust meals based on health conditions
-            daily_meals = self._adjust_meals_for_conditions(daily_meals, health_conditions)
+        return MealPlanRecord(
+            goal=goal,
+            conditions=encode_conditions(health_conditions),
+            risk_level=risk_level,
+            days=tuple(days)
+        )
 
-            # Calculate macros
-            macros = self._calculate_macros(base_calories, goal)
+    def render_meal_plan(self, record: MealPlanRecord) -> Dict:
+        """Render a meal plan record into the display dict used by the UI"""
+        conditions = decode_conditions(record.conditions)
+        notes = self._generate_meal_notes(conditions, record.risk_level)
+        meal_plan = {}
+        for day, day_meals in enumerate(record.days, start=1):
+            # Dishes are shown as planned; health conditions already shaped which dishes were eligible
+            daily_meals = {slot: self.catalog.dish(item_id)
+                           for slot, item_id in zip(MEAL_SLOTS, day_meals.meal_ids)}
 
-            # Add to meal plan
             meal_plan[day] = {
                 **daily_meals,
-                "calories": base_calories,
-                "macros": macros,
-                "notes": self._generate_meal_notes(health_conditions, risk_level)
+                "calories": day_meals.calories,
+                "macros": self._format_macros(day_meals.protein_g, day_meals.carbs_g, day_meals.fats_g,
+                                              day_meals.protein_pct, day_meals.carbs_pct, day_meals.fats_pct),
+                "notes": notes
             }
 
         return meal_plan
 
+    def _day_meals(self, meal_ids: Sequence[int]) -> DayMeals:
+        """Nutrition actually on the plate for one day's dishes"""
+        calories, protein_g, carbs_g, fats_g = self.optimizer.totals(meal_ids)
+        kcal_protein, kcal_carbs, kcal_fats = KCAL_PER_GRAM
+        return DayMeals(
+            tuple(meal_ids),
+            int(round(calories)),
+            int(round(protein_g)),
+            int(round(carbs_g)),
+            int(round(fats_g)),
+            int(round(protein_g * kcal_protein / calories * 100)),
+            int(round(carbs_g * kcal_carbs / calories * 100)),
+            int(round(fats_g * kcal_fats / calories * 100))
+        )
+
     def _calculate_base_calories(self, goal: str) -> int:
         """Calculate base calories based on goal"""
         base = 2000  # Standard base calories
@@ -206,40 +259,26 @@ class MealPlanGenerator:
             return base + 300
         return base
 
-    def _calculate_macros(self, calories: int, goal: str) -> Dict:
-        """Calculate macronutrient distribution"""
-        if goal == "Weight Loss":
-            return {
-                "protein": f"{int(calories * 0.3 / 4)}g (30%)",
-                "carbs": f"{int(calories * 0.4 / 4)}g (40%)",
-                "fats": f"{int(calories * 0.3 / 9)}g (30%)"
-            }
-        elif goal == "Muscle Gain":
-            return {
-                "protein": f"{int(calories * 0.35 / 4)}g (35%)",
-                "carbs": f"{int(calories * 0.45 / 4)}g (45%)",
-                "fats": f"{int(calories * 0.2 / 9)}g (20%)"
-            }
+    def _macro_targets(self, calories: int, goal: str) -> Tuple[int, int, int, int, int, int]:
+        """Macronutrient grams and percentages as (protein_g, carbs_g, fats_g, protein_pct, carbs_pct, fats_pct)"""
+        protein_pct, carbs_pct, fats_pct = self.MACRO_SPLITS.get(goal, self.DEFAULT_MACRO_SPLIT)
+        return (
+            int(calories * (protein_pct / 100) / 4),
+            int(calories * (carbs_pct / 100) / 4),
+            int(calories * (fats_pct / 100) / 9),
+            protein_pct,
+            carbs_pct,
+            fats_pct
+        )
+
+    def _format_macros(self, protein_g: int, carbs_g: int, fats_g: int,
+                       protein_pct: int, carbs_pct: int, fats_pct: int) -> Dict:
         return {
-            "protein": f"{int(calories * 0.25 / 4)}g (25%)",
-            "carbs": f"{int(calories * 0.55 / 4)}g (55%)",
-            "fats": f"{int(calories * 0.2 / 9)}g (20%)"
+            "protein": f"{protein_g}g ({protein_pct}%)",
+            "carbs": f"{carbs_g}g ({carbs_pct}%)",
+            "fats": f"{fats_g}g ({fats_pct}%)"
         }
 
-    def _adjust_meals_for_conditions(self, meals: Dict, conditions: List[str]) -> Dict:
-        """Adjust meals based on health conditions"""
-        if "diabetes" in conditions:
-            meals = {k: v.replace("white rice", "brown rice")
-            .replace("sugar", "stevia")
-                     for k, v in meals.items()}
-        if "hypertension" in conditions:
-            meals = {k: v + " (low sodium)" for k, v in meals.items()}
-        if "heart disease" in conditions:
-            meals = {k: v.replace("ghee", "olive oil")
-            .replace("full fat", "low fat")
-                     for k, v in meals.items()}
-        return meals
-
     def _generate_meal_notes(self, conditions: List[str], risk_level: str) -> str:
         """Generate specific notes for the meal plan"""
         notes = []
@@ -0,0 +1,221 @@
+# models/meal/meal_optimizer.py
+"""
+Calorie- and macro-aware dish selection for weekly meal plans.
+
+Every catalog dish becomes one row of a nutrition matrix (calories, protein,
+carbs, fats). A plan picks one dish per meal slot per day so that each day's
+totals land as close as possible to the targets, measured as a weighted sum of
+squared relative errors, while avoiding dishes excluded by dietary preferences
+or health conditions and limiting how often a dish repeats within the week.
+
+Two solvers are available:
+
+- ``greedy``: days are planned in order; each day starts from a random
+  combination and runs coordinate descent, re-choosing one slot at a time by
+  scoring every eligible dish for that slot in a single vectorized step. A few
+  random restarts guard against poor local optima. Cost grows linearly with the
+  number of dishes, so thousands of dishes plan in milliseconds.
+- ``milp``: the whole week as a mixed-integer program solved with
+  ``scipy.optimize.milp`` (absolute rather than squared relative errors).
+  Optimal, but slower on large catalogs; falls back to ``greedy`` if SciPy is
+  missing or no solution is found within the time limit.
+"""
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import MEAL_CONFIG
+from models.meal.dish_nutrition import DISH_NUTRITION, KCAL_PER_GRAM, TAGS
+from models.plan_records import MEAL_SLOTS, MealCatalog
+
+
+class MealOptimizer:
+    """Chooses a week of dishes from a catalog that best matches daily nutrition targets"""
+
+    def __init__(self, catalog: MealCatalog, nutrition: Dict = DISH_NUTRITION, config: Optional[Dict] = None):
+        self.catalog = catalog
+        self.config = {**MEAL_CONFIG, **(config or {})}
+        databases = sorted({database for database, _, _ in catalog.items})
+
+        n = len(catalog)
+        macros = np.empty((n, 3), dtype=np.float64)
+        self.tags = np.zeros((n, len(TAGS)), dtype=bool)
+        self.slots = np.empty(n, dtype=np.int8)
+        self.databases = np.empty(n, dtype=np.int16)
+        for item_id, (database, slot, dish) in enumerate(catalog.items):
+            protein_g, carbs_g, fats_g, tags = nutrition[dish]
+            macros[item_id] = (protein_g, carbs_g, fats_g)
+            self.tags[item_id, [TAGS.index(tag) for tag in tags]] = True
+            self.slots[item_id] = MEAL_SLOTS.index(slot)
+            self.databases[item_id] = databases.index(database)
+        self._database_codes = {database: i for i, database in enumerate(databases)}
+
+        # Columns: calories, protein_g, carbs_g, fats_g
+        self.nutrition = np.column_stack([macros @ np.asarray(KCAL_PER_GRAM, dtype=np.float64), macros])
+        self.weights = np.asarray(self.config['target_weights'], dtype=np.float64)
+
+    def eligibility(self, database: str, dietary_preferences: Iterable[str] = (),
+                    conditions: Iterable[str] = ()) -> np.ndarray:
+        """
+        Boolean mask of dishes that may be planned.
+
+        Dishes come from ``database`` only. Condition exclusions are dropped for a
+        slot they would leave empty, then diet exclusions, so every slot always
+        keeps at least one dish.
+        """
+        base = self.databases == self._database_codes[database]
+        diet = self._excluded(self.config['diet_exclusions'], dietary_preferences)
+        condition = self._excluded(self.config['condition_exclusions'], conditions)
+
+        mask = np.zeros(len(self.slots), dtype=bool)
+        for slot in range(len(MEAL_SLOTS)):
+            in_slot = base & (self.slots == slot)
+            for allowed in (in_slot & ~diet & ~condition, in_slot & ~diet, in_slot):
+                if allowed.any():
+                    mask |= allowed
+                    break
+        return mask
+
+    def _excluded(self, exclusions: Dict[str, Sequence[str]], keys: Iterable[str]) -> np.ndarray:
+        tags = {tag for key in keys for tag in exclusions.get(key, ())}
+        if not tags:
+            return np.zeros(len(self.slots), dtype=bool)
+        return self.tags[:, [TAGS.index(tag) for tag in sorted(tags)]].any(axis=1)
+
+    def totals(self, item_ids: Sequence[int]) -> np.ndarray:
+        """Calories, protein, carbs and fats of a set of dishes"""
+        return self.nutrition[list(item_ids)].sum(axis=0)
+
+    def loss(self, totals: np.ndarray, targets: Sequence[float]) -> np.ndarray:
+        """Weighted squared relative error of daily totals (last axis) against the targets"""
+        targets = np.asarray(targets, dtype=np.float64)
+        return (((totals - targets) / targets) ** 2) @ self.weights
+
+    def plan_week(self, targets: Sequence[float], eligible: np.ndarray, days: int = 7,
+                  method: Optional[str] = None) -> List[Tuple[int, ...]]:
+        """
+        Pick one dish per slot for each day.
+
+        Parameters:
+        targets (Sequence[float]): Daily calories, protein_g, carbs_g and fats_g
+        eligible (np.ndarray): Dish mask from eligibility()
+        days (int): Number of days to plan
+        method (str): 'greedy' or 'milp'; defaults to MEAL_CONFIG['method']
+
+        Returns:
+        List[Tuple[int, ...]]: Catalog ids per day, ordered like MEAL_SLOTS
+        """
+        method = method or self.config['method']
+        if method == 'milp':
+            plan = self._plan_milp(targets, eligible, days)
+            if plan is not None:
+                return plan
+        elif method != 'greedy':
+            raise ValueError(f"Unknown meal optimizer method: {method!r}")
+        return self._plan_greedy(targets, eligible, days)
+
+    # Greedy coordinate descent ----------------------------------------------
+
+    def _plan_greedy(self, targets: Sequence[float], eligible: np.ndarray, days: int) -> List[Tuple[int, ...]]:
+        slot_dishes = [np.flatnonzero(eligible & (self.slots == slot)) for slot in range(len(MEAL_SLOTS))]
+        uses = np.zeros(len(self.slots), dtype=np.int64)
+        plan = []
+        for _ in range(days):
+            # Dishes at the repeat limit drop out while their slot has alternatives
+            candidates = []
+            for dishes in slot_dishes:
+                fresh = dishes[uses[dishes] < self.config['max_repeats']]
+                candidates.append(fresh if len(fresh) else dishes)
+
+            best, best_loss = None, np.inf
+            for _ in range(max(1, self.config['restarts'])):
+                choice = [int(random.choice(dishes)) for dishes in candidates]
+                choice, choice_loss = self._descend(choice, candidates, targets, uses)
+                if choice_loss < best_loss:
+                    best, best_loss = choice, choice_loss
+            uses[best] += 1
+            plan.append(tuple(best))
+        return plan
+
+    def _descend(self, choice: List[int], candidates: List[np.ndarray], targets: Sequence[float],
+                 uses: np.ndarray) -> Tuple[List[int], float]:
+        penalty = self.config['repeat_penalty']
+        total = self.nutrition[choice].sum(axis=0)
+        current = float(self.loss(total, targets) + penalty * uses[choice].sum())
+        for _ in range(self.config['max_sweeps']):
+            improved = False
+            for slot, dishes in enumerate(candidates):
+                others = total - self.nutrition[choice[slot]]
+                losses = (self.loss(others + self.nutrition[dishes], targets)
+                          + penalty * (uses[choice].sum() - uses[choice[slot]] + uses[dishes]))
+                best = int(np.argmin(losses))
+                if losses[best] < current - 1e-12:
+                    choice[slot] = int(dishes[best])
+                    total = others + self.nutrition[choice[slot]]
+                    current = float(losses[best])
+                    improved = True
+            if not improved:
+                break
+        return choice, current
+
+    # Mixed-integer program --------------------------------------------------
+
+    def _plan_milp(self, targets: Sequence[float], eligible: np.ndarray, days: int) -> Optional[List[Tuple[int, ...]]]:
+        try:
+            from scipy import sparse
+            from scipy.optimize import Bounds, LinearConstraint, milp
+        except ImportError:
+            return None
+
+        dishes = np.flatnonzero(eligible)
+        n_dishes, n_targets = len(dishes), len(targets)
+        n_choice, n_error = days * n_dishes, days * n_targets
+        targets = np.asarray(targets, dtype=np.float64)
+        slots = self.slots[dishes]
+        week = sparse.identity(days, format='csr')
+
+        # Variables: x[day, dish] binary choices, then e[day, target] >= |relative error|
+        slot_onehot = sparse.csr_matrix((np.ones(n_dishes), (slots, np.arange(n_dishes))),
+                                        shape=(len(MEAL_SLOTS), n_dishes))
+        used_slots = np.unique(slots)
+        one_per_slot = sparse.hstack([sparse.kron(week, slot_onehot[used_slots]),
+                                      sparse.csr_matrix((days * len(used_slots), n_error))])
+
+        # Nutrition as a fraction of each target: sum(x * relative) - 1 lies within [-e, e]
+        relative = sparse.kron(week, sparse.csr_matrix((self.nutrition[dishes] / targets).T))
+        errors = sparse.identity(n_error)
+        over = sparse.hstack([relative, -errors])
+        under = sparse.hstack([relative, errors])
+
+        # Repeat limit, relaxed when a slot has too few dishes for the week
+        slot_sizes = np.bincount(slots, minlength=len(MEAL_SLOTS))[slots]
+        limits = np.maximum(self.config['max_repeats'], -(-days // slot_sizes))
+        repeats = sparse.hstack([sparse.kron(np.ones((1, days)), sparse.identity(n_dishes)),
+                                 sparse.csr_matrix((n_dishes, n_error))])
+
+        constraints = [
+            LinearConstraint(one_per_slot, 1, 1),
+            LinearConstraint(over, -np.inf, 1),
+            LinearConstraint(under, 1, np.inf),
+            LinearConstraint(repeats, 0, limits),
+        ]
+        # Tiny random costs break ties between equally good dishes so plans vary
+        jitter = np.random.default_rng(random.getrandbits(32)).uniform(0, 1e-4, n_choice)
+        cost = np.concatenate([jitter, np.tile(self.weights, days)])
+        result = milp(
+            cost,
+            constraints=constraints,
+            integrality=np.concatenate([np.ones(n_choice), np.zeros(n_error)]),
+            bounds=Bounds(0, np.concatenate([np.ones(n_choice), np.full(n_error, np.inf)])),
+            options={'time_limit': self.config['milp_time_limit']}
+        )
+        if result.x is None:
+            return None
+
+        chosen = result.x[:n_choice].reshape(days, n_dishes) > 0.5
+        plan = []
+        for day in range(days):
+            picked = dishes[chosen[day]]
+            plan.append(tuple(int(item) for item in picked[np.argsort(self.slots[picked], kind='stable')]))
+        return plan
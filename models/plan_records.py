@@ -0,0 +1,247 @@
+# models/plan_records.py
+"""
+Structured meal and exercise plan records.
+
+Generators produce compact records that reference catalog item ids and carry
+numeric macros; display text is rendered from them only at the UI edge (see
+``MealPlanGenerator.render_meal_plan`` and
+``ExercisePlanGenerator.render_exercise_plan``). Records serialize to compact
+JSON lines or to a packed binary format.
+"""
+import hashlib
+import json
+import struct
+from dataclasses import dataclass
+from typing import IO, Dict, Iterable, List, Sequence, Tuple, Union
+
+from config import CONDITIONS
+from utils.risk_bands import RISK_BANDS
+
+GOALS = ("Weight Loss", "Muscle Gain", "Maintenance", "General Fitness")
+MEAL_SLOTS = ("breakfast", "morning_snack", "lunch", "evening_snack", "dinner")
+INTENSITIES = ("low", "moderate", "high")
+EXERCISE_CATEGORIES = ("cardio", "strength", "flexibility")
+
+# Meal slot names in the plan differ from the meal database keys for snacks
+MEAL_DATABASE_SLOTS = {
+    "breakfast": "breakfast",
+    "morning_snack": "morning_snacks",
+    "lunch": "lunch",
+    "evening_snack": "evening_snacks",
+    "dinner": "dinner",
+}
+
+
+def encode_conditions(conditions: Iterable[str]) -> int:
+    """Pack health conditions into a bitmask over config.CONDITIONS; conditions no rule knows are dropped"""
+    mask = 0
+    for condition in conditions:
+        if condition in CONDITIONS:
+            mask |= 1 << CONDITIONS.index(condition)
+    return mask
+
+
+def decode_conditions(mask: int) -> List[str]:
+    return [name for i, name in enumerate(CONDITIONS) if mask & (1 << i)]
+
+
+class MealCatalog:
+    """Integer ids for every (database, slot, dish) in a meal database"""
+
+    def __init__(self, meal_database: Dict):
+        self.items: List[Tuple[str, str, str]] = []
+        self.ids: Dict[Tuple[str, str, str], int] = {}
+        for database, slots in meal_database.items():
+            for slot in MEAL_SLOTS:
+                for dish in slots[MEAL_DATABASE_SLOTS[slot]]:
+                    self.ids[(database, slot, dish)] = len(self.items)
+                    self.items.append((database, slot, dish))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def dish(self, item_id: int) -> str:
+        return self.items[item_id][2]
+
+
+class ExerciseCatalog:
+    """Integer ids for every (category, intensity, exercise) in an exercise database"""
+
+    def __init__(self, exercise_database: Dict):
+        self.items: List[Tuple[str, str, Dict]] = []
+        self.ids: Dict[Tuple[str, str, str], int] = {}
+        for category in EXERCISE_CATEGORIES:
+            for intensity in INTENSITIES:
+                for exercise in exercise_database[category][intensity]:
+                    self.ids[(category, intensity, exercise["name"])] = len(self.items)
+                    self.items.append((category, intensity, exercise))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+@dataclass(slots=True)
+class DayMeals:
+    """One day of meals: catalog ids per slot plus the nutrition those dishes provide"""
+    meal_ids: Tuple[int, ...]
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fats_g: int
+    protein_pct: int
+    carbs_pct: int
+    fats_pct: int
+
+
+@dataclass(slots=True)
+class MealPlanRecord:
+    goal: str
+    conditions: int
+    risk_level: str
+    days: Tuple[DayMeals, ...]
+
+
+@dataclass(slots=True)
+class DayWorkout:
+    """One day of exercise: a focus from the weekly structure and catalog exercise ids"""
+    focus: str
+    duration: int
+    exercise_ids: Tuple[int, ...]
+
+
+@dataclass(slots=True)
+class ExercisePlanRecord:
+    goal: str
+    intensity: str
+    conditions: int
+    days: Tuple[DayWorkout, ...]
+    # The scheduler found no week meeting recovery spacing and dropped it
+    relaxed: bool = False
+
+
+PlanRecord = Union[MealPlanRecord, ExercisePlanRecord]
+
+
+class PlanCodec:
+    """
+    Compact JSON-lines and binary serialization of plan records.
+
+    Strings (goal, risk level, intensity, focus) are stored as indexes into the
+    fixed vocabularies above and ``focuses``, so the codec must be created with
+    the same focus list when reading as when writing. A goal outside GOALS is
+    stored as its text, which the generators accept and treat as the default.
+    ``layout_id`` identifies the format and vocabularies, so stores can record
+    it next to their payloads and refuse a codec that would misread them.
+    """
+
+    # Bumped whenever the packed layout changes
+    FORMAT_VERSION = 1
+
+    _MEAL, _EXERCISE = 0, 1
+    # Kind flag of an exercise record whose schedule was relaxed
+    _RELAXED = 0x80
+    # Header goal byte of a record whose goal text follows the header
+    _OTHER_GOAL = 0xFF
+    _MEAL_DAY = struct.Struct('<5H4H3B')
+    _HEADER = struct.Struct('<BBBBB')
+
+    def __init__(self, focuses: Sequence[str]):
+        self.focuses = tuple(focuses)
+        self._focus_ids = {focus: i for i, focus in enumerate(self.focuses)}
+        vocabularies = [GOALS, RISK_BANDS.labels, INTENSITIES, list(CONDITIONS), MEAL_SLOTS, self.focuses]
+        checksum = hashlib.sha256(json.dumps(vocabularies).encode()).hexdigest()[:16]
+        self.layout_id = f"{self.FORMAT_VERSION}:{checksum}"
+
+    @staticmethod
+    def _goal_code(goal: str) -> Union[int, str]:
+        return GOALS.index(goal) if goal in GOALS else goal
+
+    # JSON lines -------------------------------------------------------------
+
+    def to_row(self, record: PlanRecord) -> List:
+        if isinstance(record, MealPlanRecord):
+            return [self._MEAL, self._goal_code(record.goal), record.conditions,
+                    RISK_BANDS.labels.index(record.risk_level),
+                    [[*day.meal_ids, day.calories, day.protein_g, day.carbs_g, day.fats_g,
+                      day.protein_pct, day.carbs_pct, day.fats_pct] for day in record.days]]
+        return [self._EXERCISE | (self._RELAXED if record.relaxed else 0), self._goal_code(record.goal), record.conditions,
+                INTENSITIES.index(record.intensity),
+                [[self._focus_ids[day.focus], day.duration, *day.exercise_ids] for day in record.days]]
+
+    def from_row(self, row: List) -> PlanRecord:
+        kind, goal, conditions, level, days = row
+        goal = GOALS[goal] if isinstance(goal, int) else goal
+        relaxed, kind = bool(kind & self._RELAXED), kind & ~self._RELAXED
+        if kind == self._MEAL:
+            n = len(MEAL_SLOTS)
+            return MealPlanRecord(
+                goal=goal, conditions=conditions, risk_level=RISK_BANDS.labels[level],
+                days=tuple(DayMeals(tuple(day[:n]), *day[n:]) for day in days)
+            )
+        return ExercisePlanRecord(
+            goal=goal, intensity=INTENSITIES[level], conditions=conditions,
+            days=tuple(DayWorkout(self.focuses[day[0]], day[1], tuple(day[2:])) for day in days),
+            relaxed=relaxed
+        )
+
+    def dumps_jsonl(self, records: Iterable[PlanRecord]) -> str:
+        return "".join(json.dumps(self.to_row(r), separators=(',', ':')) + "\n" for r in records)
+
+    def write_jsonl(self, records: Iterable[PlanRecord], fp: IO[str]) -> None:
+        for record in records:
+            fp.write(json.dumps(self.to_row(record), separators=(',', ':')))
+            fp.write("\n")
+
+    def read_jsonl(self, fp: Iterable[str]) -> List[PlanRecord]:
+        return [self.from_row(json.loads(line)) for line in fp if line.strip()]
+
+    # Binary -----------------------------------------------------------------
+
+    def dumps(self, record: PlanRecord) -> bytes:
+        """Pack one record; meal days are fixed-size, workout days carry an exercise count"""
+        kind, goal, conditions, level, days = self.to_row(record)
+        if isinstance(goal, int):
+            parts = [self._HEADER.pack(kind, goal, conditions, level, len(days))]
+        else:
+            text = goal.encode('utf-8')
+            parts = [self._HEADER.pack(kind, self._OTHER_GOAL, conditions, level, len(days)),
+                     struct.pack(f'<H{len(text)}s', len(text), text)]
+        if kind == self._MEAL:
+            parts.extend(self._MEAL_DAY.pack(*day) for day in days)
+        else:
+            for focus, duration, *exercise_ids in days:
+                parts.append(struct.pack(f'<BHB{len(exercise_ids)}H', focus, duration,
+                                         len(exercise_ids), *exercise_ids))
+        return b"".join(parts)
+
+    def loads(self, data: bytes, offset: int = 0) -> Tuple[PlanRecord, int]:
+        """Unpack one record starting at offset; returns the record and the next offset"""
+        kind, goal, conditions, level, n_days = self._HEADER.unpack_from(data, offset)
+        offset += self._HEADER.size
+        exercise = kind & ~self._RELAXED == self._EXERCISE
+        if goal == self._OTHER_GOAL:
+            length, = struct.unpack_from('<H', data, offset)
+            goal = bytes(data[offset + 2:offset + 2 + length]).decode('utf-8')
+            offset += 2 + length
+        days = []
+        for _ in range(n_days):
+            if not exercise:
+                days.append(list(self._MEAL_DAY.unpack_from(data, offset)))
+                offset += self._MEAL_DAY.size
+            else:
+                focus, duration, count = struct.unpack_from('<BHB', data, offset)
+                offset += 4
+                exercise_ids = struct.unpack_from(f'<{count}H', data, offset)
+                offset += 2 * count
+                days.append([focus, duration, *exercise_ids])
+        return self.from_row([kind, goal, conditions, level, days]), offset
+
+    def dumps_many(self, records: Iterable[PlanRecord]) -> bytes:
+        return b"".join(self.dumps(record) for record in records)
+
+    def loads_many(self, data: bytes) -> List[PlanRecord]:
+        records, offset = [], 0
+        while offset < len(data):
+            record, offset = self.loads(data, offset)
+            records.append(record)
+        return records
@@ -0,0 +1,314 @@
+# models/plan_store.py
+"""
+Persistent member plan store on SQLite.
+
+Plans are stored one row per (member, week, kind) with the record packed by
+``PlanCodec`` (about 200 bytes per plan) and, optionally, the id of the inputs
+the plan was generated from (``utils.plan_rendering.plan_id``). The primary key serves lookups by
+member and by member and week; a (week, risk_level) index serves range scans
+such as "every High-risk member's plans this week". Weeks are integers
+chosen by the caller: program week numbers, or calendar weeks from
+``iso_week()`` for batch runs.
+
+The database runs in WAL mode so readers never block the writer and several
+worker processes can share one file; each process keeps a small pool of
+connections for its threads. Writes are grouped: ``put_many`` inserts a batch
+in one transaction, and ``writer()`` buffers single plans from concurrent
+producers and flushes them in batches.
+
+Payloads hold positions in the codec's vocabularies (focuses, goals, ...), so
+the store keeps the ``PlanCodec.layout_id`` it was created with and refuses to
+open with a codec whose layout differs.
+"""
+import datetime
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from config import PLAN_STORE_CONFIG
+from models.plan_records import MealPlanRecord, PlanCodec, PlanRecord
+
+MEAL, EXERCISE = 0, 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    member_id TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    plan_id TEXT,
+    PRIMARY KEY (member_id, week, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS plans_week_risk ON plans (week, risk_level);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+_COLUMNS = "member_id, week, risk_level, payload, plan_id"
+
+
+def iso_week(day: Optional[datetime.date] = None) -> int:
+    """Calendar week as an integer such as 202642 (ISO year * 100 + ISO week)"""
+    year, week, _ = (day or datetime.date.today()).isocalendar()
+    return year * 100 + week
+
+
+@dataclass(frozen=True)
+class StoredPlan:
+    """One member's meal or exercise plan for a week"""
+    member_id: str
+    week: int
+    risk_level: str
+    record: PlanRecord
+    # Id of the inputs the plan was generated from, if the producer has one
+    plan_id: Optional[str] = None
+
+
+WeekRange = Union[int, Tuple[int, int]]
+
+
+class PlanStore:
+    """SQLite-backed plan store with a connection pool and batched writes"""
+
+    def __init__(self, path: str, codec: PlanCodec, pool_size: int = PLAN_STORE_CONFIG['pool_size'],
+                 batch_size: int = PLAN_STORE_CONFIG['batch_size'],
+                 busy_timeout_ms: int = PLAN_STORE_CONFIG['busy_timeout_ms']):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.path = path
+        self.codec = codec
+        self.batch_size = batch_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._open = 0
+        self._pool_size = pool_size
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('codec_layout', ?)",
+                         (codec.layout_id,))
+            layout, = conn.execute("SELECT value FROM meta WHERE key = 'codec_layout'").fetchone()
+        if layout != codec.layout_id:
+            self.close()
+            raise ValueError(f"{path} holds plans packed with codec layout {layout}, "
+                             f"not {codec.layout_id}; its focus or other vocabularies changed")
+
+    # Connections ------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly around batches
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Safe with WAL: a crash can lose the last transactions but never corrupts the file
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, opening one if the pool is not yet full"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._open < self._pool_size
+                self._open += grow
+            if not grow:
+                conn = self._pool.get()
+            else:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        with self._lock:
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._open = 0
+
+    def __enter__(self) -> 'PlanStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Writes -----------------------------------------------------------------
+
+    def put(self, member_id: str, week: int, risk_level: str, record: PlanRecord,
+            plan_id: Optional[str] = None) -> None:
+        self.put_many([StoredPlan(member_id, week, risk_level, record, plan_id)])
+
+    def put_many(self, plans: Iterable[StoredPlan]) -> int:
+        """Insert or replace plans in transactions of batch_size rows; returns the number written"""
+        written, batch = 0, []
+        for plan in plans:
+            batch.append(self._row(plan))
+            if len(batch) >= self.batch_size:
+                written += self._write(batch)
+                batch = []
+        if batch:
+            written += self._write(batch)
+        return written
+
+    def _row(self, plan: StoredPlan) -> Tuple:
+        kind = MEAL if isinstance(plan.record, MealPlanRecord) else EXERCISE
+        return (plan.member_id, plan.week, kind, plan.risk_level, time.time(), self.codec.dumps(plan.record),
+                plan.plan_id)
+
+    def _write(self, rows: List[Tuple]) -> int:
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO plans (member_id, week, kind, risk_level, created_at, "
+                                 "payload, plan_id) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return len(rows)
+
+    def writer(self, batch_size: Optional[int] = None) -> 'PlanWriter':
+        """Buffered writer for plans produced one at a time, possibly from several threads"""
+        return PlanWriter(self, batch_size or self.batch_size)
+
+    def delete_member(self, member_id: str) -> int:
+        with self.connection() as conn:
+            return conn.execute("DELETE FROM plans WHERE member_id = ?", (member_id,)).rowcount
+
+    # Reads ------------------------------------------------------------------
+
+    def get(self, member_id: str, week: int) -> List[StoredPlan]:
+        """A member's plans for one week (meal plan first)"""
+        return self._query("WHERE member_id = ? AND week = ? ORDER BY kind", (member_id, week))
+
+    def member_plans(self, member_id: str, weeks: Optional[WeekRange] = None) -> List[StoredPlan]:
+        """A member's plans, optionally limited to a week or an inclusive (first, last) range"""
+        where, params = self._week_filter(weeks)
+        return self._query(f"WHERE member_id = ?{where} ORDER BY week, kind", (member_id, *params))
+
+    def scan(self, weeks: Optional[WeekRange] = None, risk_levels: Optional[Sequence[str]] = None,
+             kind: Optional[int] = None, fetch_size: int = 1000) -> Iterator[StoredPlan]:
+        """
+        Stream plans for a week or week range, optionally filtered by risk level and kind.
+
+        Parameters:
+        weeks (int or tuple): One week or an inclusive (first, last) range; None scans every week
+        risk_levels (Sequence[str]): Risk levels to include; None includes all
+        kind (int): MEAL or EXERCISE; None includes both
+        fetch_size (int): Rows read per page; each page borrows a pooled connection only while
+            it is read, so a scan the caller iterates slowly or abandons never holds one
+
+        Returns:
+        Iterator[StoredPlan]: Plans ordered by week, then risk level and member
+        """
+        where, params = self._week_filter(weeks)
+        clauses = [where[len(" AND "):]] if where else []
+        if risk_levels is not None:
+            clauses.append(f"risk_level IN ({', '.join('?' * len(risk_levels))})")
+            params += tuple(risk_levels)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params += (kind,)
+        # Keyset pagination on the sort key: each page starts after the last row of the one before
+        after = None
+        while True:
+            page_clauses, page_params = list(clauses), params
+            if after is not None:
+                page_clauses.append("(week, risk_level, member_id, kind) > (?, ?, ?, ?)")
+                page_params += after
+            sql = (f"SELECT {_COLUMNS}, kind FROM plans"
+                   + (" WHERE " + " AND ".join(page_clauses) if page_clauses else "")
+                   + " ORDER BY week, risk_level, member_id, kind LIMIT ?")
+            with self.connection() as conn:
+                rows = conn.execute(sql, page_params + (fetch_size,)).fetchall()
+            yield from (self._plan(row[:-1]) for row in rows)
+            if len(rows) < fetch_size:
+                break
+            member_id, week, risk_level, _, _, last_kind = rows[-1]
+            after = (week, risk_level, member_id, last_kind)
+
+    def count(self, weeks: Optional[WeekRange] = None, risk_level: Optional[str] = None) -> int:
+        where, params = self._week_filter(weeks)
+        if risk_level is not None:
+            where += " AND risk_level = ?"
+            params += (risk_level,)
+        sql = "SELECT COUNT(*) FROM plans" + (" WHERE " + where[len(" AND "):] if where else "")
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    @staticmethod
+    def _week_filter(weeks: Optional[WeekRange]) -> Tuple[str, Tuple]:
+        if weeks is None:
+            return "", ()
+        if isinstance(weeks, tuple):
+            return " AND week BETWEEN ? AND ?", weeks
+        return " AND week = ?", (weeks,)
+
+    def _query(self, clause: str, params: Tuple) -> List[StoredPlan]:
+        with self.connection() as conn:
+            rows = conn.execute(f"SELECT {_COLUMNS} FROM plans {clause}", params).fetchall()
+        return [self._plan(row) for row in rows]
+
+    def _plan(self, row: Tuple) -> StoredPlan:
+        member_id, week, risk_level, payload, plan_id = row
+        return StoredPlan(member_id, week, risk_level, self.codec.loads(payload)[0], plan_id)
+
+
+class PlanWriter:
+    """Buffers plans and writes them to a PlanStore in batches; flushes on close"""
+
+    def __init__(self, store: PlanStore, batch_size: int):
+        self.store = store
+        self.batch_size = batch_size
+        self._buffer: List[StoredPlan] = []
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def add(self, member_id: str, week: int, risk_level: str, record: PlanRecord,
+            plan_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._buffer.append(StoredPlan(member_id, week, risk_level, record, plan_id))
+            if len(self._buffer) < self.batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[StoredPlan]) -> None:
+        # Outside the buffer lock, so producers keep adding while a batch commits
+        written = self.store.put_many(batch)
+        with self._lock:
+            self.written += written
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'PlanWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
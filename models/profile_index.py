@@ -0,0 +1,183 @@
+# models/profile_index.py
+"""
+Similarity search filtered by categorical columns.
+
+The index is built once per reference dataset. Rows are sorted by their
+(Gender, DietaryPreference) category codes and the globally scaled feature
+matrix is stored in that order, so every partition (e.g. Female / Vegan) is
+one contiguous slice. A filtered query computes distances only over the
+slices of matching partitions instead of scanning every profile and
+discarding most of them.
+
+When fewer than ``n_matches`` profiles match, filters are dropped from the
+last partition column backwards (diet first, then gender) until enough do.
+The result records which filters were actually applied.
+
+Distances are mixed-type:
+
+- weighted squared differences of the scaled numeric features
+- plus a fixed penalty for each categorical column that is not filtered on
+  but differs from the query's value
+
+After widening past diet, for example, profiles on the user's diet still
+rank first among equally close ones. Features are scaled with the
+dataset-wide scaler, so distances are comparable across partitions and with
+the unfiltered ``find_similar_profiles``.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import PROFILE_INDEX_CONFIG
+
+# App dietary preferences, most restrictive first, and the dataset category each maps to
+DIET_CATEGORIES = (
+    ('vegan', 'Vegan'),
+    ('vegetarian', 'Vegetarian'),
+    ('gluten-free', 'Gluten-Free'),
+    ('dairy-free', 'Dairy-Free'),
+)
+DEFAULT_DIET = 'Standard'
+
+
+def diet_category(dietary_preferences: Sequence[str]) -> str:
+    """Dataset DietaryPreference for the app's dietary preference checkboxes"""
+    for preference, category in DIET_CATEGORIES:
+        if preference in dietary_preferences:
+            return category
+    return DEFAULT_DIET
+
+
+class Matches(NamedTuple):
+    """Nearest profiles: dataset row positions, their distances, and the search that produced them"""
+    positions: np.ndarray
+    distances: np.ndarray
+    max_distance: float
+    filters: Dict[str, str]
+    searched: int
+
+
+class ProfileIndex:
+    """Reference profiles partitioned by categorical columns for filtered nearest-neighbour search"""
+
+    def __init__(self, data, scaled, columns: Sequence[str] = PROFILE_INDEX_CONFIG['columns'],
+                 feature_weights: Optional[Dict[str, float]] = None,
+                 category_weights: Optional[Dict[str, float]] = None):
+        """
+        Parameters:
+        data (pd.DataFrame): Reference dataset
+        scaled (ScaledFeatures): Scaler and scaled feature matrix fitted on data (see utils.shared_data)
+        columns (Sequence[str]): Categorical partition columns, most important first
+        feature_weights (Dict[str, float]): Squared-distance weight per feature
+        category_weights (Dict[str, float]): Mismatch penalty per unfiltered column
+        """
+        import pandas as pd
+
+        feature_weights = feature_weights or PROFILE_INDEX_CONFIG['feature_weights']
+        category_weights = category_weights or PROFILE_INDEX_CONFIG['category_weights']
+        self.features = list(scaled.features)
+        self.columns = tuple(columns)
+        self.mean, self.scale = scaled.mean, scaled.scale
+        self.weights = np.array([feature_weights.get(f, 1.0) for f in self.features], dtype=np.float64)
+        self.category_weights = np.array([category_weights.get(c, 0.0) for c in self.columns])
+
+        self.categories: List[Dict[str, int]] = []
+        codes = []
+        for column in self.columns:
+            values = pd.Categorical(data[column])
+            self.categories.append({value: code for code, value in enumerate(values.categories)})
+            codes.append(np.asarray(values.codes, dtype=np.int64))
+
+        # np.lexsort is stable and sorts by its last key first
+        self.order = np.lexsort(codes[::-1])
+        self.matrix = np.ascontiguousarray(scaled.matrix[self.order])
+        keys = np.stack([code[self.order] for code in codes], axis=1)
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)]) if len(keys) else np.array([], int)
+        ends = np.r_[starts[1:], len(keys)]
+        self.partitions: List[Tuple[Tuple[int, ...], int, int]] = [
+            (tuple(int(code) for code in keys[start]), int(start), int(end)) for start, end in zip(starts, ends)]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def partition_sizes(self) -> Dict[Tuple[str, ...], int]:
+        names = [{code: value for value, code in categories.items()} for categories in self.categories]
+        return {tuple(names[i].get(code, None) for i, code in enumerate(key)): end - start
+                for key, start, end in self.partitions}
+
+    def query(self, target_profile: dict, n_matches: int = 5, filters: Optional[Dict[str, str]] = None,
+              widen: bool = True) -> Matches:
+        """
+        Nearest profiles within the partitions matching filters.
+
+        Parameters:
+        target_profile (dict): Feature values, plus optional partition column values used for
+            mismatch penalties in unfiltered columns
+        n_matches (int): Number of profiles to return
+        filters (Dict[str, str]): Required values of partition columns
+        widen (bool): Drop filters (last column first) while fewer than n_matches profiles match
+
+        Returns:
+        Matches: Positions are row positions in the dataset, nearest first; ties keep dataset order
+        """
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        unknown = set(filters) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Cannot filter on {sorted(unknown)}; index partitions by {list(self.columns)}")
+
+        selected = self._select(filters)
+        while widen and filters and sum(end - start for _, start, end in selected) < n_matches:
+            filters.pop(next(column for column in reversed(self.columns) if column in filters))
+            selected = self._select(filters)
+
+        searched = sum(end - start for _, start, end in selected)
+        if not searched:
+            return Matches(np.empty(0, dtype=np.intp), np.empty(0), 0.0, filters, 0)
+
+        if len(selected) == 1:
+            _, start, end = selected[0]
+            rows = np.arange(start, end)
+            block = self.matrix[start:end]
+        else:
+            rows = np.concatenate([np.arange(start, end) for _, start, end in selected])
+            block = self.matrix[rows]
+
+        target = (np.array([target_profile[f] for f in self.features], dtype=np.float64) - self.mean) / self.scale
+        if np.isnan(target).any():
+            raise ValueError("Input data contains NaN values")
+        squared = ((block - target) ** 2) @ self.weights
+        penalties = self._penalties(selected, target_profile, filters)
+        if penalties is not None:
+            squared += penalties
+        distances = np.sqrt(squared)
+
+        positions = self.order[rows]
+        k = min(n_matches, searched)
+        if k < searched:
+            # Keep every profile tied with the k-th distance so ties resolve by dataset position
+            cutoff = np.partition(distances, k - 1)[k - 1]
+            top = np.flatnonzero(distances <= cutoff)
+        else:
+            top = np.arange(searched)
+        top = top[np.lexsort((positions[top], distances[top]))][:k]
+        return Matches(positions[top], distances[top], float(distances.max()), filters, searched)
+
+    def _select(self, filters: Dict[str, str]) -> List[Tuple[Tuple[int, ...], int, int]]:
+        wanted = []
+        for i, column in enumerate(self.columns):
+            if column in filters:
+                code = self.categories[i].get(filters[column])
+                if code is None:
+                    return []
+                wanted.append((i, code))
+        return [partition for partition in self.partitions if all(partition[0][i] == code for i, code in wanted)]
+
+    def _penalties(self, selected, target_profile: dict, filters: Dict[str, str]) -> Optional[np.ndarray]:
+        """Per-row mismatch penalties for unfiltered columns the query has a value for, constant per partition"""
+        soft = [(i, self.categories[i].get(target_profile[column]), self.category_weights[i])
+                for i, column in enumerate(self.columns)
+                if column not in filters and column in target_profile and self.category_weights[i] > 0]
+        if not soft:
+            return None
+        per_partition = [sum(weight for i, code, weight in soft if key[i] != code) for key, _, _ in selected]
+        return np.repeat(per_partition, [end - start for _, start, end in selected])
@@ -0,0 +1,166 @@
+# models/program.py
+"""
+Multi-week progressive exercise programs.
+
+A program is a run of weekly exercise plans (``PROGRAM_CONFIG['weeks']``, 12
+by default). Each week is generated from a small ``WeekSpec``: intensity
+ramps up from the member's starting tier
+(``AIWorkoutPlanGenerator._calculate_intensity``, from age and health
+conditions) by ``intensity_steps``,
+capped at the intensity allowed for the latest predicted risk level, and
+training minutes follow the ``volume`` schedule with lighter deload weeks.
+
+Weeks are stored as separate segments, each tagged with the spec it was built
+from; the spec is the week's full set of dependencies. When an input changes
+mid-program (a new risk score, a new health condition), the starting tier and
+the specs are re-derived, which is cheap, and only weeks from the current week on whose spec changed are
+regenerated. Completed weeks are never touched, so an update costs
+O(changed weeks) rather than a whole new program.
+"""
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import PROGRAM_CONFIG
+from models.exercise_plan import AIWorkoutPlanGenerator, WorkoutParameters
+from models.plan_records import INTENSITIES, ExercisePlanRecord, decode_conditions, encode_conditions
+from utils.instrumentation import timed
+
+
+@dataclass(frozen=True)
+class WeekSpec:
+    """Everything one program week is generated from"""
+    goal: str
+    intensity: str
+    conditions: int
+    volume: float
+
+
+@dataclass(slots=True)
+class ProgramWeek:
+    """A generated week, the spec it was built from and how many times it has been built"""
+    spec: WeekSpec
+    record: ExercisePlanRecord
+    builds: int = 1
+
+
+@dataclass
+class Program:
+    """A multi-week progressive program; weeks before current_week are completed"""
+    goal: str
+    start_intensity: str
+    conditions: Tuple[str, ...]
+    risk_level: str
+    weeks: List[ProgramWeek]
+    current_week: int = 1
+    # Member details the starting tier is derived from; None when the caller chose the tier itself
+    age: Optional[int] = None
+    gender: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.weeks)
+
+    def record(self, week: int) -> ExercisePlanRecord:
+        """Exercise plan record of a 1-based program week"""
+        return self.weeks[week - 1].record
+
+
+def start_intensity(age: int, gender: str, conditions: Sequence[str]) -> str:
+    """Starting intensity tier from age and health conditions"""
+    params = WorkoutParameters(age=age, gender=gender, conditions=list(conditions))
+    return AIWorkoutPlanGenerator()._calculate_intensity(params)
+
+
+class ProgramBuilder:
+    """Builds progressive programs from weekly exercise plans and updates them incrementally"""
+
+    def __init__(self, exercise_generator, config: Optional[Dict] = None):
+        self.exercise_generator = exercise_generator
+        self.config = {**PROGRAM_CONFIG, **(config or {})}
+        weeks = self.config['weeks']
+        if len(self.config['intensity_steps']) != weeks or len(self.config['volume']) != weeks:
+            raise ValueError("intensity_steps and volume need one entry per program week")
+
+    def week_specs(self, goal: str, start: str, conditions: Sequence[str], risk_level: str) -> List[WeekSpec]:
+        """Derive every week's spec from the program inputs"""
+        level = INTENSITIES.index(start)
+        cap = INTENSITIES.index(self.config['risk_intensity_caps'][risk_level])
+        mask = encode_conditions(conditions)
+        return [WeekSpec(goal, INTENSITIES[min(level + step, cap)], mask, volume)
+                for step, volume in zip(self.config['intensity_steps'], self.config['volume'])]
+
+    @timed('program_generation')
+    def build(self, goal: str, start: Optional[str], conditions: Sequence[str], risk_level: str,
+              age: Optional[int] = None, gender: Optional[str] = None) -> Program:
+        """
+        Generate a full program.
+
+        Parameters:
+        goal (str): Fitness goal
+        start (str): Starting intensity tier, or None to derive it from age, gender and conditions
+        conditions (Sequence[str]): Health conditions
+        risk_level (str): Predicted risk level, which caps the intensity
+        age (int): Member's age; with gender, lets update() re-derive the starting tier
+        gender (str): Member's gender
+
+        Returns:
+        Program: One generated week per program week
+        """
+        if start is None:
+            if age is None or gender is None:
+                raise ValueError("start or both age and gender are required")
+            start = start_intensity(age, gender, conditions)
+        specs = self.week_specs(goal, start, conditions, risk_level)
+        return Program(goal, start, tuple(conditions), risk_level,
+                       [ProgramWeek(spec, self._build_week(spec)) for spec in specs], age=age, gender=gender)
+
+    @timed('program_update')
+    def update(self, program: Program, risk_level: Optional[str] = None,
+               conditions: Optional[Sequence[str]] = None, week: Optional[int] = None) -> List[int]:
+        """
+        Apply new inputs to a program in place, regenerating only the affected future weeks.
+
+        When the risk level or the conditions change and the program knows the member's age and
+        gender, the starting tier is derived again from them, so future weeks ramp up from the
+        tier a new program would start at.
+
+        Parameters:
+        program (Program): Program to update
+        risk_level (str): New predicted risk level, if it changed
+        conditions (Sequence[str]): New health conditions, if they changed
+        week (int): Week the change takes effect (default: program.current_week); completed
+            weeks cannot change, so it may not be before the current week. Becomes the
+            program's current week
+
+        Returns:
+        List[int]: Week numbers that were regenerated
+        """
+        if week is not None:
+            if not program.current_week <= week <= len(program):
+                raise ValueError(f"week must be between {program.current_week} and {len(program)}")
+            program.current_week = week
+        if risk_level is not None:
+            program.risk_level = risk_level
+        if conditions is not None:
+            program.conditions = tuple(conditions)
+        if (risk_level is not None or conditions is not None) and program.age is not None:
+            program.start_intensity = start_intensity(program.age, program.gender, program.conditions)
+
+        specs = self.week_specs(program.goal, program.start_intensity, program.conditions, program.risk_level)
+        rebuilt = []
+        for number in range(program.current_week, len(program) + 1):
+            segment, spec = program.weeks[number - 1], specs[number - 1]
+            if segment.spec != spec:
+                program.weeks[number - 1] = ProgramWeek(spec, self._build_week(spec), segment.builds + 1)
+                rebuilt.append(number)
+        return rebuilt
+
+    def render_week(self, program: Program, week: int) -> Dict:
+        """Display dict of one program week, as returned by get_weekly_exercise_plan"""
+        return self.exercise_generator.render_exercise_plan(program.record(week))
+
+    def _build_week(self, spec: WeekSpec) -> ExercisePlanRecord:
+        record = self.exercise_generator.get_weekly_exercise_plan_record(
+            spec.intensity, decode_conditions(spec.conditions), spec.goal)
+        days = tuple(day if day.focus == "Rest" else replace(day, duration=5 * round(day.duration * spec.volume / 5))
+                     for day in record.days)
+        return replace(record, days=days)
@@ -0,0 +1,211 @@
+# models/sharded_search.py
+"""
+Exact similarity search over a reference dataset split into shards.
+
+Rows are assigned to shards either by Age range (rows sorted by age and cut
+into equal-sized ranges) or by a hash of their row position. Every shard
+keeps its own contiguous copy of the scaled feature rows, scaled with the
+single dataset-wide scaler. Distances are therefore the same numbers the
+unsharded ``find_similar_profiles`` computes.
+
+A query fans out to a thread or process pool. Each shard returns its
+nearest rows sorted by (distance, row position), keeping every row tied
+with its k-th distance, plus its largest distance. A heap merge of the
+shard lists then yields exactly the unsharded top-k, which also breaks ties
+by row position. The largest of the shard maxima is the dataset maximum
+used to normalize similarity scores.
+
+Process pools attach the shard arrays read-only from shared memory (see
+utils/shared_arrays.py), so workers do not each receive a pickled copy and
+a query sends only the scaled target and k.
+"""
+import heapq
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from config import PROFILE_INDEX_CONFIG, SHARD_CONFIG
+from models.profile_index import Matches
+from utils.instrumentation import timed
+from utils.shared_arrays import SharedArrayStore, attach_arrays
+
+STRATEGIES = ('age', 'hash')
+EXECUTORS = ('thread', 'process', 'serial')
+
+# Shard arrays attached in process pool workers
+_attached: Dict[str, np.ndarray] = {}
+
+
+class ShardResult(NamedTuple):
+    """A shard's nearest rows sorted by (distance, position), its largest distance and matching row count"""
+    distances: np.ndarray
+    positions: np.ndarray
+    max_distance: float
+    kept: int
+
+
+def _attach(paths: Dict[str, str]) -> None:
+    _attached.update(attach_arrays(paths))
+
+
+def _search(matrix: np.ndarray, positions: np.ndarray, codes: np.ndarray, target: np.ndarray, k: int,
+            wanted: Sequence) -> ShardResult:
+    """Nearest k rows of one shard among those whose category codes equal the wanted ones (None: any)"""
+    distances = np.sqrt(((matrix - target) ** 2).sum(axis=1))
+    keep = None
+    for column, code in enumerate(wanted):
+        if code is not None:
+            match = codes[:, column] == code
+            keep = match if keep is None else keep & match
+    if keep is not None:
+        distances = np.where(keep, distances, np.inf)
+        kept = int(keep.sum())
+        max_distance = float(distances[keep].max()) if kept else 0.0
+    else:
+        kept = len(distances)
+        max_distance = float(distances.max()) if kept else 0.0
+
+    k = min(k, kept)
+    if not k:
+        return ShardResult(np.empty(0), np.empty(0, dtype=np.int64), max_distance, kept)
+    if k < len(distances):
+        # Keep every row tied with the k-th distance so the merge can break ties by position
+        top = np.flatnonzero(distances <= np.partition(distances, k - 1)[k - 1])
+    else:
+        top = np.arange(len(distances))
+    top = top[np.lexsort((positions[top], distances[top]))][:k]
+    return ShardResult(distances[top], positions[top], max_distance, kept)
+
+
+def _search_attached(shard: int, target: np.ndarray, k: int, wanted: Sequence) -> ShardResult:
+    return _search(_attached[f'matrix{shard}'], _attached[f'positions{shard}'], _attached[f'codes{shard}'],
+                   target, k, wanted)
+
+
+class ShardedIndex:
+    """Reference profiles split into shards, searched in parallel and merged exactly"""
+
+    def __init__(self, data, scaled, n_shards: int = SHARD_CONFIG['shards'], strategy: str = SHARD_CONFIG['strategy'],
+                 executor: str = SHARD_CONFIG['executor'], workers: Optional[int] = SHARD_CONFIG['workers'],
+                 filter_columns: Sequence[str] = PROFILE_INDEX_CONFIG['columns']):
+        """
+        Parameters:
+        data (pd.DataFrame): Reference dataset
+        scaled (ScaledFeatures): Scaler and scaled feature matrix fitted on the whole of data
+        n_shards (int): Number of shards
+        strategy (str): 'age' (contiguous Age ranges) or 'hash' (hash of row position)
+        executor (str): 'thread', 'process' or 'serial' (no pool)
+        workers (int): Pool size; defaults to one per shard, at most the CPU count
+        filter_columns (Sequence[str]): Categorical columns queries may filter on
+        """
+        import pandas as pd
+
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown shard strategy {strategy!r}; expected one of {STRATEGIES}")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {EXECUTORS}")
+        if np.isnan(scaled.matrix).any():
+            raise ValueError("Input data contains NaN values")
+
+        self.features = list(scaled.features)
+        self.mean, self.scale = scaled.mean, scaled.scale
+        self.executor = executor
+        self.workers = workers or min(n_shards, os.cpu_count() or 1)
+        self.filter_columns = tuple(column for column in filter_columns if column in data.columns)
+        self.categories: List[Dict[str, int]] = []
+        codes = []
+        for column in self.filter_columns:
+            values = pd.Categorical(data[column])
+            self.categories.append({value: code for code, value in enumerate(values.categories)})
+            codes.append(np.asarray(values.codes, dtype=np.int16))
+        codes = np.stack(codes, axis=1) if codes else np.empty((len(data), 0), dtype=np.int16)
+
+        if strategy == 'age':
+            parts = np.array_split(np.argsort(data['Age'].to_numpy(), kind='stable'), n_shards)
+        else:
+            shard_of = pd.util.hash_array(np.arange(len(data), dtype=np.int64)) % np.uint64(n_shards)
+            parts = [np.flatnonzero(shard_of == shard) for shard in range(n_shards)]
+        self.shards = [{'positions': part.astype(np.int64),
+                        'matrix': np.ascontiguousarray(scaled.matrix[part]),
+                        'codes': np.ascontiguousarray(codes[part])} for part in parts]
+        self._rows = len(data)
+        self._pool = None
+        self._store = None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def shard_sizes(self) -> List[int]:
+        return [len(shard['positions']) for shard in self.shards]
+
+    def _start(self):
+        if self._pool is None and self.executor == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        elif self._pool is None and self.executor == 'process':
+            self._store = SharedArrayStore()
+            for i, shard in enumerate(self.shards):
+                for name, array in shard.items():
+                    self._store.publish(f'{name}{i}', array)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                             initargs=(self._store.paths,))
+        return self._pool
+
+    @timed('sharded_search')
+    def query(self, target_profile: dict, n_matches: int = 5, filters: Optional[Dict[str, str]] = None) -> Matches:
+        """
+        Nearest profiles over all shards; identical to an unsharded scan with ties broken by row position.
+
+        Parameters:
+        target_profile (dict): Feature values
+        n_matches (int): Number of profiles to return
+        filters (Dict[str, str]): Required values of filter columns; not widened when few rows match
+
+        Returns:
+        Matches: Positions are row positions in the dataset, nearest first
+        """
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        unknown = set(filters) - set(self.filter_columns)
+        if unknown:
+            raise ValueError(f"Cannot filter on {sorted(unknown)}; shards hold {list(self.filter_columns)}")
+        # A value absent from the dataset matches no row
+        wanted = tuple(self.categories[i].get(filters[column], -1) if column in filters else None
+                       for i, column in enumerate(self.filter_columns))
+
+        target = (np.array([[target_profile[f] for f in self.features]], dtype=np.float64) - self.mean) / self.scale
+        if np.isnan(target).any():
+            raise ValueError("Input data contains NaN values")
+
+        pool = self._start()
+        if self.executor == 'process':
+            results = list(pool.map(_search_attached, range(len(self.shards)), itertools.repeat(target),
+                                    itertools.repeat(n_matches), itertools.repeat(wanted)))
+        else:
+            calls = [(shard['matrix'], shard['positions'], shard['codes'], target, n_matches, wanted)
+                     for shard in self.shards]
+            results = (list(pool.map(lambda args: _search(*args), calls)) if pool is not None
+                       else [_search(*args) for args in calls])
+
+        kept = sum(result.kept for result in results)
+        merged = list(itertools.islice(heapq.merge(*(zip(result.distances.tolist(), result.positions.tolist())
+                                                     for result in results)), min(n_matches, kept)))
+        return Matches(np.array([position for _, position in merged], dtype=np.int64),
+                       np.array([distance for distance, _ in merged]),
+                       max((result.max_distance for result in results), default=0.0), filters, kept)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,183 @@
+# models/similarity_cache.py
+"""
+Memoized similar-profile searches over the quantized query space.
+
+A similarity query from the app is (Age, BMI, risk score, gender, diet). Age
+is a whole number and BMI is entered at 0.1 resolution. The risk score is the
+risk model's prediction for that (Age, BMI), so a dataset only ever sees a
+few thousand (Age, BMI) points per gender and diet. ``SimilarityCache``
+quantizes each query to the SIMILARITY_CACHE_CONFIG steps, which match the
+resolution of the data. It then keeps the search result under
+(dataset fingerprint, quantized query, n_matches) in a bounded LRU cache.
+
+The search always runs on the quantized query, not the raw one. A cached
+result is therefore exactly what a fresh search for any query in the same
+cell would return, whichever query filled it.
+
+``precompute`` fills the cache for the most requested region of the query
+space (SIMILARITY_CACHE_CONFIG['precompute']). The risk scores for that
+region come from one batch prediction. ``precompute_in_background`` runs it
+on a pool of its own, so no training worker or request waits for it; a
+failure only leaves the region uncached and is counted. Hits, misses,
+evictions and precompute failures are exposed through ``stats`` and
+``to_prometheus``.
+"""
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import SIMILARITY_CACHE_CONFIG
+from utils.cache import LRUCache
+
+# Query fields, in key order
+QUERY_FIELDS = ('Age', 'BMI', 'HealthRiskScore', 'Gender', 'DietaryPreference')
+
+
+def _result_nbytes(result) -> int:
+    # An estimate of 8 bytes per cell; pandas' memory_usage costs about as much as a search
+    profiles = result[0] if isinstance(result, tuple) else result
+    return int(profiles.size) * 8 if hasattr(profiles, 'size') else 0
+
+
+class SimilarityCache:
+    """Search results keyed by (dataset fingerprint, quantized query, n_matches)"""
+
+    def __init__(self, max_entries: int = SIMILARITY_CACHE_CONFIG['max_entries'],
+                 max_bytes: Optional[int] = SIMILARITY_CACHE_CONFIG['max_bytes'],
+                 steps: Optional[Dict[str, float]] = None):
+        """
+        Parameters:
+        max_entries (int): Results kept
+        max_bytes (int): Total size of the kept results
+        steps (Dict[str, float]): Quantization step of each numeric query field; defaults to
+            SIMILARITY_CACHE_CONFIG['steps']
+        """
+        self.steps = dict(steps or SIMILARITY_CACHE_CONFIG['steps'])
+        self._cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=_result_nbytes)
+        self._lock = threading.Lock()
+        self.precomputed = 0
+        self.precompute_failures = 0
+        self.last_precompute_error: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def quantize(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """The profile with each numeric field rounded to its step; other fields are kept as they are"""
+        quantized = dict(profile)
+        for field, step in self.steps.items():
+            if profile.get(field) is not None:
+                quantized[field] = round(round(float(profile[field]) / step) * step, 6)
+        return quantized
+
+    def key(self, fingerprint: Hashable, profile: Dict[str, Any], n_matches: int) -> tuple:
+        """Cache key of a profile that has already been quantized"""
+        return (fingerprint, n_matches) + tuple(profile.get(field) for field in QUERY_FIELDS)
+
+    def get(self, fingerprint: Hashable, profile: Dict[str, Any], n_matches: int,
+            search: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Cached result for a query, searching on a miss.
+
+        Parameters:
+        fingerprint (Hashable): Content fingerprint of the searched dataset
+        profile (Dict[str, Any]): Query with the QUERY_FIELDS entries
+        n_matches (int): Number of profiles the search returns
+        search (Callable): Called with the quantized profile on a miss
+
+        Returns:
+        Any: What search returned for the quantized profile
+        """
+        profile = self.quantize(profile)
+        # Concurrent misses for the same cell wait for one search instead of each running it
+        return self._cache.get_or_create(self.key(fingerprint, profile, n_matches), lambda: search(profile))
+
+    def precompute(self, fingerprint: Hashable, search: Callable[[Dict[str, Any]], Any], risk_model,
+                   n_matches: int, region: Optional[Dict] = None) -> int:
+        """
+        Search every query of a region ahead of the requests for it.
+
+        Parameters:
+        fingerprint (Hashable): Content fingerprint of the searched dataset
+        search (Callable): Called with each quantized profile not cached yet
+        risk_model: Model whose expected_score gives the risk score of an (Age, BMI) grid,
+            the same score requests query with
+        n_matches (int): Number of profiles the search returns
+        region (Dict): Age and BMI ranges (inclusive), genders and diets; defaults to
+            SIMILARITY_CACHE_CONFIG['precompute']
+
+        Returns:
+        int: Results added to the cache
+        """
+        import numpy as np
+
+        region = region or SIMILARITY_CACHE_CONFIG['precompute']
+        ages = np.arange(region['ages'][0], region['ages'][1] + 1, self.steps.get('Age', 1))
+        bmi_step = self.steps.get('BMI', 0.1)
+        bmis = np.round(np.arange(region['bmis'][0], region['bmis'][1] + bmi_step / 2, bmi_step), 6)
+        grid = np.array([(age, bmi) for age in ages for bmi in bmis], dtype=np.float64)
+        scores = risk_model.expected_score(grid) if len(grid) else []
+
+        added = 0
+        for (age, bmi), score in zip(grid.tolist(), np.asarray(scores).tolist()):
+            for gender in region['genders']:
+                for diet in region['diets']:
+                    profile = self.quantize({'Age': age, 'BMI': bmi, 'HealthRiskScore': score,
+                                             'Gender': gender, 'DietaryPreference': diet})
+                    key = self.key(fingerprint, profile, n_matches)
+                    if key in self._cache:
+                        continue
+                    self._cache.put(key, search(profile))
+                    added += 1
+        with self._lock:
+            self.precomputed += added
+        return added
+
+    def precompute_in_background(self, pool: Executor, *args, **kwargs) -> Future:
+        """
+        Run precompute on a pool, e.g. a single low-priority worker, without raising its errors.
+
+        Parameters:
+        pool (Executor): Pool to run on
+        *args, **kwargs: Arguments of precompute
+
+        Returns:
+        Future: Results added, or None when precomputing failed; the failure is counted and its
+            message kept in last_precompute_error
+        """
+        def run():
+            try:
+                return self.precompute(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.precompute_failures += 1
+                    self.last_precompute_error = str(e)
+                return None
+
+        return pool.submit(run)
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._cache), 'bytes': self._cache.total_bytes,
+                'precomputed': self.precomputed, 'precompute_failures': self.precompute_failures,
+                **self._cache.stats.to_dict()}
+
+    def to_prometheus(self, prefix: str = 'healthalign') -> str:
+        """Render the counters in the Prometheus text exposition format"""
+        stats = self.stats()
+        lines = []
+        for name, value, kind, description in (
+                ('similarity_cache_hits_total', stats['hits'], 'counter', 'Similarity queries answered from the cache.'),
+                ('similarity_cache_misses_total', stats['misses'], 'counter', 'Similarity queries that ran a search.'),
+                ('similarity_cache_evictions_total', stats['evictions'], 'counter', 'Cached results evicted.'),
+                ('similarity_cache_precomputed_total', stats['precomputed'], 'counter',
+                 'Results searched ahead of requests.'),
+                ('similarity_cache_precompute_failures_total', stats['precompute_failures'], 'counter',
+                 'Precompute runs that failed.'),
+                ('similarity_cache_entries', stats['entries'], 'gauge', 'Cached results.')):
+            lines += [f"# HELP {prefix}_{name} {description}",
+                      f"# TYPE {prefix}_{name} {kind}",
+                      f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,254 @@
+# models/sweep.py
+"""
+Parallel hyperparameter sweep over MODEL_CONFIG variants.
+
+Each grid point is trained and evaluated in a process pool. The dataset is
+published once as memory-mapped arrays (see utils/shared_arrays.py) and every
+worker attaches to it read-only, so nothing but the small parameter dicts is
+pickled per task. For each variant the sweep reports accuracy/error, fit time,
+predict latency and artifact size, then picks a Pareto-optimal configuration.
+
+Usage:
+    python -m models.sweep data/health_fitness_dataset.csv --output sweep.json
+    python -m models.sweep data.csv --n-estimators 25 50 --n-clusters 4 5 6 --workers 4
+"""
+import argparse
+import copy
+import itertools
+import json
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import MODEL_CONFIG, SWEEP_CONFIG
+from utils.shared_arrays import SharedArrayStore, attach_arrays
+
+# Objectives minimized when picking the Pareto-optimal variant of each model
+OBJECTIVES = {
+    'random_forest': ['mae', 'predict_latency_ms', 'artifact_bytes', 'fit_time_s'],
+    'kmeans': ['negative_silhouette', 'predict_latency_ms', 'artifact_bytes', 'fit_time_s'],
+}
+
+_shared: Dict[str, np.ndarray] = {}
+
+
+def expand_grid(grid: Dict[str, Dict[str, List]]) -> List[Dict]:
+    """Expand a {section: {param: [values]}} grid into one task per MODEL_CONFIG variant"""
+    tasks = []
+    for section, params in grid.items():
+        names = sorted(params)
+        for values in itertools.product(*(params[name] for name in names)):
+            config = copy.deepcopy(MODEL_CONFIG[section])
+            config.update(zip(names, values))
+            tasks.append({'section': section, 'config': config})
+    return tasks
+
+
+def artifact_size(obj) -> int:
+    """Pickled size of an object, counted without materializing the pickle"""
+    class _Counter:
+        nbytes = 0
+
+        def write(self, data):
+            self.nbytes += memoryview(data).nbytes
+
+    counter = _Counter()
+    pickle.dump(obj, counter, protocol=pickle.HIGHEST_PROTOCOL)
+    return counter.nbytes
+
+
+def _predict_latency_ms(predict, X: np.ndarray, repeat: int = 25) -> float:
+    """Median latency of a single-row prediction"""
+    timings = []
+    for i in range(repeat):
+        row = X[i % len(X):i % len(X) + 1]
+        started = time.perf_counter()
+        predict(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def _attach(paths: Dict[str, str]) -> None:
+    _shared.update(attach_arrays(paths))
+
+
+def _evaluate_forest(config: Dict) -> Dict:
+    from models.health_risk_model import HealthRiskModel
+
+    features, target = _shared['features'], _shared['target']
+    train_idx, test_idx = _shared['train_idx'], _shared['test_idx']
+    X_train, X_test = features[train_idx, :2], features[test_idx, :2]
+
+    model = HealthRiskModel(config)
+    started = time.perf_counter()
+    model.train(X_train, target[train_idx])
+    fit_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted = model.predict(X_test)
+    batch_time = time.perf_counter() - started
+
+    y_test = target[test_idx]
+    return {
+        'accuracy': float(np.mean(predicted == y_test)),
+        'mae': float(np.mean(np.abs(predicted - y_test))),
+        'fit_time_s': fit_time,
+        'predict_latency_ms': _predict_latency_ms(model.predict, X_test),
+        'batch_predict_us_per_row': batch_time / len(X_test) * 1e6,
+        'artifact_bytes': artifact_size(model),
+    }
+
+
+def _evaluate_kmeans(config: Dict) -> Dict:
+    from sklearn.metrics import silhouette_score
+
+    from models.exercise_model import ExercisePlanGenerator
+
+    features = _shared['features']
+    train_idx, test_idx = _shared['train_idx'], _shared['test_idx']
+    X_train, X_test = features[train_idx], features[test_idx]
+
+    generator = ExercisePlanGenerator(config)
+    started = time.perf_counter()
+    kmeans = generator.create_user_clusters(X_train)
+    fit_time = time.perf_counter() - started
+
+    labels = kmeans.predict(X_test)
+    silhouette = float(silhouette_score(
+        X_test, labels,
+        sample_size=min(SWEEP_CONFIG['silhouette_sample_size'], len(X_test)),
+        random_state=SWEEP_CONFIG['random_state']
+    )) if len(set(labels)) > 1 else 0.0
+    return {
+        'inertia': float(-kmeans.score(X_test)),
+        'silhouette': silhouette,
+        'negative_silhouette': -silhouette,
+        'fit_time_s': fit_time,
+        'predict_latency_ms': _predict_latency_ms(kmeans.predict, X_test),
+        'artifact_bytes': artifact_size(kmeans),
+    }
+
+
+def evaluate(task: Dict) -> Dict:
+    """Train and evaluate one variant against the shared dataset (runs in a worker)"""
+    evaluator = _evaluate_forest if task['section'] == 'random_forest' else _evaluate_kmeans
+    return {**task, 'metrics': evaluator(task['config'])}
+
+
+def pareto_front(results: List[Dict], objectives: List[str]) -> List[Dict]:
+    """Results not dominated on every objective by another result"""
+    front = []
+    for candidate in results:
+        c = [candidate['metrics'][name] for name in objectives]
+        dominated = False
+        for other in results:
+            o = [other['metrics'][name] for name in objectives]
+            if all(x <= y for x, y in zip(o, c)) and any(x < y for x, y in zip(o, c)):
+                dominated = True
+                break
+        if not dominated:
+            front.append(candidate)
+    return front
+
+
+def pick_config(front: List[Dict], objectives: List[str]) -> Dict:
+    """Pick the Pareto point closest to the ideal after min-max normalizing each objective"""
+    values = np.array([[r['metrics'][name] for name in objectives] for r in front], dtype=float)
+    spread = values.max(axis=0) - values.min(axis=0)
+    spread[spread == 0] = 1
+    normalized = (values - values.min(axis=0)) / spread
+    return front[int(np.argmin(np.linalg.norm(normalized, axis=1)))]
+
+
+def run_sweep(data, grid: Optional[Dict] = None, max_workers: Optional[int] = None) -> Dict:
+    """
+    Train and evaluate every grid variant in parallel.
+
+    Parameters:
+    data (pd.DataFrame): Dataset with Age, BMI and HealthRiskScore columns
+    grid (dict): {section: {param: [values]}}; defaults to SWEEP_CONFIG['grid']
+    max_workers (int): Process pool size (defaults to the CPU count)
+
+    Returns:
+    dict: Per-variant results, the Pareto front and the recommended MODEL_CONFIG per section
+    """
+    tasks = expand_grid(grid or SWEEP_CONFIG['grid'])
+    features = data[['Age', 'BMI', 'HealthRiskScore']].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(SWEEP_CONFIG['random_state'])
+    order = rng.permutation(len(features))
+    n_test = max(1, int(len(features) * SWEEP_CONFIG['test_size']))
+
+    with SharedArrayStore() as store:
+        store.publish('features', features)
+        store.publish('target', features[:, 2])
+        store.publish('train_idx', np.sort(order[n_test:]))
+        store.publish('test_idx', np.sort(order[:n_test]))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach,
+                                 initargs=(store.paths,)) as pool:
+            results = list(pool.map(evaluate, tasks))
+
+    report = {'results': results, 'pareto_front': {}, 'recommended': {}}
+    for section, objectives in OBJECTIVES.items():
+        section_results = [r for r in results if r['section'] == section]
+        if not section_results:
+            continue
+        front = pareto_front(section_results, objectives)
+        report['pareto_front'][section] = [r['config'] for r in front]
+        report['recommended'][section] = pick_config(front, objectives)['config']
+    return report
+
+
+def print_report(report: Dict) -> None:
+    for result in report['results']:
+        metrics = result['metrics']
+        params = {k: v for k, v in result['config'].items() if k != 'random_state'}
+        if result['section'] == 'random_forest':
+            quality = f"acc={metrics['accuracy']:.3f} mae={metrics['mae']:.2f}"
+        else:
+            quality = f"silhouette={metrics['silhouette']:.3f} inertia={metrics['inertia']:.0f}"
+        pareto = '*' if result['config'] in report['pareto_front'].get(result['section'], []) else ' '
+        print(f"{pareto} {result['section']:<14}{str(params):<40}{quality:<32}"
+              f"fit={metrics['fit_time_s']:.2f}s predict={metrics['predict_latency_ms']:.2f}ms "
+              f"size={metrics['artifact_bytes'] / 1e6:.1f}MB")
+    print("\n* Pareto-optimal. Recommended MODEL_CONFIG:")
+    print(json.dumps(report['recommended'], indent=4))
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data', help='Training CSV')
+    parser.add_argument('--n-estimators', type=int, nargs='+', help='Override the forest n_estimators grid')
+    parser.add_argument('--max-depth', type=int, nargs='+',
+                        help='Override the forest max_depth grid (0 means unlimited)')
+    parser.add_argument('--n-clusters', type=int, nargs='+', help='Override the KMeans n_clusters grid')
+    parser.add_argument('--workers', type=int, help='Process pool size')
+    parser.add_argument('--output', help='Write the full report to this JSON file')
+    args = parser.parse_args(argv)
+
+    grid = copy.deepcopy(SWEEP_CONFIG['grid'])
+    if args.n_estimators:
+        grid['random_forest']['n_estimators'] = args.n_estimators
+    if args.max_depth:
+        grid['random_forest']['max_depth'] = [depth or None for depth in args.max_depth]
+    if args.n_clusters:
+        grid['kmeans']['n_clusters'] = args.n_clusters
+
+    from utils.data_processing import preprocess_data
+
+    data = preprocess_data(pd.read_csv(args.data))
+    report = run_sweep(data, grid, max_workers=args.workers)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
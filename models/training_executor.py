@@ -0,0 +1,181 @@
+# models/training_executor.py
+"""
+Background training of per-dataset model versions.
+
+A ``TrainingExecutor`` trains datasets on its own thread pool, so the
+request that uploads a dataset never waits behind the training. A job runs
+the executor's ``TrainingStep`` functions in order, e.g.:
+
+- risk lookup
+- KMeans clusters
+- risk forest
+- explainer
+
+Each step receives the data and the artifacts of the steps before it. The
+job reports its current step and progress (the weighted share of steps
+done), which the app polls.
+
+A finished job's artifacts are gathered into one immutable
+``ModelVersion``, with a version number taken when the job finishes, and
+resolve the job's future. The job's ``on_done`` callback publishes the
+version, e.g. as the dataset's 'models' artifact. Callers swap versions in
+by replacing a single reference to one (the app keeps one per session), so
+a request sees either the old version or the new one, never a mix of the
+two. Until a dataset's own version is ready, a caller can keep answering
+with the version it already holds, trained on an earlier dataset.
+
+Training runs on threads rather than processes. The trained models stay in
+the server process, with no pickling, and numpy and scikit-learn release
+the GIL in their heavy loops.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Sequence
+
+from config import TRAINING_CONFIG
+from utils.instrumentation import stage
+
+
+class TrainingStep(NamedTuple):
+    """One artifact a training job builds: its name, a progress label, a relative cost and its builder"""
+    name: str
+    label: str
+    weight: float
+    build: Callable[[Any, Dict[str, Any]], Any]
+
+
+class ModelVersion(NamedTuple):
+    """Artifacts trained together on one dataset, published as a unit"""
+    version: int
+    key: Hashable
+    artifacts: Dict[str, Any]
+    trained_at: float
+
+
+class TrainingJob:
+    """Progress and outcome of training one dataset"""
+
+    def __init__(self, key: Hashable, total_weight: float):
+        self.key = key
+        self.state = 'queued'
+        self.stage = 'Waiting for earlier training to finish'
+        self.error: Optional[str] = None
+        # Error raised by the on_done callback, which runs after the job is done and cannot fail it
+        self.callback_error: Optional[str] = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.future: Future = Future()
+        self._done_weight = 0.0
+        self._total_weight = total_weight or 1.0
+
+    @property
+    def progress(self) -> float:
+        """Weighted share of the training steps done, from 0 to 1"""
+        return min(1.0, self._done_weight / self._total_weight)
+
+    @property
+    def done(self) -> bool:
+        return self.state in ('done', 'failed')
+
+    def result(self, timeout: Optional[float] = None) -> ModelVersion:
+        """Wait for the trained version; raises the training error if the job failed"""
+        return self.future.result(timeout)
+
+
+class TrainingExecutor:
+    """Trains datasets in the background and atomically swaps in each finished model version"""
+
+    def __init__(self, steps: Sequence[TrainingStep], workers: int = TRAINING_CONFIG['workers'],
+                 max_jobs: int = TRAINING_CONFIG['max_jobs']):
+        """
+        Parameters:
+        steps (Sequence[TrainingStep]): Artifacts to build, in order
+        workers (int): Datasets trained at the same time
+        max_jobs (int): Finished jobs kept for progress lookups
+        """
+        self.steps = list(steps)
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='training')
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[Hashable, TrainingJob]' = OrderedDict()
+        self._versions = itertools.count(1)
+
+    def job(self, key: Hashable) -> Optional[TrainingJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def jobs(self) -> Sequence[TrainingJob]:
+        """Known jobs, oldest first"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def submit(self, key: Hashable, data, reuse: Optional[Dict[str, Any]] = None,
+               on_done: Optional[Callable[[ModelVersion], None]] = None) -> TrainingJob:
+        """
+        Queue a dataset for training; a dataset already queued, training or trained returns its job.
+
+        Parameters:
+        key (Hashable): Dataset identity, e.g. its content fingerprint
+        data (pd.DataFrame): Training data
+        reuse (Dict[str, Any]): Artifacts to take as they are instead of building them,
+            e.g. a risk model kept because the data has not drifted
+        on_done (Callable): Called on the training thread with the new version once the job is
+            done, before the job can be forgotten; its errors are kept in job.callback_error.
+            Long follow-up work belongs on another pool, since the training worker waits for it
+
+        Returns:
+        TrainingJob: Failed jobs are replaced by a new one
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state != 'failed':
+                return job
+            reuse = dict(reuse or {})
+            job = TrainingJob(key, sum(step.weight for step in self.steps if step.name not in reuse))
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+        self._pool.submit(self._run, job, data, reuse, on_done)
+        return job
+
+    def _run(self, job: TrainingJob, data, artifacts: Dict[str, Any],
+             on_done: Optional[Callable[[ModelVersion], None]]) -> None:
+        job.state = 'running'
+        try:
+            for step in self.steps:
+                if step.name in artifacts:
+                    continue
+                job.stage = step.label
+                with stage(f'training_{step.name}'):
+                    artifacts[step.name] = step.build(data, artifacts)
+                job._done_weight += step.weight
+            with self._lock:
+                version = ModelVersion(next(self._versions), job.key, artifacts, time.time())
+        except Exception as e:
+            job.state, job.error, job.stage = 'failed', str(e), 'Failed'
+            job.finished = time.time()
+            job.future.set_exception(e)
+        else:
+            job.state, job.stage = 'done', 'Done'
+            job.finished = time.time()
+            job.future.set_result(version)
+            # After the job is done, so waiters never wait for follow-up work and it cannot fail
+            # the job, but before it is forgotten, so callers never miss both the job and its result
+            if on_done is not None:
+                try:
+                    on_done(version)
+                except Exception as e:
+                    job.callback_error = str(e)
+        finally:
+            self._forget_finished()
+
+    def _forget_finished(self) -> None:
+        with self._lock:
+            finished = [key for key, job in self._jobs.items() if job.done]
+            for key in finished[:max(0, len(finished) - self.max_jobs)]:
+                del self._jobs[key]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
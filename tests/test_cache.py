@@ -0,0 +1,88 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import LRUCache
+from utils.dataset_cache import CachedDataset, DatasetCache
+
+
+def test_concurrent_misses_build_once():
+    cache = LRUCache(max_entries=4)
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create('key', build)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ['value'] * 4
+
+
+def test_other_keys_do_not_wait_for_a_build():
+    cache = LRUCache(max_entries=4)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.5)
+        return 'slow'
+
+    thread = threading.Thread(target=lambda: cache.get_or_create('slow', slow))
+    thread.start()
+    started.wait()
+    begin = time.perf_counter()
+    assert cache.get_or_create('fast', lambda: 'fast') == 'fast'
+    assert time.perf_counter() - begin < 0.25
+    thread.join()
+
+
+def test_failed_build_is_retried():
+    cache = LRUCache(max_entries=4)
+
+    def fail():
+        raise ValueError("bad upload")
+
+    try:
+        cache.get_or_create('key', fail)
+    except ValueError:
+        pass
+    assert cache.get_or_create('key', lambda: 'ok') == 'ok'
+
+
+def test_artifact_built_once_across_threads():
+    dataset = CachedDataset('fp', pd.DataFrame({'Age': [30, 40]}))
+    calls = []
+
+    def build(data):
+        calls.append(1)
+        time.sleep(0.1)
+        return len(data)
+
+    threads = [threading.Thread(target=lambda: dataset.get_artifact('rows', build)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert dataset.artifacts['rows'] == 2
+
+
+def test_artifacts_count_towards_max_bytes():
+    raw = b"Age,Gender,BMI,HealthRiskScore,ExerciseCapacity\n30,Male,22.0,50.0,40.0\n"
+    cache = DatasetCache(max_entries=4, max_bytes=10 ** 9)
+    dataset = cache.load(raw)
+    before = cache.stats()['bytes']
+    dataset.get_artifact('matrix', lambda data: np.zeros(1000))
+    assert cache.stats()['bytes'] == before + 8000
+    dataset.set_artifact('models', {'forest': np.zeros(500)})
+    assert cache.stats()['bytes'] == before + 12000
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import COHORT_CONFIG
+from models.cohort_cube import CohortCube
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    n = 5000
+    frame = pd.DataFrame({
+        'Age': rng.integers(18, 80, n).astype(float),
+        'BMI': rng.uniform(16, 40, n).round(1),
+        'Gender': rng.choice(['Female', 'Male', 'Other'], n, p=[0.48, 0.48, 0.04]),
+        'DietaryPreference': rng.choice(list(COHORT_CONFIG['diets']), n),
+        'HealthRiskScore': rng.uniform(0, 10, n),
+        'ExerciseCapacity': rng.uniform(0, 10, n),
+    })
+    frame.loc[::97, 'BMI'] = np.nan
+    return frame
+
+
+def assert_same_cube(cube, expected):
+    assert (cube.rows, cube.skipped) == (expected.rows, expected.skipped)
+    np.testing.assert_array_equal(cube.count, expected.count)
+    np.testing.assert_allclose(cube.sums, expected.sums)
+    np.testing.assert_allclose(cube.sumsq, expected.sumsq)
+
+
+def test_updates_and_merges_equal_one_build(data):
+    expected = CohortCube.from_frame(data)
+    chunks = [data.iloc[start:start + 700] for start in range(0, len(data), 700)]
+    assert_same_cube(CohortCube.from_chunks(chunks), expected)
+    merged = CohortCube()
+    for chunk in chunks:
+        merged.merge(CohortCube.from_frame(chunk))
+    assert_same_cube(merged, expected)
+
+
+@pytest.mark.parametrize('dimensions', [(), ('age',), ('gender', 'diet'), ('age', 'bmi', 'gender', 'diet')])
+def test_rollups_equal_a_groupby(data, dimensions):
+    cube = CohortCube.from_frame(data)
+    table = cube.table(*dimensions)
+
+    kept = data.dropna()
+    kept = kept[kept['Gender'].isin(COHORT_CONFIG['genders'])].copy()
+    kept['age'] = pd.cut(kept['Age'], [-np.inf, *COHORT_CONFIG['age_edges'], np.inf], right=False,
+                         labels=cube.labels['age'])
+    kept['bmi'] = pd.cut(kept['BMI'], [-np.inf, *COHORT_CONFIG['bmi_edges'], np.inf], right=False,
+                         labels=cube.labels['bmi'])
+    kept['gender'], kept['diet'] = kept['Gender'], kept['DietaryPreference']
+    assert cube.rows == len(kept)
+
+    measures = list(COHORT_CONFIG['measures'])
+    if dimensions:
+        expected = kept.groupby(list(dimensions), observed=True)[measures].agg(['count', 'mean', 'std'])
+        table = table[table['count'] > 0].set_index(list(dimensions))
+        assert len(table) == len(expected)
+        expected = expected.loc[table.index]
+    else:
+        expected = kept[measures].agg(['count', 'mean', 'std']).unstack().to_frame().T
+    np.testing.assert_array_equal(table['count'], expected[(measures[0], 'count')])
+    for measure in measures:
+        np.testing.assert_allclose(table[f'{measure}_mean'], expected[(measure, 'mean')])
+        np.testing.assert_allclose(table[f'{measure}_std'], expected[(measure, 'std')])
@@ -0,0 +1,15 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from utils.dataset_cache import artifact_nbytes
+
+
+def test_fitted_forests_count_their_trees():
+    rng = np.random.default_rng(0)
+    X, y = rng.uniform(size=(2000, 2)), rng.uniform(size=2000)
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    assert all(artifact_nbytes(estimator.tree_) > estimator.tree_.node_count for estimator in forest.estimators_)
+    assert artifact_nbytes({'model': forest}) == pytest.approx(len(pickle.dumps(forest)), rel=0.1)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dataset_stats import DatasetStats, compare_stats
+
+
+def make_data(seed, n=4000, bmi_shift=0.0):
+    rng = np.random.default_rng(seed)
+    age = rng.integers(18, 80, n).astype(float)
+    bmi = (rng.normal(26, 4, n) + bmi_shift).round(1)
+    frame = pd.DataFrame({
+        'Age': age,
+        'BMI': bmi,
+        'Gender': rng.choice(['Female', 'Male'], n),
+        'HealthRiskScore': (0.05 * age + 0.2 * bmi + rng.normal(0, 1, n)).round(1),
+        'ExerciseCapacity': rng.uniform(0, 10, n).round(1),
+    })
+    frame.loc[::50, 'BMI'] = np.nan
+    return frame
+
+
+@pytest.fixture(scope='module')
+def data():
+    return make_data(0)
+
+
+def test_chunked_stats_equal_describe(data):
+    # Every column has fewer distinct values than the sketch keeps, so quantiles are exact too
+    summary = DatasetStats.from_frame(data, chunksize=333).summary()
+    expected = data.describe()
+    pd.testing.assert_frame_equal(summary[expected.columns], expected, check_dtype=False)
+
+
+def test_merged_parts_equal_one_pass(data):
+    expected = DatasetStats.from_frame(data)
+    merged = DatasetStats()
+    for start in range(0, len(data), 900):
+        merged.merge(DatasetStats.from_frame(data.iloc[start:start + 900], chunksize=250))
+    assert merged.rows == expected.rows
+    assert merged.columns == expected.columns
+    for column, stats in expected.numeric.items():
+        moments, other = stats.moments, merged.numeric[column].moments
+        assert (other.count, other.missing, other.minimum, other.maximum) == \
+            (moments.count, moments.missing, moments.minimum, moments.maximum)
+        assert other.mean == pytest.approx(moments.mean)
+        assert other.m2 == pytest.approx(moments.m2)
+        np.testing.assert_array_equal(merged.numeric[column].sketch.values, stats.sketch.values)
+        np.testing.assert_array_equal(merged.numeric[column].sketch.weights, stats.sketch.weights)
+    assert merged.categorical['Gender'] == expected.categorical['Gender']
+    assert DatasetStats.from_dict(merged.to_dict()).summary().equals(merged.summary())
+
+
+def test_only_shifted_uploads_trigger_retraining(data):
+    reference = DatasetStats.from_frame(data)
+    same = compare_stats(reference, DatasetStats.from_frame(make_data(1)))
+    assert not same.retrain
+    assert same.reasons == []
+
+    shifted = compare_stats(reference, DatasetStats.from_frame(make_data(1, bmi_shift=3.0)))
+    assert shifted.retrain
+    assert {drift.column for drift in shifted.drifted() if drift.status == 'drift'} >= {'BMI'}
+    assert any(reason.startswith("BMI drifted") for reason in shifted.reasons)
+
+    missing = compare_stats(reference, DatasetStats.from_frame(make_data(1).drop(columns='ExerciseCapacity')))
+    assert missing.retrain
+    assert missing.missing_columns == ['ExerciseCapacity']
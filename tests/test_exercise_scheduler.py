@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from config import CONDITIONS, EXERCISE_CONFIG
+from models.exercise_model import ExercisePlanGenerator
+from models.plan_records import GOALS, INTENSITIES
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return ExercisePlanGenerator()
+
+
+def day_range(scheduler, day):
+    """Fewest and most minutes a training day's exercises span, rounded as the scheduler rounds"""
+    low, high = EXERCISE_CONFIG['warmup_minutes'] + scheduler.minutes[list(day.exercise_ids)].sum(axis=0)
+    return 5 * np.round(low / 5), 5 * np.round(high / 5)
+
+
+@pytest.mark.parametrize('goal', GOALS)
+@pytest.mark.parametrize('conditions', [[]] + [[condition] for condition in CONDITIONS] + [list(CONDITIONS)])
+def test_schedules_meet_every_constraint(generator, goal, conditions):
+    random.seed(0)
+    scheduler = generator.scheduler
+    structure = generator.WEEKLY_STRUCTURES.get(goal, generator.WEEKLY_STRUCTURES['default'])
+    target = sum(day['duration'] for day in structure)
+    for intensity in INTENSITIES:
+        used, days, relaxed = scheduler.schedule(structure, intensity, conditions)
+        assert not relaxed
+        assert used == scheduler.effective_intensity(intensity, conditions)
+        assert sorted(day.focus for day in days) == sorted(day['focus'] for day in structure)
+        assert scheduler.violations(days, intensity, conditions) == []
+
+        # Weekly minutes are within tolerance unless the chosen exercises cannot stretch that far
+        total = sum(day.duration for day in days)
+        training = [day for day in days if day.exercise_ids]
+        if total < target * (1 - EXERCISE_CONFIG['duration_tolerance']):
+            assert all(day.duration == day_range(scheduler, day)[1] for day in training)
+        elif total > target * (1 + EXERCISE_CONFIG['duration_tolerance']):
+            assert all(day.duration == day_range(scheduler, day)[0] for day in training)
+
+
+def test_weeks_without_recovery_spacing_are_flagged(generator):
+    random.seed(0)
+    structure = [{'focus': 'Upper Body Strength', 'duration': 60}] * 2
+    _, days, relaxed = generator.scheduler.schedule(structure, 'moderate', [])
+    assert relaxed
+    assert generator.scheduler.violations(days, 'moderate', []) == [
+        "day 2: strength work on muscles trained the day before"]
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from config import MEAL_CONFIG
+from models.meal.dish_nutrition import DISH_NUTRITION
+from models.meal.meal_model import MealPlanGenerator
+from models.plan_records import MEAL_SLOTS
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return MealPlanGenerator()
+
+
+@pytest.mark.parametrize('method', ['greedy', 'milp'])
+@pytest.mark.parametrize('condition', sorted(MEAL_CONFIG['condition_exclusions']))
+def test_plans_avoid_excluded_dishes(generator, method, condition):
+    optimizer = generator.optimizer
+    eligible = optimizer.eligibility('non_vegetarian', [], [condition])
+    targets = (1500, 112, 150, 50)
+    week = optimizer.plan_week(targets, eligible, method=method)
+    excluded = set(MEAL_CONFIG['condition_exclusions'][condition])
+    for day in week:
+        assert [optimizer.slots[item] for item in day] == list(range(len(MEAL_SLOTS)))
+        assert all(eligible[list(day)])
+        # Every slot of this database keeps dishes without the excluded tags
+        assert not any(excluded & set(DISH_NUTRITION[generator.catalog.dish(item)][3]) for item in day)
+    # The repeat limit relaxes only for slots with too few dishes to fill the week
+    uses = np.bincount([item for day in week for item in day], minlength=len(eligible))
+    for slot in range(len(MEAL_SLOTS)):
+        in_slot = eligible & (optimizer.slots == slot)
+        assert uses[in_slot].max() <= max(MEAL_CONFIG['max_repeats'], -(-len(week) // in_slot.sum()))
+
+
+def test_rendered_dishes_are_catalog_dishes(generator):
+    record = generator.generate_meal_plan_record('Weight Loss', [], ['hypertension', 'heart disease'], 'High')
+    meal_plan = generator.render_meal_plan(record)
+    for day, day_meals in zip(meal_plan.values(), record.days):
+        assert [day[slot] for slot in MEAL_SLOTS] == [generator.catalog.dish(item) for item in day_meals.meal_ids]
@@ -0,0 +1,43 @@
+import pytest
+
+from models.exercise_model import ExercisePlanGenerator
+from models.meal.meal_model import MealPlanGenerator
+from models.plan_records import PlanCodec, decode_conditions, encode_conditions
+
+
+@pytest.fixture(scope='module')
+def generators():
+    return MealPlanGenerator(), ExercisePlanGenerator()
+
+
+def test_unknown_conditions_are_ignored():
+    assert decode_conditions(encode_conditions(['diabetes', 'migraine', 'Diabetes'])) == ['diabetes']
+
+
+@pytest.mark.parametrize('goal', ['Weight Loss', 'Endurance'])
+def test_records_round_trip_any_goal(generators, goal):
+    meal_generator, exercise_generator = generators
+    records = [
+        meal_generator.generate_meal_plan_record(goal, ['vegetarian'], ['hypertension', 'migraine'], 'Low'),
+        exercise_generator.get_weekly_exercise_plan_record('moderate', ['asthma', 'migraine'], goal),
+    ]
+    codec = PlanCodec(ExercisePlanGenerator.focus_types())
+    assert codec.loads_many(codec.dumps_many(records)) == records
+    assert codec.read_jsonl(codec.dumps_jsonl(records).splitlines()) == records
+    assert all(record.goal == goal for record in records)
+
+
+def test_plan_entry_points_accept_unknown_values(generators):
+    meal_generator, exercise_generator = generators
+    meal_plan = meal_generator.generate_meal_plan('Endurance', [], ['migraine'], 'Low')
+    exercise_plan = exercise_generator.get_weekly_exercise_plan('low', ['migraine'], 'Endurance')
+    assert len(meal_plan) == len(exercise_plan) == 7
+
+
+def test_relaxed_schedules_round_trip(generators):
+    _, exercise_generator = generators
+    record = exercise_generator.get_weekly_exercise_plan_record('moderate', [], 'Muscle Gain')
+    record.relaxed = True
+    codec = PlanCodec(ExercisePlanGenerator.focus_types())
+    assert codec.loads_many(codec.dumps_many([record])) == [record]
+    assert codec.read_jsonl(codec.dumps_jsonl([record]).splitlines()) == [record]
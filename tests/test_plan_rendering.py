@@ -0,0 +1,19 @@
+from models.exercise_model import ExercisePlanGenerator
+from models.meal.meal_model import MealPlanGenerator
+from utils.plan_rendering import PlanRenderCache, meal_day_views, plan_id, records_id
+
+
+def test_same_inputs_with_different_records_render_apart():
+    generator = MealPlanGenerator()
+    exercise_generator = ExercisePlanGenerator()
+    inputs = dict(goal='Weight Loss', dietary_preferences=['vegetarian'], health_conditions=[], risk_level='Low')
+    first, second = (generator.generate_meal_plan_record(**inputs) for _ in range(2))
+    exercise = exercise_generator.get_weekly_exercise_plan_record('moderate', [], 'Weight Loss')
+    assert plan_id(**inputs) == plan_id(**inputs)
+    assert records_id(first, exercise) == records_id(first, exercise)
+
+    cache = PlanRenderCache()
+    for record in (first, second):
+        views = cache.get(records_id(record, exercise), 'meal',
+                          lambda: meal_day_views(generator.render_meal_plan(record)))
+        assert views == tuple(meal_day_views(generator.render_meal_plan(record)))
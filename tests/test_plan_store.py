@@ -0,0 +1,68 @@
+import pytest
+
+from models.exercise_model import ExercisePlanGenerator
+from models.meal.meal_model import MealPlanGenerator
+from models.plan_records import PlanCodec
+from models.plan_store import EXERCISE, PlanStore, StoredPlan
+
+
+@pytest.fixture(scope='module')
+def records():
+    meal = MealPlanGenerator().generate_meal_plan_record('Muscle Gain', [], ['diabetes'], 'Moderate')
+    exercise = ExercisePlanGenerator().get_weekly_exercise_plan_record('moderate', ['diabetes'], 'Muscle Gain')
+    return meal, exercise
+
+
+@pytest.fixture
+def store(tmp_path):
+    with PlanStore(str(tmp_path / 'plans.db'), PlanCodec(ExercisePlanGenerator.focus_types())) as store:
+        yield store
+
+
+def test_plans_round_trip(store, records):
+    meal, exercise = records
+    plans = [StoredPlan('member-a', 202642, 'Moderate', meal, 'plan-1'),
+             StoredPlan('member-a', 202642, 'Moderate', exercise, 'plan-1'),
+             StoredPlan('member-b', 202643, 'High', exercise)]
+    assert store.put_many(plans) == 3
+    assert store.get('member-a', 202642) == plans[:2]
+    assert store.member_plans('member-b') == plans[2:]
+    assert list(store.scan(weeks=(202642, 202643), kind=EXERCISE)) == [plans[1], plans[2]]
+    assert store.count(risk_level='High') == 1
+
+
+def test_members_with_the_same_inputs_keep_their_own_plans(store, records):
+    meal, _ = records
+    store.put('member-a', 202642, 'Moderate', meal, 'plan-1')
+    store.put('member-b', 202642, 'Moderate', meal, 'plan-1')
+    assert store.count(weeks=202642) == 2
+
+
+
+def test_partly_read_scans_do_not_hold_connections(tmp_path, records):
+    meal, exercise = records
+    with PlanStore(str(tmp_path / 'plans.db'), PlanCodec(ExercisePlanGenerator.focus_types()),
+                   pool_size=2) as store:
+        plans = [StoredPlan(f'member-{n:03d}', 202642, 'Low', record)
+                 for n in range(25) for record in (meal, exercise)]
+        store.put_many(plans)
+        scans = [store.scan(weeks=202642, fetch_size=4) for _ in range(3)]
+        assert [next(scan) for scan in scans] == [plans[0]] * 3
+        # Lookups and writes still find a free connection while the scans are open
+        assert store.get('member-007', 202642) == plans[14:16]
+        store.put('member-999', 202642, 'High', meal)
+        assert store.count(weeks=202642) == 51
+        # Every page continues where the last one ended, across writes in between
+        assert [next(scans[0]) for _ in range(9)] == plans[1:10]
+        assert list(scans[1])[-1] == plans[-1]
+
+
+def test_stores_refuse_a_codec_with_another_focus_order(tmp_path, records):
+    path = str(tmp_path / 'plans.db')
+    focuses = ExercisePlanGenerator.focus_types()
+    with PlanStore(path, PlanCodec(focuses)) as store:
+        store.put('member-a', 202642, 'Moderate', records[1])
+    with pytest.raises(ValueError, match="codec layout"):
+        PlanStore(path, PlanCodec(focuses[::-1]))
+    with PlanStore(path, PlanCodec(focuses)) as store:
+        assert store.get('member-a', 202642)[0].record == records[1]
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import FEATURES, PROFILE_INDEX_CONFIG
+from data.dataset_generator import generate_health_dataset
+from models.profile_index import ProfileIndex
+from utils.data_processing import preprocess_data
+from utils.shared_data import scale_reference_features
+
+
+@pytest.fixture(scope='module')
+def reference():
+    # Repeated rows make distance ties, which must break by row position
+    data = preprocess_data(generate_health_dataset(2000).iloc[np.r_[0:2000, 0:300]].reset_index(drop=True))
+    scaled = scale_reference_features(data)
+    return data, scaled, ProfileIndex(data, scaled)
+
+
+def brute_force(data, scaled, profile, n_matches, filters):
+    """Scan every row, skipping those outside filters and penalizing mismatches in the other columns"""
+    weights = np.array([PROFILE_INDEX_CONFIG['feature_weights'][f] for f in scaled.features])
+    target = (np.array([profile[f] for f in scaled.features]) - scaled.mean) / scaled.scale
+    squared = ((scaled.matrix - target) ** 2) @ weights
+    keep = np.ones(len(data), dtype=bool)
+    for column in PROFILE_INDEX_CONFIG['columns']:
+        if column in filters:
+            keep &= (data[column] == filters[column]).to_numpy()
+        elif column in profile:
+            squared += PROFILE_INDEX_CONFIG['category_weights'][column] * (data[column] != profile[column]).to_numpy()
+    positions = np.flatnonzero(keep)
+    distances = np.sqrt(squared[positions])
+    order = np.lexsort((positions, distances))[:n_matches]
+    return positions[order], distances[order]
+
+
+def test_filtered_queries_equal_a_filtered_scan(reference):
+    data, scaled, index = reference
+    rng = np.random.default_rng(0)
+    for i in rng.choice(len(data), 20):
+        row = data.iloc[i]
+        profile = {feature: float(row[feature]) for feature in FEATURES}
+        profile.update(Gender=row['Gender'], DietaryPreference=row['DietaryPreference'])
+        for filters in ({}, {'Gender': row['Gender']},
+                        {'Gender': row['Gender'], 'DietaryPreference': row['DietaryPreference']}):
+            matches = index.query(profile, 7, filters=filters)
+            assert matches.filters == filters
+            positions, distances = brute_force(data, scaled, profile, 7, filters)
+            assert np.array_equal(matches.positions, positions)
+            np.testing.assert_allclose(matches.distances, distances)
+
+
+def test_filters_widen_only_when_a_partition_is_short(reference):
+    data, _, index = reference
+    sizes = index.partition_sizes()
+    (gender, diet), size = min(sizes.items(), key=lambda item: item[1])
+    profile = {feature: float(data[feature].mean()) for feature in FEATURES}
+    filters = {'Gender': gender, 'DietaryPreference': diet}
+
+    assert index.query(profile, size, filters=filters).filters == filters
+    assert index.query(profile, size, filters=filters).searched == size
+    # Diet is dropped before gender
+    widened = index.query(profile, size + 1, filters=filters)
+    assert widened.filters == {'Gender': gender}
+    assert widened.searched == (data['Gender'] == gender).sum()
+    assert index.query(profile, len(data), filters=filters).filters == {}
+    assert index.query(profile, size + 1, filters=filters, widen=False).filters == filters
+
+
+def test_category_mismatches_are_penalized_and_ties_keep_dataset_order():
+    genders = ['Male', 'Female', 'Female', 'Male', 'Female', 'Female']
+    diets = ['Vegan', 'Standard', 'Vegan', 'Standard', 'Vegan', 'Standard']
+    data = pd.DataFrame({'Age': [40.0] * 6, 'BMI': [25.0] * 6, 'HealthRiskScore': [3.0] * 6,
+                         'Gender': genders, 'DietaryPreference': diets})
+    data.loc[len(data)] = [60.0, 35.0, 8.0, 'Male', 'Standard']
+    index = ProfileIndex(data, scale_reference_features(data))
+    profile = {'Age': 40.0, 'BMI': 25.0, 'HealthRiskScore': 3.0, 'Gender': 'Female', 'DietaryPreference': 'Vegan'}
+
+    matches = index.query(profile, 6)
+    weights = PROFILE_INDEX_CONFIG['category_weights']
+    # Exact matches first in dataset order, then a diet mismatch, a gender mismatch, and both
+    assert list(matches.positions) == [2, 4, 1, 5, 0, 3]
+    np.testing.assert_allclose(matches.distances ** 2, [0, 0, weights['DietaryPreference'],
+                                                        weights['DietaryPreference'], weights['Gender'],
+                                                        weights['Gender'] + weights['DietaryPreference']])
+    # A filtered column no longer penalizes
+    filtered = index.query(profile, 3, filters={'Gender': 'Female'})
+    assert list(filtered.positions) == [2, 4, 1]
+    np.testing.assert_allclose(filtered.distances ** 2, [0, 0, weights['DietaryPreference']])
@@ -0,0 +1,35 @@
+import pytest
+
+from models.exercise_model import ExercisePlanGenerator
+from models.program import ProgramBuilder, start_intensity
+
+
+@pytest.fixture(scope='module')
+def builder():
+    return ProgramBuilder(ExercisePlanGenerator())
+
+
+def test_completed_weeks_cannot_change(builder):
+    program = builder.build('Weight Loss', 'moderate', [], 'Low')
+    builder.update(program, risk_level='Moderate', week=5)
+    with pytest.raises(ValueError):
+        builder.update(program, risk_level='Low', week=3)
+    assert program.current_week == 5
+
+
+def test_new_conditions_lower_the_starting_tier(builder):
+    program = builder.build('Weight Loss', None, [], 'Low', age=45, gender='Female')
+    assert program.start_intensity == start_intensity(45, 'Female', []) == 'high'
+    weeks = [program.record(week) for week in range(1, 5)]
+
+    rebuilt = builder.update(program, conditions=['diabetes', 'hypertension'], week=5)
+    assert program.start_intensity == start_intensity(45, 'Female', ['diabetes', 'hypertension'])
+    assert rebuilt == list(range(5, len(program) + 1))
+    assert [program.record(week) for week in range(1, 5)] == weeks
+    assert program.weeks[4].spec == builder.week_specs(
+        'Weight Loss', program.start_intensity, program.conditions, 'Low')[4]
+
+
+def test_unchanged_inputs_rebuild_nothing(builder):
+    program = builder.build('Muscle Gain', None, ['asthma'], 'Moderate', age=30, gender='Male')
+    assert builder.update(program, risk_level='Moderate', conditions=['asthma']) == []
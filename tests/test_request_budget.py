@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from utils.request_budget import DEGRADATION, RequestBudget
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    # Lets overrunning stages on the shared pool finish
+    event.set()
+
+
+@pytest.fixture(autouse=True)
+def degradation():
+    DEGRADATION.reset()
+    yield DEGRADATION
+    DEGRADATION.reset()
+
+
+def test_stages_that_overrun_answer_with_their_fallback(release):
+    budget = RequestBudget(total_ms=5000, stages_ms={'slow': 20, 'fast': 5000})
+    assert budget.run('slow', lambda: release.wait(5) and 'full', fallback=lambda: 'fallback') == 'fallback'
+    assert budget.run('fast', lambda: 'full', fallback=lambda: 'fallback') == 'full'
+    assert budget.run('inline', lambda: 'full') == 'full'
+    assert budget.stages == ['slow', 'fast', 'inline']
+    assert budget.degraded == ['slow']
+
+
+def test_deadlines_are_capped_by_the_total_budget(release):
+    budget = RequestBudget(total_ms=50, stages_ms={'stage': 60_000})
+    assert budget.deadline_ms('stage') <= 50
+    assert budget.deadline_ms('unknown') <= 50
+    budget.started -= 1.0
+    assert budget.deadline_ms('stage') == 0
+    assert budget.wait('stage', Future(), fallback=lambda: 'fallback') == 'fallback'
+    assert budget.degraded == ['stage']
+
+
+def test_disabled_budgets_wait_for_every_stage(release):
+    budget = RequestBudget(total_ms=0, enabled=False)
+    release.set()
+    assert budget.run('slow', lambda: release.wait(5) and 'full', fallback=lambda: 'fallback') == 'full'
+    assert not budget.finish()
+
+
+def test_requests_are_counted_once(degradation, release):
+    degraded = RequestBudget(total_ms=5000, stages_ms={'similar': 10})
+    degraded.run('similar', lambda: release.wait(5), fallback=lambda: None)
+    degraded.degrade('plans', lambda: None)
+    assert degraded.finish()
+    assert degraded.finish()
+
+    clean = RequestBudget(total_ms=5000)
+    clean.run('similar', lambda: None, fallback=lambda: None)
+    assert not clean.finish()
+    RequestBudget().finish()
+
+    snapshot = degradation.snapshot()
+    assert (snapshot['requests'], snapshot['degraded_requests'], snapshot['degraded_rate']) == (2, 1, 0.5)
+    assert snapshot['stages'] == {
+        'plans': {'runs': 1, 'fallbacks': 1, 'fallback_rate': 1.0},
+        'similar': {'runs': 2, 'fallbacks': 1, 'fallback_rate': 0.5},
+    }
+    assert 'healthalign_stage_fallbacks_total{stage="similar"} 1' in degradation.to_prometheus()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.dataset_generator import generate_health_dataset
+from models.joint_model import train_joint_model
+from models.risk_explainer import RiskExplainer
+from utils.data_processing import preprocess_data
+
+
+@pytest.fixture(scope='module')
+def trained():
+    data = preprocess_data(generate_health_dataset(2000))
+    model = train_joint_model(data)
+    return data, model, RiskExplainer.from_model(model, data)
+
+
+def test_contributions_add_up_to_the_expected_score(trained):
+    data, _, explainer = trained
+    rng = np.random.default_rng(0)
+    # Off-grid and out-of-range inputs too
+    age = np.r_[data['Age'].to_numpy(), rng.uniform(0, 100, 500)]
+    bmi = np.r_[data['BMI'].to_numpy(), rng.uniform(10, 50, 500)]
+    explanation = explainer.explain(age, bmi)
+    np.testing.assert_allclose(explanation.expected, explainer.base + explanation.age + explanation.bmi)
+
+    # Over the training data, the baseline is the mean prediction and contributions average out
+    on_data = explainer.explain(data['Age'], data['BMI'])
+    assert on_data.expected.mean() == pytest.approx(explainer.base)
+    assert on_data.age.mean() == pytest.approx(0, abs=1e-9)
+    assert on_data.bmi.mean() == pytest.approx(0, abs=1e-9)
+
+
+def test_grid_lookups_equal_the_model_at_data_resolution(trained):
+    data, model, explainer = trained
+    rows = data[['Age', 'BMI']].drop_duplicates().iloc[:500]
+    ages, bmis = np.meshgrid(explainer.age_grid[::7], explainer.bmi_grid[::13], indexing='ij')
+    points = pd.concat([rows, pd.DataFrame({'Age': ages.ravel(), 'BMI': bmis.ravel()})], ignore_index=True)
+    expected = explainer.explain(points['Age'].to_numpy(), points['BMI'].to_numpy()).expected
+    np.testing.assert_allclose(expected, model.expected_score(points))
+
+    # Beyond the data range the forest is constant, and lookups clip to the grid's edge
+    outside = pd.DataFrame({'Age': [data['Age'].max() + 20, data['Age'].min() - 5],
+                            'BMI': [data['BMI'].max() + 5, data['BMI'].min() - 3]})
+    np.testing.assert_allclose(explainer.explain(outside['Age'], outside['BMI']).expected,
+                               model.expected_score(outside))
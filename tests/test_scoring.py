@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from config import CONDITIONS
+from models.exercise_plan import AIWorkoutPlanGenerator, WorkoutParameters
+from models.health_risk_model import get_risk_level
+from utils.data_processing import calculate_health_metrics
+from utils.scoring import (
+    condition_counts,
+    condition_mask,
+    health_scores,
+    intensity_tiers,
+    risk_levels,
+    score_population,
+)
+
+
+def scalar_scores(ages, bmis, conditions):
+    planner = AIWorkoutPlanGenerator()
+    health = [calculate_health_metrics(age, bmi, member) for age, bmi, member in zip(ages, bmis, conditions)]
+    intensity = [planner._calculate_intensity(WorkoutParameters(age=age, gender='Female', conditions=member))
+                 for age, member in zip(ages, conditions)]
+    return np.array(health, dtype=np.float64), np.array(intensity)
+
+
+@pytest.fixture
+def members():
+    rng = random.Random(0)
+    pool = list(CONDITIONS) + ['migraine', 'Diabetes']
+    ages = [rng.randint(18, 80) for _ in range(500)]
+    bmis = [round(rng.uniform(16, 40), 1) for _ in range(500)]
+    # Raw lists as the scalar API accepts them: unknown names and repeats included
+    conditions = [[rng.choice(pool) for _ in range(rng.randint(0, 4))] for _ in range(500)]
+    return ages, bmis, conditions
+
+
+def test_counts_match_scalar_rules_for_raw_lists(members):
+    ages, bmis, conditions = members
+    health, intensity = scalar_scores(ages, bmis, conditions)
+    counts = condition_counts(conditions)
+    assert np.array_equal(health_scores(np.array(ages), np.array(bmis), counts), health)
+    assert np.array_equal(intensity_tiers(np.array(ages), counts), intensity)
+
+
+def test_mask_matches_scalar_rules_for_clean_lists(members):
+    ages, bmis, _ = members
+    rng = random.Random(1)
+    conditions = [rng.sample(CONDITIONS, rng.randint(0, len(CONDITIONS))) for _ in ages]
+    health, intensity = scalar_scores(ages, bmis, conditions)
+    mask = condition_mask(conditions)
+    assert np.array_equal(health_scores(np.array(ages), np.array(bmis), mask), health)
+    assert np.array_equal(intensity_tiers(np.array(ages), mask), intensity)
+
+
+def test_score_population_matches_in_chunks(members):
+    ages, bmis, conditions = members
+    health, _ = scalar_scores(ages, bmis, conditions)
+    risk = np.linspace(0, 100, len(ages))
+    result = score_population(np.array(ages), np.array(bmis), condition_counts(conditions),
+                              risk_scores=risk, chunk_size=64)
+    assert np.array_equal(result['health_score'], health)
+    assert list(risk_levels(risk)) == [get_risk_level(score) for score in risk]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from config import FEATURES
+from data.dataset_generator import generate_health_dataset
+from models.health_risk_matching import find_similar_profiles
+from models.sharded_search import ShardedIndex
+from utils.data_processing import preprocess_data
+from utils.shared_data import scale_reference_features
+
+
+@pytest.fixture(scope='module')
+def reference():
+    # Repeated rows make distance ties, which must break by row position as in the unsharded search
+    data = preprocess_data(generate_health_dataset(3000).iloc[np.r_[0:3000, 0:500]].reset_index(drop=True))
+    return data, scale_reference_features(data)
+
+
+@pytest.mark.parametrize('strategy', ['age', 'hash'])
+@pytest.mark.parametrize('executor', ['serial', 'thread'])
+def test_sharded_matches_unsharded(reference, strategy, executor):
+    data, scaled = reference
+    rng = np.random.default_rng(0)
+    queries = [({feature: float(data[feature].iat[i]) for feature in FEATURES}, filters)
+               for i in rng.choice(len(data), 10)
+               for filters in (None, {'Gender': data['Gender'].iat[i]},
+                               {'Gender': 'Female', 'DietaryPreference': data['DietaryPreference'].iat[i]})]
+    with ShardedIndex(data, scaled, n_shards=3, strategy=strategy, executor=executor, workers=2) as shards:
+        for profile, filters in queries:
+            want = find_similar_profiles(profile, data, 7, scaled=scaled, filters=filters)
+            got = find_similar_profiles(profile, data, 7, scaled=scaled, filters=filters, shards=shards)
+            assert got.index.equals(want.index)
+            assert np.array_equal(got['SimilarityScore'].to_numpy(), want['SimilarityScore'].to_numpy())
+
+
+def test_searched_counts_the_rows_matching_filters(reference):
+    data, scaled = reference
+    profile = {feature: float(data[feature].mean()) for feature in FEATURES}
+    with ShardedIndex(data, scaled, n_shards=3, executor='serial') as shards:
+        assert shards.query(profile, 5).searched == len(data)
+        assert shards.query(profile, 5, {'Gender': 'Female'}).searched == (data['Gender'] == 'Female').sum()
+        assert shards.query(profile, 5, {'Gender': 'Unknown'}).searched == 0
+
+
+def test_searchers_must_search_the_requested_features(reference):
+    data, scaled = reference
+    with ShardedIndex(data, scaled, n_shards=2, executor='serial') as shards:
+        with pytest.raises(ValueError, match="searches"):
+            find_similar_profiles({'Age': 40, 'BMI': 25}, data, 5, features=['Age', 'BMI'], shards=shards)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from data.dataset_generator import generate_health_dataset
+from utils.data_processing import preprocess_data
+from utils.shared_data import attach_dataset, publish_dataset
+
+
+def test_published_columns_attach_unchanged(tmp_path):
+    data = preprocess_data(generate_health_dataset(1000))
+    # More distinct values than int8 codes can hold, as in an ID column of an upload
+    data['MemberId'] = [f"m{n:04d}" for n in range(len(data))]
+    directory = publish_dataset(data, 'fp', root=str(tmp_path))
+    shared = attach_dataset(directory)
+    for column in data.columns:
+        attached = shared.data[column]
+        if data[column].dtype.kind in 'biuf':
+            assert np.array_equal(attached.to_numpy(), data[column].to_numpy())
+        else:
+            assert list(attached.astype(str)) == list(data[column].astype(str))
+    assert shared.arrays['MemberId'].dtype == np.int16
+    assert isinstance(shared.data['Gender'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models.similarity_cache import SimilarityCache
+
+
+def query(**fields):
+    return {'Age': 40, 'BMI': 24.0, 'HealthRiskScore': 3.0, 'Gender': 'Female', 'DietaryPreference': 'Vegan',
+            **fields}
+
+
+def test_queries_in_one_cell_share_a_search():
+    searched = []
+
+    def search(profile):
+        searched.append(profile)
+        return len(searched)
+
+    cache = SimilarityCache()
+    assert cache.get('fp', query(BMI=24.02, HealthRiskScore=3.04), 5, search) == 1
+    assert cache.get('fp', query(BMI=23.96, HealthRiskScore=2.96), 5, search) == 1
+    assert searched == [query()]
+    assert cache.get('fp', query(BMI=24.1), 5, search) == 2
+    assert cache.get('fp', query(), 10, search) == 3
+    assert cache.get('other', query(), 5, search) == 4
+    assert cache.get('fp', query(Gender='Male'), 5, search) == 5
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 5, 5)
+
+
+def test_concurrent_misses_search_once():
+    started, release = threading.Event(), threading.Event()
+    searched = []
+
+    def search(profile):
+        searched.append(profile)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    cache = SimilarityCache()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get, 'fp', query(), 5, search)
+        started.wait(5)
+        others = [pool.submit(cache.get, 'fp', query(BMI=24.01), 5, search) for _ in range(3)]
+        release.set()
+        results = [future.result(timeout=5) for future in [first] + others]
+    assert results == ['result'] * 4
+    assert len(searched) == 1
+
+
+def test_background_precompute_failures_are_counted():
+    class BrokenModel:
+        def expected_score(self, grid):
+            raise ValueError("no model")
+
+    cache = SimilarityCache()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = cache.precompute_in_background(pool, 'fp', lambda profile: profile, BrokenModel(), 5).result()
+    assert result is None
+    assert cache.stats()['precompute_failures'] == 1
+    assert cache.last_precompute_error == "no model"
+    assert 'similarity_cache_precompute_failures_total 1' in cache.to_prometheus()
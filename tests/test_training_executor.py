@@ -0,0 +1,47 @@
+import threading
+
+from models.training_executor import TrainingExecutor, TrainingStep
+
+
+def executor():
+    return TrainingExecutor([TrainingStep('rows', "Counting rows", 1, lambda data, built: len(data))], workers=1)
+
+
+def test_job_is_done_before_follow_up_work():
+    release = threading.Event()
+    seen = []
+
+    def on_done(version):
+        seen.append(training.job('a').done)
+        release.wait(5)
+
+    training = executor()
+    job = training.submit('a', [1, 2, 3], on_done=on_done)
+    assert job.result(timeout=5).artifacts['rows'] == 3
+    release.set()
+    training.shutdown()
+    assert seen == [True]
+
+
+def test_follow_up_errors_do_not_fail_the_job():
+    def on_done(version):
+        raise RuntimeError("precompute broke")
+
+    training = executor()
+    job = training.submit('a', [1], on_done=on_done)
+    job.result(timeout=5)
+    training.shutdown()
+    assert job.state == 'done'
+    assert job.callback_error == "precompute broke"
+
+
+def test_finished_jobs_are_kept_until_published():
+    seen = []
+    training = TrainingExecutor([TrainingStep('rows', "Counting rows", 1, lambda data, built: len(data))],
+                                workers=1, max_jobs=0)
+    job = training.submit('a', [1], on_done=lambda version: seen.append(training.job('a')))
+    job.result(timeout=5)
+    training.shutdown()
+    assert seen == [job]
+    assert training.job('a') is None
+
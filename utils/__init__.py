@@ -0,0 +1,44 @@
+"""Data utilities.
+
+Public names are resolved on first access so that ``import utils`` stays cheap.
+"""
+import importlib
+
+_EXPORTS = {
+    'preprocess_data': 'utils.data_processing',
+    'create_user_features': 'utils.data_processing',
+    'scale_features': 'utils.data_processing',
+    'find_similar_users': 'utils.data_processing',
+    'calculate_health_metrics': 'utils.data_processing',
+    'LRUCache': 'utils.cache',
+    'CacheStats': 'utils.cache',
+    'DatasetCache': 'utils.dataset_cache',
+    'content_hash': 'utils.dataset_cache',
+    'condition_mask': 'utils.scoring',
+    'condition_counts': 'utils.scoring',
+    'score_population': 'utils.scoring',
+    'PlanRenderCache': 'utils.plan_rendering',
+    'plan_id': 'utils.plan_rendering',
+    'records_id': 'utils.plan_rendering',
+    'publish_dataset': 'utils.shared_data',
+    'attach_dataset': 'utils.shared_data',
+    'DatasetStats': 'utils.dataset_stats',
+    'compare_stats': 'utils.dataset_stats',
+    'RequestBudget': 'utils.request_budget',
+    'compact': 'utils.compaction',
+    'weighted_rows': 'utils.compaction',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,148 @@
+# utils/cache.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hit_rate, 4)
+        }
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by entry count and total size"""
+
+    def __init__(self, max_entries: int = 128, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        # Futures of values being built by get_or_create, so concurrent misses build each key once
+        self._pending: Dict[Hashable, Future] = {}
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, recording a hit or miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return self._entries[key]
+            self.stats.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or replace a value, evicting least-recently-used entries as needed"""
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, building it with factory on a miss.
+
+        factory runs outside the cache's lock, so lookups of other keys never wait for it;
+        concurrent misses for the same key wait for the first caller's value instead of
+        building their own.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return self._entries[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.stats.misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self.stats.hits += 1
+        if pending is not None:
+            return pending.result()
+        try:
+            value = factory()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self.put(key, value)
+            del self._pending[key]
+        future.set_result(value)
+        return value
+
+    def resize(self, key: Hashable) -> None:
+        """Measure an entry's size again after its value grew or shrank, evicting entries as needed"""
+        with self._lock:
+            if key not in self._entries:
+                return
+            size = self._sizeof(self._entries[key])
+            self._total_bytes += size - self._sizes[key]
+            self._sizes[key] = size
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key]
+            self._remove(key)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        self._total_bytes -= self._sizes.pop(key)
+
+    def _evict(self) -> None:
+        # The most recently inserted entry is always kept, even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._total_bytes > self.max_bytes)):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
@@ -0,0 +1,104 @@
+# utils/compaction.py
+"""
+Collapse repeated feature tuples into unique weighted points.
+
+Age is a whole number and BMI and HealthRiskScore are rounded to 0.1, so
+large datasets repeat the same (Age, BMI, HealthRiskScore) tuples many
+times. ``compact`` keeps one point per distinct key tuple, in order of first
+appearance, with these extra columns:
+
+- the number of rows it stands for, in ``Count``
+- each numeric side column (e.g. ExerciseCapacity) averaged over those rows
+- each categorical side column set to its most frequent value (the first
+  category on ties)
+
+Weighted by their counts, the points give the same means, variances,
+impurities and leaf averages as the rows. Model fits (``sample_weight``),
+the similarity scaler and the neighbour index can then scale with the number
+of distinct tuples instead of the number of rows.
+
+Compaction only pays off when the tuples repeat: ``weighted_rows`` returns
+the raw rows unchanged when there are fewer than
+COMPACTION_CONFIG['min_ratio'] rows per point.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import COMPACTION_CONFIG
+from utils.instrumentation import timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COUNT_COLUMN = 'Count'
+
+
+class Compacted(NamedTuple):
+    """Unique points with their row counts, and the point each original row was collapsed into"""
+    points: pd.DataFrame
+    inverse: np.ndarray
+    rows: int
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.points[COUNT_COLUMN].to_numpy()
+
+    @property
+    def ratio(self) -> float:
+        """Rows per unique point"""
+        return self.rows / len(self.points) if len(self.points) else 1.0
+
+
+@timed('compaction')
+def compact(data: pd.DataFrame, keys: Sequence[str] = COMPACTION_CONFIG['training_keys']) -> Compacted:
+    """
+    Collapse rows with equal key values into one point each.
+
+    Parameters:
+    data (pd.DataFrame): Rows to compact
+    keys (Sequence[str]): Columns whose values identify a point; every other column is aggregated
+
+    Returns:
+    Compacted: Points in order of first appearance, with key columns, aggregated side columns and Count
+    """
+    import pandas as pd
+
+    keys = list(keys)
+    inverse = data.groupby(keys, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    n_points = int(inverse.max()) + 1 if len(inverse) else 0
+    _, first = np.unique(inverse, return_index=True)
+    counts = np.bincount(inverse, minlength=n_points)
+
+    points = data[keys].iloc[first].reset_index(drop=True)
+    for column in data.columns:
+        if column in keys:
+            continue
+        values = data[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            points[column] = np.bincount(inverse, weights=values.to_numpy(dtype=np.float64),
+                                         minlength=n_points) / counts
+        else:
+            codes, categories = pd.factorize(values, sort=True, use_na_sentinel=False)
+            # Rows per (point, category); the most frequent category of each point wins
+            tally = np.bincount(inverse * len(categories) + codes, minlength=n_points * len(categories))
+            points[column] = np.asarray(categories)[tally.reshape(n_points, len(categories)).argmax(axis=1)]
+    points[COUNT_COLUMN] = counts
+    return Compacted(points, inverse, len(data))
+
+
+def weighted_rows(data: pd.DataFrame, keys: Sequence[str] = COMPACTION_CONFIG['training_keys'],
+                  min_ratio: float = COMPACTION_CONFIG['min_ratio']) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Rows to fit a model or build an index on.
+
+    Returns:
+    tuple: (unique points, their counts as sample weights) when there are at least min_ratio rows
+        per point, otherwise (data, None)
+    """
+    compacted = compact(data, keys)
+    if compacted.ratio < min_ratio:
+        return data, None
+    return compacted.points, compacted.counts
@@ -1,9 +1,10 @@
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
+from utils.instrumentation import timed
 
+# numpy and sklearn are imported inside the functions that need them so that
+# importing this module (and therefore app.py) stays cheap
 
+
+@timed()
 def preprocess_data(df):
     """Preprocess the input data"""
     df = df.copy()
@@ -13,11 +14,15 @@ def preprocess_data(df):
 
 def create_user_features(age, bmi):
     """Create feature vector for user"""
+    import numpy as np
+
     return np.array([[age, bmi]])
 
 
 def scale_features(features, scaler=None):
     """Scale features using StandardScaler"""
+    from sklearn.preprocessing import StandardScaler
+
     if scaler is None:
         scaler = StandardScaler()
         scaled_features = scaler.fit_transform(features)
@@ -28,6 +33,8 @@ def scale_features(features, scaler=None):
 
 def find_similar_users(user_features, historical_data, n_neighbors=5):
     """Find similar users based on features"""
+    from sklearn.metrics.pairwise import cosine_similarity
+
     # Ensure we're only using Age and BMI for comparison
     if historical_data.shape[1] > 2:
         historical_data = historical_data[:, :2]  # Take only first two columns (Age and BMI)
@@ -0,0 +1,166 @@
+# utils/dataset_cache.py
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from config import CACHE_CONFIG, REQUIRED_COLUMNS
+from utils.cache import LRUCache
+from utils.data_processing import preprocess_data
+from utils.instrumentation import stage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from utils.shared_data import SharedDataset
+
+
+def content_hash(raw: bytes) -> str:
+    """Fingerprint uploaded file contents"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def load_dataset(raw: bytes, required_columns: List[str] = REQUIRED_COLUMNS) -> pd.DataFrame:
+    """Parse, validate and preprocess an uploaded CSV"""
+    import pandas as pd
+
+    with stage('csv_parse'):
+        data = pd.read_csv(io.BytesIO(raw))
+    if not all(col in data.columns for col in required_columns):
+        raise ValueError(f"Dataset must contain these columns: {', '.join(required_columns)}")
+    return preprocess_data(data)
+
+
+def artifact_nbytes(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Approximate memory held by an artifact.
+
+    DataFrames count their columns, objects with an integer ``nbytes`` (arrays, packed models,
+    cubes) count that, scikit-learn trees count their node and value arrays, and containers and
+    other objects count what they hold. Objects reachable twice are counted once.
+    """
+    import numpy as np
+
+    seen = set() if _seen is None else _seen
+    if id(value) in seen or value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return 0
+    seen.add(id(value))
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, np.ndarray) or isinstance(getattr(type(value), 'nbytes', None), property):
+        return int(value.nbytes)
+    if type(value).__module__ == 'sklearn.tree._tree' and hasattr(value, 'node_count'):
+        # A Cython Tree keeps its nodes and values in C arrays that have no __dict__ to walk
+        from sklearn.tree._tree import NODE_DTYPE
+
+        return int(value.node_count) * NODE_DTYPE.itemsize + int(value.value.nbytes)
+    if isinstance(value, dict):
+        return sum(artifact_nbytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(artifact_nbytes(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return sum(artifact_nbytes(item, seen) for item in vars(value).values())
+    return 0
+
+
+@dataclass
+class CachedDataset:
+    """A preprocessed dataset together with artifacts derived from it"""
+    fingerprint: str
+    data: pd.DataFrame
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    # Called after an artifact is added, so the owning cache can count its size
+    on_change: Optional[Callable[[], None]] = field(default=None, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _pending: Dict[str, Future] = field(default_factory=dict, repr=False, compare=False)
+    _data_nbytes: Optional[int] = field(default=None, repr=False, compare=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the data and of every artifact derived from it so far"""
+        if self._data_nbytes is None:
+            self._data_nbytes = int(self.data.memory_usage(deep=True).sum())
+        seen = {id(self.data)}
+        return self._data_nbytes + sum(artifact_nbytes(value, seen) for value in list(self.artifacts.values()))
+
+    def get_artifact(self, name: str, factory: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        Return a derived artifact (e.g. a trained model), building it on first use.
+
+        Artifacts are requested from request, pool and training threads; concurrent first uses
+        wait for one build instead of each building their own.
+        """
+        with self._lock:
+            if name in self.artifacts:
+                return self.artifacts[name]
+            pending = self._pending.get(name)
+            if pending is None:
+                future = self._pending[name] = Future()
+        if pending is not None:
+            return pending.result()
+        try:
+            value = factory(self.data)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[name]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self.artifacts[name] = value
+            del self._pending[name]
+        future.set_result(value)
+        self._changed()
+        return value
+
+    def set_artifact(self, name: str, value: Any) -> None:
+        """Store an artifact built elsewhere, e.g. by background training"""
+        with self._lock:
+            self.artifacts[name] = value
+        self._changed()
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+
+class DatasetCache:
+    """Memoizes parsed and preprocessed uploads by content hash across reruns and sessions"""
+
+    def __init__(self, max_entries: int = CACHE_CONFIG['datasets']['max_entries'],
+                 max_bytes: Optional[int] = CACHE_CONFIG['datasets']['max_bytes'],
+                 loader: Callable[[bytes], pd.DataFrame] = load_dataset,
+                 shared: Optional[SharedDataset] = None):
+        self.loader = loader
+        self.shared = shared
+        self._cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes,
+                               sizeof=lambda entry: entry.nbytes)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def load(self, raw: bytes) -> CachedDataset:
+        """Return the cached dataset for these bytes, parsing them only on a miss"""
+        fingerprint = content_hash(raw)
+        return self._cache.get_or_create(fingerprint, lambda: self._create(fingerprint, raw))
+
+    def _create(self, fingerprint: str, raw: bytes) -> CachedDataset:
+        # Artifacts grow the entry after it is cached, so its size is measured again on each one
+        resize = lambda: self._cache.resize(fingerprint)
+        if self.shared is not None and self.shared.fingerprint == fingerprint:
+            # Already published to shared memory: wrap the mapped arrays instead of parsing a copy
+            return CachedDataset(fingerprint=fingerprint, data=self.shared.data,
+                                 artifacts={'scaled_features': self.shared.scaled}, on_change=resize)
+        return CachedDataset(fingerprint=fingerprint, data=self.loader(raw), on_change=resize)
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats.to_dict()
+        stats['entries'] = len(self._cache)
+        stats['bytes'] = self._cache.total_bytes
+        return stats
+
+    def clear(self) -> None:
+        self._cache.clear()
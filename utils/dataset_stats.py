@@ -0,0 +1,428 @@
+# utils/dataset_stats.py
+"""
+Single-pass dataset statistics and drift checks.
+
+``DatasetStats`` reads a CSV or Parquet file in chunks and keeps only
+fixed-size state per column, so the file is never held in memory:
+
+- numeric columns: count, mean and variance merged chunk by chunk
+  (Welford's update in Chan et al.'s pairwise form), min, max and missing
+  values, plus a ``QuantileSketch``
+- other columns: category frequencies
+
+The sketch keeps at most ``sketch_size`` weighted centroids. A column with
+fewer distinct values than that (Age, rounded BMI in most uploads) is
+represented exactly. Statistics of separate chunks or files merge.
+
+``compare_stats`` compares an upload against the statistics of the data a
+model was trained on. It computes the population stability index (PSI) over
+reference quantile bins for every column, and the Kolmogorov-Smirnov
+statistic for numeric ones. Retraining is recommended when a risk model
+input or target column drifts past the thresholds in DRIFT_CONFIG.
+
+Profile a file and check a new one against it from the command line:
+
+    python -m utils.dataset_stats profile data/health_fitness_dataset.csv --output reference.json
+    python -m utils.dataset_stats compare reference.json upload.csv
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import DRIFT_CONFIG
+from utils.instrumentation import timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Probability floor for empty bins so that PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+@dataclass
+class Moments:
+    """Streaming count, mean, variance and range of a numeric column"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = float('inf')
+    maximum: float = float('-inf')
+    missing: int = 0
+
+    def update(self, values: np.ndarray) -> None:
+        present = values[~np.isnan(values)]
+        self.missing += len(values) - len(present)
+        if len(present):
+            mean = float(present.mean())
+            self.merge(Moments(len(present), mean, float(((present - mean) ** 2).sum()),
+                               float(present.min()), float(present.max())))
+
+    def merge(self, other: Moments) -> None:
+        self.missing += other.missing
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation, as pandas describe() reports it"""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+
+
+@dataclass
+class QuantileSketch:
+    """Mergeable approximate distribution of a numeric column in at most ``size`` weighted centroids"""
+    size: int = DRIFT_CONFIG['sketch_size']
+    values: np.ndarray = field(default_factory=lambda: np.empty(0))
+    weights: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self._add(values, np.ones(len(values)))
+
+    def merge(self, other: QuantileSketch) -> None:
+        self._add(other.values, other.weights)
+
+    @property
+    def total(self) -> float:
+        return float(self.weights.sum())
+
+    def cdf(self, x) -> np.ndarray:
+        """Share of values <= x"""
+        cumulative = np.cumsum(self.weights)
+        index = np.searchsorted(self.values, np.asarray(x, dtype=np.float64), side='right')
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0) / cumulative[-1]
+
+    def quantile(self, q) -> np.ndarray:
+        """Values at quantiles q, interpolating linearly between ranks like pandas (exact for exact sketches)"""
+        cumulative = np.cumsum(self.weights)
+        rank = np.asarray(q, dtype=np.float64) * (cumulative[-1] - 1)
+        last = len(self.values) - 1
+        below = self.values[np.minimum(np.searchsorted(cumulative, np.floor(rank), side='right'), last)]
+        above = self.values[np.minimum(np.searchsorted(cumulative, np.ceil(rank), side='right'), last)]
+        return below + (above - below) * (rank - np.floor(rank))
+
+    def _add(self, values: np.ndarray, weights: np.ndarray) -> None:
+        # Equal values share one centroid, so low-cardinality columns are kept exactly
+        values, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        weights = np.bincount(inverse, np.concatenate([self.weights, weights]), minlength=len(values))
+        if len(values) > self.size:
+            # Merge neighbours into size buckets of roughly equal weight
+            buckets = np.minimum(((np.cumsum(weights) - weights / 2) / weights.sum() * self.size).astype(np.intp),
+                                 self.size - 1)
+            merged = np.bincount(buckets, weights, minlength=self.size)
+            sums = np.bincount(buckets, weights * values, minlength=self.size)
+            keep = merged > 0
+            values, weights = sums[keep] / merged[keep], merged[keep]
+        self.values, self.weights = values, weights
+
+
+@dataclass
+class NumericStats:
+    """Moments and distribution sketch of a numeric column"""
+    moments: Moments = field(default_factory=Moments)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def update(self, values: np.ndarray) -> None:
+        self.moments.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other: NumericStats) -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+
+@dataclass
+class CategoricalStats:
+    """Category frequencies of a column"""
+    counts: Counter = field(default_factory=Counter)
+    missing: int = 0
+
+    def update(self, column: pd.Series) -> None:
+        self.missing += int(column.isna().sum())
+        self.counts.update({str(value): int(count) for value, count in column.value_counts().items()})
+
+    def merge(self, other: CategoricalStats) -> None:
+        self.counts.update(other.counts)
+        self.missing += other.missing
+
+    def frequencies(self) -> Dict[str, float]:
+        total = sum(self.counts.values())
+        return {value: count / total for value, count in self.counts.most_common()} if total else {}
+
+
+@dataclass
+class DatasetStats:
+    """Per-column statistics of a dataset, built one chunk at a time"""
+    rows: int = 0
+    numeric: Dict[str, NumericStats] = field(default_factory=dict)
+    categorical: Dict[str, CategoricalStats] = field(default_factory=dict)
+    sketch_size: int = DRIFT_CONFIG['sketch_size']
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.numeric) + list(self.categorical)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Add a chunk; column kinds are fixed by the first chunk that has the column"""
+        import pandas as pd
+
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            values = chunk[column]
+            if column not in self.numeric and column not in self.categorical:
+                if pd.api.types.is_numeric_dtype(values):
+                    self.numeric[column] = NumericStats(sketch=QuantileSketch(self.sketch_size))
+                else:
+                    self.categorical[column] = CategoricalStats()
+            if column in self.numeric:
+                values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+                self.numeric[column].update(values)
+            else:
+                self.categorical[column].update(values)
+
+    def merge(self, other: DatasetStats) -> None:
+        """Combine statistics of another part of the same dataset"""
+        self.rows += other.rows
+        for column, stats in other.numeric.items():
+            self.numeric.setdefault(column, NumericStats(sketch=QuantileSketch(self.sketch_size))).merge(stats)
+        for column, stats in other.categorical.items():
+            self.categorical.setdefault(column, CategoricalStats()).merge(stats)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], sketch_size: int = DRIFT_CONFIG['sketch_size']) -> DatasetStats:
+        stats = cls(sketch_size=sketch_size)
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    @classmethod
+    @timed('dataset_stats')
+    def from_frame(cls, data: pd.DataFrame, chunksize: int = DRIFT_CONFIG['chunksize']) -> DatasetStats:
+        """Statistics of an in-memory frame, computed with the same chunked pass as files"""
+        return cls.from_chunks(data.iloc[start:start + chunksize] for start in range(0, len(data), chunksize))
+
+    @classmethod
+    @timed('dataset_stats')
+    def from_file(cls, source, chunksize: int = DRIFT_CONFIG['chunksize'], file_format: Optional[str] = None) -> DatasetStats:
+        """
+        Statistics of a CSV or Parquet file, read one chunk at a time.
+
+        Parameters:
+        source (str or file-like): Path or binary file object
+        chunksize (int): Rows per chunk
+        file_format (str): 'csv' or 'parquet'; inferred from the path's extension by default (csv for file objects)
+
+        Returns:
+        DatasetStats: Statistics of every column
+        """
+        return cls.from_chunks(read_chunks(source, chunksize, file_format))
+
+    def summary(self) -> pd.DataFrame:
+        """describe()-style table of the numeric columns"""
+        import pandas as pd
+
+        quantiles = (0.25, 0.5, 0.75)
+        rows = {}
+        for column, stats in self.numeric.items():
+            moments = stats.moments
+            values = stats.sketch.quantile(quantiles) if moments.count else [np.nan] * len(quantiles)
+            rows[column] = [moments.count, moments.mean, moments.std, moments.minimum, *values, moments.maximum]
+        return pd.DataFrame(rows, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+    def to_dict(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'sketch_size': self.sketch_size,
+            'numeric': {column: {'moments': vars(stats.moments),
+                                 'values': stats.sketch.values.tolist(),
+                                 'weights': stats.sketch.weights.tolist()}
+                        for column, stats in self.numeric.items()},
+            'categorical': {column: {'counts': dict(stats.counts), 'missing': stats.missing}
+                            for column, stats in self.categorical.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> DatasetStats:
+        size = payload['sketch_size']
+        return cls(
+            rows=payload['rows'],
+            numeric={column: NumericStats(Moments(**value['moments']),
+                                          QuantileSketch(size, np.asarray(value['values'], dtype=np.float64),
+                                                         np.asarray(value['weights'], dtype=np.float64)))
+                     for column, value in payload['numeric'].items()},
+            categorical={column: CategoricalStats(Counter(value['counts']), value['missing'])
+                         for column, value in payload['categorical'].items()},
+            sketch_size=size,
+        )
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> DatasetStats:
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def read_chunks(source, chunksize: int = DRIFT_CONFIG['chunksize'], file_format: Optional[str] = None):
+    """Yield a CSV or Parquet file as DataFrames of at most chunksize rows"""
+    import pandas as pd
+
+    if file_format is None:
+        is_path = isinstance(source, (str, os.PathLike))
+        file_format = 'parquet' if is_path and str(source).endswith(('.parquet', '.pq')) else 'csv'
+    if file_format == 'csv':
+        with pd.read_csv(source, chunksize=chunksize) as reader:
+            yield from reader
+    elif file_format == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pyarrow") from None
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+
+@dataclass
+class ColumnDrift:
+    """Distribution shift of one column between reference and current statistics"""
+    column: str
+    psi: float
+    ks: Optional[float]
+    status: str
+
+
+@dataclass
+class DriftReport:
+    """Per-column drift of an upload against training statistics, and whether to retrain"""
+    columns: List[ColumnDrift]
+    missing_columns: List[str]
+    retrain: bool
+    reasons: List[str]
+
+    def drifted(self) -> List[ColumnDrift]:
+        return [drift for drift in self.columns if drift.status != 'stable']
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI between two distributions over the same bins"""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return float(((actual - expected) * np.log(actual / expected)).sum())
+
+
+def numeric_drift(reference: QuantileSketch, current: QuantileSketch, bins: int = DRIFT_CONFIG['psi_bins']):
+    """(PSI over reference quantile bins, KS statistic) of two sketches"""
+    edges = np.unique(reference.quantile(np.linspace(0, 1, bins + 1)[1:-1]))
+
+    def masses(sketch):
+        return np.diff(np.concatenate([[0.0], sketch.cdf(edges), [1.0]]))
+
+    points = np.union1d(reference.values, current.values)
+    ks = float(np.abs(reference.cdf(points) - current.cdf(points)).max())
+    return population_stability_index(masses(reference), masses(current)), ks
+
+
+def categorical_drift(reference: CategoricalStats, current: CategoricalStats) -> float:
+    """PSI over the union of both columns' categories"""
+    expected, actual = reference.frequencies(), current.frequencies()
+    categories = sorted(set(expected) | set(actual))
+    return population_stability_index(np.array([expected.get(c, 0.0) for c in categories]),
+                                      np.array([actual.get(c, 0.0) for c in categories]))
+
+
+@timed('drift_check')
+def compare_stats(reference: DatasetStats, current: DatasetStats, config: Optional[dict] = None) -> DriftReport:
+    """
+    Compare an upload's statistics with the statistics a model was trained on.
+
+    Parameters:
+    reference (DatasetStats): Training data statistics
+    current (DatasetStats): Statistics of the new dataset
+    config (dict): Thresholds; defaults to DRIFT_CONFIG
+
+    Returns:
+    DriftReport: Drift of every column present in both, and the retraining decision
+    """
+    config = {**DRIFT_CONFIG, **(config or {})}
+    columns, reasons = [], []
+    for column in reference.columns:
+        if column in reference.numeric and column in current.numeric:
+            if not (reference.numeric[column].moments.count and current.numeric[column].moments.count):
+                continue
+            psi, ks = numeric_drift(reference.numeric[column].sketch, current.numeric[column].sketch,
+                                    config['psi_bins'])
+        elif column in reference.categorical and column in current.categorical:
+            psi, ks = categorical_drift(reference.categorical[column], current.categorical[column]), None
+        else:
+            continue
+        if psi >= config['psi_retrain'] or (ks is not None and ks >= config['ks_retrain']):
+            status = 'drift'
+        elif psi >= config['psi_warn']:
+            status = 'warn'
+        else:
+            status = 'stable'
+        columns.append(ColumnDrift(column, psi, ks, status))
+        if status == 'drift' and column in config['model_columns']:
+            reasons.append(f"{column} drifted (PSI {psi:.2f}" + (f", KS {ks:.2f})" if ks is not None else ")"))
+
+    compared = {drift.column for drift in columns}
+    missing = [column for column in config['model_columns'] if column in reference.columns and column not in compared]
+    reasons += [f"{column} is missing or has no values" for column in missing]
+    return DriftReport(columns, missing, bool(reasons), reasons)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile datasets and check them for drift")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    profile = subparsers.add_parser('profile', help='Compute statistics of a CSV or Parquet file')
+    profile.add_argument('path', help='Dataset file')
+    profile.add_argument('--output', help='Save the statistics as JSON')
+    compare = subparsers.add_parser('compare', help='Check a dataset against saved statistics')
+    compare.add_argument('reference', help='Statistics JSON written by profile')
+    compare.add_argument('path', help='Dataset file')
+    for command in (profile, compare):
+        command.add_argument('--chunksize', type=int, default=DRIFT_CONFIG['chunksize'])
+    args = parser.parse_args(argv)
+
+    stats = DatasetStats.from_file(args.path, chunksize=args.chunksize)
+    if args.command == 'profile':
+        print(f"{stats.rows:,} rows")
+        print(stats.summary().to_string())
+        for column, categorical in stats.categorical.items():
+            print(f"\n{column}:")
+            for value, share in categorical.frequencies().items():
+                print(f"  {value:<20}{share:>8.1%}")
+        if args.output:
+            stats.save(args.output)
+        return 0
+
+    report = compare_stats(DatasetStats.load(args.reference), stats)
+    print(f"{'column':<24}{'PSI':>8}{'KS':>8}  status")
+    for drift in report.columns:
+        ks = f"{drift.ks:.3f}" if drift.ks is not None else '-'
+        print(f"{drift.column:<24}{drift.psi:>8.3f}{ks:>8}  {drift.status}")
+    print("\nRetrain: " + ("yes - " + "; ".join(report.reasons) if report.retrain else "no"))
+    return int(report.retrain)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
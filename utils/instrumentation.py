@@ -0,0 +1,198 @@
+# utils/instrumentation.py
+"""
+Lightweight stage timing for the planning pipeline.
+
+Stages are timed with the ``stage`` context manager or the ``timed`` decorator.
+Timings are recorded only when instrumentation is enabled globally (see
+``INSTRUMENTATION_CONFIG``) or when the caller is inside a ``request_trace``;
+otherwise both return immediately. Recorded timings feed a per-stage histogram
+that can be exported as JSON or in the Prometheus text format.
+"""
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import INSTRUMENTATION_CONFIG
+
+_enabled = INSTRUMENTATION_CONFIG['enabled']
+_current_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('current_trace', default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    def __init__(self, buckets_ms: Sequence[float]):
+        self.buckets_ms = tuple(buckets_ms)
+        self.bucket_counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.min_ms = min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for upper, bucket_count in zip(self.buckets_ms, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(upper, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'buckets_ms': list(self.buckets_ms),
+            'bucket_counts': list(self.bucket_counts),
+        }
+
+
+class StageRegistry:
+    """Thread-safe collection of per-stage histograms"""
+
+    def __init__(self, buckets_ms: Sequence[float] = INSTRUMENTATION_CONFIG['buckets_ms']):
+        self.buckets_ms = tuple(buckets_ms)
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage_name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage_name)
+            if histogram is None:
+                histogram = self._histograms[stage_name] = Histogram(self.buckets_ms)
+            histogram.observe(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: hist.to_dict() for name, hist in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps({'stages': self.snapshot()}, **kwargs)
+
+    def to_prometheus(self, metric: str = 'healthalign_stage_duration_seconds') -> str:
+        """Render all histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {metric} Time spent in each planning pipeline stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, hist in self.snapshot().items():
+            cumulative = 0
+            for upper, bucket_count in zip(hist['buckets_ms'], hist['bucket_counts']):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{upper / 1000:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {hist["total_ms"] / 1000:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {hist["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = StageRegistry()
+
+
+def enable(enabled: bool = True) -> None:
+    """Turn process-wide stage recording on or off"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def record(stage_name: str, elapsed_ms: float) -> None:
+    """Record a stage duration in the histograms and the current request trace"""
+    if _enabled:
+        REGISTRY.observe(stage_name, elapsed_ms)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append((stage_name, elapsed_ms))
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """Context manager timing a block as ``name`` (a no-op when nothing is recording)"""
+    if _enabled or _current_trace.get() is not None:
+        return _Stage(name)
+    return _NULL_STAGE
+
+
+def timed(name: Optional[str] = None):
+    """Decorator timing every call of a function as a stage (defaults to the function name)"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and _current_trace.get() is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage_name, (time.perf_counter() - started) * 1000)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def request_trace() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the (stage, milliseconds) timings of the enclosed request"""
+    trace: List[Tuple[str, float]] = []
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
@@ -0,0 +1,98 @@
+# utils/plan_rendering.py
+"""
+Markdown rendering of generated plans for the Streamlit UI.
+
+A plan is identified by ``plan_id``, a hash of the dataset fingerprint and
+every user input that shapes it. The dishes and exercises are drawn at random,
+so two sessions with the same inputs get different records; the rendered
+markdown is therefore keyed by ``records_id``, a hash of the records
+themselves. Each day's markdown is built once and kept in a process-wide LRU
+cache, so a rerun re-emits one cached string per day instead of rebuilding
+dozens of small elements.
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from config import CACHE_CONFIG
+from utils.cache import LRUCache
+
+MEAL_SLOT_LABELS = (
+    ("breakfast", "🍳 **Breakfast:**"),
+    ("morning_snack", "🥪 **Morning Snack:**"),
+    ("lunch", "🥗 **Lunch:**"),
+    ("evening_snack", "🍎 **Evening Snack:**"),
+    ("dinner", "🍽 **Dinner:**"),
+)
+
+
+def plan_id(**inputs) -> str:
+    """Stable id for a plan from the inputs that determine it"""
+    payload = json.dumps(inputs, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def records_id(*records) -> str:
+    """Stable id for plan records from their content; records are dataclasses whose repr lists every field"""
+    return hashlib.sha256(repr(records).encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class DayView:
+    """Expander title and the single markdown block shown for one day"""
+    title: str
+    markdown: str
+
+
+def meal_day_views(meal_plan: Dict) -> List[DayView]:
+    """One markdown block per day of a rendered meal plan"""
+    views = []
+    for day, meals in meal_plan.items():
+        lines = [f"- {label} {meals[slot]}" for slot, label in MEAL_SLOT_LABELS]
+        lines.append("")
+        lines.append(f"**Calories:** {meals['calories']} · **Macros:** {meals['macros']}")
+        views.append(DayView(f"Day {day}", "\n".join(lines)))
+    return views
+
+
+def exercise_day_views(exercise_plan: Dict) -> List[DayView]:
+    """One markdown block per day of a rendered exercise plan"""
+    views = []
+    for day, workout in exercise_plan.items():
+        lines = [
+            f"**🎯 Focus:** {workout['focus']} · **⏱ Duration:** {workout['duration']} minutes",
+            "",
+            "**🏋️ Exercises:**",
+        ]
+        lines.extend(f"- {exercise}" for exercise in workout['exercises'])
+        if workout.get('notes'):
+            lines.append("")
+            lines.append(f"> 💡 {workout['notes']}")
+        views.append(DayView(f"Day {day}", "\n".join(lines)))
+    return views
+
+
+def _views_nbytes(views: Tuple[DayView, ...]) -> int:
+    return sum(len(view.title) + len(view.markdown) for view in views)
+
+
+class PlanRenderCache:
+    """Per-day markdown of rendered plans, built once per (records id, section)"""
+
+    def __init__(self, max_entries: int = CACHE_CONFIG['plan_renders']['max_entries'],
+                 max_bytes: int = CACHE_CONFIG['plan_renders']['max_bytes']):
+        self._cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=_views_nbytes)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, records: str, section: str, build: Callable[[], List[DayView]]) -> Tuple[DayView, ...]:
+        """Cached day views for a plan section, calling build only on the first request for its records id"""
+        return self._cache.get_or_create((records, section), lambda: tuple(build()))
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._cache), 'bytes': self._cache.total_bytes, **self._cache.stats.to_dict()}
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,167 @@
+# utils/request_budget.py
+"""
+Per-request latency budget with graceful degradation.
+
+A ``RequestBudget`` is created for each request. Every stage that has a
+cheaper answer runs on a shared thread pool, in a copy of the caller's
+context, so its instrumentation timings still land in the request trace.
+The caller waits until the stage's deadline:
+
+- the stage's own limit from REQUEST_BUDGET_CONFIG, capped by what is left
+  of the request's total budget
+
+If the stage overruns, the caller gets the stage's fallback, and the request
+is flagged as degraded. The overrunning work keeps going in the background.
+Work that later requests should pick up, such as first-time model training
+for a dataset, is submitted once and its future kept by the caller. Each
+request then waits on it with ``RequestBudget.wait``.
+
+Stages without a fallback run inline with no deadline. ``DEGRADATION``
+counts requests, degraded requests and fallbacks per stage for the debug
+panel and the Prometheus export.
+"""
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from config import REQUEST_BUDGET_CONFIG
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def submit(func: Callable[[], Any]) -> Future:
+    """Run func on the shared budget pool in a copy of the caller's context"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REQUEST_BUDGET_CONFIG['workers'],
+                                           thread_name_prefix='request-budget')
+    return _executor.submit(contextvars.copy_context().run, func)
+
+
+class DegradationStats:
+    """Thread-safe counts of requests, degraded requests and per-stage fallbacks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, stages: List[str], degraded: List[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            self.degraded_requests += bool(degraded)
+            self.stage_runs.update(stages)
+            self.stage_fallbacks.update(degraded)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'degraded_requests': self.degraded_requests,
+                'degraded_rate': self.degraded_requests / self.requests if self.requests else 0.0,
+                'stages': {stage: {'runs': runs, 'fallbacks': self.stage_fallbacks[stage],
+                                   'fallback_rate': self.stage_fallbacks[stage] / runs}
+                           for stage, runs in sorted(self.stage_runs.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.degraded_requests = 0
+            self.stage_runs: Counter = Counter()
+            self.stage_fallbacks: Counter = Counter()
+
+    def to_prometheus(self, prefix: str = 'healthalign') -> str:
+        """Render the counters in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_requests_total Requests run under a latency budget.",
+            f"# TYPE {prefix}_requests_total counter",
+            f"{prefix}_requests_total {snapshot['requests']}",
+            f"# HELP {prefix}_degraded_requests_total Requests answered with at least one fallback.",
+            f"# TYPE {prefix}_degraded_requests_total counter",
+            f"{prefix}_degraded_requests_total {snapshot['degraded_requests']}",
+            f"# HELP {prefix}_stage_fallbacks_total Stages that overran their deadline and used a fallback.",
+            f"# TYPE {prefix}_stage_fallbacks_total counter",
+        ]
+        lines += [f'{prefix}_stage_fallbacks_total{{stage="{stage}"}} {stats["fallbacks"]}'
+                  for stage, stats in snapshot['stages'].items()]
+        return "\n".join(lines) + "\n"
+
+
+DEGRADATION = DegradationStats()
+
+
+class RequestBudget:
+    """Stage deadlines for one request; stages that overrun answer with their fallback"""
+
+    def __init__(self, total_ms: Optional[float] = None, stages_ms: Optional[Dict[str, float]] = None,
+                 enabled: Optional[bool] = None):
+        self.total_ms = REQUEST_BUDGET_CONFIG['total_ms'] if total_ms is None else total_ms
+        self.stages_ms = {**REQUEST_BUDGET_CONFIG['stages_ms'], **(stages_ms or {})}
+        self.enabled = REQUEST_BUDGET_CONFIG['enabled'] if enabled is None else enabled
+        self.started = time.perf_counter()
+        self.stages: List[str] = []
+        self.degraded: List[str] = []
+        self._finished = False
+
+    def remaining_ms(self) -> float:
+        return max(0.0, self.total_ms - (time.perf_counter() - self.started) * 1000)
+
+    def deadline_ms(self, stage: str) -> float:
+        """Time a stage may take: its own limit, capped by what is left of the request's budget"""
+        return min(self.stages_ms.get(stage, self.total_ms), self.remaining_ms())
+
+    def run(self, stage: str, func: Callable[[], Any], fallback: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Run a stage within its deadline.
+
+        Parameters:
+        stage (str): Stage name, for deadlines and degradation counts
+        func (Callable): The full computation; must not touch per-session UI state
+        fallback (Callable): Cheaper answer returned when func overruns; without one, func runs
+            inline with no deadline
+
+        Returns:
+        Any: func's result, or the fallback's if func did not finish in time. Exceptions raised
+            by func propagate.
+        """
+        if fallback is None or not self.enabled:
+            self.stages.append(stage)
+            return func()
+        future = submit(func)
+        try:
+            return self.wait(stage, future, fallback)
+        finally:
+            # Drops work still queued behind other overrunning stages; running work is left to finish
+            future.cancel()
+
+    def wait(self, stage: str, future: Future, fallback: Callable[[], Any]) -> Any:
+        """Wait for work already submitted until the stage's deadline, then answer with the fallback"""
+        self.stages.append(stage)
+        try:
+            return future.result(timeout=self.deadline_ms(stage) / 1000 if self.enabled else None)
+        except TimeoutError:
+            self.degraded.append(stage)
+            return fallback()
+
+    def degrade(self, stage: str, fallback: Callable[[], Any]) -> Any:
+        """Answer a stage with its fallback without trying the full computation"""
+        self.stages.append(stage)
+        self.degraded.append(stage)
+        return fallback()
+
+    @property
+    def is_degraded(self) -> bool:
+        return bool(self.degraded)
+
+    def finish(self) -> bool:
+        """Count the request once in DEGRADATION, unless it ran no stage; returns whether it was degraded"""
+        if self.stages and not self._finished:
+            DEGRADATION.record(self.stages, self.degraded)
+            self._finished = True
+        return self.is_degraded
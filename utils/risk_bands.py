@@ -0,0 +1,81 @@
+# utils/risk_bands.py
+"""
+Risk banding driven by ``APP_CONFIG['risk_score_ranges']``.
+
+The configured ranges are compiled once into sorted bin edges. Every API bins
+with the same rule (``searchsorted(edges, score, side='right')``), so a score
+equal to a band's lower bound belongs to that band. Scores below the first or
+above the last range fall into the outermost bands; missing or non-numeric
+scores are labelled ``UNKNOWN`` (code -1).
+"""
+from bisect import bisect_right
+from math import isnan
+from typing import Dict, Sequence, Tuple
+
+from config import APP_CONFIG
+
+UNKNOWN = 'Unknown'
+
+
+class RiskBands:
+    """Precompiled risk bands with scalar, NumPy and pandas APIs"""
+
+    def __init__(self, ranges: Dict[str, Tuple[float, float]] = APP_CONFIG['risk_score_ranges']):
+        bands = sorted(ranges.items(), key=lambda item: item[1][0])
+        for (name, (_, upper)), (next_name, (next_lower, _)) in zip(bands, bands[1:]):
+            if upper != next_lower:
+                raise ValueError(f"Risk ranges must be contiguous: {name!r} ends at {upper} "
+                                 f"but {next_name!r} starts at {next_lower}")
+        self.labels: Tuple[str, ...] = tuple(name.title() for name, _ in bands)
+        self.edges: Tuple[float, ...] = tuple(float(lower) for _, (lower, _) in bands[1:])
+
+    def code(self, score) -> int:
+        """Band index of one score (-1 if it is missing or not numeric)"""
+        try:
+            score = float(score)
+        except (ValueError, TypeError):
+            return -1
+        if isnan(score):
+            return -1
+        return bisect_right(self.edges, score)
+
+    def label(self, score) -> str:
+        """Band label of one score"""
+        code = self.code(score)
+        return self.labels[code] if code >= 0 else UNKNOWN
+
+    def codes(self, scores: Sequence[float]):
+        """Band indices for an array of scores as int8 (-1 for NaN)"""
+        import numpy as np
+
+        scores = np.asarray(scores, dtype=np.float64)
+        codes = np.searchsorted(np.asarray(self.edges), scores, side='right').astype(np.int8)
+        codes[np.isnan(scores)] = -1
+        return codes
+
+    def label_array(self, scores: Sequence[float]):
+        """Band labels for an array of scores"""
+        import numpy as np
+
+        lookup = np.array(self.labels + (UNKNOWN,))
+        # Code -1 indexes the trailing UNKNOWN entry
+        return lookup[self.codes(scores)]
+
+    def categorical(self, scores: Sequence[float]):
+        """Band labels as an ordered pandas Categorical (NaN for missing scores)"""
+        import pandas as pd
+
+        return pd.Categorical.from_codes(self.codes(scores), categories=list(self.labels), ordered=True)
+
+    def value_counts(self, scores: Sequence[float]) -> Dict[str, int]:
+        """Number of scores in each non-empty band, plus UNKNOWN for missing scores"""
+        import numpy as np
+
+        counts = np.bincount(self.codes(scores).astype(np.int64) + 1, minlength=len(self.labels) + 1)
+        result = {label: int(count) for label, count in zip(self.labels, counts[1:]) if count}
+        if counts[0]:
+            result[UNKNOWN] = int(counts[0])
+        return result
+
+
+RISK_BANDS = RiskBands()
@@ -0,0 +1,141 @@
+# utils/scoring.py
+"""
+Vectorized population scoring.
+
+Array versions of the scalar scoring rules, for rescoring millions of members
+at once:
+
+- ``health_scores``   -> ``utils.data_processing.calculate_health_metrics``
+- ``intensity_tiers`` -> ``AIWorkoutPlanGenerator._calculate_intensity``
+- ``risk_levels``     -> ``models.health_risk_model.get_risk_level`` (via utils.risk_bands)
+
+The scalar rules only count each member's conditions (``len(conditions)``),
+so conditions are passed either as per-member counts or as a boolean matrix
+with one column per entry of ``CONDITIONS``:
+
+- ``condition_counts`` counts raw condition lists exactly as the scalar rules
+  do, unknown and repeated entries included, so results are identical for
+  any input.
+- ``condition_mask`` keeps only distinct entries of ``CONDITIONS``. It
+  matches the scalar rules only for clean lists, and suits filtering
+  members by condition.
+"""
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from config import CONDITIONS
+from utils.risk_bands import RISK_BANDS
+
+INTENSITY_TIERS = np.array(['low', 'moderate', 'high'])
+
+
+def condition_counts(conditions: Iterable[Iterable[str]]) -> np.ndarray:
+    """Number of conditions in each member's list, counted as the scalar rules count them"""
+    return np.fromiter((len(member) for member in conditions), dtype=np.int64)
+
+
+def condition_mask(conditions: Iterable[Iterable[str]]) -> np.ndarray:
+    """
+    Encode per-member condition lists as an (n_members, len(CONDITIONS)) boolean matrix.
+
+    Conditions outside CONDITIONS are dropped and repeats collapse; score raw lists with
+    condition_counts instead.
+    """
+    columns = {name: i for i, name in enumerate(CONDITIONS)}
+    rows = [[columns[c] for c in member if c in columns] for member in conditions]
+    mask = np.zeros((len(rows), len(CONDITIONS)), dtype=bool)
+    for i, cols in enumerate(rows):
+        mask[i, cols] = True
+    return mask
+
+
+def _condition_counts(conditions: np.ndarray) -> np.ndarray:
+    conditions = np.asarray(conditions)
+    if conditions.ndim == 1 and not np.issubdtype(conditions.dtype, np.bool_):
+        return conditions.astype(np.int64)
+    if conditions.ndim != 2:
+        raise ValueError("conditions must be per-member counts or a 2-D (members x conditions) mask")
+    return conditions.sum(axis=1, dtype=np.int64)
+
+
+def health_scores(age: np.ndarray, bmi: np.ndarray, conditions: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_health_metrics: 0-100 health score per member"""
+    age = np.asarray(age)
+    bmi = np.asarray(bmi, dtype=np.float64)
+    base_score = 100 - (age * 0.3)
+    bmi_factor = np.abs(25 - bmi) * 2
+    condition_factor = _condition_counts(conditions) * 10
+    return np.clip(base_score - bmi_factor - condition_factor, 0, 100)
+
+
+def intensity_codes(age: np.ndarray, conditions: np.ndarray) -> np.ndarray:
+    """Vectorized _calculate_intensity as codes into INTENSITY_TIERS (0=low, 1=moderate, 2=high)"""
+    age = np.asarray(age)
+    age_penalty = np.where(age < 30, 0.0,
+                           np.where(age < 50, (age - 30) * 1.5, 30 + (age - 50) * 2))
+    final_score = 100 - age_penalty - _condition_counts(conditions) * 15
+    return (final_score > 40).astype(np.int8) + (final_score > 70)
+
+
+def intensity_tiers(age: np.ndarray, conditions: np.ndarray) -> np.ndarray:
+    """Vectorized _calculate_intensity: 'low' / 'moderate' / 'high' per member"""
+    return INTENSITY_TIERS[intensity_codes(age, conditions)]
+
+
+def risk_level_codes(risk_scores: np.ndarray) -> np.ndarray:
+    """Vectorized get_risk_level as codes into RISK_BANDS.labels (-1 for missing scores)"""
+    return RISK_BANDS.codes(risk_scores)
+
+
+def risk_levels(risk_scores: np.ndarray) -> np.ndarray:
+    """Vectorized get_risk_level: 'Low' / 'Moderate' / 'High' per score"""
+    return RISK_BANDS.label_array(risk_scores)
+
+
+def score_population(age: np.ndarray, bmi: np.ndarray, conditions: np.ndarray,
+                     risk_scores: Optional[np.ndarray] = None, model=None,
+                     chunk_size: int = 1_000_000) -> Dict[str, np.ndarray]:
+    """
+    Score a whole member base in fixed-size chunks.
+
+    Parameters:
+    age (np.ndarray): Member ages
+    bmi (np.ndarray): Member BMIs
+    conditions (np.ndarray): Per-member condition counts (see condition_counts) or a boolean
+        condition mask (see condition_mask)
+    risk_scores (np.ndarray): Health risk scores; predicted with ``model`` when omitted
+    model (HealthRiskModel): Trained model used to predict missing risk scores
+    chunk_size (int): Rows processed per chunk, bounding temporary memory
+
+    Returns:
+    dict: 'health_score' (float64), 'intensity' and 'risk_level' codes (int8) and,
+    when risk scores are available, 'risk_score'
+    """
+    age = np.asarray(age)
+    bmi = np.asarray(bmi, dtype=np.float64)
+    conditions = np.asarray(conditions)
+    n = len(age)
+    if not (len(bmi) == len(conditions) == n):
+        raise ValueError("age, bmi and conditions must have the same number of rows")
+
+    result = {
+        'health_score': np.empty(n, dtype=np.float64),
+        'intensity': np.empty(n, dtype=np.int8),
+    }
+    if risk_scores is not None or model is not None:
+        result['risk_score'] = np.empty(n, dtype=np.float64)
+        result['risk_level'] = np.empty(n, dtype=np.int8)
+
+    for start in range(0, n, chunk_size):
+        chunk = slice(start, min(start + chunk_size, n))
+        result['health_score'][chunk] = health_scores(age[chunk], bmi[chunk], conditions[chunk])
+        result['intensity'][chunk] = intensity_codes(age[chunk], conditions[chunk])
+        if 'risk_score' in result:
+            if risk_scores is not None:
+                chunk_risk = np.asarray(risk_scores[chunk], dtype=np.float64)
+            else:
+                chunk_risk = model.predict(np.column_stack([age[chunk], bmi[chunk]]))
+            result['risk_score'][chunk] = chunk_risk
+            result['risk_level'][chunk] = risk_level_codes(chunk_risk)
+    return result
@@ -0,0 +1,61 @@
+# utils/shared_arrays.py
+"""
+Zero-copy sharing of numpy arrays between processes.
+
+Arrays are published as ``.npy`` files in a RAM-backed directory (``/dev/shm``
+where available) and attached by other processes as read-only memory maps, so
+every process reads the same physical pages instead of receiving a pickled copy.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def default_shared_dir() -> str:
+    """RAM-backed directory for shared arrays, falling back to the temp directory"""
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def attach_array(path: str) -> np.ndarray:
+    """Map a published array read-only without copying it"""
+    import numpy as np
+
+    return np.load(path, mmap_mode='r')
+
+
+def attach_arrays(paths: Dict[str, str]) -> Dict[str, np.ndarray]:
+    return {name: attach_array(path) for name, path in paths.items()}
+
+
+class SharedArrayStore:
+    """A directory of published arrays, removed when the store is closed"""
+
+    def __init__(self, directory: Optional[str] = None, prefix: str = 'healthalign-'):
+        self.directory = tempfile.mkdtemp(prefix=prefix, dir=directory or default_shared_dir())
+        self.paths: Dict[str, str] = {}
+
+    def publish(self, name: str, array: np.ndarray) -> str:
+        """Write an array once so that other processes can attach to it"""
+        import numpy as np
+
+        path = os.path.join(self.directory, f"{name}.npy")
+        np.save(path, np.ascontiguousarray(array))
+        self.paths[name] = path
+        return path
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.paths = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,208 @@
+# utils/shared_data.py
+"""
+Shared-memory reference dataset for hosts running several app workers.
+
+One loader process publishes a preprocessed dataset once into a RAM-backed
+directory (see utils/shared_arrays.py):
+
+- numeric columns as ``.npy`` arrays
+- categorical columns (Gender, DietaryPreference) as code arrays of the
+  smallest integer type that fits, with their categories in the manifest
+- the fitted similarity scaler (mean and scale) and the scaled feature matrix
+
+Every worker attaches the arrays as read-only memory maps and wraps them in a
+DataFrame without copying, so all workers share the same physical pages and
+host RAM stays flat as workers are added. ``manifest.json`` is written last,
+so a worker never sees a partially published dataset.
+
+Publish from the command line and point workers at the result:
+
+    python -m utils.shared_data publish data/health_fitness_dataset.csv
+    HEALTHALIGN_SHARED_DATA=/dev/shm/healthalign/<fingerprint> streamlit run app.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+from config import FEATURES, SHARED_DATA_CONFIG
+from utils.shared_arrays import attach_array, default_shared_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+MANIFEST = 'manifest.json'
+
+
+class ScaledFeatures(NamedTuple):
+    """Standard-scaled similarity features of a dataset and the scaler that produced them"""
+    features: List[str]
+    mean: np.ndarray
+    scale: np.ndarray
+    matrix: np.ndarray
+
+
+def scale_reference_features(data: pd.DataFrame, features: List[str] = FEATURES,
+                             sample_weight: Optional[np.ndarray] = None) -> ScaledFeatures:
+    """
+    Fit the similarity scaler once; the result matches a per-query StandardScaler fit.
+
+    sample_weight holds the row counts when data holds compacted points (see utils.compaction),
+    so that the scaler matches a fit over the original rows.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    matrix = scaler.fit_transform(data[features].values, sample_weight=sample_weight)
+    return ScaledFeatures(list(features), scaler.mean_, scaler.scale_, matrix)
+
+
+def publish_dataset(data: pd.DataFrame, fingerprint: str, root: Optional[str] = None,
+                    features: List[str] = FEATURES) -> str:
+    """
+    Publish a preprocessed dataset for workers to attach.
+
+    Parameters:
+    data (pd.DataFrame): Preprocessed reference dataset
+    fingerprint (str): Content hash of the source file (see utils.dataset_cache.content_hash)
+    root (str): Parent directory; defaults to SHARED_DATA_CONFIG['root'] under /dev/shm
+    features (List[str]): Columns scaled for similarity matching
+
+    Returns:
+    str: Directory holding the published arrays and manifest
+    """
+    import numpy as np
+
+    directory = os.path.join(root or _default_root(), fingerprint)
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        return directory
+    staging = f"{directory}.tmp-{os.getpid()}"
+    os.makedirs(staging, exist_ok=True)
+
+    columns = []
+    for name in data.columns:
+        column = data[name]
+        entry = {'name': name, 'file': f"col{len(columns)}.npy"}
+        if column.dtype.kind in 'biuf':
+            values = column.to_numpy()
+        else:
+            categorical = column.astype('category')
+            entry['categories'] = [str(c) for c in categorical.cat.categories]
+            # Codes run from -1 (missing) to the category count; int8 would wrap past 127 categories
+            codes = categorical.cat.codes.to_numpy()
+            dtype = next(dtype for dtype in (np.int8, np.int16, np.int32, np.int64)
+                         if np.iinfo(dtype).max >= len(entry['categories']))
+            values = codes.astype(dtype)
+        np.save(os.path.join(staging, entry['file']), np.ascontiguousarray(values))
+        columns.append(entry)
+
+    scaled = scale_reference_features(data, features)
+    np.save(os.path.join(staging, 'scaled_features.npy'), np.ascontiguousarray(scaled.matrix))
+    manifest = {
+        'fingerprint': fingerprint,
+        'rows': len(data),
+        'columns': columns,
+        'scaler': {'features': scaled.features, 'mean': scaled.mean.tolist(), 'scale': scaled.scale.tolist()},
+    }
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        # Another loader published the same dataset first
+        shutil.rmtree(staging, ignore_errors=True)
+    return directory
+
+
+def unpublish_dataset(directory: str) -> None:
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@dataclass
+class SharedDataset:
+    """A published dataset attached read-only by a worker"""
+    directory: str
+    fingerprint: str
+    data: pd.DataFrame
+    scaled: ScaledFeatures
+    arrays: Dict[str, np.ndarray]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+
+def attach_dataset(directory: str) -> SharedDataset:
+    """Map a published dataset without copying it"""
+    import numpy as np
+    import pandas as pd
+
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    arrays, columns = {}, {}
+    for entry in manifest['columns']:
+        values = attach_array(os.path.join(directory, entry['file']))
+        arrays[entry['name']] = values
+        if 'categories' in entry:
+            columns[entry['name']] = pd.Categorical.from_codes(values, categories=entry['categories'])
+        else:
+            columns[entry['name']] = values
+    arrays['scaled_features'] = attach_array(os.path.join(directory, 'scaled_features.npy'))
+
+    scaler = manifest['scaler']
+    return SharedDataset(
+        directory=directory,
+        fingerprint=manifest['fingerprint'],
+        data=pd.DataFrame(columns, copy=False),
+        scaled=ScaledFeatures(scaler['features'], np.asarray(scaler['mean']), np.asarray(scaler['scale']),
+                              arrays['scaled_features']),
+        arrays=arrays
+    )
+
+
+def attach_from_env() -> Optional[SharedDataset]:
+    """Attach the dataset named by SHARED_DATA_CONFIG['env'], if one is configured"""
+    directory = os.environ.get(SHARED_DATA_CONFIG['env'])
+    if not directory:
+        return None
+    return attach_dataset(directory)
+
+
+def _default_root() -> str:
+    return os.path.join(default_shared_dir(), SHARED_DATA_CONFIG['root'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish or remove a shared reference dataset")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish = subparsers.add_parser('publish', help='Parse a CSV and publish it for workers')
+    publish.add_argument('csv', help='Dataset CSV')
+    publish.add_argument('--root', help='Parent directory (default: /dev/shm/healthalign)')
+    remove = subparsers.add_parser('unpublish', help='Remove a published dataset')
+    remove.add_argument('directory', help='Directory printed by publish')
+    args = parser.parse_args(argv)
+
+    if args.command == 'unpublish':
+        unpublish_dataset(args.directory)
+        return 0
+
+    from utils.dataset_cache import content_hash, load_dataset
+
+    with open(args.csv, 'rb') as f:
+        raw = f.read()
+    directory = publish_dataset(load_dataset(raw), content_hash(raw), root=args.root)
+    print(directory)
+    print(f"export {SHARED_DATA_CONFIG['env']}={directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())